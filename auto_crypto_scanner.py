@@ -1,73 +1,61 @@
 # اسکنر خودکار ارز دیجیتال با فیلترهای بهبود یافته
-import sys
+import argparse
 import time
-import requests
 from datetime import datetime
+import config
 from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
+from scanner import circuit_breaker, http_client, market_data, metrics, telegram_dispatcher
+from scanner.market_snapshot import MarketSnapshot
+from scanner.price_feed import LiveMarketState, feed_from_url
+from scanner.rule_tables import SIGNAL_RULES
+from scanner.scheduler import Scheduler
+
+# فید قیمت لحظه‌ای (مثلا tcp://127.0.0.1:8765 برای سرور پخش محلی یا یک آدرس ws://)
+PRICE_FEED_URL = getattr(config, 'PRICE_FEED_URL', None)
+LIVE_WINDOW = 60            # پنجره تشخیص پامپ/دامپ لحظه‌ای (ثانیه)
+LIVE_THRESHOLD = 5.0        # حداقل تغییر قیمت در پنجره (درصد)
+SCAN_LIMIT = 20             # تعداد ارزهای بررسی‌شده از ابتدای لیست بازار
+SCAN_INTERVAL = 300         # 5 دقیقه
+RETRY_INTERVAL = 60
 
 class AutoCryptoScanner:
     def __init__(self):
         self.last_signals = {}  # ذخیره آخرین سیگنال‌ها برای جلوگیری از تکرار
+        self.signal_rules = SIGNAL_RULES.compile()
+        self.last_tokens = MarketSnapshot.empty()
+        self.live_state = None
+        self.feed = None
         
     def send_telegram_alert(self, message):
-        """ارسال هشدار به تلگرام"""
+        """ارسال هشدار به تلگرام (از طریق صف ارسال پس‌زمینه؛ اسکن منتظر تلگرام نمی‌ماند)"""
         if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
             print("⚠️ تنظیمات تلگرام ناقص است.")
             return False
-            
-        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-        data = {
-            "chat_id": TELEGRAM_CHAT_ID,
-            "text": message,
-            "parse_mode": "HTML"
-        }
-        
-        try:
-            response = requests.post(url, data=data, timeout=10)
-            if response.status_code == 200:
-                print("📱 پیام به تلگرام ارسال شد.")
-                return True
-            else:
-                print(f"❌ خطا در ارسال تلگرام: {response.status_code}")
-                return False
-        except Exception as e:
-            print(f"❌ خطا در ارسال تلگرام: {e}")
-            return False
+        if telegram_dispatcher.send(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, message):
+            print("📱 پیام در صف ارسال تلگرام قرار گرفت.")
+            return True
+        return False
 
     def fetch_crypto_data(self):
         """دریافت داده‌های ارز با retry logic"""
         print("📡 دریافت داده‌های جدید...")
         
-        url = "https://api.coingecko.com/api/v3/coins/markets"
-        params = {
-            'vs_currency': 'usd',
-            'order': 'market_cap_desc',
-            'per_page': 20,  # افزایش تعداد ارزها
-            'page': 1,
-            'sparkline': False,
-            'price_change_percentage': '24h'
-        }
+        url, params = market_data.markets_query()
         
         for attempt in range(3):
             try:
-                response = requests.get(url, params=params, timeout=20)
+                with metrics.timed('fetch', 'coingecko'):
+                    response = http_client.get(url, params=params)
                 if response.status_code == 200:
-                    data = response.json()
-                    tokens = []
-                    for coin in data:
-                        tokens.append({
-                            "name": coin['name'],
-                            "symbol": coin['symbol'].upper(),
-                            "price": coin['current_price'],
-                            "volume": coin['total_volume'],
-                            "change_24h": coin['price_change_percentage_24h'] or 0,
-                            "market_cap": coin['market_cap'],
-                            "rank": coin['market_cap_rank']
-                        })
+                    with metrics.timed('parse', 'coingecko'):
+                        tokens = MarketSnapshot.from_coingecko(response.json()[:SCAN_LIMIT])  # افزایش تعداد ارزها
                     print(f"✅ {len(tokens)} ارز دریافت شد.")
                     return tokens
                 else:
                     print(f"❌ خطا: کد {response.status_code}")
+            except circuit_breaker.CircuitOpenError as e:
+                print(f"🔌 {e}")
+                return None
             except Exception as e:
                 print(f"❌ تلاش {attempt + 1}: {e}")
                 if attempt < 2:
@@ -76,76 +64,56 @@ class AutoCryptoScanner:
         return None
 
     def analyze_signals(self, tokens):
-        """تحلیل پیشرفته سیگنال‌ها با فیلترهای بهبود یافته"""
+        """
+        تحلیل پیشرفته سیگنال‌ها با فیلترهای بهبود یافته
+        قوانین (فیلتر حجم/رتبه، خرید/فروش و pump/dump) در SIGNAL_RULES تعریف شده‌اند
+        """
+        tokens = MarketSnapshot.coerce(tokens)
+        if not tokens:
+            return []
+        with metrics.timed('scoring'):
+            columns = tokens.columns(SIGNAL_RULES.inputs())
+            chosen, columns = self.signal_rules.evaluate(columns)
+
         signals = []
-        
-        for token in tokens:
-            symbol = token['symbol']
-            change = token['change_24h']
-            volume = token['volume']
-            price = token['price']
-            rank = token.get('rank', 999)
-            
-            # فیلتر اولیه: فقط ارزهای معتبر
-            if not volume or volume < 100000:  # حجم کمینه
+        for i, token in enumerate(tokens):
+            if chosen[i] < 0:
                 continue
-            if rank > 100:  # فقط top 100
-                continue
-                
-            signal_type = None
-            strength = 0
-            reason = ""
-            
-            # سیگنال‌های خرید
-            if change > 5 and volume > 10000000:  # رشد قوی + حجم بالا
-                signal_type = "خرید قوی"
-                strength = 3
-                reason = f"رشد {change:.1f}% با حجم بالا"
-            elif change > 3 and volume > 5000000:
-                signal_type = "خرید متوسط"
-                strength = 2
-                reason = f"رشد {change:.1f}% با حجم خوب"
-            elif change > 1.5 and volume > 2000000 and rank <= 50:
-                signal_type = "خرید ضعیف"
-                strength = 1
-                reason = f"رشد {change:.1f}% در ارز معتبر"
-                
-            # سیگنال‌های فروش
-            elif change < -5 and volume > 5000000:
-                signal_type = "فروش قوی"
-                strength = 3
-                reason = f"سقوط {abs(change):.1f}% با حجم بالا"
-            elif change < -3 and volume > 2000000:
-                signal_type = "فروش متوسط"
-                strength = 2
-                reason = f"کاهش {abs(change):.1f}%"
-            elif change < -2 and rank <= 20:  # ارزهای top 20
-                signal_type = "هشدار نزولی"
-                strength = 1
-                reason = f"کاهش {abs(change):.1f}% در ارز برتر"
-            
-            # بررسی تغییرات شدید (pump/dump)
-            if abs(change) > 15:
-                if change > 0:
-                    signal_type = "پامپ احتمالی"
-                    strength = 3
-                    reason = f"رشد شدید {change:.1f}% - احتیاط!"
-                else:
-                    signal_type = "دامپ احتمالی"
-                    strength = 3
-                    reason = f"سقوط شدید {abs(change):.1f}% - فرار!"
-            
-            if signal_type:
-                signals.append({
-                    'token': token,
-                    'type': signal_type,
-                    'strength': strength,
-                    'reason': reason,
-                    'timestamp': datetime.now()
-                })
+            signal = {'token': token}
+            signal.update(self.signal_rules.describe(chosen[i], columns, i))
+            signal['timestamp'] = datetime.now()
+            signals.append(signal)
         
         return signals
 
+    def start_live_feed(self, url=PRICE_FEED_URL):
+        """اتصال به فید قیمت لحظه‌ای؛ پامپ/دامپ در چند ثانیه (به جای دور بعدی اسکن) گزارش می‌شود"""
+        if not url:
+            return None
+        self.live_state = LiveMarketState()
+        self.live_state.add_listener(LIVE_WINDOW, LIVE_THRESHOLD, self.on_live_move)
+        self.feed = feed_from_url(url, self.live_state).start()
+        print(f"📡 فید قیمت لحظه‌ای: {url}")
+        return self.feed
+
+    def on_live_move(self, symbol, change, state):
+        """شنونده LiveMarketState: ساخت سیگنال لحظه‌ای و ارسال فوری"""
+        index = self.last_tokens.index_of('symbol') if len(self.last_tokens) else {}
+        token = dict(self.last_tokens[index[symbol]]) if symbol in index else {'name': symbol, 'symbol': symbol}
+        token['price'] = state['price']
+        signal = {
+            'token': token,
+            'type': "پامپ لحظه‌ای" if change > 0 else "دامپ لحظه‌ای",
+            'strength': 3,
+            'reason': f"تغییر {change:+.1f}% در {LIVE_WINDOW} ثانیه",
+            'timestamp': datetime.now()
+        }
+        self.last_signals[symbol] = signal
+        print(f"⚡ {signal['type']}: {symbol} ({signal['reason']})")
+        message = self.format_signal_message([signal])
+        if message:
+            self.send_telegram_alert(message)
+
     def format_signal_message(self, signals):
         """فرمت کردن پیام سیگنال برای تلگرام"""
         if not signals:
@@ -187,17 +155,24 @@ class AutoCryptoScanner:
         
         return strong_count > 0 or medium_count >= 3
 
-    def run_scan(self):
-        """اجرای یک دور اسکن"""
+    def run_scan(self, tokens=None):
+        """
+        اجرای یک دور اسکن
+        tokens: snapshot بازار که زمان‌بند بین اسکنرها به اشتراک می‌گذارد؛ None یعنی دریافت مستقل
+        """
         print(f"\n{'='*60}")
         print(f"🚀 شروع اسکن - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"{'='*60}")
         
         # دریافت داده‌ها
-        tokens = self.fetch_crypto_data()
+        if tokens is None:
+            tokens = self.fetch_crypto_data()
+        else:
+            tokens = MarketSnapshot.coerce(tokens).head(SCAN_LIMIT)
         if not tokens:
             print("❌ نتوانستم داده‌ای دریافت کنم.")
             return
+        self.last_tokens = tokens
         
         # تحلیل سیگنال‌ها
         signals = self.analyze_signals(tokens)
@@ -228,26 +203,29 @@ class AutoCryptoScanner:
     def run_auto(self):
         """اجرای خودکار"""
         print("🔥 شروع اسکنر خودکار ارز دیجیتال")
-        print("💡 برای توقف: Ctrl+C")
+        if self.feed is None:
+            self.start_live_feed()
         
-        while True:
-            try:
-                self.run_scan()
-                time.sleep(300)  # 5 دقیقه
-            except KeyboardInterrupt:
-                print("\n⏹️ اسکنر توسط کاربر متوقف شد.")
-                break
-            except Exception as e:
-                print(f"\n❌ خطا در اسکن: {e}")
-                print("🔄 ادامه در 1 دقیقه...")
-                time.sleep(60)
+        scheduler = Scheduler(name='auto_crypto_scanner')
+        scheduler.add_job('auto_crypto_scanner', self.run_scan, SCAN_INTERVAL, retry_interval=RETRY_INTERVAL)
+        scheduler.run()
+
+def main():
+    parser = argparse.ArgumentParser(description="اسکنر خودکار ارز دیجیتال")
+    parser.add_argument('--once', action='store_true', help="فقط یک دور اسکن (بدون زمان‌بند)")
+    parser.add_argument('--feed', help="فید قیمت لحظه‌ای، مثلا tcp://127.0.0.1:8765 یا یک آدرس ws://")
+    args = parser.parse_args()
 
-if __name__ == "__main__":
     scanner = AutoCryptoScanner()
-    
-    if len(sys.argv) > 1 and sys.argv[1] == "--once":
+    if args.feed:
+        scanner.start_live_feed(args.feed)
+
+    if args.once:
         # اجرای یک‌بار
         scanner.run_scan()
     else:
         # اجرای خودکار
         scanner.run_auto()
+
+if __name__ == "__main__":
+    main()
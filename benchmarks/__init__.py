@@ -0,0 +1,7 @@
+"""
+بسته benchmarks
+بنچمارک آفلاین مسیر اسکن روی پاسخ‌های ضبط‌شده APIها (بدون شبکه)
+    python -m benchmarks.run                 اجرای همه بنچمارک‌ها برای 100، 1000 و 10000 ارز
+    python -m benchmarks.record              به‌روزرسانی fixtureها از APIهای واقعی
+    python -m benchmarks.mock_server         سرور محلی ساختگی APIها با تزریق تأخیر و خطا (تست بار اسکنرها)
+"""
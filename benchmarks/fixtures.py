@@ -0,0 +1,157 @@
+"""
+ماژول fixtures.py
+بارگذاری پاسخ‌های ضبط‌شده APIها از benchmarks/fixtures و بزرگ‌نمایی ساختگی آن‌ها به n ارز
+ارزهای اضافه کپی ارزهای ضبط‌شده با شناسه/نماد یکتا و قیمت، حجم و تغییرات جابه‌جاشده (قطعی با seed) هستند
+"""
+import copy
+import json
+import os
+import zlib
+from functools import lru_cache
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+FIXTURES = {
+    'coingecko_markets': 'coingecko_markets.json',            # coins/markets (صفحه اول)
+    'coingecko_market_chart': 'coingecko_market_chart.json',  # coins/bitcoin/market_chart?days=90
+    'coingecko_coin': 'coingecko_coin.json',                  # coins/chainlink
+    'cmc_listings': 'cmc_listings.json',                      # v1/cryptocurrency/listings/latest
+    'cmc_quotes': 'cmc_quotes.json',                          # v1/cryptocurrency/quotes/latest
+    'etherscan_tokentx': 'etherscan_tokentx.json',            # module=account&action=tokentx
+    'etherscan_tokeninfo': 'etherscan_tokeninfo.json',        # module=token&action=tokeninfo
+    'telegram_sendmessage': 'telegram_sendmessage.json',      # bot<token>/sendMessage
+}
+
+# فیلدهای قیمتی/حجمی که با ضریب ارز ساختگی مقیاس می‌شوند
+_CG_SCALED = ('current_price', 'high_24h', 'low_24h', 'price_change_24h', 'ath', 'atl')
+_CG_CHANGES = ('price_change_percentage_24h', 'market_cap_change_percentage_24h',
+               'price_change_percentage_1h_in_currency', 'price_change_percentage_24h_in_currency',
+               'price_change_percentage_7d_in_currency', 'price_change_percentage_14d_in_currency',
+               'price_change_percentage_30d_in_currency')
+_CMC_CHANGES = ('percent_change_1h', 'percent_change_24h', 'percent_change_7d', 'percent_change_30d')
+
+
+@lru_cache(maxsize=None)
+def _load(name: str) -> str:
+    with open(os.path.join(FIXTURE_DIR, FIXTURES[name]), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def load(name: str):
+    """پاسخ ضبط‌شده name (هر بار یک کپی مستقل)"""
+    return json.loads(_load(name))
+
+
+def _factors(n: int, seed: int):
+    rng = np.random.default_rng(seed)
+    return rng.lognormal(0.0, 1.0, n), rng.lognormal(0.0, 0.7, n), rng.normal(0.0, 1.0, (n, 8))
+
+
+def _suffix(k: int, size: int) -> str:
+    return '' if k < size else f'-{k // size}'
+
+
+def coingecko_markets(n: int, seed: int = 0) -> List[Dict]:
+    """n ارز در قالب coins/markets (ارزهای ضبط‌شده + کپی‌های جابه‌جاشده؛ رتبه بر اساس ارزش بازار)"""
+    recorded = load('coingecko_markets')
+    size = len(recorded)
+    price_factor, volume_factor, noise = _factors(n, seed)
+    markets = []
+    for k in range(n):
+        coin = copy.deepcopy(recorded[k % size])
+        if k >= size:
+            suffix = _suffix(k, size)
+            coin['id'] += suffix
+            coin['symbol'] += suffix.replace('-', '')
+            coin['name'] += suffix.replace('-', ' ')
+            for name in _CG_SCALED:
+                if coin.get(name) is not None:
+                    coin[name] *= price_factor[k]
+            for name in ('market_cap', 'fully_diluted_valuation'):
+                if coin.get(name) is not None:
+                    coin[name] *= price_factor[k]
+            coin['total_volume'] *= price_factor[k] * volume_factor[k]
+            for j, name in enumerate(_CG_CHANGES):
+                if coin.get(name) is not None:
+                    coin[name] += noise[k, j % noise.shape[1]] * 3
+        markets.append(coin)
+    order = sorted(range(n), key=lambda i: -(markets[i]['market_cap'] or 0))
+    for rank, i in enumerate(order, 1):
+        markets[i]['market_cap_rank'] = rank
+    return [markets[i] for i in order]
+
+
+def cmc_listings(n: int, seed: int = 0) -> Dict:
+    """پاسخ listings/latest با n ارز"""
+    payload = load('cmc_listings')
+    recorded = payload['data']
+    size = len(recorded)
+    price_factor, volume_factor, noise = _factors(n, seed + 1)
+    listings = []
+    for k in range(n):
+        coin = copy.deepcopy(recorded[k % size])
+        if k >= size:
+            suffix = _suffix(k, size)
+            coin['id'] += k * 100
+            coin['slug'] += suffix
+            coin['symbol'] += suffix.replace('-', '')
+            coin['name'] += suffix.replace('-', ' ')
+            quote = coin['quote']['USD']
+            quote['price'] *= price_factor[k]
+            quote['market_cap'] *= price_factor[k]
+            quote['volume_24h'] *= price_factor[k] * volume_factor[k]
+            for j, name in enumerate(_CMC_CHANGES):
+                quote[name] += noise[k, j] * 3
+        coin['cmc_rank'] = k + 1
+        listings.append(coin)
+    payload['data'] = listings
+    return payload
+
+
+def tokentx(n: int, seed: int = 0) -> Dict:
+    """پاسخ tokentx با n انتقال (بلوک‌ها صعودی)"""
+    payload = load('etherscan_tokentx')
+    recorded = payload['result']
+    size = len(recorded)
+    first_block = int(recorded[0]['blockNumber'])
+    span = int(recorded[-1]['blockNumber']) - first_block + 1
+    rng = np.random.default_rng(seed)
+    result = []
+    for k in range(n):
+        tx = dict(recorded[k % size])
+        if k >= size:
+            tx['blockNumber'] = str(int(tx['blockNumber']) + span * (k // size))
+            tx['hash'] = '0x%064x' % int(rng.integers(0, 2 ** 62))
+            tx['value'] = str(int(int(tx['value']) * rng.lognormal(0, 1)))
+        result.append(tx)
+    payload['result'] = result
+    return payload
+
+
+@lru_cache(maxsize=1)
+def _chart_returns():
+    chart = load('coingecko_market_chart')
+    prices = np.array(chart['prices'], dtype=float)
+    return prices[:, 0], np.diff(np.log(prices[:, 1]))
+
+
+def market_chart(coin_id: str, price: float, seed: int = 0) -> Dict:
+    """پاسخ market_chart برای coin_id: بازده‌های ضبط‌شده با جابه‌جایی قطعی (بر اساس coin_id) تا قیمت price"""
+    timestamps, returns = _chart_returns()
+    rng = np.random.default_rng([seed, zlib.crc32(coin_id.encode('utf-8'))])
+    shift = rng.integers(0, len(returns))
+    path = np.concatenate([[0.0], np.cumsum(np.roll(returns, shift) * rng.uniform(0.5, 2.0))])
+    prices = float(price or 1.0) * np.exp(path - path[-1])
+    return {'prices': np.column_stack([timestamps, prices]).tolist()}
+
+
+def price_history(coin_id: str, price: float, seed: int = 0) -> pd.Series:
+    """همان تبدیلی که AdvancedCryptoScanner._load_price_history روی پاسخ market_chart انجام می‌دهد"""
+    data = market_chart(coin_id, price, seed)
+    prices = pd.DataFrame(data['prices'], columns=['timestamp', 'price'], dtype=float)
+    index = pd.to_datetime(prices['timestamp'], unit='ms')
+    return pd.Series(prices['price'].values, index=index, name='price')
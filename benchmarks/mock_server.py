@@ -0,0 +1,435 @@
+"""
+ماژول mock_server.py
+سرور HTTP محلی به جای CoinGecko، CoinMarketCap، Etherscan/BscScan و تلگرام برای تست بار بدون مصرف سهمیه API
+پاسخ‌ها از fixtureهای ضبط‌شده (بزرگ‌نمایی‌شده به تعداد دلخواه ارز/انتقال) ساخته می‌شوند و برای هر سرویس
+تأخیر با توزیع دلخواه و خطای 429 (با Retry-After) و 5xx با احتمال دلخواه تزریق می‌شود
+
+هر سرویس زیر /<نام سرویس> سرو می‌شود؛ اسکنرها با متغیر محیطی PUMP_API_BASE_URL به آن هدایت می‌شوند:
+    python -m benchmarks.mock_server --port 8900 --latency lognormal:80:0.5 --rate-429 0.02 --rate-5xx 0.01
+    PUMP_API_BASE_URL=http://127.0.0.1:8900 python run_all.py
+
+تنظیمات هر سرویس جداگانه با --config (فایل JSON):
+    {"coingecko": {"latency": "uniform:100:400", "rate_429": 0.1}, "telegram": {"latency": "fixed:30"}}
+آمار درخواست‌ها (به تفکیک سرویس/endpoint/وضعیت) از /_stats خوانده می‌شود
+"""
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+from benchmarks import fixtures
+
+MOCK_PORT = 8900
+DEFAULT_COINS = 1000
+DEFAULT_TRANSFERS = 2000
+ERROR_STATUSES = (500, 502, 503, 504)
+PROVIDERS = ('coingecko', 'coinmarketcap', 'etherscan', 'bscscan', 'telegram')
+ETHERSCAN_MAX_RESULTS = 10000       # سقف page × offset در Etherscan/BscScan
+
+LATENCY_KINDS = {
+    'fixed': 1,          # fixed:MS
+    'uniform': 2,        # uniform:MIN_MS:MAX_MS
+    'lognormal': 2,      # lognormal:MEDIAN_MS:SIGMA
+    'exponential': 1,    # exponential:MEAN_MS
+}
+
+
+def parse_latency(spec: str) -> Tuple[str, Tuple[float, ...]]:
+    """تبدیل 'lognormal:80:0.5' به ('lognormal', (80.0, 0.5))"""
+    kind, *args = spec.split(':')
+    if kind not in LATENCY_KINDS or len(args) != LATENCY_KINDS[kind]:
+        raise ValueError(f"توزیع تأخیر نامعتبر: {spec} (مثال: fixed:50، uniform:20:200، lognormal:80:0.5، exponential:100)")
+    return kind, tuple(float(a) for a in args)
+
+
+@dataclass
+class FaultProfile:
+    """رفتار یک سرویس: توزیع تأخیر (میلی‌ثانیه) و احتمال پاسخ 429/5xx"""
+    latency: str = 'fixed:0'
+    rate_429: float = 0.0
+    rate_5xx: float = 0.0
+    retry_after: int = 1           # ثانیه (هدر Retry-After و parameters.retry_after تلگرام؛ مثل APIهای واقعی عدد صحیح)
+
+    def __post_init__(self):
+        self._latency = parse_latency(self.latency)
+        if not 0 <= self.rate_429 + self.rate_5xx <= 1:
+            raise ValueError("مجموع rate_429 و rate_5xx باید بین 0 و 1 باشد")
+
+    def delay(self, rng: random.Random) -> float:
+        """یک نمونه تأخیر بر حسب ثانیه"""
+        kind, args = self._latency
+        if kind == 'fixed':
+            ms = args[0]
+        elif kind == 'uniform':
+            ms = rng.uniform(*args)
+        elif kind == 'lognormal':
+            ms = args[0] * rng.lognormvariate(0.0, args[1])
+        else:
+            ms = rng.expovariate(1.0 / args[0]) if args[0] > 0 else 0.0
+        return max(ms, 0.0) / 1000.0
+
+    def fault(self, rng: random.Random) -> Optional[int]:
+        """کد وضعیت خطای تزریقی یا None برای پاسخ عادی"""
+        draw = rng.random()
+        if draw < self.rate_429:
+            return 429
+        if draw < self.rate_429 + self.rate_5xx:
+            return rng.choice(ERROR_STATUSES)
+        return None
+
+
+class MockResponse(Exception):
+    """پاسخ غیرعادی (404، 400 و ...) که مسیریاب با آن از پردازش خارج می‌شود"""
+
+    def __init__(self, status: int, payload):
+        super().__init__(status)
+        self.status = status
+        self.payload = payload
+
+
+@dataclass
+class MockData:
+    """داده‌های پاسخ‌ها که یک‌بار هنگام شروع سرور ساخته می‌شوند"""
+    coins: int = DEFAULT_COINS
+    transfers: int = DEFAULT_TRANSFERS
+    seed: int = 0
+    markets: List[Dict] = field(init=False)
+    by_id: Dict[str, Dict] = field(init=False)
+    listings: Dict = field(init=False)
+    cmc_by_id: Dict[str, Dict] = field(init=False)
+    cmc_by_symbol: Dict[str, List[Dict]] = field(init=False)
+    tokentx: Dict = field(init=False)
+
+    def __post_init__(self):
+        self.markets = fixtures.coingecko_markets(self.coins, self.seed)
+        self.by_id = {coin['id']: coin for coin in self.markets}
+        self.listings = fixtures.cmc_listings(self.coins, self.seed)
+        self.cmc_by_id = {str(coin['id']): coin for coin in self.listings['data']}
+        self.cmc_by_symbol = {}
+        for coin in self.listings['data']:
+            self.cmc_by_symbol.setdefault(coin['symbol'].upper(), []).append(coin)
+        self.tokentx = fixtures.tokentx(self.transfers, self.seed)
+
+
+def _int(params: Dict, name: str, default: int) -> int:
+    try:
+        return int(params.get(name, default))
+    except (TypeError, ValueError):
+        raise MockResponse(400, {'error': f'invalid {name}'})
+
+
+def _cmc_status(error_code: int = 0, error_message: Optional[str] = None) -> Dict:
+    return {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime()), 'error_code': error_code,
+            'error_message': error_message, 'elapsed': 1, 'credit_count': 1, 'notice': None}
+
+
+class Routes:
+    """ساخت پاسخ هر endpoint در قالب همان API واقعی"""
+
+    def __init__(self, data: MockData):
+        self.data = data
+        self._message_ids = itertools.count(1)
+
+    def dispatch(self, provider: str, method: str, path: str, params: Dict):
+        handler = getattr(self, provider)
+        return handler(method, path.rstrip('/'), params)
+
+    # --- CoinGecko ---
+    def coingecko(self, method: str, path: str, params: Dict):
+        if path == '/coins/markets':
+            per_page = min(_int(params, 'per_page', 100), 250)
+            page = max(_int(params, 'page', 1), 1)
+            return self.data.markets[(page - 1) * per_page:page * per_page]
+        match = re.fullmatch(r'/coins/([^/]+)/market_chart', path)
+        if match:
+            coin = self._coin(match.group(1))
+            chart = fixtures.market_chart(coin['id'], coin['current_price'], self.data.seed)
+            days = params.get('days', '90')
+            if days != 'max':
+                try:
+                    chart['prices'] = chart['prices'][-max(int(float(days) * 24), 1):]
+                except ValueError:
+                    raise MockResponse(400, {'error': 'invalid days'})
+            return chart
+        match = re.fullmatch(r'/coins/([^/]+)', path)
+        if match:
+            return self._coin_detail(self._coin(match.group(1)))
+        raise MockResponse(404, {'error': 'Not Found'})
+
+    def _coin(self, coin_id: str) -> Dict:
+        coin = self.data.by_id.get(coin_id)
+        if coin is None:
+            raise MockResponse(404, {'error': 'coin not found'})
+        return coin
+
+    def _coin_detail(self, coin: Dict) -> Dict:
+        detail = fixtures.load('coingecko_coin')
+        detail.update(id=coin['id'], symbol=coin['symbol'], name=coin['name'], web_slug=coin['id'],
+                      market_cap_rank=coin['market_cap_rank'])
+        market_data = detail.get('market_data') or {}
+        for name in ('current_price', 'market_cap', 'total_volume'):
+            if isinstance(market_data.get(name), dict):
+                market_data[name]['usd'] = coin.get(name)
+        for name in ('price_change_percentage_24h', 'market_cap_change_percentage_24h'):
+            if name in market_data:
+                market_data[name] = coin.get(name)
+        return detail
+
+    # --- CoinMarketCap ---
+    def coinmarketcap(self, method: str, path: str, params: Dict):
+        if path == '/v1/cryptocurrency/listings/latest':
+            start = max(_int(params, 'start', 1), 1)
+            limit = min(_int(params, 'limit', 100), 5000)
+            return {'status': _cmc_status(), 'data': self.data.listings['data'][start - 1:start - 1 + limit]}
+        if path == '/v1/cryptocurrency/quotes/latest':
+            if params.get('id'):
+                found = {i: self.data.cmc_by_id[i] for i in params['id'].split(',') if i in self.data.cmc_by_id}
+            elif params.get('symbol'):
+                found = {s: self.data.cmc_by_symbol[s][0] for s in params['symbol'].upper().split(',')
+                         if s in self.data.cmc_by_symbol}
+            else:
+                raise MockResponse(400, {'status': _cmc_status(400, '"id" or "symbol" is required')})
+            return {'status': _cmc_status(), 'data': found}
+        if path == '/v1/cryptocurrency/map':
+            symbols = set(params.get('symbol', '').upper().split(',')) - {''}
+            coins = [c for s in symbols for c in self.data.cmc_by_symbol.get(s, [])] if symbols \
+                else self.data.listings['data']
+            return {'status': _cmc_status(), 'data': [
+                {'id': c['id'], 'rank': c['cmc_rank'], 'name': c['name'], 'symbol': c['symbol'],
+                 'slug': c['slug'], 'is_active': 1, 'platform': c.get('platform')} for c in coins]}
+        raise MockResponse(404, {'status': _cmc_status(404, 'Not Found')})
+
+    # --- Etherscan / BscScan ---
+    def etherscan(self, method: str, path: str, params: Dict):
+        if path != '/api':
+            raise MockResponse(404, {'status': '0', 'message': 'NOTOK', 'result': 'Not Found'})
+        action = (params.get('module'), params.get('action'))
+        if action == ('token', 'tokeninfo'):
+            return fixtures.load('etherscan_tokeninfo')
+        if action == ('account', 'tokentx'):
+            return self._tokentx(params)
+        return {'status': '0', 'message': 'NOTOK', 'result': 'Error! Missing Or invalid Module name'}
+
+    bscscan = etherscan
+
+    def _tokentx(self, params: Dict) -> Dict:
+        page = max(_int(params, 'page', 1), 1)
+        offset = _int(params, 'offset', 0) or ETHERSCAN_MAX_RESULTS
+        if page * offset > ETHERSCAN_MAX_RESULTS:
+            return {'status': '0', 'message': 'NOTOK',
+                    'result': 'Result window is too large, PageNo x Offset size must be less than or equal to 10000'}
+        start_block = _int(params, 'startblock', 0)
+        end_block = _int(params, 'endblock', 10 ** 10)
+        result = [tx for tx in self.data.tokentx['result'] if start_block <= int(tx['blockNumber']) <= end_block]
+        if params.get('sort') == 'desc':
+            result = result[::-1]
+        result = result[(page - 1) * offset:page * offset]
+        if not result:
+            return {'status': '0', 'message': 'No transactions found', 'result': []}
+        return {'status': '1', 'message': 'OK', 'result': result}
+
+    # --- Telegram ---
+    def telegram(self, method: str, path: str, params: Dict):
+        if not re.fullmatch(r'/bot[^/]+/sendMessage', path):
+            raise MockResponse(404, {'ok': False, 'error_code': 404, 'description': 'Not Found'})
+        if not params.get('chat_id') or not params.get('text'):
+            raise MockResponse(400, {'ok': False, 'error_code': 400, 'description': 'Bad Request: message text is empty'})
+        payload = fixtures.load('telegram_sendmessage')
+        payload['result'].update(message_id=next(self._message_ids), date=int(time.time()), text=params['text'])
+        return payload
+
+
+def _endpoint(provider: str, path: str, params: Dict) -> str:
+    """نام endpoint برای آمار (شناسه ارز و توکن ربات حذف می‌شوند)"""
+    if provider == 'telegram':
+        path = re.sub(r'^/bot[^/]+', '/bot…', path)
+    elif provider == 'coingecko' and path.rstrip('/') != '/coins/markets':
+        path = re.sub(r'^/coins/[^/]+', '/coins/…', path)
+    elif provider in ('etherscan', 'bscscan'):
+        path = f"{path}?action={params.get('action')}"
+    return f"{provider} {path}"
+
+
+class MockServer:
+    """
+    سرور HTTP چندنخی که هر سرویس را زیر /<نام سرویس> سرو می‌کند
+    profiles: تنظیمات هر سرویس (سرویس‌های بدون تنظیم از default استفاده می‌کنند)
+    """
+
+    def __init__(self, data: MockData, default: Optional[FaultProfile] = None,
+                 profiles: Optional[Dict[str, FaultProfile]] = None,
+                 host: str = '127.0.0.1', port: int = MOCK_PORT, seed: int = 0):
+        self.routes = Routes(data)
+        self.default = default or FaultProfile()
+        self.profiles = profiles or {}
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._stats_lock = threading.Lock()
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'     # keep-alive مثل APIهای واقعی
+
+            def do_GET(self):
+                mock._handle(self, {})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length).decode('utf-8') if length else ''
+                if 'json' in (self.headers.get('Content-Type') or ''):
+                    form = json.loads(body or '{}')
+                else:
+                    form = dict(parse_qsl(body))
+                mock._handle(self, {k: str(v) for k, v in form.items()})
+
+            def log_message(self, format, *args):
+                pass
+
+        ThreadingHTTPServer.allow_reuse_address = True
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    @property
+    def url(self) -> str:
+        host, port = self.address
+        return f"http://{host}:{port}"
+
+    def profile(self, provider: str) -> FaultProfile:
+        return self.profiles.get(provider, self.default)
+
+    def _handle(self, request: BaseHTTPRequestHandler, form: Dict):
+        parsed = urlparse(request.path)
+        if parsed.path == '/_stats':
+            return self._send(request, 200, self.stats())
+        provider, _, path = parsed.path.lstrip('/').partition('/')
+        if provider not in PROVIDERS:
+            return self._send(request, 404, {'error': f'unknown provider {provider}'})
+        profile = self.profile(provider)
+        with self._rng_lock:
+            delay, fault = profile.delay(self._rng), profile.fault(self._rng)
+        if delay:
+            time.sleep(delay)
+        path = '/' + path
+        params = dict(parse_qsl(parsed.query))
+        params.update(form)
+        endpoint = _endpoint(provider, path, params)
+        if fault == 429:
+            self._count(endpoint, 429)
+            payload = {'ok': False, 'error_code': 429, 'description': 'Too Many Requests',
+                       'parameters': {'retry_after': profile.retry_after}} if provider == 'telegram' \
+                else {'status': {'error_code': 429, 'error_message': 'You have exceeded the rate limit'}}
+            return self._send(request, 429, payload, {'Retry-After': str(profile.retry_after)})
+        if fault is not None:
+            self._count(endpoint, fault)
+            return self._send(request, fault, {'error': 'injected server error'})
+        try:
+            status, payload = 200, self.routes.dispatch(provider, request.command, path, params)
+        except MockResponse as e:
+            status, payload = e.status, e.payload
+        self._count(endpoint, status)
+        self._send(request, status, payload)
+
+    @staticmethod
+    def _send(request: BaseHTTPRequestHandler, status: int, payload, headers: Optional[Dict] = None):
+        body = json.dumps(payload).encode('utf-8')
+        try:
+            request.send_response(status)
+            request.send_header('Content-Type', 'application/json; charset=utf-8')
+            request.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                request.send_header(name, value)
+            request.end_headers()
+            request.wfile.write(body)
+        except OSError:
+            pass    # کلاینت قبل از پایان پاسخ اتصال را بسته (مثلاً timeout)
+
+    def _count(self, endpoint: str, status: int):
+        with self._stats_lock:
+            counters = self._stats.setdefault(endpoint, {})
+            counters[str(status)] = counters.get(str(status), 0) + 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """تعداد پاسخ‌ها به تفکیک endpoint و کد وضعیت"""
+        with self._stats_lock:
+            return {endpoint: dict(counters) for endpoint, counters in sorted(self._stats.items())}
+
+    def start(self) -> 'MockServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='mock-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def load_profiles(path: str, default: FaultProfile) -> Dict[str, FaultProfile]:
+    """تنظیمات هر سرویس از فایل JSON؛ کلیدهای ذکرنشده از default گرفته می‌شوند"""
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    unknown = set(config) - set(PROVIDERS)
+    if unknown:
+        raise ValueError(f"سرویس ناشناخته در {path}: {', '.join(sorted(unknown))}")
+    return {provider: replace(default, **settings) for provider, settings in config.items()}
+
+
+def print_stats(stats: Dict[str, Dict[str, int]]):
+    for endpoint, counters in stats.items():
+        total = sum(counters.values())
+        detail = '، '.join(f"{status}: {count}" for status, count in sorted(counters.items()))
+        print(f"  {endpoint:45s} {total:7d} درخواست ({detail})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="سرور محلی ساختگی APIها با تزریق تأخیر و خطا")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=MOCK_PORT)
+    parser.add_argument('--coins', type=int, default=DEFAULT_COINS, help='تعداد ارزهای coins/markets و listings')
+    parser.add_argument('--transfers', type=int, default=DEFAULT_TRANSFERS, help='تعداد انتقال‌های tokentx')
+    parser.add_argument('--latency', default='fixed:0',
+                        help='توزیع تأخیر (میلی‌ثانیه): fixed:MS، uniform:MIN:MAX، lognormal:MEDIAN:SIGMA، exponential:MEAN')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='احتمال پاسخ 429')
+    parser.add_argument('--rate-5xx', type=float, default=0.0, help='احتمال پاسخ 500/502/503/504')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After پاسخ‌های 429 (ثانیه)')
+    parser.add_argument('--config', help='فایل JSON تنظیمات جداگانه هر سرویس')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        default = FaultProfile(args.latency, args.rate_429, args.rate_5xx, args.retry_after)
+        profiles = load_profiles(args.config, default) if args.config else {}
+    except (OSError, ValueError, TypeError) as e:
+        parser.error(str(e))
+    print(f"🧪 ساخت داده‌ها: {args.coins} ارز، {args.transfers} انتقال...")
+    data = MockData(args.coins, args.transfers, args.seed)
+    server = MockServer(data, default, profiles, args.host, args.port, args.seed)
+    print(f"📡 سرور ساختگی روی {server.url}")
+    for provider in PROVIDERS:
+        p = server.profile(provider)
+        print(f"  {provider:14s} تأخیر {p.latency}، 429: {p.rate_429:.1%}، 5xx: {p.rate_5xx:.1%}")
+    print(f"▶️ اجرای اسکنرها: PUMP_API_BASE_URL={server.url} python run_all.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️ سرور متوقف شد.")
+        print_stats(server.stats())
+
+
+if __name__ == '__main__':
+    main()
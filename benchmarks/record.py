@@ -0,0 +1,115 @@
+"""
+ماژول record.py
+به‌روزرسانی پاسخ‌های ضبط‌شده benchmarks/fixtures از APIهای واقعی
+سرویس‌هایی که کلیدشان در config تنظیم نشده رد می‌شوند؛ sendMessage تلگرام ضبط نمی‌شود (پیام واقعی می‌فرستد)
+"""
+import argparse
+import json
+import os
+from typing import Dict, Optional
+
+from scanner import http_client, market_data
+from benchmarks.fixtures import FIXTURE_DIR, FIXTURES
+
+RECORD_COINS = 50                 # تعداد ارزهای ضبط‌شده از coins/markets و listings/latest
+RECORD_QUOTES = 10                # تعداد ارزهای quotes/latest
+RECORD_TRANSFERS = 200            # تعداد انتقال‌های tokentx
+CHART_COIN = 'bitcoin'
+CHART_DAYS = 90                   # 90 روز → داده ساعتی
+COIN_ID = 'chainlink'
+TOKEN_CONTRACT = '0x514910771af9ca656af840dff83e8264ecf986ca'   # LINK روی اتریوم
+
+COIN_PARAMS = {
+    'localization': 'false',
+    'tickers': 'false',
+    'community_data': 'false',
+    'developer_data': 'false',
+}
+
+
+def _config_value(name: str) -> Optional[str]:
+    try:
+        import config
+    except ImportError:
+        return None
+    return getattr(config, name, None) or None
+
+
+def _fetch(url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None):
+    response = http_client.get(url, params=params, headers=headers, use_cache=False)
+    response.raise_for_status()
+    return response.json()
+
+
+def _write(name: str, payload) -> None:
+    path = os.path.join(FIXTURE_DIR, FIXTURES[name])
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+    print(f"💾 {FIXTURES[name]} ذخیره شد")
+
+
+def record_coingecko() -> None:
+    key = _config_value('COINGECKO_API_KEY')
+    headers = {'x-cg-pro-api-key': key} if key else {}
+    url, params = market_data.markets_query()
+    _write('coingecko_markets', _fetch(url, params, headers)[:RECORD_COINS])
+    url = http_client.api_url('coingecko', f'/coins/{CHART_COIN}/market_chart')
+    _write('coingecko_market_chart', _fetch(url, {'vs_currency': 'usd', 'days': CHART_DAYS}, headers))
+    url = http_client.api_url('coingecko', f'/coins/{COIN_ID}')
+    _write('coingecko_coin', _fetch(url, COIN_PARAMS, headers))
+
+
+def record_coinmarketcap() -> None:
+    key = _config_value('COINMARKETCAP_API_KEY')
+    if not key:
+        print("⚪ کلید کوین‌مارکت‌کپ تنظیم نشده؛ رد شد")
+        return
+    headers = {'X-CMC_PRO_API_KEY': key, 'Accept': 'application/json'}
+    url, params = market_data.cmc_listings_query(1, RECORD_COINS)
+    listings = _fetch(url, params, headers)
+    _write('cmc_listings', listings)
+    ids = ','.join(str(coin['id']) for coin in listings['data'][:RECORD_QUOTES])
+    url = http_client.api_url('coinmarketcap', '/v1/cryptocurrency/quotes/latest')
+    _write('cmc_quotes', _fetch(url, {'id': ids, 'convert': 'USD'}, headers))
+
+
+def record_etherscan() -> None:
+    key = _config_value('ETHERSCAN_API_KEY')
+    if not key:
+        print("⚪ کلید اترسکن تنظیم نشده؛ رد شد")
+        return
+    url = http_client.api_url('etherscan', '/api')
+    transfers = {
+        'module': 'account', 'action': 'tokentx', 'contractaddress': TOKEN_CONTRACT,
+        'page': 1, 'offset': RECORD_TRANSFERS, 'sort': 'asc', 'apikey': key,
+    }
+    _write('etherscan_tokentx', _fetch(url, transfers))
+    info = {'module': 'token', 'action': 'tokeninfo', 'contractaddress': TOKEN_CONTRACT, 'apikey': key}
+    _write('etherscan_tokeninfo', _fetch(url, info))
+
+
+RECORDERS = {
+    'coingecko': record_coingecko,
+    'coinmarketcap': record_coinmarketcap,
+    'etherscan': record_etherscan,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='به‌روزرسانی fixtureهای بنچمارک از APIهای واقعی')
+    parser.add_argument('--provider', action='append', choices=sorted(RECORDERS),
+                        help='فقط این سرویس (قابل تکرار؛ پیش‌فرض همه)')
+    args = parser.parse_args()
+
+    for provider in args.provider or list(RECORDERS):
+        print(f"📡 ضبط پاسخ‌های {provider}...")
+        try:
+            RECORDERS[provider]()
+        except Exception as e:
+            print(f"❌ خطا در ضبط {provider}: {e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,411 @@
+"""
+ماژول run.py
+اجرای بنچمارک‌های آفلاین مسیر اسکن روی fixtureهای ضبط‌شده (بزرگ‌نمایی‌شده به 100، 1000 و 10000 ارز)
+- هر بنچمارک REPEAT بار اجرا می‌شود؛ توابع سریع در هر اجرا چند بار تکرار می‌شوند تا حداقل MIN_BATCH ثانیه طول بکشند
+- نتایج (min/median/mean و زمان هر آیتم) به یک فایل JSON نوشته می‌شود و با --compare با اجرای قبلی مقایسه می‌شود
+- اسکنرها در یک پوشه موقت ساخته می‌شوند (alerts.db و signals_log.csv مخزن دست نمی‌خورند)
+  و دریافت تاریخچه قیمت به جای شبکه از fixture خوانده می‌شود
+
+اجرا:
+    python -m benchmarks.run
+    python -m benchmarks.run --sizes 100,1000 --filter advanced --output before.json
+    python -m benchmarks.run --compare before.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import fixtures
+
+SIZES = (100, 1000, 10000)
+REPEAT = 5
+MIN_BATCH = 0.05                 # حداقل زمان هر اجرا (ثانیه) برای توابع سریع
+ANALYZE_MAX_SIZE = 1000          # analyze_token برای هر ارز کندل و اندیکاتور می‌سازد (~10ms)؛ اندازه‌های بزرگ‌تر رد می‌شوند
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+REGRESSION_RATIO = 1.10          # در مقایسه، کندتر از این نسبت «کندتر» علامت می‌خورد
+
+# نام -> (سازنده، سنگین)؛ سازنده با (context, size) تابع زمان‌گیری (و در صورت نیاز تابع reset) را برمی‌گرداند
+# بنچمارک‌های سنگین (تحلیل کندل‌ها برای هر ارز) فقط تا ANALYZE_MAX_SIZE ارز اجرا می‌شوند
+BENCHMARKS: Dict[str, Tuple[Callable, bool]] = {}
+
+
+def benchmark(name: str, heavy: bool = False):
+    def register(factory):
+        BENCHMARKS[name] = (factory, heavy)
+        return factory
+    return register
+
+
+class Context:
+    """داده‌ها و اسکنرهای مشترک بنچمارک‌های یک اندازه"""
+
+    def __init__(self, size: int, seed: int = 0):
+        self.size = size
+        self.seed = seed
+        self._cache = {}
+
+    def get(self, key: str, build: Callable):
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+    # --- داده ---
+
+    def markets(self) -> List[Dict]:
+        return self.get('markets', lambda: fixtures.coingecko_markets(self.size, self.seed))
+
+    def cmc_listings(self) -> Dict:
+        return self.get('cmc_listings', lambda: fixtures.cmc_listings(self.size, self.seed))
+
+    def snapshot(self):
+        from scanner.market_snapshot import MarketSnapshot
+        return self.get('snapshot', lambda: MarketSnapshot.from_coingecko(self.markets()))
+
+    def records(self) -> List[Dict]:
+        return self.get('records', lambda: self.snapshot().to_records())
+
+    def histories(self) -> Dict[str, pd.Series]:
+        return self.get('histories', lambda: {
+            c['id']: fixtures.price_history(c['id'], c['current_price'], self.seed) for c in self.markets()})
+
+    def transfer_index(self):
+        """(ایندکس، قرارداد، زمان آخرین انتقال) با size انتقال tokentx ثبت‌شده در پوشه موقت بنچمارک"""
+        def build():
+            from scanner.transfer_index import TransferIndex
+            transfers = fixtures.tokentx(self.size, self.seed)['result']
+            contract = transfers[0]['contractAddress']
+            now = max(int(tx['timeStamp']) for tx in transfers)
+            index = TransferIndex(f'bench_transfers_{self.size}.db')
+            index.ingest('ethereum', contract, transfers, since=0, now=now)
+            return index, contract, now
+        return self.get('transfer_index', build)
+
+    # --- اسکنرها ---
+
+    def advanced(self):
+        def build():
+            import crypto_scanner
+            scanner = crypto_scanner.AdvancedCryptoScanner()
+            histories = self.histories()
+            # به جای درخواست market_chart، سری ساخته‌شده از fixture برگردانده می‌شود
+            scanner._load_price_history = lambda coin_id, days: histories.get(coin_id)
+            return scanner
+        return self.get('advanced', build)
+
+    def growth(self):
+        def build():
+            import growth_scanner
+            return growth_scanner.GrowthPotentialScanner()
+        return self.get('growth', build)
+
+    def auto(self):
+        def build():
+            import auto_crypto_scanner
+            return auto_crypto_scanner.AutoCryptoScanner()
+        return self.get('auto', build)
+
+
+def _reset_advanced(scanner):
+    """حالت دور اول اسکن: بدون اندیکاتور ثبت‌شده و بدون نتیجه تحلیل قبلی"""
+    from scanner.indicators import IndicatorEngine
+    scanner.indicator_engine = IndicatorEngine()
+    scanner.last_analysis.clear()
+
+
+# --- بنچمارک‌ها ---
+
+@benchmark('parse.coingecko_markets')
+def _parse_coingecko(ctx: Context, size: int):
+    from scanner.market_snapshot import MarketSnapshot
+    markets = ctx.markets()
+    return lambda: MarketSnapshot.from_coingecko(markets)
+
+
+@benchmark('parse.cmc_listings')
+def _parse_cmc(ctx: Context, size: int):
+    from scanner.market_snapshot import MarketSnapshot
+    data = ctx.cmc_listings()['data']
+    return lambda: MarketSnapshot.from_coinmarketcap(data)
+
+
+@benchmark('parse.market_chart', heavy=True)
+def _parse_market_chart(ctx: Context, size: int):
+    markets = ctx.markets()
+    payloads = [fixtures.market_chart(c['id'], c['current_price'], ctx.seed) for c in markets[:size]]
+
+    def parse():
+        # همان تبدیل _load_price_history روی پاسخ JSON
+        for data in payloads:
+            prices = pd.DataFrame(data['prices'], columns=['timestamp', 'price'], dtype=float)
+            pd.Series(prices['price'].values, index=pd.to_datetime(prices['timestamp'], unit='ms'), name='price')
+    return parse
+
+
+@benchmark('crypto.calculate_coin_score')
+def _calculate_coin_score(ctx: Context, size: int):
+    import crypto_scanner
+    records = ctx.records()
+    return lambda: [crypto_scanner.calculate_coin_score(r) for r in records]
+
+
+@benchmark('crypto.find_best_coins')
+def _crypto_find_best(ctx: Context, size: int):
+    import crypto_scanner
+    snapshot = ctx.snapshot()
+    return lambda: crypto_scanner.find_best_coins(snapshot, top_n=5)
+
+
+@benchmark('advanced.analyze_token', heavy=True)
+def _analyze_token(ctx: Context, size: int):
+    scanner = ctx.advanced()
+    records = ctx.records()
+    return (lambda: [scanner.analyze_token(r) for r in records]), (lambda: _reset_advanced(scanner))
+
+
+@benchmark('advanced.find_best_coins', heavy=True)
+def _advanced_find_best(ctx: Context, size: int):
+    scanner = ctx.advanced()
+    records = ctx.records()
+    scanner.find_best_coins(records)        # دورهای بعدی: اندیکاتورها فقط کندل‌های جدید را می‌گیرند
+    return lambda: scanner.find_best_coins(records, top_n=5)
+
+
+@benchmark('growth.analyze_growth_potential')
+def _growth(ctx: Context, size: int):
+    scanner = ctx.growth()
+    snapshot = ctx.snapshot()
+    return lambda: scanner.analyze_growth_potential(snapshot)
+
+
+@benchmark('auto.analyze_signals')
+def _auto(ctx: Context, size: int):
+    scanner = ctx.auto()
+    snapshot = ctx.snapshot()
+    return lambda: scanner.analyze_signals(snapshot)
+
+
+@benchmark('main.filter_tokens')
+def _filter_tokens(ctx: Context, size: int):
+    import main as meme_coin_tracker
+    tokens = [meme_coin_tracker.Token(r['name'], r['price'], int(r['volume']), price_change_24h=r['change_24h'])
+              for r in ctx.records()]
+
+    def run():
+        meme_coin_tracker.filter_tokens(tokens, min_price=0.002)
+        meme_coin_tracker.filter_tokens(tokens, min_volume=100000)
+        meme_coin_tracker.filter_tokens(tokens, name_contains='coin', custom_filter=lambda t: t.price_change_24h > 0)
+    return run
+
+
+@benchmark('format.best_coins_message')
+def _format_best(ctx: Context, size: int):
+    scanner = ctx.advanced()
+    analyzed = []
+    for record in ctx.records():
+        token = scanner.analyze_token(record)
+        if token:
+            analyzed.append(token)
+            if len(analyzed) >= 20:
+                break
+    analyzed.sort(key=lambda t: t.score, reverse=True)
+    best = analyzed[:5]
+    return lambda: scanner.format_best_coins_message(best)
+
+
+@benchmark('format.growth_message')
+def _format_growth(ctx: Context, size: int):
+    scanner = ctx.growth()
+    from scanner.rule_tables import GROWTH_RULES
+    coins = scanner.analyze_growth_potential(ctx.snapshot())
+    if not coins:
+        # اگر ارزی به آستانه نرسید، ۵ ارز اول با امتیازشان (یک گذر برداری) قالب‌بندی می‌شوند
+        head = ctx.snapshot().head(5)
+        result = scanner.growth_rules.evaluate(head.columns(GROWTH_RULES.inputs()))
+        coins = [{'token': t, 'score': int(result.scores[i]), 'factors': result.labels(i)} for i, t in enumerate(head)]
+    return lambda: scanner.format_growth_message(coins)
+
+
+@benchmark('format.signal_message')
+def _format_signals(ctx: Context, size: int):
+    scanner = ctx.auto()
+    signals = scanner.analyze_signals(ctx.snapshot())
+    return lambda: scanner.format_signal_message(signals)
+
+
+@benchmark('multi_api.score_coin')
+def _score_coin(ctx: Context, size: int):
+    from scanner.multi_api import MultiAPIScanner
+    coin_payload = fixtures.load('coingecko_coin')
+    quotes = list(fixtures.load('cmc_quotes')['data'].values())
+    index, contract, now = ctx.transfer_index()
+    activity = {'new_transfers': 0, 'windows': index.activity('ethereum', contract, now=now)}
+    markets = ctx.markets()
+
+    def run():
+        for i, coin in enumerate(markets):
+            MultiAPIScanner._score_coin(coin, coin_payload, quotes[i % len(quotes)], activity, None)
+    return run
+
+
+@benchmark('onchain.transfer_activity')
+def _transfer_activity(ctx: Context, size: int):
+    index, contract, now = ctx.transfer_index()
+    return lambda: index.activity('ethereum', contract, now=now)
+
+
+# --- اندازه‌گیری ---
+
+def measure(func: Callable, reset: Optional[Callable] = None, repeat: int = REPEAT,
+            min_batch: float = MIN_BATCH) -> Dict:
+    """زمان هر فراخوانی func در repeat اجرا؛ با reset هر اجرا یک فراخوانی پس از reset (بدون زمان‌گیری) است"""
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink):
+        number = 1
+        if reset is None:
+            func()                                   # گرم کردن (کش‌ها و import‌های تنبل)
+            started = time.perf_counter()
+            func()                                   # تخمین تعداد تکرار
+            elapsed = time.perf_counter() - started
+            number = max(1, int(min_batch / elapsed)) if elapsed > 0 else 1000
+        times = []
+        for _ in range(repeat):
+            if reset is not None:
+                reset()
+            started = time.perf_counter()
+            for _ in range(number):
+                func()
+            times.append((time.perf_counter() - started) / number)
+            sink.seek(0)
+            sink.truncate()
+    return {
+        'number': number,
+        'repeat': repeat,
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.fmean(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def metadata(sizes, repeat: int) -> Dict:
+    return {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sizes': list(sizes),
+        'repeat': repeat,
+    }
+
+
+def run(sizes=SIZES, names: Optional[List[str]] = None, repeat: int = REPEAT, seed: int = 0,
+        max_analyze: Optional[int] = ANALYZE_MAX_SIZE) -> List[Dict]:
+    results = []
+    for size in sizes:
+        ctx = Context(size, seed)
+        for name, (factory, heavy) in BENCHMARKS.items():
+            if names and not any(part in name for part in names):
+                continue
+            if heavy and max_analyze is not None and size > max_analyze:
+                print(f"⏭️ {name} [{size}]: بزرگ‌تر از حداکثر اندازه تحلیل ({max_analyze})")
+                continue
+            with contextlib.redirect_stdout(io.StringIO()):
+                built = factory(ctx, size)
+            func, reset = built if isinstance(built, tuple) else (built, None)
+            stats = measure(func, reset, repeat)
+            stats.update(name=name, size=size, per_item_us=stats['median'] / size * 1e6)
+            results.append(stats)
+            print(f"⏱️ {name:<34} {size:>6} ارز: میانه {stats['median'] * 1000:9.3f} ms "
+                  f"({stats['per_item_us']:8.2f} µs/ارز، {stats['number']}×{stats['repeat']})")
+    return results
+
+
+def write_results(path: str, meta: Dict, results: List[Dict]):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': results}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def compare(results: List[Dict], baseline_path: str) -> List[Dict]:
+    """نسبت میانه اجرای فعلی به فایل نتایج قبلی برای هر (بنچمارک، اندازه) مشترک"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r['name'], r['size']): r for r in json.load(f)['results']}
+    rows = []
+    for result in results:
+        old = baseline.get((result['name'], result['size']))
+        if old is None or not old['median']:
+            continue
+        ratio = result['median'] / old['median']
+        rows.append({'name': result['name'], 'size': result['size'], 'before': old['median'],
+                     'after': result['median'], 'ratio': ratio})
+        mark = "🔴 کندتر" if ratio > REGRESSION_RATIO else "🟢 سریع‌تر" if ratio < 1 / REGRESSION_RATIO else "⚪"
+        print(f"{mark} {result['name']:<34} {result['size']:>6}: {old['median'] * 1000:9.3f} → "
+              f"{result['median'] * 1000:9.3f} ms (×{ratio:.2f})")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="بنچمارک آفلاین مسیر اسکن روی fixtureهای ضبط‌شده")
+    parser.add_argument('--sizes', default=','.join(str(s) for s in SIZES), help="تعداد ارزها، جدا با کاما")
+    parser.add_argument('--filter', action='append', help="فقط بنچمارک‌هایی که نامشان شامل این متن است")
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-analyze', type=int, default=ANALYZE_MAX_SIZE,
+                        help="حداکثر اندازه برای بنچمارک‌های analyze_token (0 = بدون محدودیت)")
+    parser.add_argument('--output', help="فایل JSON نتایج (پیش‌فرض: benchmarks/results/bench_<زمان>.json)")
+    parser.add_argument('--compare', help="فایل نتایج قبلی برای مقایسه")
+    parser.add_argument('--list', action='store_true')
+    args = parser.parse_args()
+    if args.list:
+        for name, (_, heavy) in BENCHMARKS.items():
+            print(name + (f" (حداکثر {args.max_analyze or 'بدون محدودیت'} ارز)" if heavy else ""))
+        return
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    output = os.path.abspath(args.output or os.path.join(
+        RESULTS_DIR, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"))
+    baseline = os.path.abspath(args.compare) if args.compare else None
+    meta = metadata(sizes, args.repeat)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='pump-bench-') as workdir:
+        os.chdir(workdir)
+        try:
+            results = run(sizes, args.filter, args.repeat, args.seed, args.max_analyze or None)
+        finally:
+            os.chdir(cwd)
+    write_results(output, meta, results)
+    print(f"💾 {len(results)} نتیجه در {output} ذخیره شد.")
+    if baseline:
+        compare(results, baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,9 @@
 # اسکنر حرفه‌ای ارز دیجیتال با تحلیل پیشرفته
-import sys
 import time
-import json
-import numpy as np
 import pandas as pd
 import requests
-import ta
-from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
+from datetime import datetime
+from typing import Dict, List, Optional
 from dataclasses import dataclass
 from config import (
     TELEGRAM_BOT_TOKEN, 
@@ -15,6 +11,12 @@ from config import (
     COINGECKO_API_KEY,
     COINMARKETCAP_API_KEY
 )
+from scanner import alert_store, circuit_breaker, http_client, market_data, metrics, signal_log, telegram_dispatcher, universe
+from scanner.indicators import IndicatorEngine
+from scanner.market_snapshot import MarketSnapshot
+from scanner.rule_tables import COIN_SCORE_RULES, advanced_score_rules, load_overrides
+from scanner.scheduler import Scheduler
+from scanner.ttl_cache import TTLCache, candle_expiry
 
 SETTINGS = {
     'min_volume': 1000000,
@@ -27,6 +29,36 @@ SETTINGS = {
     'max_market_cap': 10000000000
 }
 
+# پیکربندی بهینه‌شده با python -m scanner.sweep (در صورت وجود strategy_overrides.json)
+ADVANCED_OVERRIDES = load_overrides('advanced')
+SETTINGS.update(ADVANCED_OVERRIDES.get('settings', {}))
+MIN_SCORE = ADVANCED_OVERRIDES.get('min_score', 40)
+COIN_SCORE_OVERRIDES = load_overrides('coin_score')
+COIN_SCORE_MIN = COIN_SCORE_OVERRIDES.get('min_score', 30)
+COIN_SCORE_MIN_VOLUME = COIN_SCORE_OVERRIDES.get('min_volume', 1000000)
+
+# تایم‌فریم‌ها: برای هر ارز فقط یک سری قیمت ساعتی دریافت و به کندل‌های هر تایم‌فریم تبدیل می‌شود
+TIMEFRAMES = {
+    '1h': '1h',
+    '4h': '4h',
+    '1d': '1D',
+}
+DEFAULT_TIMEFRAME = '1d'
+FULL_UNIVERSE_SCAN = False               # True: اسکن تدریجی کل بازار به جای 100 ارز اول
+HISTORY_DAYS = 90                        # کوین‌گکو برای 2 تا 90 روز داده ساعتی برمی‌گرداند
+SCAN_LIMIT = 100
+SCAN_INTERVAL = 300                      # تاخیر ۵ دقیقه بین اجراها
+
+# کش سری‌های قیمت: هر ورودی تا بسته شدن کندل ساعتی جاری معتبر است و تا HISTORY_STALE_TTL بعد از آن
+# همان مقدار قبلی برگردانده و در پس‌زمینه به‌روز می‌شود
+CANDLE_INTERVAL = 3600
+HISTORY_CACHE_SIZE = 500
+HISTORY_CACHE_BYTES = 64 * 1024 * 1024
+HISTORY_STALE_TTL = 600
+ANALYSIS_CACHE_SIZE = 2000
+ANALYSIS_TTL = 3600
+RATE_LIMIT_BACKOFF = 5                   # انتظار پس از 429 بدون Retry-After: 5، 10، 20 ثانیه
+
 @dataclass
 class TokenAnalysis:
     symbol: str
@@ -45,211 +77,174 @@ class TokenAnalysis:
     risk_level: str = "متوسط"
     signals: List[str] = None
     factors: List[str] = None
+    coin_id: Optional[str] = None
+    source: Optional[str] = None
+    timeframe: str = DEFAULT_TIMEFRAME
     def __post_init__(self):
         self.signals = [] if self.signals is None else self.signals
         self.factors = [] if self.factors is None else self.factors
 
-import csv
-import os
-
 class AdvancedCryptoScanner:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({'User-Agent': 'Mozilla/5.0', 'Accept': 'application/json'})
-        self.historical_data = {}
-        self.last_analysis = {}
-        self.alert_history = set()
-        self.signal_log_file = 'signals_log.csv'
-        self._load_alert_history()
+        self.session = http_client.get_session()
+        self.historical_data = TTLCache(max_entries=HISTORY_CACHE_SIZE, max_bytes=HISTORY_CACHE_BYTES,
+                                        ttl=CANDLE_INTERVAL, stale_ttl=HISTORY_STALE_TTL, name='historical_data')
+        self.indicator_engine = IndicatorEngine()
+        self.score_rules = advanced_score_rules(
+            SETTINGS['max_drawdown'], SETTINGS['rsi_oversold'], SETTINGS['rsi_overbought']
+        ).with_thresholds(ADVANCED_OVERRIDES.get('thresholds', {})).compile()
+        self.universe = None
+        self.last_analysis = TTLCache(max_entries=ANALYSIS_CACHE_SIZE, ttl=ANALYSIS_TTL, name='last_analysis')
+        self.signal_log_file = signal_log.SIGNAL_LOG_FILE
+        self.signal_log = signal_log.SignalLogWriter(self.signal_log_file)
+        self.alert_store = alert_store.get_store()
+        # تاریخچه CSV قدیمی فقط بار اول وارد ذخیره‌گاه می‌شود
+        self.alert_store.import_csv(self.signal_log_file)
 
     def _log_signal(self, symbol, name, score, reasons, timeframe, source):
         now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        file_exists = os.path.isfile(self.signal_log_file)
-        with open(self.signal_log_file, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            if not file_exists:
-                writer.writerow(["time", "symbol", "name", "score", "reasons", "timeframe", "source"])
-            writer.writerow([now, symbol, name, score, reasons, timeframe, source])
-        # Add to alert history
-        self.alert_history.add((symbol, timeframe, source, now[:10]))
-
-    def _load_alert_history(self):
-        self.alert_history = set()
-        if os.path.exists(self.signal_log_file):
-            with open(self.signal_log_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    self.alert_history.add((row['symbol'], row['timeframe'], row['source'], row['time'][:10]))
+        self.signal_log.write(symbol, name, score, reasons, timeframe, source, now)
+        self.alert_store.mark(symbol, timeframe, source, now)
 
     def _should_alert(self, symbol, timeframe, source):
-        today = datetime.now().strftime('%Y-%m-%d')
-        return (symbol, timeframe, source, today) not in self.alert_history
+        return not self.alert_store.seen(symbol, timeframe, source)
 
     # آماده‌سازی ساختار برای چند تایم‌فریم و چند API (در توابع بعدی تکمیل می‌شود)
 
     def _make_api_request(self, url: str, params: dict = None, retries: int = 3) -> Optional[dict]:
         for attempt in range(retries):
             try:
-                response = self.session.get(url, params=params, timeout=15)
+                response = http_client.get(url, params=params)
                 if response.status_code == 200:
                     return response.json()
                 elif response.status_code == 429:
-                    wait_time = (2 ** attempt) * 5
-                    print(f"⏳ محدودیت نرخ. صبر می‌کنم {wait_time} ثانیه...")
-                    time.sleep(wait_time)
+                    if attempt == retries - 1:
+                        break
+                    # صبر تا پایان Retry-After (یا backoff نمایی اگر سرور اعلام نکرد)؛
+                    # اگر rate_limiter خاموش یا پیکربندی‌نشده باشد تلاش بعدی نباید بلافاصله انجام شود
+                    wait = http_client.retry_after_of(response)
+                    wait = RATE_LIMIT_BACKOFF * 2 ** attempt if wait is None else wait
+                    print(f"⏳ محدودیت نرخ. تلاش دوباره پس از {wait:.0f} ثانیه...")
+                    time.sleep(wait)
                     continue
                 else:
                     print(f"❌ خطای API: کد {response.status_code}")
                     return None
+            except circuit_breaker.CircuitOpenError as e:
+                print(f"🔌 {e}")
+                return None
             except requests.exceptions.RequestException as e:
                 print(f"❌ خطای اتصال: {e}")
                 time.sleep(5)
                 continue
         return None
-    def fetch_real_crypto_data(self, limit: int = 100) -> List[Dict]:
+    def fetch_real_crypto_data(self, limit: int = 100, full_universe: bool = False,
+                               markets: Optional[MarketSnapshot] = None) -> MarketSnapshot:
+        """
+        markets: snapshot کوین‌گکو (به ترتیب ارزش بازار) که زمان‌بند بین اسکنرها به اشتراک می‌گذارد؛
+        در این صورت فقط CoinMarketCap جداگانه دریافت می‌شود
+        """
         print("\n📡 در حال دریافت داده‌های ارزهای دیجیتال...")
-        cg_data = self._fetch_coingecko_data(limit)
-        cmc_data = []
-        if COINMARKETCAP_API_KEY and COINMARKETCAP_API_KEY != 'YOUR_COINMARKETCAP_API_KEY':
+        if full_universe:
+            cg_data = self._fetch_universe()
+        elif markets is not None:
+            cg_data = MarketSnapshot.coerce(markets).head(limit)
+        else:
+            cg_data = self._fetch_coingecko_data(limit)
+        cmc_data = MarketSnapshot.empty()
+        if not circuit_breaker.is_available('coinmarketcap'):
+            print("🔌 مدار CoinMarketCap باز است؛ فقط داده‌های CoinGecko استفاده می‌شود.")
+        elif COINMARKETCAP_API_KEY and COINMARKETCAP_API_KEY != 'YOUR_COINMARKETCAP_API_KEY':
             cmc_data = self._fetch_coinmarketcap_data(limit)
-        all_tokens = {}
-        if cg_data:
-            for token in cg_data:
-                all_tokens[token['symbol']] = token
-        if cmc_data:
-            for token in cmc_data:
-                if token['symbol'] not in all_tokens:
-                    all_tokens[token['symbol']] = token
-        tokens = list(all_tokens.values())
-        tokens.sort(key=lambda x: x.get('volume', 0), reverse=True)
+        # CoinGecko اولویت دارد؛ از CoinMarketCap فقط نمادهایی که در CoinGecko نیستند اضافه می‌شوند
+        cg_data = cg_data.unique('symbol', keep='last')
+        cmc_data = cmc_data.mask(~cmc_data.isin('symbol', cg_data['symbol'])).unique('symbol')
+        tokens = MarketSnapshot.concat(cg_data, cmc_data).sort('volume', descending=True)
         print(f"✅ داده‌های {len(tokens)} ارز با موفقیت دریافت شد.")
         return tokens
-    def _fetch_coingecko_data(self, limit: int) -> List[Dict]:
+    def _coingecko_key(self) -> str:
+        return COINGECKO_API_KEY if COINGECKO_API_KEY != 'YOUR_COINGECKO_API_KEY' else ''
+    def _fetch_coingecko_data(self, limit: int) -> MarketSnapshot:
         try:
-            url = "https://api.coingecko.com/api/v3/coins/markets"
-            params = {
-                'vs_currency': 'usd',
-                'order': 'market_cap_desc',
-                'per_page': min(limit, 250),
-                'page': 1,
-                'sparkline': False,
-                'price_change_percentage': '1h,24h,7d,14d,30d',
-                'x_cg_pro_api_key': COINGECKO_API_KEY if COINGECKO_API_KEY != 'YOUR_COINGECKO_API_KEY' else ''
-            }
-            response = self.session.get(url, params=params, timeout=20)
-            if response.status_code == 200:
-                data = response.json()
-                tokens = []
-                for coin in data:
-                    try:
-                        tokens.append({
-                            'symbol': coin['symbol'].upper(),
-                            'name': coin['name'],
-                            'price': coin['current_price'],
-                            'volume': coin['total_volume'],
-                            'market_cap': coin['market_cap'],
-                            'rank': coin['market_cap_rank'],
-                            'change_1h': coin.get('price_change_percentage_1h', 0) or 0,
-                            'change_24h': coin.get('price_change_percentage_24h', 0) or 0,
-                            'change_7d': coin.get('price_change_percentage_7d', 0) or 0,
-                            'change_14d': coin.get('price_change_percentage_14d', 0) or 0,
-                            'change_30d': coin.get('price_change_percentage_30d', 0) or 0,
-                            'ath': coin.get('ath'),
-                            'ath_change_percentage': coin.get('ath_change_percentage'),
-                            'ath_date': coin.get('ath_date'),
-                            'last_updated': coin.get('last_updated'),
-                            'source': 'CoinGecko'
-                        })
-                    except (KeyError, TypeError) as e:
-                        print(f"⚠️ خطا در پردازش داده‌های {coin.get('symbol', 'ناشناخته')}: {e}")
-                        continue
-                return tokens
-            else:
-                print(f"❌ خطا در دریافت داده از CoinGecko: کد {response.status_code}")
-                return []
+            # بیش از 250 ارز: صفحه‌های coins/markets موازی دریافت می‌شوند
+            return universe.fetch_coingecko_top(limit, self._coingecko_key())
         except Exception as e:
             print(f"❌ خطا در اتصال به CoinGecko: {e}")
-            return []
-    def _fetch_coinmarketcap_data(self, limit: int) -> List[Dict]:
+            return MarketSnapshot.empty()
+    def _fetch_universe(self) -> MarketSnapshot:
+        if self.universe is None:
+            self.universe = universe.UniverseScanner(api_key=self._coingecko_key())
         try:
-            url = "https://pro-api.coinmarketcap.com/v1/cryptocurrency/listings/latest"
-            headers = {
-                'X-CMC_PRO_API_KEY': COINMARKETCAP_API_KEY,
-                'Accept': 'application/json'
-            }
-            params = {
-                'start': 1,
-                'limit': min(limit, 100),
-                'convert': 'USD'
-            }
-            response = self.session.get(url, headers=headers, params=params, timeout=20)
-            if response.status_code == 200:
-                data = response.json()
-                tokens = []
-                for coin in data.get('data', []):
-                    try:
-                        quote = coin.get('quote', {}).get('USD', {})
-                        tokens.append({
-                            'symbol': coin['symbol'],
-                            'name': coin['name'],
-                            'price': quote.get('price'),
-                            'volume': quote.get('volume_24h', 0),
-                            'market_cap': quote.get('market_cap'),
-                            'rank': coin.get('cmc_rank', 9999),
-                            'change_1h': quote.get('percent_change_1h', 0),
-                            'change_24h': quote.get('percent_change_24h', 0),
-                            'change_7d': quote.get('percent_change_7d', 0),
-                            'change_30d': quote.get('percent_change_30d', 0),
-                            'ath': None,
-                            'ath_change_percentage': None,
-                            'ath_date': None,
-                            'last_updated': quote.get('last_updated'),
-                            'source': 'CoinMarketCap'
-                        })
-                    except (KeyError, TypeError) as e:
-                        print(f"⚠️ خطا در پردازش داده‌های {coin.get('symbol', 'ناشناخته')}: {e}")
-                        continue
-                return tokens
-            else:
-                error_msg = response.json().get('status', {}).get('error_message', 'خطای ناشناخته')
-                print(f"❌ خطا در دریافت داده از CoinMarketCap: کد {response.status_code} - {error_msg}")
-                return []
+            tokens = self.universe.scan()
+            stats = self.universe.stats()
+            print(f"🌐 اسکن کل بازار: {stats['coins']} ارز در {stats['pages']} صفحه (صفحه بعدی: {stats['next_page']})")
+            return tokens
+        except Exception as e:
+            print(f"❌ خطا در اسکن کل بازار: {e}")
+            return MarketSnapshot.empty()
+    def _fetch_coinmarketcap_data(self, limit: int) -> MarketSnapshot:
+        try:
+            # صفحه‌بندی با start؛ هر صفحه حداکثر CMC_LISTINGS_PER_PAGE ارز
+            return universe.fetch_coinmarketcap_top(limit, COINMARKETCAP_API_KEY)
         except Exception as e:
             print(f"❌ خطا در اتصال به CoinMarketCap: {e}")
-            return []
-    def fetch_historical_data(self, symbol: str, days: int = 30) -> Optional[pd.DataFrame]:
-        if symbol in self.historical_data:
-            return self.historical_data[symbol]
+            return MarketSnapshot.empty()
+    def fetch_price_history(self, coin_id: str, days: int = HISTORY_DAYS) -> Optional[pd.Series]:
+        """سری قیمت ساعتی یک ارز؛ یک‌بار در هر کندل ساعتی برای همه تایم‌فریم‌ها دریافت می‌شود"""
+        return self.historical_data.get_or_load(
+            (coin_id, days), lambda: self._load_price_history(coin_id, days),
+            expires_at=lambda: candle_expiry(CANDLE_INTERVAL))
+    def _load_price_history(self, coin_id: str, days: int) -> Optional[pd.Series]:
         try:
-            url = f"https://api.coingecko.com/api/v3/coins/{symbol.lower()}/market_chart"
+            url = http_client.api_url('coingecko', f'/coins/{coin_id}/market_chart')
             params = {
                 'vs_currency': 'usd',
                 'days': days,
-                'interval': 'daily',
-                'x_cg_pro_api_key': COINGECKO_API_KEY if COINGECKO_API_KEY != 'YOUR_COINGECKO_API_KEY' else ''
+                'x_cg_pro_api_key': self._coingecko_key()
             }
-            response = self.session.get(url, params=params, timeout=20)
+            with metrics.timed('history', 'coingecko'):
+                response = http_client.get(url, params=params)
             if response.status_code == 200:
-                data = response.json()
-                if 'prices' in data and len(data['prices']) > 0:
-                    df = pd.DataFrame(data['prices'], columns=['timestamp', 'price'])
-                    df['date'] = pd.to_datetime(df['timestamp'], unit='ms')
-                    df.set_index('date', inplace=True)
-                    df['rsi'] = ta.momentum.RSIIndicator(df['price']).rsi()
-                    macd = ta.trend.MACD(df['price'])
-                    df['macd'] = macd.macd()
-                    df['macd_signal'] = macd.macd_signal()
-                    bollinger = ta.volatility.BollingerBands(df['price'])
-                    df['bb_high'] = bollinger.bollinger_hband()
-                    df['bb_mid'] = bollinger.bollinger_mavg()
-                    df['bb_low'] = bollinger.bollinger_lband()
-                    self.historical_data[symbol] = df
-                    return df
+                with metrics.timed('parse', 'coingecko'):
+                    data = response.json()
+                    if 'prices' in data and len(data['prices']) > 0:
+                        prices = pd.DataFrame(data['prices'], columns=['timestamp', 'price'], dtype=float)
+                        index = pd.to_datetime(prices['timestamp'], unit='ms')
+                        return pd.Series(prices['price'].values, index=index, name='price')
+            return None
+        except circuit_breaker.CircuitOpenError:
+            return None         # بدون داده تاریخی: اندیکاتورها محاسبه نمی‌شوند و امتیاز فقط از داده بازار است
+        except Exception as e:
+            print(f"❌ خطا در دریافت داده‌های تاریخی {coin_id}: {e}")
             return None
+    def fetch_historical_data(self, symbol: str, days: int = HISTORY_DAYS, timeframe: str = DEFAULT_TIMEFRAME,
+                              coin_id: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """کندل‌های OHLC تایم‌فریم به همراه RSI/MACD/بولینگر، ساخته‌شده از سری ساعتی مشترک"""
+        series = self.fetch_price_history(coin_id or symbol.lower(), days)
+        if series is None or series.empty:
+            return None
+        try:
+            with metrics.timed('indicators'):
+                candles = series.resample(TIMEFRAMES[timeframe], label='left', closed='left').ohlc().dropna()
+                timestamps = candles.index.astype('int64') // 10**6
+                # فقط کندل‌های جدید به موتور افزایشی داده می‌شوند؛ کندل آخر (هنوز بسته نشده) موقت است
+                rows = self.indicator_engine.ingest(f"{coin_id or symbol.lower()}:{timeframe}",
+                                                    zip(timestamps, candles['close']))
+                df = pd.DataFrame(rows, dtype=float)
+                df['date'] = pd.to_datetime(df['timestamp'], unit='ms')
+                df.set_index('date', inplace=True)
+                return df.join(candles[['open', 'high', 'low', 'close']])
         except Exception as e:
-            print(f"❌ خطا در دریافت داده‌های تاریخی {symbol}: {e}")
+            print(f"❌ خطا در ساخت کندل‌های {timeframe} برای {symbol}: {e}")
             return None
-    def analyze_token(self, token_data: Dict) -> Optional[TokenAnalysis]:
+    def analyze_token(self, token_data: Dict, timeframe: str = DEFAULT_TIMEFRAME) -> Optional[TokenAnalysis]:
+        token = self._prepare_token(token_data, timeframe)
+        if token is not None:
+            self._calculate_final_score(token)
+            self._finish_analysis(token)
+        return token
+    def _prepare_token(self, token_data: Dict, timeframe: str) -> Optional[TokenAnalysis]:
+        """ساخت TokenAnalysis، اعتبارسنجی و اندیکاتورها (بدون امتیاز؛ امتیاز برای همه ارزها یک‌جا محاسبه می‌شود)"""
         try:
             token = TokenAnalysis(
                 symbol=token_data['symbol'],
@@ -259,18 +254,21 @@ class AdvancedCryptoScanner:
                 market_cap=token_data['market_cap'],
                 change_1h=token_data['change_1h'],
                 change_24h=token_data['change_24h'],
-                change_7d=token_data['change_7d']
+                change_7d=token_data['change_7d'],
+                coin_id=token_data.get('id'),
+                source=token_data.get('source'),
+                timeframe=timeframe
             )
             if not self._validate_token(token):
                 return None
             self._calculate_technical_indicators(token)
-            self._calculate_final_score(token)
-            self._determine_risk_level(token)
-            self.last_analysis[token.symbol] = token
             return token
         except Exception as e:
             print(f"⚠️ خطا در تحلیل توکن {token_data.get('symbol', 'ناشناخته')}: {e}")
             return None
+    def _finish_analysis(self, token: TokenAnalysis):
+        self._determine_risk_level(token)
+        self.last_analysis[(token.symbol, token.timeframe)] = token
     def _validate_token(self, token: TokenAnalysis) -> bool:
         if token.volume < SETTINGS['min_volume']:
             return False
@@ -282,7 +280,7 @@ class AdvancedCryptoScanner:
             token.signals.append(f"⚠️ هشدار: نوسان بالا ({token.change_24h:.2f}%)")
         return True
     def _calculate_technical_indicators(self, token: TokenAnalysis):
-        df = self.fetch_historical_data(token.symbol)
+        df = self.fetch_historical_data(token.symbol, timeframe=token.timeframe, coin_id=token.coin_id)
         if df is not None and not df.empty:
             if 'rsi' in df.columns:
                 token.rsi = df['rsi'].iloc[-1]
@@ -305,77 +303,19 @@ class AdvancedCryptoScanner:
                     token.signals.append("نزدیک به باند بالایی بولینگر")
                 elif current_price <= bb_low:
                     token.signals.append("نزدیک به باند پایینی بولینگر")
+    @metrics.timed('scoring')
     def _calculate_final_score(self, token: TokenAnalysis):
-        score = 0
-        factors = []
-        price_score = 0
-        if token.change_1h > 5:
-            price_score += 12
-            factors.append("📈 رشد قوی 1 ساعته")
-        elif token.change_1h > 2:
-            price_score += 8
-            factors.append("📈 رشد متوسط 1 ساعته")
-        elif token.change_1h > 0:
-            price_score += 3
-        if token.change_24h > 15:
-            price_score += 12
-            factors.append("🚀 رشد انفجاری 24 ساعته")
-        elif token.change_24h > 7:
-            price_score += 8
-            factors.append("📈 رشد قوی 24 ساعته")
-        elif token.change_24h > 3:
-            price_score += 4
-            factors.append("📊 رشد متوسط 24 ساعته")
-        if token.change_7d > 30:
-            price_score += 6
-            factors.append("🌟 روند صعودی قوی هفتگی")
-        elif token.change_7d > 15:
-            price_score += 4
-            factors.append("📈 روند صعودی هفتگی")
-        elif token.change_7d > 0:
-            price_score += 2
-        score += min(price_score, 30)
-        liquidity_score = 0
-        volume_to_mcap = (token.volume / token.market_cap) if token.market_cap > 0 else 0
-        if volume_to_mcap > 0.5:
-            liquidity_score += 15
-            factors.append("💎 نقدینگی فوق‌العاده")
-        elif volume_to_mcap > 0.2:
-            liquidity_score += 10
-            factors.append("💧 نقدینگی بالا")
-        elif volume_to_mcap > 0.1:
-            liquidity_score += 5
-            factors.append("💦 نقدینگی مناسب")
-        if token.volume > 1000000000:
-            liquidity_score += 10
-            factors.append("💰 حجم معاملات بسیار بالا")
-        elif token.volume > 100000000:
-            liquidity_score += 6
-            factors.append("💵 حجم معاملات بالا")
-        elif token.volume > 10000000:
-            liquidity_score += 3
-        score += min(liquidity_score, 25)
-        ta_score = 0
-        if token.rsi is not None:
-            if token.rsi < 30:
-                ta_score += 8
-                factors.append("🟢 RSI در ناحیه اشباع فروش")
-            elif token.rsi > 70:
-                ta_score -= 5
-                factors.append("🔴 RSI اشباع خرید")
-        if token.macd is not None:
-            if token.macd > 0:
-                ta_score += 5
-                factors.append("📊 MACD مثبت")
-            else:
-                ta_score -= 3
-        score += min(ta_score, 25)
-        risk_score = 0
-        if token.change_24h < -SETTINGS['max_drawdown']:
-            risk_score -= 10
-            factors.append("⚠️ افت شدید قیمت")
-        token.score = max(0, min(score + risk_score, 100))
-        token.factors = factors
+        token.score, token.factors = self.score_rules.score_one(vars(token))
+    @metrics.timed('scoring')
+    def _calculate_final_scores(self, tokens: List[TokenAnalysis]):
+        """امتیاز همه ارزهای یک تایم‌فریم در یک گذر برداری جدول قوانین"""
+        if not tokens:
+            return
+        result = self.score_rules.evaluate_records([vars(t) for t in tokens])
+        for i, token in enumerate(tokens):
+            score = result.scores[i]
+            token.score = int(score) if self.score_rules.integer else float(score)
+            token.factors = result.labels(i)
     def _determine_risk_level(self, token: TokenAnalysis):
         if token.score > 80:
             token.risk_level = "کم"
@@ -383,29 +323,21 @@ class AdvancedCryptoScanner:
             token.risk_level = "متوسط"
         else:
             token.risk_level = "زیاد"
-    def find_best_coins(self, tokens: List[Dict], top_n: int = 5) -> List[TokenAnalysis]:
+    def find_best_coins(self, tokens: List[Dict], top_n: int = 5,
+                        timeframe: str = DEFAULT_TIMEFRAME) -> List[TokenAnalysis]:
+        prepared = [t for t in (self._prepare_token(d, timeframe) for d in tokens) if t is not None]
+        self._calculate_final_scores(prepared)
         analyzed = []
-        for token_data in tokens:
-            token = self.analyze_token(token_data)
-            if token and token.score >= 40:
+        for token in prepared:
+            self._finish_analysis(token)
+            if token.score >= MIN_SCORE:
                 analyzed.append(token)
         analyzed.sort(key=lambda t: t.score, reverse=True)
         return analyzed[:top_n]
     def send_telegram_alert(self, message: str):
-        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-        data = {
-            'chat_id': TELEGRAM_CHAT_ID,
-            'text': message,
-            'parse_mode': 'HTML'
-        }
-        try:
-            response = self.session.post(url, data=data, timeout=10)
-            if response.status_code == 200:
-                print("📣 پیام به تلگرام ارسال شد.")
-            else:
-                print(f"❌ خطا در ارسال پیام تلگرام: {response.status_code}")
-        except Exception as e:
-            print(f"❌ خطا در ارسال پیام تلگرام: {e}")
+        """قرار دادن پیام در صف ارسال پس‌زمینه تلگرام (بدون انتظار برای API)"""
+        if telegram_dispatcher.send(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, message):
+            print("📣 پیام در صف ارسال تلگرام قرار گرفت.")
     def format_best_coins_message(self, best_coins: List[TokenAnalysis]) -> str:
         if not best_coins:
             return "هیچ ارز مناسبی یافت نشد."
@@ -422,6 +354,58 @@ class AdvancedCryptoScanner:
             msg += "---\n"
         return msg
 
+    def run_scan(self, tokens: Optional[MarketSnapshot] = None) -> bool:
+        """
+        یک دور اسکن چند تایم‌فریم و ارسال گزارش
+        tokens: snapshot بازار که زمان‌بند بین اسکنرها به اشتراک می‌گذارد؛ None یعنی دریافت مستقل
+        """
+        print("\n🚦 شروع اسکن حرفه‌ای چند تایم‌فریم و چند منبع...")
+        # یک snapshot بازار در هر دور؛ سری قیمت هر ارز هم یک‌بار دریافت و بین تایم‌فریم‌ها مشترک است
+        tokens = self.fetch_real_crypto_data(limit=SCAN_LIMIT, full_universe=FULL_UNIVERSE_SCAN, markets=tokens)
+        all_best_coins = []
+        for tf_name in TIMEFRAMES:
+            print(f"\n⏱ تحلیل تایم‌فریم {tf_name}...")
+            best_coins = self.find_best_coins(tokens, top_n=5, timeframe=tf_name)
+            for coin in best_coins:
+                reasons = ", ".join(coin.signals or [])
+                source = coin.source or 'CoinGecko'
+                if self._should_alert(coin.symbol, tf_name, source):
+                    self._log_signal(coin.symbol, coin.name, coin.score, reasons, tf_name, source)
+                    print(f"✅ سیگنال جدید {coin.symbol} در {tf_name} ثبت شد!")
+                else:
+                    print(f"⏳ سیگنال {coin.symbol} قبلاً در {tf_name} ثبت شده است.")
+            all_best_coins.extend([(coin, tf_name) for coin in best_coins])
+        # ساخت جدول HTML حرفه‌ای برای تلگرام
+        def html_table(best_coins_with_tf):
+            if not best_coins_with_tf:
+                return "<b>هیچ سیگنال معتبری یافت نشد.</b>"
+            table = "<b>🏆 جدول بهترین ارزها (تایم‌فریم):</b>\n<table border='1' cellpadding='4'>\n<tr><th>ردیف</th><th>نماد</th><th>نام</th><th>امتیاز</th><th>ریسک</th><th>1h</th><th>24h</th><th>7d</th><th>تایم‌فریم</th><th>دلایل</th></tr>"
+            for i, (t, tf) in enumerate(best_coins_with_tf, 1):
+                table += f"<tr><td>{i}</td><td>{t.symbol}</td><td>{t.name}</td><td>{t.score:.1f}</td><td>{t.risk_level}</td>"
+                table += f"<td>{t.change_1h:+.2f}%</td><td>{t.change_24h:+.2f}%</td><td>{t.change_7d:+.2f}%</td><td>{tf}</td>"
+                table += f"<td>{'، '.join(t.signals or [])}</td></tr>"
+            table += "</table>"
+            return table
+        # حذف کامل ارزهای تکراری (حتی اگر در چند تایم‌فریم یا سورس باشند):
+        unique_dict = {}
+        for coin, tf in all_best_coins:
+            symbol_norm = coin.symbol.upper().strip()
+            if symbol_norm not in unique_dict:
+                unique_dict[symbol_norm] = (coin, tf)
+        unique_best_coins = list(unique_dict.values())
+        html_msg = html_table(unique_best_coins[:5])  # فقط ۵ ارز برتر برای تلگرام
+        self.send_telegram_alert(html_msg)
+        print("\n📊 گزارش حرفه‌ای به تلگرام ارسال شد.")
+        stats = self.historical_data.stats()
+        print(f"📦 کش داده‌های تاریخی: {stats['entries']} ارز، hit={stats['hits']} stale={stats['stale_hits']} "
+              f"miss={stats['misses']} evict={stats['evictions']}")
+        for provider, health in circuit_breaker.health().items():
+            if health['state'] != circuit_breaker.CLOSED:
+                print(f"🔌 {provider}: {health['state']} (رد شده: {health['rejected']}، "
+                      f"تلاش دوباره تا {health['retry_in']:.0f} ثانیه)")
+        print("\n🎯 پایان اسکن حرفه‌ای.")
+        return bool(unique_best_coins)
+
 def main():
     print("🔥 شروع اسکن حرفه‌ای ارز دیجیتال...")
     try:
@@ -457,35 +441,14 @@ def fetch_real_crypto_data():
     """دریافت داده‌های واقعی از CoinGecko API - همه ارزهای مهم"""
     print("📡 در حال اتصال به CoinGecko API برای اسکن همه ارزها...")
     
-    url = "https://api.coingecko.com/api/v3/coins/markets"
-    params = {
-        'vs_currency': 'usd',
-        'order': 'market_cap_desc',
-        'per_page': 100,  # تحلیل top 100 ارز
-        'page': 1,
-        'sparkline': False,
-        'price_change_percentage': '1h,24h,7d'
-    }
+    url, params = market_data.markets_query()
     
     try:
-        response = requests.get(url, params=params, timeout=15)
-        time.sleep(5)  # تاخیر برای جلوگیری از rate limit
+        with metrics.timed('fetch', 'coingecko'):
+            response = http_client.get(url, params=params)  # محدودیت نرخ در http_client اعمال می‌شود
         if response.status_code == 200:
-            data = response.json()
-            tokens = []
-            for coin in data:
-                tokens.append({
-                    "name": coin['name'],
-                    "symbol": coin['symbol'].upper(),
-                    "price": coin['current_price'],
-                    "volume": coin['total_volume'],
-                    "change_1h": coin.get('price_change_percentage_1h', 0) or 0,
-                    "change_24h": coin.get('price_change_percentage_24h', 0) or 0,
-                    "change_7d": coin.get('price_change_percentage_7d', 0) or 0,
-                    "market_cap": coin['market_cap'],
-                    "rank": coin['market_cap_rank'],
-                    "volume_to_cap": (coin['total_volume'] / coin['market_cap']) * 100 if coin['market_cap'] else 0
-                })
+            with metrics.timed('parse', 'coingecko'):
+                tokens = MarketSnapshot.from_coingecko(response.json()[:100])  # تحلیل top 100 ارز
             print(f"✅ داده‌های {len(tokens)} ارز با موفقیت دریافت شد.")
             return tokens
         else:
@@ -501,99 +464,29 @@ def fetch_real_crypto_data():
         print(f"❌ خطای غیرمنتظره: {e}")
         return None
 
+_coin_score_rules = COIN_SCORE_RULES.with_thresholds(COIN_SCORE_OVERRIDES.get('thresholds', {})).compile()
+
+
 def calculate_coin_score(token):
     """محاسبه امتیاز هوشمند برای هر ارز (از 100)"""
-    score = 0
-    factors = []
-    
-    # عامل 1: روند قیمت (35 امتیاز)
-    if token['change_1h'] > 3:
-        score += 15
-        factors.append("momentum قوی 1ساعت")
-    elif token['change_1h'] > 1:
-        score += 8
-        factors.append("momentum متوسط 1ساعت")
-    elif token['change_1h'] > 0:
-        score += 3
-        
-    if token['change_24h'] > 10:
-        score += 15
-        factors.append("رشد فوق‌العاده 24ساعت")
-    elif token['change_24h'] > 5:
-        score += 10
-        factors.append("رشد قوی 24ساعت")
-    elif token['change_24h'] > 2:
-        score += 5
-        factors.append("رشد متوسط 24ساعت")
-    elif token['change_24h'] > 0:
-        score += 2
-        
-    if token['change_7d'] > 20:
-        score += 5
-        factors.append("روند هفتگی عالی")
-    elif token['change_7d'] > 0:
-        score += 2
-        
-    # عامل 2: حجم و نقدینگی (25 امتیاز)
-    if token['volume_to_cap'] > 30:
-        score += 15
-        factors.append("نقدینگی فوق‌العاده")
-    elif token['volume_to_cap'] > 15:
-        score += 10
-        factors.append("نقدینگی عالی")
-    elif token['volume_to_cap'] > 5:
-        score += 5
-        factors.append("نقدینگی خوب")
-        
-    if token['volume'] > 500000000:  # بیش از 500 میلیون
-        score += 10
-        factors.append("حجم معاملات بالا")
-    elif token['volume'] > 100000000:  # بیش از 100 میلیون
-        score += 5
-        
-    # عامل 3: رتبه و اعتبار (20 امتیاز)
-    if token['rank'] <= 10:
-        score += 20
-        factors.append("ارز برتر")
-    elif token['rank'] <= 30:
-        score += 15
-        factors.append("ارز معتبر")
-    elif token['rank'] <= 50:
-        score += 10
-        factors.append("ارز شناخته‌شده")
-    elif token['rank'] <= 100:
-        score += 5
-        
-    # عامل 4: پتانسیل breakout (20 امتیاز)
-    # momentum جدید (1ساعت بهتر از میانگین 24ساعت)
-    if token['change_1h'] > token['change_24h'] / 24 * 3:
-        score += 10
-        factors.append("breakout جدید")
-        
-    # whale activity (حجم خیلی بالا)
-    if token['volume'] > token['market_cap'] * 0.5:  # حجم بیش از 50% ارزش بازار
-        score += 10
-        factors.append("فعالیت نهنگ‌ها")
-    elif token['volume'] > token['market_cap'] * 0.2:
-        score += 5
-        
-    return min(score, 100), factors
+    return _coin_score_rules.score_one(token)
 
 def find_best_coins(tokens, top_n=5):
     """یافتن بهترین ارزها بر اساس امتیاز"""
+    tokens = MarketSnapshot.coerce(tokens)
+    # فیلتر اولیه
+    candidates = tokens.mask((tokens['volume'] >= COIN_SCORE_MIN_VOLUME) & (tokens['price'] > 0))
+    with metrics.timed('scoring'):
+        result = _coin_score_rules.evaluate(candidates.columns(COIN_SCORE_RULES.inputs()))
+
     scored_coins = []
-    
-    for token in tokens:
-        # فیلتر اولیه
-        if token['volume'] < 1000000 or token['price'] <= 0:
-            continue
-            
-        score, factors = calculate_coin_score(token)
-        if score >= 30:  # حداقل امتیاز برای در نظر گیری
+    for i, token in enumerate(candidates):
+        score = int(result.scores[i])
+        if score >= COIN_SCORE_MIN:  # حداقل امتیاز برای در نظر گیری
             scored_coins.append({
                 'token': token,
                 'score': score,
-                'factors': factors
+                'factors': result.labels(i)
             })
     
     # مرتب‌سازی بر اساس امتیاز
@@ -601,29 +494,14 @@ def find_best_coins(tokens, top_n=5):
     return scored_coins[:top_n]
 
 def send_telegram_alert(message):
-    """ارسال هشدار به تلگرام"""
+    """ارسال هشدار به تلگرام (از طریق صف ارسال پس‌زمینه)"""
     if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
         print("⚠️ تنظیمات تلگرام ناقص است.")
         return False
-        
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    data = {
-        "chat_id": TELEGRAM_CHAT_ID,
-        "text": message,
-        "parse_mode": "HTML"
-    }
-    
-    try:
-        response = requests.post(url, data=data, timeout=10)
-        if response.status_code == 200:
-            print("📱 بهترین ارزها به تلگرام ارسال شد!")
-            return True
-        else:
-            print(f"❌ خطا در ارسال تلگرام: {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"❌ خطا در ارسال تلگرام: {e}")
-        return False
+    if telegram_dispatcher.send(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, message):
+        print("📱 بهترین ارزها در صف ارسال تلگرام قرار گرفت!")
+        return True
+    return False
 
 def format_best_coins_message(best_coins):
     """فرمت کردن پیام بهترین ارزها"""
@@ -658,70 +536,11 @@ def format_best_coins_message(best_coins):
     message += f"💡 <i>از {len(best_coins)} ارز برتر انتخاب شده</i>"
     return message
 
-def main():
-    print("\n🚦 شروع اسکن حرفه‌ای چند تایم‌فریم و چند منبع...")
-    scanner = AdvancedCryptoScanner()
-    timeframes = [
-        ("1h", 1),
-        ("4h", 4),
-        ("1d", 24)
-    ]
-    sources = ["CoinGecko", "CoinMarketCap"]
-    all_best_coins = []
-    for tf_name, tf_hours in timeframes:
-        print(f"\n⏱ تحلیل تایم‌فریم {tf_name}...")
-        tokens = scanner.fetch_real_crypto_data(limit=100)
-        best_coins = scanner.find_best_coins(tokens, top_n=5)
-        for coin in best_coins:
-            reasons = ", ".join(coin.signals or [])
-            if scanner._should_alert(coin.symbol, tf_name, coin.__dict__.get('source', 'CoinGecko')):
-                scanner._log_signal(coin.symbol, coin.name, coin.score, reasons, tf_name, coin.__dict__.get('source', 'CoinGecko'))
-                print(f"✅ سیگنال جدید {coin.symbol} در {tf_name} ثبت شد!")
-            else:
-                print(f"⏳ سیگنال {coin.symbol} قبلاً در {tf_name} ثبت شده است.")
-        all_best_coins.extend([(coin, tf_name) for coin in best_coins])
-    # ساخت جدول HTML حرفه‌ای برای تلگرام
-    def html_table(best_coins_with_tf):
-        if not best_coins_with_tf:
-            return "<b>هیچ سیگنال معتبری یافت نشد.</b>"
-        table = "<b>🏆 جدول بهترین ارزها (تایم‌فریم):</b>\n<table border='1' cellpadding='4'>\n<tr><th>ردیف</th><th>نماد</th><th>نام</th><th>امتیاز</th><th>ریسک</th><th>1h</th><th>24h</th><th>7d</th><th>تایم‌فریم</th><th>دلایل</th></tr>"
-        for i, (t, tf) in enumerate(best_coins_with_tf, 1):
-            table += f"<tr><td>{i}</td><td>{t.symbol}</td><td>{t.name}</td><td>{t.score:.1f}</td><td>{t.risk_level}</td>"
-            table += f"<td>{t.change_1h:+.2f}%</td><td>{t.change_24h:+.2f}%</td><td>{t.change_7d:+.2f}%</td><td>{tf}</td>"
-            table += f"<td>{'، '.join(t.signals or [])}</td></tr>"
-        table += "</table>"
-        return table
-    # حذف کامل ارزهای تکراری (حتی اگر در چند تایم‌فریم یا سورس باشند):
-    unique_dict = {}
-    for coin, tf in all_best_coins:
-        symbol_norm = coin.symbol.upper().strip()
-        if symbol_norm not in unique_dict:
-            unique_dict[symbol_norm] = (coin, tf)
-    unique_best_coins = list(unique_dict.values())
-    html_msg = html_table(unique_best_coins[:5])  # فقط ۵ ارز برتر برای تلگرام
-    scanner.send_telegram_alert(html_msg)
-    print("\n📊 گزارش حرفه‌ای به تلگرام ارسال شد.")
-    print("\n🎯 پایان اسکن حرفه‌ای.")
-
-
-
 if __name__ == "__main__":
-    import time
-    DELAY_SECONDS = 300  # تاخیر ۵ دقیقه بین اجراها
-    while True:
-        try:
-            print("🔥 اجرای اسکنر ارز دیجیتال با داده‌های واقعی...")
-            print("📡 اتصال به CoinGecko API...\n")
-            result = main()
-            print(f"\n🎯 نتیجه نهایی: {'✅ سیگنال‌هایی پیدا شد!' if result else '⚪ هیچ سیگنال قوی‌ای پیدا نشد.'}")
-            print(f"\n⏳ در حال انتظار {DELAY_SECONDS//60} دقیقه تا اجرای بعدی...")
-            time.sleep(DELAY_SECONDS)
-        except KeyboardInterrupt:
-            print("\n⏹️ اسکنر توسط کاربر متوقف شد.")
-            break
-        except Exception as e:
-            print(f"\n❌ خطای غیرمنتظره: {e}")
-            print("💡 اگر خطای اتصال دیدید، فیلترشکن فعال کنید.")
-            print(f"🔁 تلاش برای ادامه اجرای برنامه پس از {DELAY_SECONDS//60} دقیقه...")
-            time.sleep(DELAY_SECONDS)
-            continue
+    print("🔥 اجرای اسکنر ارز دیجیتال با داده‌های واقعی...")
+    print("💡 اگر خطای اتصال دیدید، فیلترشکن فعال کنید.")
+    # یک نمونه اسکنر برای همه دورها تا کش‌های داده تاریخی و تحلیل بین دورها حفظ شوند
+    scanner = AdvancedCryptoScanner()
+    scheduler = Scheduler(name='crypto_scanner')
+    scheduler.add_job('crypto_scanner', scanner.run_scan, SCAN_INTERVAL)
+    scheduler.run()
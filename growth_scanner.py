@@ -1,76 +1,54 @@
 # اسکنر پتانسیل رشد ارزهای دیجیتال
 import sys
 import time
-import requests
 from datetime import datetime
 from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
+from scanner import circuit_breaker, http_client, market_data, metrics, telegram_dispatcher
+from scanner.market_snapshot import MarketSnapshot
+from scanner.rule_tables import GROWTH_RULES, load_overrides
+from scanner.scheduler import Scheduler
+
+SCAN_LIMIT = 50             # تحلیل top 50
+SCAN_INTERVAL = 600         # 10 دقیقه
+RETRY_INTERVAL = 120
+GROWTH_OVERRIDES = load_overrides('growth')    # پیکربندی بهینه‌شده با python -m scanner.sweep
 
 class GrowthPotentialScanner:
     def __init__(self):
-        self.growth_threshold = 70  # حد آستانه پتانسیل رشد (از 100)
+        self.growth_threshold = GROWTH_OVERRIDES.get('min_score', 70)  # حد آستانه پتانسیل رشد (از 100)
+        self.min_volume = GROWTH_OVERRIDES.get('min_volume', 1000000)
+        self.growth_rules = GROWTH_RULES.with_thresholds(GROWTH_OVERRIDES.get('thresholds', {})).compile()
         
     def send_telegram_alert(self, message):
-        """ارسال هشدار به تلگرام"""
+        """ارسال هشدار به تلگرام (از طریق صف ارسال پس‌زمینه؛ اسکن منتظر تلگرام نمی‌ماند)"""
         if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
             print("⚠️ تنظیمات تلگرام ناقص است.")
             return False
-            
-        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-        data = {
-            "chat_id": TELEGRAM_CHAT_ID,
-            "text": message,
-            "parse_mode": "HTML"
-        }
-        
-        try:
-            response = requests.post(url, data=data, timeout=10)
-            if response.status_code == 200:
-                print("📱 پیام رشد به تلگرام ارسال شد.")
-                return True
-            else:
-                print(f"❌ خطا در ارسال تلگرام: {response.status_code}")
-                return False
-        except Exception as e:
-            print(f"❌ خطا در ارسال تلگرام: {e}")
-            return False
+        if telegram_dispatcher.send(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, message):
+            print("📱 پیام رشد در صف ارسال تلگرام قرار گرفت.")
+            return True
+        return False
 
     def fetch_crypto_data(self):
         """دریافت داده‌های کامل ارزها"""
         print("📡 دریافت داده‌های ارزها برای تحلیل پتانسیل رشد...")
         
-        url = "https://api.coingecko.com/api/v3/coins/markets"
-        params = {
-            'vs_currency': 'usd',
-            'order': 'market_cap_desc',
-            'per_page': 50,  # تحلیل top 50
-            'page': 1,
-            'sparkline': False,
-            'price_change_percentage': '1h,24h,7d'
-        }
+        url, params = market_data.markets_query()
         
         for attempt in range(3):
             try:
-                response = requests.get(url, params=params, timeout=20)
+                with metrics.timed('fetch', 'coingecko'):
+                    response = http_client.get(url, params=params)
                 if response.status_code == 200:
-                    data = response.json()
-                    tokens = []
-                    for coin in data:
-                        tokens.append({
-                            "name": coin['name'],
-                            "symbol": coin['symbol'].upper(),
-                            "price": coin['current_price'],
-                            "volume": coin['total_volume'],
-                            "change_1h": coin.get('price_change_percentage_1h', 0) or 0,
-                            "change_24h": coin.get('price_change_percentage_24h', 0) or 0,
-                            "change_7d": coin.get('price_change_percentage_7d', 0) or 0,
-                            "market_cap": coin['market_cap'],
-                            "rank": coin['market_cap_rank'],
-                            "volume_to_cap": (coin['total_volume'] / coin['market_cap']) * 100 if coin['market_cap'] else 0
-                        })
+                    with metrics.timed('parse', 'coingecko'):
+                        tokens = MarketSnapshot.from_coingecko(response.json()[:SCAN_LIMIT])
                     print(f"✅ {len(tokens)} ارز دریافت شد.")
                     return tokens
                 else:
                     print(f"❌ خطا: کد {response.status_code}")
+            except circuit_breaker.CircuitOpenError as e:
+                print(f"🔌 {e}")
+                return None
             except Exception as e:
                 print(f"❌ تلاش {attempt + 1}: {e}")
                 if attempt < 2:
@@ -79,83 +57,25 @@ class GrowthPotentialScanner:
         return None
 
     def calculate_growth_potential(self, token):
-        """محاسبه پتانسیل رشد بر اساس عوامل مختلف"""
-        score = 0
-        factors = []
-        
-        # عامل 1: روند قیمت (40 امتیاز)
-        if token['change_1h'] > 2:
-            score += 15
-            factors.append("روند 1ساعت مثبت")
-        elif token['change_1h'] > 0:
-            score += 8
-            
-        if token['change_24h'] > 5:
-            score += 15
-            factors.append("رشد 24ساعت قوی")
-        elif token['change_24h'] > 1:
-            score += 10
-            factors.append("رشد 24ساعت متوسط")
-        elif token['change_24h'] > 0:
-            score += 5
-            
-        if token['change_7d'] > 10:
-            score += 10
-            factors.append("روند هفتگی مثبت")
-        elif token['change_7d'] > 0:
-            score += 5
-            
-        # عامل 2: حجم معاملات (25 امتیاز)
-        if token['volume_to_cap'] > 20:  # حجم بالا نسبت به ارزش بازار
-            score += 15
-            factors.append("حجم معاملات بالا")
-        elif token['volume_to_cap'] > 10:
-            score += 10
-            factors.append("حجم معاملات خوب")
-        elif token['volume_to_cap'] > 5:
-            score += 5
-            
-        # عامل 3: رتبه بازار (15 امتیاز)
-        if token['rank'] <= 20:
-            score += 15
-            factors.append("ارز برتر")
-        elif token['rank'] <= 50:
-            score += 10
-            factors.append("ارز معتبر")
-        elif token['rank'] <= 100:
-            score += 5
-            
-        # عامل 4: پتانسیل breakout (20 امتیاز)
-        # اگر تغییر 1 ساعت خیلی بیشتر از 24 ساعت باشد (momentum جدید)
-        if token['change_1h'] > token['change_24h'] / 24 * 2:
-            score += 10
-            factors.append("momentum جدید")
-            
-        # اگر حجم خیلی بالا باشد (whale activity)
-        if token['volume'] > 100000000:  # بیش از 100 میلیون دلار
-            score += 10
-            factors.append("فعالیت نهنگ‌ها")
-        elif token['volume'] > 50000000:
-            score += 5
-            
-        return min(score, 100), factors  # حداکثر 100 امتیاز
+        """محاسبه پتانسیل رشد بر اساس عوامل مختلف (حداکثر 100 امتیاز)"""
+        return self.growth_rules.score_one(token)
 
     def analyze_growth_potential(self, tokens):
         """تحلیل پتانسیل رشد همه ارزها"""
+        tokens = MarketSnapshot.coerce(tokens)
+        # فیلتر اولیه: حداقل حجم و قیمت
+        candidates = tokens.mask((tokens['volume'] >= self.min_volume) & (tokens['price'] > 0))
+        with metrics.timed('scoring'):
+            result = self.growth_rules.evaluate(candidates.columns(GROWTH_RULES.inputs()))
+
         growth_coins = []
-        
-        for token in tokens:
-            # فیلتر اولیه: حداقل حجم و قیمت
-            if token['volume'] < 1000000 or token['price'] <= 0:
-                continue
-                
-            score, factors = self.calculate_growth_potential(token)
-            
+        for i, token in enumerate(candidates):
+            score = int(result.scores[i])
             if score >= self.growth_threshold:
                 growth_coins.append({
                     'token': token,
                     'score': score,
-                    'factors': factors,
+                    'factors': result.labels(i),
                     'timestamp': datetime.now()
                 })
         
@@ -196,14 +116,20 @@ class GrowthPotentialScanner:
         message += f"💡 <i>تحلیل شده: {len(growth_coins)} ارز با پتانسیل بالا</i>"
         return message
 
-    def run_scan(self):
-        """اجرای یک دور اسکن پتانسیل رشد"""
+    def run_scan(self, tokens=None):
+        """
+        اجرای یک دور اسکن پتانسیل رشد
+        tokens: snapshot بازار که زمان‌بند بین اسکنرها به اشتراک می‌گذارد؛ None یعنی دریافت مستقل
+        """
         print(f"\n{'='*60}")
         print(f"🚀 شروع تحلیل پتانسیل رشد - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"{'='*60}")
         
         # دریافت داده‌ها
-        tokens = self.fetch_crypto_data()
+        if tokens is None:
+            tokens = self.fetch_crypto_data()
+        else:
+            tokens = MarketSnapshot.coerce(tokens).head(SCAN_LIMIT)
         if not tokens:
             print("❌ نتوانستم داده‌ای دریافت کنم.")
             return
@@ -236,19 +162,9 @@ class GrowthPotentialScanner:
     def run_auto(self):
         """اجرای خودکار"""
         print("🔥 شروع اسکنر پتانسیل رشد خودکار")
-        print("💡 برای توقف: Ctrl+C")
-        
-        while True:
-            try:
-                self.run_scan()
-                time.sleep(600)  # 10 دقیقه
-            except KeyboardInterrupt:
-                print("\n⏹️ اسکنر توسط کاربر متوقف شد.")
-                break
-            except Exception as e:
-                print(f"\n❌ خطا در اسکن: {e}")
-                print("🔄 ادامه در 2 دقیقه...")
-                time.sleep(120)
+        scheduler = Scheduler(name='growth_scanner')
+        scheduler.add_job('growth_scanner', self.run_scan, SCAN_INTERVAL, retry_interval=RETRY_INTERVAL)
+        scheduler.run()
 
 if __name__ == "__main__":
     scanner = GrowthPotentialScanner()
@@ -139,7 +139,7 @@ def main():
         all_coins = best_result['all']
         # نمایش جدول مقایسه‌ای
         print("\nجدول مقایسه‌ای ارزهای برتر:")
-        headers = ["نام", "نماد", "قیمت CG", "تغییر CG", "حجم CG", "قیمت CMC", "تغییر CMC", "حجم CMC", "تراکنش ETH", "تراکنش BSC", "امتیاز"]
+        headers = ["نام", "نماد", "قیمت CG", "تغییر CG", "حجم CG", "قیمت CMC", "تغییر CMC", "حجم CMC", "تراکنش ETH (24h)", "تراکنش BSC (24h)", "امتیاز"]
         rows = [
             [c['name'], c['symbol'], c['price'], c['cg_change_24h'], c['cg_volume'], c['cmc_price'], c['cmc_change_24h'], c['cmc_volume'], c['eth_tx'], c['bsc_tx'], c['score']]
             for c in all_coins
@@ -158,7 +158,7 @@ def main():
             print(f"قیمت: {best['price']}")
             print(f"تغییر ۲۴ ساعت: {best['cg_change_24h']}% (CG) / {best['cmc_change_24h']}% (CMC)")
             print(f"حجم: {best['cg_volume']} (CG) / {best['cmc_volume']} (CMC)")
-            print(f"تراکنش آنچین: ETH={best['eth_tx']}  BSC={best['bsc_tx']}")
+            print(f"تراکنش آنچین ۲۴ ساعت: ETH={best['eth_tx']}  BSC={best['bsc_tx']}")
             print(f"امتیاز سیگنال: {best['score']}")
         else:
             print("هیچ ارز مناسبی پیدا نشد.")
@@ -193,15 +193,9 @@ def main():
             # ارسال پیام تلگرام برای هر ارز جدید با رشد سریع هولدرها
             from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
             def send_telegram_message(text):
-                import requests
-                if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
-                    return
-                url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-                data = {"chat_id": TELEGRAM_CHAT_ID, "text": text}
-                try:
-                    requests.post(url, data=data, timeout=10)
-                except Exception:
-                    pass
+                # پیام‌های این حلقه در صف پس‌زمینه در چند پیام بزرگ ادغام می‌شوند
+                from scanner import telegram_dispatcher
+                telegram_dispatcher.send(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, text, parse_mode=None)
             for c in holder_growth_coins:
                 # تشخیص منبع داده (اتریوم یا BSC یا کوین‌گکو)
                 data_source = ""
@@ -230,15 +224,15 @@ def main():
         print("\nبرای سیگنال‌گیری پیشرفته، config.py و کلیدها را وارد کن!")
 
 def send_telegram_test():
-    import requests
+    from scanner import http_client
     from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
     if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
         print("توکن یا chat_id تلگرام تنظیم نشده.")
         return
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+    url = http_client.api_url('telegram', f'/bot{TELEGRAM_BOT_TOKEN}/sendMessage')
     data = {"chat_id": TELEGRAM_CHAT_ID, "text": "✅ پیام تستی از اسکنر ارز دیجیتال (meme_coin_tracker)"}
     try:
-        resp = requests.post(url, data=data, timeout=10)
+        resp = http_client.post(url, data=data)
         if resp.status_code == 200:
             print("پیام تستی با موفقیت به تلگرام ارسال شد.")
         else:
@@ -246,12 +240,10 @@ def send_telegram_test():
     except Exception as e:
         print(f"خطا در ارسال پیام تستی: {e}")
 
+SCAN_INTERVAL = 300  # هر ۵ دقیقه
+
 if __name__ == "__main__":
-    import time
-    print("اجرای خودکار هر ۳ دقیقه فعال شد. برای توقف Ctrl+C را بزنید.")
-    while True:
-        try:
-            main()
-        except Exception as e:
-            print(f"خطا در اجرای تحلیل: {e}")
-        time.sleep(300)  # هر ۵ دقیقه برای تست
+    from scanner.scheduler import Scheduler
+    scheduler = Scheduler(name='meme_coin_tracker')
+    scheduler.add_job('meme_coin_tracker', main, SCAN_INTERVAL)
+    scheduler.run()
@@ -0,0 +1,42 @@
+# اجرای همه اسکنرها در یک پروسه با زمان‌بند مشترک
+# snapshot بازار کوین‌گکو در هر تیک یک‌بار دریافت و بین اسکنرهایی که به آن نیاز دارند تقسیم می‌شود
+import sys
+
+import auto_crypto_scanner
+import crypto_scanner
+import growth_scanner
+import main as meme_coin_tracker
+from scanner import market_data, universe
+from scanner.scheduler import Scheduler
+
+
+def build_scheduler() -> Scheduler:
+    crypto = crypto_scanner.AdvancedCryptoScanner()
+    growth = growth_scanner.GrowthPotentialScanner()
+    auto = auto_crypto_scanner.AutoCryptoScanner()
+    auto.start_live_feed()
+
+    def fetch_markets():
+        # صفحه اول coins/markets (250 ارز به ترتیب ارزش بازار)؛ هر اسکنر از ابتدای آن برمی‌دارد
+        tokens = universe.fetch_coingecko_top(market_data.MARKETS_PER_PAGE, crypto._coingecko_key())
+        return tokens if len(tokens) else None
+
+    scheduler = Scheduler(name='pump')
+    scheduler.add_source('markets', fetch_markets)
+    scheduler.add_job('crypto_scanner', crypto.run_scan, crypto_scanner.SCAN_INTERVAL, source='markets')
+    scheduler.add_job('auto_crypto_scanner', auto.run_scan, auto_crypto_scanner.SCAN_INTERVAL,
+                      source='markets', retry_interval=auto_crypto_scanner.RETRY_INTERVAL)
+    scheduler.add_job('growth_scanner', growth.run_scan, growth_scanner.SCAN_INTERVAL,
+                      source='markets', retry_interval=growth_scanner.RETRY_INTERVAL)
+    scheduler.add_job('meme_coin_tracker', meme_coin_tracker.main, meme_coin_tracker.SCAN_INTERVAL)
+    return scheduler
+
+
+if __name__ == "__main__":
+    scheduler = build_scheduler()
+    if "--list" in sys.argv:
+        for job in scheduler.jobs.values():
+            print(f"{job.name}: هر {job.interval:g} ثانیه" + (f" (داده: {job.source})" if job.source else ""))
+    else:
+        scheduler.run()
+        print(scheduler.stats())
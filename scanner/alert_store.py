@@ -0,0 +1,157 @@
+"""
+ماژول alert_store.py
+ذخیره‌گاه ایندکس‌دار هشدارهای ارسال‌شده برای جلوگیری از هشدار تکراری
+کلید هر هشدار (symbol, timeframe, source, day) است؛ بررسی تکراری بودن یک جستجوی کلید اصلی است
+و دیگر لازم نیست کل signals_log.csv هنگام راه‌اندازی در حافظه خوانده شود
+- روزهای قدیمی‌تر از RETENTION_DAYS به‌صورت دوره‌ای حذف می‌شوند
+- import_csv تاریخچه signals_log.csv موجود را یک‌بار وارد می‌کند
+
+وارد کردن دستی:
+    python -m scanner.alert_store import signals_log.csv
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+ALERT_STORE_DB = 'alerts.db'
+RETENTION_DAYS = 30
+PRUNE_EVERY = 200
+DAY_FORMAT = '%Y-%m-%d'
+
+
+def _today() -> str:
+    return datetime.now().strftime(DAY_FORMAT)
+
+
+class AlertStore:
+    """ثبت و بررسی هشدارهای ارسال‌شده هر روز"""
+
+    def __init__(self, db_path: str = ALERT_STORE_DB, retention_days: int = RETENTION_DAYS):
+        self.db_path = db_path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._writes = 0
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS alerts ('
+            ' symbol TEXT NOT NULL,'
+            ' timeframe TEXT NOT NULL,'
+            ' source TEXT NOT NULL,'
+            ' day TEXT NOT NULL,'
+            ' first_seen TEXT NOT NULL,'
+            ' PRIMARY KEY (symbol, timeframe, source, day)) WITHOUT ROWID'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS alerts_day ON alerts (day)')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS imports (path TEXT PRIMARY KEY, rows INTEGER, imported_at TEXT)')
+
+    def seen(self, symbol: str, timeframe: str, source: str, day: Optional[str] = None) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT 1 FROM alerts WHERE symbol = ? AND timeframe = ? AND source = ? AND day = ?',
+                (symbol, timeframe, source, day or _today())).fetchone()
+        return row is not None
+
+    def mark(self, symbol: str, timeframe: str, source: str, when: Optional[str] = None) -> bool:
+        """
+        ثبت هشدار؛ when زمان به قالب 'YYYY-MM-DD HH:MM:SS' است (پیش‌فرض: اکنون)
+        True یعنی این کلید تازه ثبت شد و False یعنی قبلا (شاید توسط پروسه دیگری) ثبت شده بود
+        """
+        when = when or datetime.now().strftime(f'{DAY_FORMAT} %H:%M:%S')
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT OR IGNORE INTO alerts (symbol, timeframe, source, day, first_seen) VALUES (?, ?, ?, ?, ?)',
+                (symbol, timeframe, source, when[:10], when))
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                self._prune()
+            return cursor.rowcount == 1
+
+    def prune(self, retention_days: Optional[int] = None) -> int:
+        """حذف روزهای قدیمی‌تر از retention_days؛ تعداد ردیف‌های حذف‌شده را برمی‌گرداند"""
+        with self._lock:
+            return self._prune(retention_days)
+
+    def _prune(self, retention_days: Optional[int] = None) -> int:
+        days = self.retention_days if retention_days is None else retention_days
+        cutoff = (datetime.now() - timedelta(days=days)).strftime(DAY_FORMAT)
+        return self._conn.execute('DELETE FROM alerts WHERE day < ?', (cutoff,)).rowcount
+
+    def import_csv(self, path: str, force: bool = False) -> int:
+        """
+        وارد کردن یک‌باره signals_log.csv (ستون‌های time, symbol, timeframe, source)
+        هر فایل فقط یک‌بار وارد می‌شود مگر force؛ ردیف‌های خارج از بازه نگهداری نادیده گرفته می‌شوند
+        """
+        path = os.path.abspath(path)
+        if not os.path.exists(path):
+            return 0
+        with self._lock:
+            if not force and self._conn.execute('SELECT 1 FROM imports WHERE path = ?', (path,)).fetchone():
+                return 0
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).strftime(DAY_FORMAT)
+        rows = []
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                when = row.get('time') or ''
+                if len(when) < 10 or when[:10] < cutoff or not row.get('symbol'):
+                    continue
+                rows.append((row['symbol'], row.get('timeframe') or '', row.get('source') or '', when[:10], when))
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO alerts (symbol, timeframe, source, day, first_seen) VALUES (?, ?, ?, ?, ?)',
+                    rows)
+                self._conn.execute('INSERT OR REPLACE INTO imports (path, rows, imported_at) VALUES (?, ?, ?)',
+                                   (path, len(rows), datetime.now().isoformat(timespec='seconds')))
+                self._conn.execute('COMMIT')
+            except sqlite3.Error:
+                self._conn.execute('ROLLBACK')
+                raise
+        return len(rows)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM alerts').fetchone()[0]
+
+
+_store: Optional[AlertStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> AlertStore:
+    """ذخیره‌گاه مشترک این پروسه (روی فایل ALERT_STORE_DB)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = AlertStore(ALERT_STORE_DB)
+    return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="مدیریت ذخیره‌گاه هشدارهای ارسال‌شده")
+    sub = parser.add_subparsers(dest='mode', required=True)
+    imp = sub.add_parser('import', help="وارد کردن signals_log.csv")
+    imp.add_argument('path')
+    imp.add_argument('--force', action='store_true')
+    prune = sub.add_parser('prune', help="حذف روزهای قدیمی")
+    prune.add_argument('--days', type=int, default=RETENTION_DAYS)
+    args = parser.parse_args()
+    store = get_store()
+    if args.mode == 'import':
+        print(f"✅ {store.import_csv(args.path, force=args.force)} ردیف وارد شد.")
+    else:
+        print(f"🧹 {store.prune(args.days)} ردیف حذف شد.")
+    print(f"📦 {store.count()} هشدار در {store.db_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,464 @@
+"""
+ماژول backtest.py
+بک‌تست برداری استراتژی‌های امتیازدهی روی ماتریس (زمان × ارز) از داده‌های تاریخی
+- Panel: برای هر فیلد (price، volume، change_24h، rsi، ...) یک ماتریس float64 با شکل (T, N)
+- جدول‌های rule_tables بدون تغییر روی کل ماتریس (به صورت تکه‌های زمانی) ارزیابی می‌شوند؛
+  هیچ حلقه پایتونی روی ارز یا زمان وجود ندارد
+- برای ارزهای هشداردار (امتیاز >= آستانه و top_n هر لحظه) بازده آینده در چند افق، نرخ موفقیت،
+  بازده مازاد نسبت به میانگین بازار، بیشترین افت در طول نگهداری و افت سرمایه پرتفوی گزارش می‌شود
+
+اجرا:
+    python -m scanner.backtest --strategy coin_score --synthetic 8760x500
+    python -m scanner.backtest --strategy growth --input history.csv   (ستون‌های time, id, price, volume, market_cap)
+    python -m scanner.backtest --strategy coin_score --tuned          (با پیکربندی strategy_overrides.json)
+"""
+import argparse
+import time
+import warnings
+from dataclasses import dataclass, field, replace
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from scanner.market_snapshot import MarketSnapshot
+from scanner.rule_tables import COIN_SCORE_RULES, GROWTH_RULES, advanced_score_rules, load_overrides
+from scanner.scoring_rules import CompiledRules, RuleTable
+
+HORIZONS = {'1h': 3600, '24h': 24 * 3600, '7d': 7 * 24 * 3600}
+CHANGE_FIELDS = {'change_1h': 3600, 'change_24h': 24 * 3600, 'change_7d': 7 * 24 * 3600}
+CHUNK_ROWS = 2048                  # تعداد ردیف زمانی در هر تکه ارزیابی (محدود کردن حافظه موقت)
+RSI_WINDOW = 14
+MACD_FAST, MACD_SLOW = 12, 26
+
+
+def _volume_to_cap(volume: np.ndarray, market_cap: np.ndarray) -> np.ndarray:
+    valid = (market_cap != 0) & ~np.isnan(market_cap)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(valid, volume / market_cap * 100, 0.0)
+
+
+def _ranks(market_cap: np.ndarray) -> np.ndarray:
+    """رتبه هر ارز در هر ردیف بر اساس ارزش بازار (1 = بزرگ‌ترین؛ NaN برای ارزش نامعلوم)"""
+    filled = np.where(np.isnan(market_cap), -np.inf, market_cap)
+    order = np.argsort(-filled, axis=1, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, market_cap.shape[1] + 1)[None, :], axis=1)
+    return np.where(np.isnan(market_cap), np.nan, ranks.astype(np.float64))
+
+
+def _rsi(prices: pd.DataFrame, window: int = RSI_WINDOW) -> np.ndarray:
+    """RSI با میانگین Wilder، هم‌ارز StreamingRSI در indicators.py"""
+    diff = prices.diff().fillna(0.0)
+    up = diff.clip(lower=0).ewm(alpha=1.0 / window, adjust=False, min_periods=window).mean()
+    down = (-diff).clip(lower=0).ewm(alpha=1.0 / window, adjust=False, min_periods=window).mean()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + up.to_numpy() / down.to_numpy())
+    return np.where(down.to_numpy() == 0, 100.0, rsi)
+
+
+def _macd(prices: pd.DataFrame) -> np.ndarray:
+    fast = prices.ewm(span=MACD_FAST, adjust=False, min_periods=MACD_FAST).mean()
+    slow = prices.ewm(span=MACD_SLOW, adjust=False, min_periods=MACD_SLOW).mean()
+    return (fast - slow).to_numpy()
+
+
+@dataclass
+class Panel:
+    """داده‌های تاریخی به صورت ماتریس‌های (T, N)؛ ردیف‌ها با فاصله ثابت step ثانیه"""
+    times: np.ndarray                      # datetime64[s] با شکل (T,)
+    coins: np.ndarray                      # شناسه ارزها با شکل (N,)
+    fields: Dict[str, np.ndarray]
+    step: float
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.times), len(self.coins)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.fields[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.fields
+
+    def steps(self, seconds: float) -> int:
+        """تعداد ردیف معادل seconds ثانیه (0 اگر کوتاه‌تر از یک ردیف باشد)"""
+        return int(round(seconds / self.step))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(v.nbytes for v in self.fields.values())
+
+    @classmethod
+    def from_prices(cls, times, coins, price: np.ndarray, volume: Optional[np.ndarray] = None,
+                    market_cap: Optional[np.ndarray] = None, step: Optional[float] = None,
+                    extra: Optional[Mapping[str, np.ndarray]] = None, indicators: bool = True) -> 'Panel':
+        """
+        ساخت Panel از ماتریس قیمت؛ تغییرات 1h/24h/7d، رتبه، volume_to_cap و RSI/MACD
+        (در تایم‌فریم خود Panel) از روی قیمت محاسبه می‌شوند مگر اینکه در extra آمده باشند
+        """
+        times = np.asarray(times, dtype='datetime64[s]')
+        price = np.asarray(price, dtype=np.float64)
+        if step is None:
+            step = float(np.median(np.diff(times).astype(np.float64))) if len(times) > 1 else 3600.0
+        shape = price.shape
+        fields = {'price': price}
+        fields['volume'] = np.full(shape, np.nan) if volume is None else np.asarray(volume, dtype=np.float64)
+        fields['market_cap'] = np.full(shape, np.nan) if market_cap is None else np.asarray(market_cap, dtype=np.float64)
+        for name, values in (extra or {}).items():
+            fields[name] = np.asarray(values, dtype=np.float64)
+        for name, seconds in CHANGE_FIELDS.items():
+            if name in fields:
+                continue
+            lag = int(round(seconds / step))
+            change = np.full(shape, np.nan)
+            if 0 < lag < shape[0]:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    change[lag:] = (price[lag:] / price[:-lag] - 1.0) * 100.0
+            fields[name] = change
+        if 'rank' not in fields:
+            fields['rank'] = _ranks(fields['market_cap'])
+        if 'volume_to_cap' not in fields:
+            fields['volume_to_cap'] = _volume_to_cap(fields['volume'], fields['market_cap'])
+        if indicators:
+            frame = pd.DataFrame(price)
+            fields.setdefault('rsi', _rsi(frame))
+            fields.setdefault('macd', _macd(frame))
+        return cls(times, np.asarray(coins, dtype=object), fields, float(step))
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, time: str = 'time', coin: str = 'id',
+                   step: Optional[float] = None, indicators: bool = True) -> 'Panel':
+        """ساخت Panel از جدول بلند (یک ردیف برای هر زمان و ارز)"""
+        frame = frame.copy()
+        frame[time] = pd.to_datetime(frame[time])
+        values = [c for c in frame.columns if c not in (time, coin) and pd.api.types.is_numeric_dtype(frame[c])]
+        wide = frame.pivot_table(index=time, columns=coin, values=values, aggfunc='last').sort_index()
+        times = wide.index.values
+        coins = wide.columns.get_level_values(1).unique().to_numpy()
+        matrices = {name: wide[name].reindex(columns=coins).to_numpy(dtype=np.float64) for name in values}
+        price = matrices.pop('price')
+        return cls.from_prices(times, coins, price, matrices.pop('volume', None), matrices.pop('market_cap', None),
+                               step=step, extra=matrices, indicators=indicators)
+
+    @classmethod
+    def from_snapshots(cls, snapshots: Sequence[Tuple[object, MarketSnapshot]], key: str = 'id',
+                       step: Optional[float] = None, indicators: bool = True) -> 'Panel':
+        """ساخت Panel از snapshotهای ذخیره‌شده بازار [(زمان، MarketSnapshot)، ...]"""
+        frames = []
+        for ts, snapshot in snapshots:
+            snapshot = MarketSnapshot.coerce(snapshot)
+            numeric = ['price', 'volume', 'market_cap', 'rank', 'change_1h', 'change_24h', 'change_7d']
+            frame = pd.DataFrame(snapshot.columns(numeric))
+            frame['id'] = snapshot[key]
+            frame['time'] = ts
+            frames.append(frame)
+        return cls.from_frame(pd.concat(frames, ignore_index=True), step=step, indicators=indicators)
+
+    def save(self, path: str):
+        np.savez(path, times=self.times.astype(np.int64), coins=self.coins.astype(str),
+                 step=np.array(self.step), **{f'field.{k}': v for k, v in self.fields.items()})
+
+    @classmethod
+    def load(cls, path: str) -> 'Panel':
+        with np.load(path, allow_pickle=False) as data:
+            fields = {k[len('field.'):]: data[k] for k in data.files if k.startswith('field.')}
+            return cls(data['times'].astype('datetime64[s]'), data['coins'].astype(object),
+                       fields, float(data['step']))
+
+
+def synthetic_panel(n_times: int = 24 * 365, n_coins: int = 500, step: float = 3600,
+                    seed: int = 0) -> Panel:
+    """داده ساختگی (گام تصادفی با رژیم‌های momentum) برای تست و بنچمارک"""
+    rng = np.random.default_rng(seed)
+    vol = rng.uniform(0.004, 0.03, n_coins)
+    # روند کندِ تصادفی برای هر ارز تا بازده‌ها خودهمبستگی (momentum) داشته باشند
+    drift = pd.DataFrame(rng.standard_normal((n_times, n_coins))).ewm(halflife=24).mean().to_numpy()
+    returns = (0.5 * drift + rng.standard_normal((n_times, n_coins))) * vol
+    price = rng.lognormal(0, 2, n_coins) * np.exp(np.cumsum(returns, axis=0))
+    supply = rng.lognormal(18, 1.5, n_coins)
+    market_cap = price * supply
+    turnover = rng.lognormal(-2.5, 0.8, n_coins) * (1 + 20 * np.abs(returns))
+    volume = market_cap * turnover
+    times = np.datetime64('2024-01-01T00:00:00') + (np.arange(n_times) * step).astype('timedelta64[s]')
+    coins = np.array([f'coin-{i}' for i in range(n_coins)], dtype=object)
+    return Panel.from_prices(times, coins, price, volume, market_cap, step=step)
+
+
+@dataclass
+class Strategy:
+    """یک جدول امتیازدهی به همراه فیلتر اولیه و قاعده انتخاب هشدارهای اسکنر مربوط"""
+    name: str
+    rules: RuleTable
+    threshold: float
+    top_n: Optional[int] = 5
+    min_volume: float = 0.0
+    min_market_cap: Optional[float] = None
+    max_market_cap: Optional[float] = None
+    require_price: bool = True
+
+    def compile(self) -> CompiledRules:
+        return self.rules.compile()
+
+
+def advanced_strategy(settings: Mapping) -> Strategy:
+    """AdvancedCryptoScanner: فیلتر _validate_token و امتیاز >= 40 (settings همان SETTINGS است)"""
+    rules = advanced_score_rules(settings['max_drawdown'], settings['rsi_oversold'], settings['rsi_overbought'])
+    return Strategy('advanced', rules, threshold=40, top_n=5,
+                    min_volume=settings['min_volume'], min_market_cap=settings['min_market_cap'],
+                    max_market_cap=settings['max_market_cap'], require_price=False)
+
+
+STRATEGIES = {
+    # calculate_coin_score / find_best_coins در crypto_scanner.py
+    'coin_score': Strategy('coin_score', COIN_SCORE_RULES, threshold=30, top_n=5, min_volume=1000000),
+    # GrowthPotentialScanner (پیام تلگرام 5 ارز برتر را می‌فرستد)
+    'growth': Strategy('growth', GROWTH_RULES, threshold=70, top_n=5, min_volume=1000000),
+}
+
+
+def build_strategy(name: str, overrides: Optional[Mapping] = None,
+                   settings: Optional[Mapping] = None) -> Strategy:
+    """
+    استراتژی name با اعمال overrides (همان شکل load_overrides)، هم‌ارز کاری که اسکنر هنگام import می‌کند
+    settings (SETTINGS پایه crypto_scanner) فقط برای 'advanced' لازم است
+    """
+    overrides = overrides or {}
+    if name == 'advanced':
+        strategy = advanced_strategy({**settings, **overrides.get('settings', {})})
+    else:
+        strategy = STRATEGIES[name]
+        strategy = replace(strategy, min_volume=overrides.get('min_volume', strategy.min_volume))
+    thresholds = overrides.get('thresholds')
+    return replace(strategy, rules=strategy.rules.with_thresholds(thresholds) if thresholds else strategy.rules,
+                   threshold=overrides.get('min_score', strategy.threshold))
+
+
+def score_panel(panel: Panel, rules: CompiledRules, chunk_rows: int = CHUNK_ROWS) -> np.ndarray:
+    """امتیاز همه ارزها در همه زمان‌ها با شکل (T, N)"""
+    names = rules.table.inputs()
+    T, N = panel.shape
+    scores = np.empty((T, N), dtype=np.float64)
+    for start in range(0, T, chunk_rows):
+        stop = min(T, start + chunk_rows)
+        columns = {name: panel[name][start:stop].ravel() for name in names}
+        scores[start:stop] = rules.evaluate(columns).scores.reshape(stop - start, N)
+    return scores
+
+
+def eligible_mask(panel: Panel, strategy: Strategy) -> np.ndarray:
+    with np.errstate(invalid='ignore'):
+        mask = panel['volume'] >= strategy.min_volume
+        if strategy.require_price:
+            mask &= panel['price'] > 0
+        if strategy.min_market_cap is not None:
+            mask &= panel['market_cap'] >= strategy.min_market_cap
+        if strategy.max_market_cap is not None:
+            mask &= panel['market_cap'] <= strategy.max_market_cap
+    return mask & ~np.isnan(panel['price'])
+
+
+def rank_order(scores: np.ndarray) -> np.ndarray:
+    """ترتیب ستون‌های هر ردیف بر اساس امتیاز نزولی (پایدار: در امتیاز برابر، ستون جلوتر)"""
+    return np.argsort(-scores, axis=1, kind='stable')
+
+
+def select_alerts(scores: np.ndarray, eligible: np.ndarray, threshold: float,
+                  top_n: Optional[int] = None, order: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    ماسک هشدارها: امتیاز >= آستانه و (در صورت top_n) جزو top_n امتیاز همان ردیف
+    order (rank_order همین امتیازها) برای ارزیابی چند فیلتر/آستانه روی یک امتیاز یک‌بار محاسبه می‌شود
+    """
+    alerts = eligible & (scores >= threshold)
+    if top_n is None or top_n >= scores.shape[1]:
+        return alerts
+    # فقط ردیف‌هایی که بیش از top_n هشدار دارند محدود می‌شوند
+    crowded = np.flatnonzero(np.count_nonzero(alerts, axis=1) > top_n)
+    if len(crowded) and order is not None:
+        # اولین top_n هشدار در ترتیب امتیاز هر ردیف
+        rows_order = order[crowded]
+        ranked = np.take_along_axis(alerts[crowded], rows_order, axis=1)
+        ranked &= np.cumsum(ranked, axis=1) <= top_n
+        top = np.zeros((len(crowded), scores.shape[1]), dtype=bool)
+        np.put_along_axis(top, rows_order, ranked, axis=1)
+        alerts[crowded] = top
+    elif len(crowded):
+        # مرتب‌سازی پایدار: در امتیاز برابر، ارز ستون جلوتر (مثل sort پایدار اسکنرها) انتخاب می‌شود
+        ranked = np.where(alerts[crowded], scores[crowded], -np.inf)
+        keep = np.argsort(-ranked, axis=1, kind='stable')[:, :top_n]
+        top = np.zeros((len(crowded), scores.shape[1]), dtype=bool)
+        np.put_along_axis(top, keep, True, axis=1)
+        alerts[crowded] &= top
+    return alerts
+
+
+def forward_returns(price: np.ndarray, steps: int) -> np.ndarray:
+    """بازده نسبی از ردیف t تا t+steps (NaN برای انتهای بازه)"""
+    result = np.full(price.shape, np.nan)
+    if 0 < steps < price.shape[0]:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result[:-steps] = price[steps:] / price[:-steps] - 1.0
+    return result
+
+
+def _adverse_excursion(price: np.ndarray, rows: np.ndarray, cols: np.ndarray, steps: int) -> np.ndarray:
+    """بیشترین افت قیمت از نقطه ورود در ردیف‌های t+1..t+steps برای هر هشدار"""
+    offsets = np.arange(1, steps + 1)
+    index = rows[:, None] + offsets[None, :]
+    valid = index < price.shape[0]
+    window = price[np.minimum(index, price.shape[0] - 1), cols[:, None]]
+    window = np.where(valid, window, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)      # پنجره تماما NaN
+        return np.minimum(np.nanmin(window, axis=1) / price[rows, cols] - 1.0, 0.0)
+
+
+def max_drawdown(equity: np.ndarray) -> float:
+    if len(equity) == 0:
+        return 0.0
+    peak = np.maximum.accumulate(equity)
+    return float(np.min(equity / peak - 1.0))
+
+
+@dataclass
+class BacktestResult:
+    strategy: str
+    shape: Tuple[int, int]
+    alerts: np.ndarray = field(repr=False)
+    scores: np.ndarray = field(repr=False)
+    horizons: Dict[str, Dict[str, float]]
+    equity: np.ndarray = field(repr=False)
+    elapsed: float = 0.0
+
+    @property
+    def max_drawdown(self) -> float:
+        return max_drawdown(self.equity)
+
+    @property
+    def total_return(self) -> float:
+        return float(self.equity[-1] - 1.0) if len(self.equity) else 0.0
+
+    def summary(self) -> Dict:
+        return {
+            'strategy': self.strategy,
+            'times': self.shape[0],
+            'coins': self.shape[1],
+            'alerts': int(self.alerts.sum()),
+            'total_return': self.total_return,
+            'max_drawdown': self.max_drawdown,
+            'horizons': self.horizons,
+            'elapsed': self.elapsed,
+        }
+
+    def report(self) -> str:
+        lines = [f"📊 بک‌تست {self.strategy}: {self.shape[0]} زمان × {self.shape[1]} ارز، "
+                 f"{int(self.alerts.sum())} هشدار ({self.elapsed:.2f} ثانیه)"]
+        for name, stats in self.horizons.items():
+            if not stats['count']:
+                lines.append(f"   {name}: بدون هشدار قابل ارزیابی")
+                continue
+            lines.append(f"   {name}: میانگین {stats['mean'] * 100:+.2f}% | میانه {stats['median'] * 100:+.2f}% | "
+                         f"موفقیت {stats['hit_rate'] * 100:.1f}% | مازاد {stats['excess'] * 100:+.2f}% | "
+                         f"افت میانگین {stats['mean_adverse'] * 100:.2f}% | بدترین افت {stats['worst_adverse'] * 100:.2f}%")
+        lines.append(f"   پرتفوی (بازچینی هر ردیف): بازده کل {self.total_return * 100:+.1f}% | "
+                     f"بیشترین افت سرمایه {self.max_drawdown * 100:.1f}%")
+        return "\n".join(lines)
+
+
+def benchmark_returns(fwd: np.ndarray, eligible: np.ndarray) -> np.ndarray:
+    """میانگین بازده همه ارزهای واجد شرایط در هر ردیف (مبنای مقایسه)"""
+    held = eligible & ~np.isnan(fwd)
+    counts = np.count_nonzero(held, axis=1)
+    return np.divide(np.where(held, fwd, 0.0).sum(axis=1), counts, out=np.zeros(len(counts)), where=counts > 0)
+
+
+def horizon_stats(price: np.ndarray, alerts: np.ndarray, eligible: np.ndarray, steps: int,
+                  fwd: Optional[np.ndarray] = None, benchmark: Optional[np.ndarray] = None) -> Dict[str, float]:
+    """fwd و benchmark (forward_returns و benchmark_returns) در صورت ارزیابی چند پیکربندی از پیش محاسبه می‌شوند"""
+    fwd = forward_returns(price, steps) if fwd is None else fwd
+    rows, cols = np.nonzero(alerts & ~np.isnan(fwd))
+    if not len(rows):
+        return {'steps': steps, 'count': 0}
+    values = fwd[rows, cols]
+    benchmark = benchmark_returns(fwd, eligible) if benchmark is None else benchmark
+    adverse = _adverse_excursion(price, rows, cols, steps)
+    return {
+        'steps': steps,
+        'count': int(len(values)),
+        'mean': float(values.mean()),
+        'median': float(np.median(values)),
+        'hit_rate': float((values > 0).mean()),
+        'excess': float((values - benchmark[rows]).mean()),
+        'mean_adverse': float(np.nanmean(adverse)),
+        'worst_adverse': float(np.nanmin(adverse)),
+    }
+
+
+def equity_curve(price: np.ndarray, alerts: np.ndarray, fwd: Optional[np.ndarray] = None) -> np.ndarray:
+    """پرتفوی هم‌وزن ارزهای هشداردار هر ردیف که یک ردیف نگه داشته می‌شود (fwd: forward_returns یک‌ردیفی)"""
+    fwd = forward_returns(price, 1) if fwd is None else fwd
+    held = alerts & ~np.isnan(fwd)
+    counts = held.sum(axis=1)
+    step_returns = np.divide(np.where(held, fwd, 0.0).sum(axis=1), counts,
+                             out=np.zeros(len(counts)), where=counts > 0)
+    return np.cumprod(1.0 + step_returns)
+
+
+def run_backtest(panel: Panel, strategy: Strategy, horizons: Mapping[str, float] = HORIZONS,
+                 rules: Optional[CompiledRules] = None) -> BacktestResult:
+    started = time.perf_counter()
+    rules = rules or strategy.compile()
+    scores = score_panel(panel, rules)
+    eligible = eligible_mask(panel, strategy)
+    alerts = select_alerts(scores, eligible, strategy.threshold, strategy.top_n)
+    price = panel['price']
+    stats = {}
+    for name, seconds in horizons.items():
+        steps = panel.steps(seconds)
+        if steps >= 1:
+            stats[name] = horizon_stats(price, alerts, eligible, steps)
+    equity = equity_curve(price, alerts)
+    return BacktestResult(strategy.name, panel.shape, alerts, scores, stats, equity,
+                          time.perf_counter() - started)
+
+
+def load_panel(path: str) -> Panel:
+    if path.endswith('.npz'):
+        return Panel.load(path)
+    return Panel.from_frame(pd.read_csv(path))
+
+
+def add_panel_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--input', help="فایل CSV بلند (time, id, price, volume, market_cap, ...) یا Panel.npz")
+    parser.add_argument('--synthetic', default='8760x500', help="داده ساختگی به شکل TxN اگر --input داده نشود")
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def panel_from_args(args) -> Panel:
+    started = time.perf_counter()
+    if args.input:
+        panel = load_panel(args.input)
+    else:
+        n_times, n_coins = (int(x) for x in args.synthetic.lower().split('x'))
+        panel = synthetic_panel(n_times, n_coins, seed=args.seed)
+    print(f"📦 Panel {panel.shape[0]}×{panel.shape[1]} ({panel.nbytes / 1e6:.0f} MB) "
+          f"در {time.perf_counter() - started:.2f} ثانیه آماده شد.")
+    return panel
+
+
+def main():
+    parser = argparse.ArgumentParser(description="بک‌تست برداری استراتژی‌های امتیازدهی")
+    parser.add_argument('--strategy', choices=['advanced'] + list(STRATEGIES), default='coin_score')
+    parser.add_argument('--tuned', action='store_true', help="اعمال پیکربندی بهینه‌شده strategy_overrides.json")
+    add_panel_arguments(parser)
+    args = parser.parse_args()
+    panel = panel_from_args(args)
+    settings = None
+    if args.strategy == 'advanced':
+        from crypto_scanner import SETTINGS as settings
+    overrides = load_overrides(args.strategy) if args.tuned else None
+    print(run_backtest(panel, build_strategy(args.strategy, overrides, settings)).report())
+
+
+if __name__ == '__main__':
+    main()
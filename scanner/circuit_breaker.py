@@ -0,0 +1,218 @@
+"""
+ماژول circuit_breaker.py
+قطع‌کننده مدار (circuit breaker) برای هر سرویس: وقتی یک API خراب یا کند است، درخواست‌های بعدی
+به جای طی کردن کل زنجیره تلاش مجدد و انتظار، در چند میکروثانیه با CircuitOpenError رد می‌شوند
+- closed: درخواست‌ها عادی ارسال و نتیجه آن‌ها در پنجره WINDOW_SECONDS ثبت می‌شود؛ اگر حداقل MIN_CALLS
+  درخواست ثبت شده باشد و نرخ خطا (خطای اتصال/timeout یا 5xx) یا نرخ درخواست‌های کند از آستانه بگذرد مدار باز می‌شود
+- open: همه درخواست‌ها فوراً رد می‌شوند تا پایان مدت باز بودن (با هر بار شکست دوباره دو برابر می‌شود)
+- half_open: HALF_OPEN_PROBES درخواست آزمایشی عبور می‌کند؛ موفقیت مدار را می‌بندد و شکست دوباره بازش می‌کند
+پاسخ 429 خنثی است (rate_limiter جداگانه آن را مدیریت می‌کند)
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import requests
+
+from scanner import metrics
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+WINDOW_SECONDS = 60           # پنجره محاسبه نرخ خطا و کندی
+MIN_CALLS = 10                # حداقل درخواست در پنجره برای تصمیم‌گیری
+ERROR_RATE = 0.5
+SLOW_RATE = 0.5
+SLOW_CALL_SECONDS = 10.0      # درخواستی که (با تلاش‌های مجدد داخلی) بیش از این طول بکشد کند است
+OPEN_SECONDS = 30             # مدت باز ماندن مدار پس از اولین قطع
+MAX_OPEN_SECONDS = 300
+HALF_OPEN_PROBES = 1
+
+# آستانه کندی مخصوص هر سرویس (ثانیه)
+SLOW_CALL_OVERRIDES = {
+    'etherscan': 15.0,
+    'bscscan': 15.0,
+}
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """درخواست به سرویسی که مدارش باز است (بدون ارسال به شبکه)"""
+
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"مدار {provider} باز است؛ تلاش دوباره تا {retry_in:.0f} ثانیه دیگر")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, window: float = WINDOW_SECONDS, min_calls: int = MIN_CALLS,
+                 error_rate: float = ERROR_RATE, slow_rate: float = SLOW_RATE,
+                 slow_call: float = SLOW_CALL_SECONDS, open_seconds: float = OPEN_SECONDS,
+                 max_open_seconds: float = MAX_OPEN_SECONDS, probes: int = HALF_OPEN_PROBES):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.probes = probes
+        self._state = CLOSED
+        self._calls = deque()          # (زمان، شکست، کند)
+        self._failures = 0
+        self._slow = 0
+        self._open_until = 0.0
+        self._cooldown = open_seconds
+        self._inflight_probes = 0
+        self._lock = threading.Lock()
+        self.counters = {'opened': 0, 'rejected': 0}
+        metrics.CIRCUIT_STATE.set(0, name)
+
+    # --- رابط عمومی ---
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def allow(self) -> bool:
+        """آیا درخواست می‌تواند ارسال شود؛ در half_open یک سهم آزمایشی رزرو می‌شود که با record آزاد می‌شود"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._inflight_probes < self.probes:
+                self._inflight_probes += 1
+                return True
+            self.counters['rejected'] += 1
+            return False
+
+    def check(self) -> None:
+        """مثل allow ولی با CircuitOpenError به جای False"""
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_in())
+
+    def record(self, ok: Optional[bool], seconds: float = 0.0) -> None:
+        """
+        ثبت نتیجه یک درخواست مجاز‌شده با allow (درخواستی که به نتیجه نرسید باید با release آزاد شود)
+        ok=True موفق، False شکست (خطای اتصال/5xx)، None خنثی (مثل 429)
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            if state == HALF_OPEN:
+                self._inflight_probes = max(0, self._inflight_probes - 1)
+                if ok is None:
+                    return
+                if ok and seconds < self.slow_call:
+                    self._close()
+                else:
+                    self._trip(now, escalate=True)
+                return
+            if ok is None or state == OPEN:
+                return
+            failed, slow = not ok, seconds >= self.slow_call
+            self._calls.append((now, failed, slow))
+            self._failures += failed
+            self._slow += slow
+            self._prune(now)
+            calls = len(self._calls)
+            if calls >= self.min_calls and (self._failures / calls >= self.error_rate
+                                            or self._slow / calls >= self.slow_rate):
+                self._trip(now)
+
+    def release(self) -> None:
+        """آزاد کردن سهم آزمایشی رزروشده با allow برای درخواستی که نتیجه‌ای برای record ندارد"""
+        with self._lock:
+            if self._current_state(time.monotonic()) == HALF_OPEN:
+                self._inflight_probes = max(0, self._inflight_probes - 1)
+
+    def retry_in(self) -> float:
+        """چند ثانیه تا عبور اولین درخواست آزمایشی (صفر یعنی همین حالا)"""
+        with self._lock:
+            if self._current_state(time.monotonic()) != OPEN:
+                return 0.0
+            return max(0.0, self._open_until - time.monotonic())
+
+    def health(self) -> Dict:
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            self._prune(now)
+            calls = len(self._calls)
+            return {
+                'state': state,
+                'calls': calls,
+                'error_rate': self._failures / calls if calls else 0.0,
+                'slow_rate': self._slow / calls if calls else 0.0,
+                'retry_in': max(0.0, self._open_until - now) if state == OPEN else 0.0,
+                'opened': self.counters['opened'],
+                'rejected': self.counters['rejected'],
+            }
+
+    # --- داخلی (با قفل) ---
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now >= self._open_until:
+            self._set_state(HALF_OPEN)
+            self._inflight_probes = 0
+        return self._state
+
+    def _prune(self, now: float):
+        horizon = now - self.window
+        while self._calls and self._calls[0][0] < horizon:
+            _, failed, slow = self._calls.popleft()
+            self._failures -= failed
+            self._slow -= slow
+
+    def _trip(self, now: float, escalate: bool = False):
+        if escalate:
+            self._cooldown = min(self._cooldown * 2, self.max_open_seconds)
+        self._open_until = now + self._cooldown
+        self._calls.clear()
+        self._failures = self._slow = 0
+        self.counters['opened'] += 1
+        self._set_state(OPEN)
+        print(f"🔌 مدار {self.name} باز شد؛ درخواست‌ها تا {self._cooldown:.0f} ثانیه فوراً رد می‌شوند.")
+
+    def _close(self):
+        self._cooldown = self.open_seconds
+        self._calls.clear()
+        self._failures = self._slow = 0
+        self._set_state(CLOSED)
+        print(f"✅ مدار {self.name} دوباره بسته شد.")
+
+    def _set_state(self, state: str):
+        self._state = state
+        metrics.CIRCUIT_STATE.set((CLOSED, HALF_OPEN, OPEN).index(state), self.name)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    """breaker مشترک هر سرویس در این پروسه"""
+    with _breakers_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            slow_call = SLOW_CALL_OVERRIDES.get(provider, SLOW_CALL_SECONDS)
+            breaker = _breakers[provider] = CircuitBreaker(provider, slow_call=slow_call)
+        return breaker
+
+
+def is_available(provider: str) -> bool:
+    """False اگر مدار provider باز باشد (بدون رزرو سهم آزمایشی)"""
+    with _breakers_lock:
+        breaker = _breakers.get(provider)
+    return breaker is None or breaker.state != OPEN
+
+
+def health() -> Dict[str, Dict]:
+    """وضعیت همه سرویس‌هایی که تا کنون درخواستی به آن‌ها ارسال شده"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.health() for b in breakers}
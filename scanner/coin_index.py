@@ -0,0 +1,163 @@
+"""
+ماژول coin_index.py
+ایندکس محلی و پایدار اطلاعات ثابت ارزها (تاریخ genesis، قراردادهای هر شبکه، نماد و نام)
+تشخیص‌دهنده‌ها به جای یک درخواست سنگین coins/{id} برای هر ارز در هر دور، از این ایندکس
+در حافظه می‌خوانند و فقط برای شناسه‌هایی که هرگز دیده نشده‌اند به شبکه می‌روند
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+COIN_INDEX_DB = 'coin_index.db'
+REFRESH_AGE = 7 * 24 * 3600     # رکوردهای قدیمی‌تر از این در پس‌زمینه به‌روز می‌شوند
+REFRESH_INTERVAL = 60           # فاصله دورهای به‌روزرسانی پس‌زمینه (ثانیه)
+REFRESH_BATCH = 5               # تعداد ارز در هر دور به‌روزرسانی پس‌زمینه
+
+
+def metadata_from_detail(coin_id: str, detail: Dict) -> Dict:
+    """استخراج فیلدهای ثابت از پاسخ coins/{id} کوین‌گکو"""
+    platforms = {k: v for k, v in (detail.get('platforms') or {}).items() if k and v}
+    return {
+        'id': coin_id,
+        'symbol': (detail.get('symbol') or '').upper(),
+        'name': detail.get('name'),
+        'genesis_date': detail.get('genesis_date'),
+        'platforms': platforms,
+    }
+
+
+class CoinIndex:
+    """
+    نگاشت شناسه ارز -> اطلاعات ثابت، با نسخه کامل در حافظه و ذخیره در SQLite
+    fetcher تابعی است که شناسه را گرفته و پاسخ coins/{id} را برمی‌گرداند (یا {} در صورت خطا)
+    """
+
+    def __init__(self, db_path: str = COIN_INDEX_DB):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._entries: Dict[str, Dict] = {}
+        self._updated: Dict[str, float] = {}
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS coins ('
+            ' id TEXT PRIMARY KEY,'
+            ' symbol TEXT,'
+            ' name TEXT,'
+            ' genesis_date TEXT,'
+            ' platforms TEXT,'
+            ' updated REAL NOT NULL)'
+        )
+        self._load()
+
+    def _load(self):
+        rows = self._conn.execute('SELECT id, symbol, name, genesis_date, platforms, updated FROM coins').fetchall()
+        with self._lock:
+            for coin_id, symbol, name, genesis_date, platforms, updated in rows:
+                self._entries[coin_id] = {
+                    'id': coin_id,
+                    'symbol': symbol,
+                    'name': name,
+                    'genesis_date': genesis_date,
+                    'platforms': json.loads(platforms) if platforms else {},
+                }
+                self._updated[coin_id] = updated
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, coin_id: str) -> bool:
+        return coin_id in self._entries
+
+    def get(self, coin_id: str) -> Optional[Dict]:
+        return self._entries.get(coin_id)
+
+    def put(self, meta: Dict):
+        now = time.time()
+        with self._lock:
+            self._entries[meta['id']] = meta
+            self._updated[meta['id']] = now
+            self._conn.execute(
+                'INSERT OR REPLACE INTO coins (id, symbol, name, genesis_date, platforms, updated) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (meta['id'], meta.get('symbol'), meta.get('name'), meta.get('genesis_date'),
+                 json.dumps(meta.get('platforms') or {}), now))
+
+    def ensure(self, coin_ids: Iterable[str], fetcher: Callable[[str], Dict]) -> Dict[str, Dict]:
+        """
+        اطلاعات همه شناسه‌ها؛ فقط شناسه‌های ناشناخته از شبکه گرفته می‌شوند
+        شناسه‌ای که دریافتش ناموفق باشد در خروجی نمی‌آید (و دور بعد دوباره امتحان می‌شود)
+        """
+        result = {}
+        for coin_id in coin_ids:
+            meta = self._entries.get(coin_id)
+            if meta is None:
+                detail = fetcher(coin_id)
+                if not detail:
+                    continue
+                meta = metadata_from_detail(coin_id, detail)
+                self.put(meta)
+            result[coin_id] = meta
+        return result
+
+    def stale_ids(self, max_age: float = REFRESH_AGE, limit: Optional[int] = None) -> List[str]:
+        """شناسه‌هایی که از آخرین به‌روزرسانی‌شان بیش از max_age گذشته (قدیمی‌ترین اول)"""
+        cutoff = time.time() - max_age
+        with self._lock:
+            stale = sorted((t, i) for i, t in self._updated.items() if t < cutoff)
+        ids = [i for _, i in stale]
+        return ids if limit is None else ids[:limit]
+
+    def refresh(self, fetcher: Callable[[str], Dict], batch: int = REFRESH_BATCH) -> int:
+        """به‌روزرسانی تدریجی چند رکورد قدیمی؛ تعداد رکوردهای به‌روز شده را برمی‌گرداند"""
+        refreshed = 0
+        for coin_id in self.stale_ids(limit=batch):
+            if self._stop.is_set():
+                break
+            detail = fetcher(coin_id)
+            if detail:
+                self.put(metadata_from_detail(coin_id, detail))
+                refreshed += 1
+        return refreshed
+
+    def start_refresher(self, fetcher: Callable[[str], Dict], interval: float = REFRESH_INTERVAL):
+        """اجرای refresh در یک thread پس‌زمینه (فقط یک‌بار برای هر ایندکس)"""
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+
+            def run():
+                while not self._stop.wait(interval):
+                    try:
+                        self.refresh(fetcher)
+                    except Exception as e:
+                        print(f"[CoinIndex] خطا در به‌روزرسانی پس‌زمینه: {e}")
+
+            self._stop.clear()
+            self._refresher = threading.Thread(target=run, name='coin-index-refresh', daemon=True)
+            self._refresher.start()
+
+    def stop_refresher(self):
+        self._stop.set()
+
+
+_index: Optional[CoinIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> CoinIndex:
+    """ایندکس مشترک این پروسه (روی فایل COIN_INDEX_DB)"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = CoinIndex(COIN_INDEX_DB)
+    return _index
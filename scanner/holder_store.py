@@ -0,0 +1,107 @@
+"""
+ماژول holder_store.py
+تاریخچه زمانی تعداد هولدرهای هر قرارداد (شبکه، آدرس قرارداد)
+هر دور اسکن تعداد فعلی را ثبت می‌کند و رشد در بازه‌های 1h/24h/7d از همین تاریخچه محلی محاسبه می‌شود
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+HOLDER_STORE_DB = 'holders.db'
+
+GROWTH_WINDOWS = {
+    '1h': 3600,
+    '24h': 24 * 3600,
+    '7d': 7 * 24 * 3600,
+}
+MAX_LAG_RATIO = 0.25                  # نمونه مبنا حداکثر تا ۲۵٪ طول بازه قدیمی‌تر از زمان هدف باشد
+RETENTION = 8 * 24 * 3600             # نمونه‌های قدیمی‌تر از این پاک می‌شوند
+PRUNE_EVERY = 500
+
+
+class HolderStore:
+    """ذخیره و پرس‌وجوی نمونه‌های زمانی تعداد هولدر"""
+
+    def __init__(self, db_path: str = HOLDER_STORE_DB):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._writes = 0
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS snapshots ('
+            ' chain TEXT NOT NULL,'
+            ' contract TEXT NOT NULL,'
+            ' ts REAL NOT NULL,'
+            ' holders INTEGER NOT NULL,'
+            ' PRIMARY KEY (chain, contract, ts))'
+        )
+
+    @staticmethod
+    def _key(chain: str, contract: str):
+        return chain.lower(), contract.lower()
+
+    def record(self, chain: str, contract: str, holders: int, ts: Optional[float] = None):
+        chain, contract = self._key(chain, contract)
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO snapshots (chain, contract, ts, holders) VALUES (?, ?, ?, ?)',
+                               (chain, contract, time.time() if ts is None else ts, int(holders)))
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                self._conn.execute('DELETE FROM snapshots WHERE ts < ?', (time.time() - RETENTION,))
+
+    def latest(self, chain: str, contract: str) -> Optional[int]:
+        chain, contract = self._key(chain, contract)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT holders FROM snapshots WHERE chain = ? AND contract = ? ORDER BY ts DESC LIMIT 1',
+                (chain, contract)).fetchone()
+        return row[0] if row else None
+
+    def value_at(self, chain: str, contract: str, seconds_ago: float,
+                 now: Optional[float] = None) -> Optional[int]:
+        """
+        تعداد هولدر در seconds_ago ثانیه پیش: آخرین نمونه قبل از آن لحظه
+        اگر نمونه‌ای نباشد یا خیلی قدیمی‌تر از زمان هدف باشد None برمی‌گردد
+        """
+        chain, contract = self._key(chain, contract)
+        target = (time.time() if now is None else now) - seconds_ago
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT ts, holders FROM snapshots WHERE chain = ? AND contract = ? AND ts <= ? '
+                'ORDER BY ts DESC LIMIT 1',
+                (chain, contract, target)).fetchone()
+        if row is None or target - row[0] > seconds_ago * MAX_LAG_RATIO:
+            return None
+        return row[1]
+
+    def growth(self, chain: str, contract: str, window: str = '24h',
+               now: Optional[float] = None) -> Optional[int]:
+        """رشد تعداد هولدر در بازه window (یکی از کلیدهای GROWTH_WINDOWS)"""
+        current = self.latest(chain, contract)
+        past = self.value_at(chain, contract, GROWTH_WINDOWS[window], now=now)
+        if current is None or past is None:
+            return None
+        return current - past
+
+    def growth_all(self, chain: str, contract: str) -> Dict[str, Optional[int]]:
+        return {window: self.growth(chain, contract, window) for window in GROWTH_WINDOWS}
+
+
+_store: Optional[HolderStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> HolderStore:
+    """ذخیره‌گاه مشترک این پروسه (روی فایل HOLDER_STORE_DB)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = HolderStore(HOLDER_STORE_DB)
+    return _store
@@ -0,0 +1,247 @@
+"""
+ماژول http_client.py
+لایه مشترک HTTP برای همه اسکنرها: یک Session با استخر اتصال keep-alive برای هر هاست،
+فشرده‌سازی gzip، timeout مخصوص هر API، یک سیاست واحد برای تلاش مجدد (retry/backoff)
+محدودیت نرخ مشترک بین پروسه‌ها (rate_limiter)، کش پایدار پاسخ‌ها (response_cache)
+و قطع‌کننده مدار هر سرویس (circuit_breaker) که درخواست به سرویس خراب را فوراً رد می‌کند
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from scanner import circuit_breaker, metrics, rate_limiter, response_cache
+
+# آدرس پایه هر سرویس
+BASE_URLS = {
+    'coingecko': 'https://api.coingecko.com/api/v3',
+    'coinmarketcap': 'https://pro-api.coinmarketcap.com',
+    'etherscan': 'https://api.etherscan.io',
+    'bscscan': 'https://api.bscscan.com',
+    'telegram': 'https://api.telegram.org',
+}
+DEFAULT_BASE_URLS = dict(BASE_URLS)
+
+# اگر تنظیم شود همه سرویس‌ها به <ریشه>/<نام سرویس> هدایت می‌شوند (مثلاً سرور ساختگی benchmarks.mock_server)
+BASE_URL_ENV = 'PUMP_API_BASE_URL'
+
+# timeout هر سرویس به صورت (اتصال، خواندن) بر حسب ثانیه
+TIMEOUTS = {
+    'coingecko': (5, 20),
+    'coinmarketcap': (5, 20),
+    'etherscan': (5, 30),
+    'bscscan': (5, 30),
+    'telegram': (5, 10),
+}
+DEFAULT_TIMEOUT = (5, 15)
+
+# تنظیمات استخر اتصال و تلاش مجدد
+POOL_CONNECTIONS = 10      # تعداد هاست‌هایی که استخرشان نگه داشته می‌شود
+POOL_MAXSIZE = 20          # حداکثر اتصال باز برای هر هاست
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 1.0        # فاصله‌ها: 1، 2، 4 ثانیه
+RETRY_STATUSES = (500, 502, 503, 504)   # 429 جداگانه و از طریق rate_limiter مدیریت می‌شود
+RATE_LIMIT_ENABLED = True
+RATE_LIMIT_RETRIES = 3     # تعداد تلاش مجدد پس از پاسخ 429
+CIRCUIT_BREAKER_ENABLED = True
+CACHE_ENABLED = True
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0',
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _build_retry() -> Retry:
+    return Retry(
+        total=RETRY_TOTAL,
+        connect=RETRY_TOTAL,
+        read=RETRY_TOTAL,
+        status=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def get_session() -> requests.Session:
+    """Session مشترک (thread-safe) که بین همه اسکنرها به اشتراک گذاشته می‌شود"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.headers.update(DEFAULT_HEADERS)
+                adapter = HTTPAdapter(
+                    pool_connections=POOL_CONNECTIONS,
+                    pool_maxsize=POOL_MAXSIZE,
+                    max_retries=_build_retry(),
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def use_base_url(root: Optional[str]) -> None:
+    """
+    هدایت همه سرویس‌ها به root/<نام سرویس> (مثلاً http://127.0.0.1:8900/coingecko/coins/markets)
+    root=None آدرس‌های واقعی را برمی‌گرداند؛ آدرس‌هایی که قبلاً ساخته شده‌اند (مثل TelegramDispatcher.url) تغییر نمی‌کنند
+    """
+    for provider, base in DEFAULT_BASE_URLS.items():
+        BASE_URLS[provider] = root.rstrip('/') + '/' + provider if root else base
+
+
+def provider_for(url: str) -> Optional[str]:
+    """تشخیص نام سرویس از روی پیشوند آدرس پایه یا در غیر این صورت هاست آدرس"""
+    for provider, base in BASE_URLS.items():
+        if url.startswith(base.rstrip('/') + '/'):
+            return provider
+    host = urlparse(url).netloc
+    for provider, base in BASE_URLS.items():
+        if urlparse(base).netloc == host:
+            return provider
+    return None
+
+
+def api_url(provider: str, path: str) -> str:
+    """ساخت آدرس کامل یک endpoint از روی نام سرویس"""
+    return BASE_URLS[provider].rstrip('/') + '/' + path.lstrip('/')
+
+
+def timeout_for(url: str) -> Tuple[float, float]:
+    return TIMEOUTS.get(provider_for(url), DEFAULT_TIMEOUT)
+
+
+def retry_after_of(response: requests.Response) -> Optional[float]:
+    """مدت انتظار اعلام‌شده توسط سرور (هدر Retry-After یا parameters.retry_after تلگرام)"""
+    seconds = rate_limiter.parse_retry_after(response.headers.get('Retry-After'))
+    if seconds is None:
+        try:
+            seconds = float(response.json()['parameters']['retry_after'])
+        except (ValueError, KeyError, TypeError):
+            seconds = None
+    return seconds
+
+
+def _guarded(action, *args):
+    """فراخوانی rate_limiter یا response_cache؛ خطای پایگاه داده نباید جلوی درخواست را بگیرد"""
+    try:
+        return action(*args)
+    except sqlite3.Error as e:
+        print(f"⚠️ خطا در پایگاه داده {getattr(action, '__qualname__', action)}: {e}")
+        return None
+
+
+def request(method: str, url: str, timeout=None, **kwargs) -> requests.Response:
+    """
+    ارسال درخواست از طریق Session مشترک با timeout مخصوص همان سرویس
+    قبل از هر درخواست توکن سطل همان API گرفته می‌شود و پاسخ 429 کل سطل را
+    (برای همه پروسه‌ها) تا پایان Retry-After مسدود می‌کند و سپس دوباره تلاش می‌شود
+    اگر مدار سرویس باز باشد بدون انتظار CircuitOpenError پرتاب می‌شود
+    """
+    provider = provider_for(url)
+    limiter = rate_limiter.get_limiter() if RATE_LIMIT_ENABLED and provider else None
+    breaker = circuit_breaker.get_breaker(provider) if CIRCUIT_BREAKER_ENABLED and provider else None
+    session = get_session()
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        if breaker is not None and not breaker.allow():
+            metrics.record_request(provider, 'circuit_open', 0.0)
+            raise circuit_breaker.CircuitOpenError(provider, breaker.retry_in())
+        recorded = False
+        try:
+            if limiter is not None:
+                _guarded(limiter.acquire, provider)
+            started = time.perf_counter()
+            try:
+                response = session.request(method, url, timeout=timeout or timeout_for(url), **kwargs)
+            except requests.RequestException:
+                elapsed = time.perf_counter() - started
+                metrics.record_request(provider, 'error', elapsed)
+                if breaker is not None:
+                    recorded = True
+                    breaker.record(False, elapsed)
+                raise
+            elapsed = time.perf_counter() - started
+            metrics.record_request(provider, response.status_code, elapsed)
+            if breaker is not None:
+                # 429 خنثی است؛ سایر خطاهای 4xx مشکل درخواست‌اند نه سلامت سرویس
+                recorded = True
+                breaker.record(None if response.status_code == 429 else response.status_code < 500, elapsed)
+        finally:
+            if breaker is not None and not recorded:
+                # هر خطای دیگر (KeyboardInterrupt، خطای غیر requests) نباید سهم آزمایشی half_open را نگه دارد
+                breaker.release()
+        if response.status_code != 429 or limiter is None or attempt == RATE_LIMIT_RETRIES:
+            return response
+        wait = retry_after_of(response)
+        if wait is None:
+            wait = (2 ** attempt) * 5
+        print(f"⏳ محدودیت نرخ {provider}. صبر می‌کنم {wait:.0f} ثانیه...")
+        _guarded(limiter.penalize, provider, wait)
+    return response
+
+
+def _cached_response(url: str, body: bytes, content_type: Optional[str]) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response._content = body
+    response.url = url
+    response.encoding = 'utf-8'
+    if content_type:
+        response.headers['Content-Type'] = content_type
+    response.from_cache = True
+    return response
+
+
+def _is_cacheable(response: requests.Response) -> bool:
+    """پاسخ‌های خطای Etherscan/BscScan با کد 200 برمی‌گردند (message=NOTOK) و نباید کش شوند"""
+    if response.status_code != 200:
+        return False
+    try:
+        data = response.json()
+    except ValueError:
+        return False
+    return not (isinstance(data, dict) and data.get('message') == 'NOTOK')
+
+
+def get(url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+        timeout=None, use_cache: bool = True, **kwargs) -> requests.Response:
+    """
+    درخواست GET از طریق Session مشترک
+    اگر endpoint در response_cache.CACHE_TTLS تعریف شده باشد، پاسخ معتبر از کش دیسک خوانده می‌شود
+    """
+    cache = response_cache.get_cache() if CACHE_ENABLED and use_cache else None
+    family, ttl = cache.family_for(provider_for(url), url) if cache is not None else (None, 0)
+    if family:
+        key = response_cache.normalize_key(url, params)
+        cached = _guarded(cache.get, key, family)
+        if cached is not None:
+            return _cached_response(url, *cached)
+    response = request('GET', url, params=params, headers=headers, timeout=timeout, **kwargs)
+    if family and _is_cacheable(response):
+        _guarded(cache.set, key, family, ttl, response.content, response.headers.get('Content-Type'))
+    return response
+
+
+def post(url: str, data=None, json=None, headers: Optional[Dict] = None,
+         timeout=None, **kwargs) -> requests.Response:
+    """درخواست POST از طریق Session مشترک (خطاهای 5xx برای POST تکرار نمی‌شوند)"""
+    return request('POST', url, data=data, json=json, headers=headers, timeout=timeout, **kwargs)
+
+
+if os.environ.get(BASE_URL_ENV):
+    use_base_url(os.environ[BASE_URL_ENV])
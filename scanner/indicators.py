@@ -0,0 +1,197 @@
+"""
+ماژول indicators.py
+محاسبه افزایشی (streaming) اندیکاتورهای RSI، MACD و باندهای بولینگر
+هر ارز یک وضعیت کوچک دارد (میانگین‌های Wilder، EMAهای سریع/کند/سیگنال، میانگین و واریانس غلتان)
+و هر قیمت جدید در O(1) اعمال می‌شود. خروجی‌ها با کتابخانه ta (با تنظیمات پیش‌فرض) برابرند.
+"""
+import copy
+import math
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from scanner.ttl_cache import TTLCache
+
+ENGINE_MAX_KEYS = 2000          # سقف تعداد (ارز، تایم‌فریم)های نگه‌داشته‌شده؛ بیشتر از آن LRU حذف می‌شود
+ENGINE_TTL = 6 * 3600           # وضعیت ارزی که این مدت دریافت نشده حذف و دفعه بعد از کل تاریخچه ساخته می‌شود
+ENGINE_HISTORY = 2              # تحلیل فقط آخرین و یکی‌مانده‌به‌آخرین ردیف را می‌خواند (تقاطع MACD)
+
+
+class StreamingEMA:
+    """EMA معادل pandas.ewm(adjust=False) که تا min_periods مقدار None برمی‌گرداند"""
+
+    def __init__(self, span: Optional[int] = None, alpha: Optional[float] = None,
+                 min_periods: Optional[int] = None):
+        if alpha is None:
+            alpha = 2.0 / (span + 1)
+        self.alpha = alpha
+        self.min_periods = min_periods if min_periods is not None else (span or 1)
+        self.count = 0
+        self.mean: Optional[float] = None
+
+    def update(self, value: float) -> Optional[float]:
+        if self.mean is None:
+            self.mean = value
+        else:
+            self.mean += self.alpha * (value - self.mean)
+        self.count += 1
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.mean if self.count >= self.min_periods else None
+
+
+class StreamingRSI:
+    """RSI با میانگین Wilder (alpha=1/window) معادل ta.momentum.RSIIndicator"""
+
+    def __init__(self, window: int = 14):
+        self.up = StreamingEMA(alpha=1.0 / window, min_periods=window)
+        self.down = StreamingEMA(alpha=1.0 / window, min_periods=window)
+        self.last_price: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        diff = 0.0 if self.last_price is None else price - self.last_price
+        self.last_price = price
+        self.up.update(diff if diff > 0 else 0.0)
+        self.down.update(-diff if diff < 0 else 0.0)
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        up, down = self.up.value, self.down.value
+        if up is None or down is None:
+            return None
+        if down == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + up / down)
+
+
+class StreamingMACD:
+    """MACD معادل ta.trend.MACD (EMA سریع 12، کند 26، سیگنال 9)"""
+
+    def __init__(self, window_slow: int = 26, window_fast: int = 12, window_sign: int = 9):
+        self.fast = StreamingEMA(span=window_fast)
+        self.slow = StreamingEMA(span=window_slow)
+        self.signal = StreamingEMA(span=window_sign)
+
+    def update(self, price: float) -> Tuple[Optional[float], Optional[float]]:
+        fast = self.fast.update(price)
+        slow = self.slow.update(price)
+        if fast is not None and slow is not None:
+            # سیگنال فقط از اولین مقدار معتبر MACD شروع می‌شود (مثل ewm روی سری با NaN ابتدایی)
+            self.signal.update(fast - slow)
+        return self.value
+
+    @property
+    def value(self) -> Tuple[Optional[float], Optional[float]]:
+        fast, slow = self.fast.value, self.slow.value
+        macd = fast - slow if fast is not None and slow is not None else None
+        return macd, self.signal.value
+
+
+class StreamingBollinger:
+    """باندهای بولینگر با میانگین و واریانس غلتان (ddof=0) معادل ta.volatility.BollingerBands"""
+
+    def __init__(self, window: int = 20, window_dev: float = 2):
+        self.window = window
+        self.window_dev = window_dev
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, price: float) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        if len(self.values) == self.window:
+            old = self.values.popleft()
+            n = len(self.values)
+            if n:
+                delta = old - self.mean
+                self.mean -= delta / n
+                self.m2 -= delta * (old - self.mean)
+            else:
+                self.mean = self.m2 = 0.0
+        self.values.append(price)
+        n = len(self.values)
+        delta = price - self.mean
+        self.mean += delta / n
+        self.m2 += delta * (price - self.mean)
+        return self.value
+
+    @property
+    def value(self) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        if len(self.values) < self.window:
+            return None, None, None
+        std = math.sqrt(max(self.m2, 0.0) / self.window)
+        return (self.mean + self.window_dev * std, self.mean, self.mean - self.window_dev * std)
+
+
+class IndicatorState:
+    """وضعیت کامل اندیکاتورهای یک ارز"""
+
+    def __init__(self):
+        self.rsi = StreamingRSI()
+        self.macd = StreamingMACD()
+        self.bollinger = StreamingBollinger()
+        self.last_ts: Optional[float] = None
+
+    def update(self, ts: float, price: float) -> Dict:
+        rsi = self.rsi.update(price)
+        macd, macd_signal = self.macd.update(price)
+        bb_high, bb_mid, bb_low = self.bollinger.update(price)
+        self.last_ts = ts
+        return {
+            'timestamp': ts,
+            'price': price,
+            'rsi': rsi,
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'bb_high': bb_high,
+            'bb_mid': bb_mid,
+            'bb_low': bb_low,
+        }
+
+    def peek(self, ts: float, price: float) -> Dict:
+        """محاسبه اندیکاتورها برای یک نقطه موقت بدون تغییر وضعیت"""
+        return copy.deepcopy(self).update(ts, price)
+
+
+class IndicatorEngine:
+    """
+    نگهدارنده وضعیت اندیکاتورهای همه ارزها؛ کلید شامل شناسه ارز است (نه نماد که بین چند ارز مشترک است)
+    ingest فقط نقاط جدیدتر از آخرین نقطه ثبت‌شده را پردازش می‌کند؛ نقطه آخر هر سری
+    (قیمت لحظه‌ای که در دریافت بعدی عوض می‌شود) به صورت موقت محاسبه و ثبت نمی‌شود
+    وضعیت‌ها در TTLCache با سقف تعداد و انقضای زمانی نگه داشته می‌شوند و از هر سری فقط
+    history ردیف آخر نگه داشته می‌شود
+    """
+
+    def __init__(self, history: int = ENGINE_HISTORY, max_keys: Optional[int] = ENGINE_MAX_KEYS,
+                 ttl: float = ENGINE_TTL):
+        self.history = history
+        self._states = TTLCache(max_entries=max_keys, ttl=ttl, name='indicator_engine')
+
+    def reset(self, key: str):
+        del self._states[key]
+
+    def ingest(self, key: str, points: Iterable[Sequence[float]], provisional_last: bool = True) -> List[Dict]:
+        """
+        points: دنباله (timestamp, price) مرتب بر اساس زمان
+        خروجی: حداکثر history ردیف ثبت‌شده آخر (و در صورت وجود، نقطه موقت آخر)
+        """
+        entry = self._states.get(key)
+        if entry is None:
+            entry = (IndicatorState(), deque(maxlen=self.history))
+        state, rows = entry
+        new_points = [(float(ts), float(price)) for ts, price in points
+                      if price is not None and (state.last_ts is None or ts > state.last_ts)]
+        tail = new_points.pop() if provisional_last and new_points else None
+        for ts, price in new_points:
+            rows.append(state.update(ts, price))
+        # set دوباره زمان انقضا را تمدید می‌کند
+        self._states.set(key, entry)
+        result = list(rows)
+        if tail is not None:
+            result.append(state.peek(*tail))
+        return result
+
+    def latest(self, key: str) -> Optional[Dict]:
+        entry = self._states.get(key)
+        return entry[1][-1] if entry is not None and entry[1] else None
@@ -0,0 +1,38 @@
+"""
+ماژول market_data.py
+درخواست استاندارد coins/markets کوین‌گکو (و listings/latest کوین‌مارکت‌کپ) که همه اسکنرها از آن استفاده می‌کنند
+چون پارامترها یکسان است، همه اسکنرها از یک رکورد response_cache مشترک استفاده می‌کنند و هرکدام
+فقط به تعداد مورد نیاز خودش از ابتدای لیست برمی‌دارد
+"""
+from typing import Dict, Tuple
+
+from scanner import http_client
+
+MARKETS_PER_PAGE = 250                       # حداکثر مجاز کوین‌گکو در هر صفحه
+MARKETS_PRICE_CHANGES = '1h,24h,7d,14d,30d'  # اجتماع بازه‌هایی که اسکنرها نیاز دارند
+CMC_LISTINGS_PER_PAGE = 200                  # هر 200 نتیجه listings/latest یک credit مصرف می‌کند
+
+
+def markets_query(page: int = 1) -> Tuple[str, Dict]:
+    """آدرس و پارامترهای استاندارد coins/markets برای صفحه page"""
+    url = http_client.api_url('coingecko', '/coins/markets')
+    params = {
+        'vs_currency': 'usd',
+        'order': 'market_cap_desc',
+        'per_page': MARKETS_PER_PAGE,
+        'page': page,
+        'sparkline': 'false',
+        'price_change_percentage': MARKETS_PRICE_CHANGES,
+    }
+    return url, params
+
+
+def cmc_listings_query(start: int = 1, limit: int = CMC_LISTINGS_PER_PAGE) -> Tuple[str, Dict]:
+    """آدرس و پارامترهای listings/latest کوین‌مارکت‌کپ از رتبه start (شروع از 1)"""
+    url = http_client.api_url('coinmarketcap', '/v1/cryptocurrency/listings/latest')
+    params = {
+        'start': start,
+        'limit': limit,
+        'convert': 'USD',
+    }
+    return url, params
@@ -0,0 +1,307 @@
+"""
+ماژول market_snapshot.py
+نمای ستونی (columnar) یک دور داده بازار به جای لیست دیکشنری‌ها
+هر فیلد عددی یک آرایه float64 و هر فیلد متنی یک آرایه object با رشته‌های intern شده است؛
+فیلتر، مرتب‌سازی و اتصال روی آرایه‌ها انجام می‌شود و برای کدهای قدیمی که token['price']
+می‌خوانند، snapshot[i] یک نمای سطری (Mapping) بدون کپی برمی‌گرداند
+"""
+import sys
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+# فیلدهای عددی (NaN یعنی مقدار ناموجود) و متنی؛ ترتیب همین‌جا ترتیب کلیدهای نمای سطری است
+FLOAT_FIELDS = (
+    'price', 'volume', 'market_cap', 'rank',
+    'change_1h', 'change_24h', 'change_7d', 'change_14d', 'change_30d',
+    'ath', 'ath_change_percentage', 'volume_to_cap',
+)
+STR_FIELDS = ('id', 'symbol', 'name', 'source', 'ath_date', 'last_updated')
+INT_FIELDS = ('rank',)                       # در ستون float64 نگه‌داری و در نمای سطری int برگردانده می‌شوند
+INTERNED_FIELDS = ('id', 'symbol', 'name', 'source')
+FIELD_ORDER = ('id', 'symbol', 'name') + FLOAT_FIELDS + ('source', 'ath_date', 'last_updated')
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _float_column(values: Iterable) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def _str_column(name: str, values: Iterable) -> np.ndarray:
+    values = [_intern(v) for v in values] if name in INTERNED_FIELDS else list(values)
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def _is_text(column: np.ndarray) -> bool:
+    return column.dtype == object
+
+
+def _empty_column(name: str, size: int, like: Optional[np.ndarray] = None) -> np.ndarray:
+    if name in STR_FIELDS or (like is not None and _is_text(like)):
+        return np.full(size, None, dtype=object)
+    return np.full(size, np.nan, dtype=np.float64)
+
+
+def _volume_to_cap(volume: np.ndarray, market_cap: np.ndarray) -> np.ndarray:
+    """حجم به درصد ارزش بازار (0 اگر ارزش بازار صفر یا نامعلوم باشد)"""
+    valid = (market_cap != 0) & ~np.isnan(market_cap)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(valid, volume / market_cap * 100, 0.0)
+
+
+class SnapshotRow(Mapping):
+    """نمای فقط‌خواندنی یک ردیف؛ رفتار آن مثل دیکشنری قدیمی هر ارز است"""
+
+    __slots__ = ('_snapshot', '_index')
+
+    def __init__(self, snapshot: 'MarketSnapshot', index: int):
+        self._snapshot = snapshot
+        self._index = index
+
+    def __getitem__(self, key):
+        column = self._snapshot.column(key)
+        value = column[self._index]
+        if _is_text(column):
+            return value
+        if np.isnan(value):
+            return None
+        return int(value) if key in INT_FIELDS else float(value)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._snapshot.fields)
+
+    def __len__(self) -> int:
+        return len(self._snapshot.fields)
+
+    def __repr__(self) -> str:
+        return f"SnapshotRow({dict(self)!r})"
+
+
+class MarketSnapshot:
+    """
+    داده یک دور بازار به صورت ستونی
+    snapshot['price'] ستون، snapshot[i] نمای سطری و snapshot[mask] یا snapshot[indices] زیرمجموعه است
+    """
+
+    def __init__(self, columns: Optional[Dict[str, np.ndarray]] = None):
+        columns = columns or {}
+        sizes = {len(c) for c in columns.values()}
+        if len(sizes) > 1:
+            raise ValueError(f"طول ستون‌ها یکسان نیست: {sizes}")
+        self._size = sizes.pop() if sizes else 0
+        self._columns = {name: columns[name] for name in FIELD_ORDER if name in columns}
+        self._columns.update({name: col for name, col in columns.items() if name not in self._columns})
+
+    # --- ساخت ---
+
+    @classmethod
+    def empty(cls) -> 'MarketSnapshot':
+        return cls({name: _empty_column(name, 0) for name in FIELD_ORDER})
+
+    @classmethod
+    def from_records(cls, records: Sequence[Mapping], fields: Optional[Iterable[str]] = None) -> 'MarketSnapshot':
+        """ساخت از لیست دیکشنری‌ها (فیلد ناموجود -> NaN یا None)"""
+        if fields is None:
+            fields = []
+            for record in records:
+                fields.extend(k for k in record if k not in fields)
+        columns = {}
+        for name in fields:
+            values = [r.get(name) for r in records]
+            text = name in STR_FIELDS or any(isinstance(v, str) for v in values)
+            columns[name] = _str_column(name, values) if text else _float_column(values)
+        return cls(columns)
+
+    @classmethod
+    def coerce(cls, tokens) -> 'MarketSnapshot':
+        """ورودی snapshot یا لیست دیکشنری -> snapshot"""
+        if isinstance(tokens, cls):
+            return tokens
+        tokens = list(tokens or [])
+        return cls.from_records(tokens) if tokens else cls.empty()
+
+    @classmethod
+    def from_coingecko(cls, markets: Sequence[Dict]) -> 'MarketSnapshot':
+        """ساخت از پاسخ coins/markets کوین‌گکو"""
+        records = []
+        for coin in markets:
+            try:
+                records.append({
+                    'id': coin['id'],
+                    'symbol': coin['symbol'].upper(),
+                    'name': coin['name'],
+                    'price': coin['current_price'],
+                    'volume': coin['total_volume'],
+                    'market_cap': coin['market_cap'],
+                    'rank': coin['market_cap_rank'],
+                    'change_1h': coin.get('price_change_percentage_1h', 0) or 0,
+                    'change_24h': coin.get('price_change_percentage_24h', 0) or 0,
+                    'change_7d': coin.get('price_change_percentage_7d', 0) or 0,
+                    'change_14d': coin.get('price_change_percentage_14d', 0) or 0,
+                    'change_30d': coin.get('price_change_percentage_30d', 0) or 0,
+                    'ath': coin.get('ath'),
+                    'ath_change_percentage': coin.get('ath_change_percentage'),
+                    'ath_date': coin.get('ath_date'),
+                    'last_updated': coin.get('last_updated'),
+                    'source': 'CoinGecko',
+                })
+            except (KeyError, TypeError, AttributeError) as e:
+                print(f"⚠️ خطا در پردازش داده‌های {coin.get('symbol', 'ناشناخته')}: {e}")
+        snapshot = cls.from_records(records, FIELD_ORDER)
+        snapshot._columns['volume_to_cap'] = _volume_to_cap(snapshot['volume'], snapshot['market_cap'])
+        return snapshot
+
+    @classmethod
+    def from_coinmarketcap(cls, listings: Sequence[Dict]) -> 'MarketSnapshot':
+        """ساخت از فیلد data پاسخ listings/latest کوین‌مارکت‌کپ"""
+        records = []
+        for coin in listings:
+            try:
+                quote = coin.get('quote', {}).get('USD', {})
+                records.append({
+                    'id': coin.get('slug'),
+                    'symbol': coin['symbol'],
+                    'name': coin['name'],
+                    'price': quote.get('price'),
+                    'volume': quote.get('volume_24h', 0),
+                    'market_cap': quote.get('market_cap'),
+                    'rank': coin.get('cmc_rank', 9999),
+                    'change_1h': quote.get('percent_change_1h', 0),
+                    'change_24h': quote.get('percent_change_24h', 0),
+                    'change_7d': quote.get('percent_change_7d', 0),
+                    'change_30d': quote.get('percent_change_30d', 0),
+                    'last_updated': quote.get('last_updated'),
+                    'source': 'CoinMarketCap',
+                })
+            except (KeyError, TypeError, AttributeError) as e:
+                print(f"⚠️ خطا در پردازش داده‌های {coin.get('symbol', 'ناشناخته')}: {e}")
+        snapshot = cls.from_records(records, FIELD_ORDER)
+        snapshot._columns['volume_to_cap'] = _volume_to_cap(snapshot['volume'], snapshot['market_cap'])
+        return snapshot
+
+    @classmethod
+    def concat(cls, *snapshots: 'MarketSnapshot') -> 'MarketSnapshot':
+        """الحاق ردیف‌ها؛ فیلدهایی که در یکی نیست با NaN یا None پر می‌شوند"""
+        snapshots = [s for s in snapshots if len(s)]
+        if not snapshots:
+            return cls.empty()
+        fields = []
+        for snapshot in snapshots:
+            fields.extend(f for f in snapshot.fields if f not in fields)
+        columns = {}
+        for name in fields:
+            like = next(s._columns[name] for s in snapshots if name in s._columns)
+            parts = [s._columns[name] if name in s._columns else _empty_column(name, len(s), like)
+                     for s in snapshots]
+            columns[name] = np.concatenate(parts)
+        return cls(columns)
+
+    # --- دسترسی ---
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[SnapshotRow]:
+        return (SnapshotRow(self, i) for i in range(self._size))
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.column(key)
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += self._size
+            if not 0 <= key < self._size:
+                raise IndexError(key)
+            return SnapshotRow(self, int(key))
+        return self.take(key)
+
+    def __repr__(self) -> str:
+        return f"MarketSnapshot({self._size} coins, fields={list(self.fields)})"
+
+    @property
+    def fields(self):
+        return self._columns.keys()
+
+    @property
+    def nbytes(self) -> int:
+        """حجم حافظه آرایه‌ها (برای ستون‌های متنی فقط اشاره‌گرها؛ رشته‌ها intern و مشترک‌اند)"""
+        return sum(c.nbytes for c in self._columns.values())
+
+    def column(self, name: str) -> np.ndarray:
+        return self._columns[name]
+
+    def columns(self, names: Iterable[str]) -> Dict[str, np.ndarray]:
+        """ستون‌های عددی float64 برای موتور قوانین (فیلد ناموجود -> NaN)"""
+        result = {}
+        for name in names:
+            column = self._columns.get(name)
+            result[name] = column if column is not None else np.full(self._size, np.nan)
+        return result
+
+    def to_records(self) -> List[Dict]:
+        return [dict(row) for row in self]
+
+    # --- عملیات ستونی ---
+
+    def take(self, indices) -> 'MarketSnapshot':
+        """زیرمجموعه با ماسک بولی، آرایه اندیس یا slice"""
+        return MarketSnapshot({name: col[indices] for name, col in self._columns.items()})
+
+    def mask(self, mask: np.ndarray) -> 'MarketSnapshot':
+        return self.take(np.asarray(mask, dtype=bool))
+
+    def head(self, n: int) -> 'MarketSnapshot':
+        return self.take(slice(0, n))
+
+    def sort(self, field: str, descending: bool = True) -> 'MarketSnapshot':
+        """مرتب‌سازی پایدار؛ مقادیر NaN همیشه در انتها"""
+        values = self._columns[field]
+        if _is_text(values):
+            order = sorted(range(self._size), key=lambda i: (values[i] is None, values[i] or ''),
+                           reverse=descending)
+            return self.take(np.array(order, dtype=np.intp))
+        key = np.where(np.isnan(values), np.inf, -values if descending else values)
+        return self.take(np.argsort(key, kind='stable'))
+
+    def isin(self, field: str, values: Iterable) -> np.ndarray:
+        values = set(values)
+        return np.fromiter((v in values for v in self._columns[field]), dtype=bool, count=self._size)
+
+    def unique(self, field: str = 'symbol', keep: str = 'first') -> 'MarketSnapshot':
+        """حذف ردیف‌های تکراری بر اساس field (keep: 'first' یا 'last')"""
+        positions = {}
+        for i, value in enumerate(self._columns[field]):
+            if keep == 'last' or value not in positions:
+                positions[value] = i
+        return self.take(np.array(sorted(positions.values()), dtype=np.intp))
+
+    def index_of(self, field: str = 'symbol') -> Dict:
+        """نگاشت مقدار field -> اندیس اولین ردیف"""
+        index = {}
+        for i, value in enumerate(self._columns[field]):
+            index.setdefault(value, i)
+        return index
+
+    def join(self, other: 'MarketSnapshot', on: str = 'symbol', fields: Optional[Iterable[str]] = None,
+             suffix: str = '') -> 'MarketSnapshot':
+        """
+        اتصال چپ: ستون‌های fields از other بر اساس کلید on به این snapshot اضافه می‌شوند
+        ردیف‌های بدون جفت NaN یا None می‌گیرند؛ با suffix می‌توان نام ستون‌های جدید را از ستون‌های موجود جدا کرد
+        """
+        fields = [f for f in (other.fields if fields is None else fields) if f != on]
+        lookup = other.index_of(on)
+        positions = np.fromiter((lookup.get(v, -1) for v in self._columns[on]), dtype=np.intp, count=self._size)
+        matched = positions >= 0
+        columns = dict(self._columns)
+        for name in fields:
+            source = other._columns[name]
+            column = _empty_column(name, self._size, source)
+            column[matched] = source[positions[matched]]
+            columns[name + suffix] = column
+        return MarketSnapshot(columns)
@@ -0,0 +1,253 @@
+"""
+ماژول metrics.py
+اندازه‌گیری زمان و تعداد هر مرحله اسکن به تفکیک مرحله و سرویس، با خروجی قالب متنی Prometheus
+- مرحله‌ها: fetch (snapshot بازار)، parse، history (داده تاریخی)، indicators، scoring، dispatch (ارسال تلگرام)
+- http_client هر درخواست را با کد وضعیت و زمان پاسخ ثبت می‌کند؛ Scheduler مدت هر دور هر Job را
+- endpoint اختیاری /metrics: با تنظیم METRICS_PORT در config.py، Scheduler.run آن را روی 127.0.0.1 راه‌اندازی می‌کند
+
+استفاده:
+    with metrics.timed('history', 'coingecko'):
+        response = http_client.get(url)
+
+    @metrics.timed('scoring')
+    def score(...): ...
+"""
+import bisect
+import threading
+import time
+from contextlib import ContextDecorator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Sequence, Tuple
+
+METRICS_ENABLED = True
+METRICS_HOST = '127.0.0.1'
+PREFIX = 'pump'
+LOCAL = 'local'                        # سرویس مرحله‌هایی که درخواست شبکه ندارند (indicators، scoring)
+STAGES = ('fetch', 'parse', 'history', 'indicators', 'scoring', 'dispatch')
+
+# مرزهای هیستوگرام زمان (ثانیه): از امتیازدهی یک ارز (میکروثانیه) تا یک دور کامل اسکن (دقیقه)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labels, labels)} {_number(value)}')
+        return '\n'.join(lines)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], list] = {}     # labels -> [شمارش هر بازه..., مجموع، تعداد]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def summary(self, *labels: str) -> Tuple[int, float]:
+        """(تعداد، مجموع) مشاهده‌های labels"""
+        with self._lock:
+            state = self._values.get(labels)
+            return (state[-1], state[-2]) if state else (0, 0.0)
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = [(labels, list(state)) for labels, state in sorted(self._values.items())]
+        for labels, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state):
+                cumulative += count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f'{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, labels)} {_number(state[-2])}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, labels)} {state[-1]}')
+        return '\n'.join(lines)
+
+
+class Gauge:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} gauge']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labels, labels)} {_number(value)}')
+        return '\n'.join(lines)
+
+
+STAGE_SECONDS = Histogram(f'{PREFIX}_stage_seconds', 'Duration of each scan stage', ('stage', 'provider'))
+STAGE_ERRORS = Counter(f'{PREFIX}_stage_errors_total', 'Failed scan stages (exception or error response)', ('stage', 'provider'))
+HTTP_SECONDS = Histogram(f'{PREFIX}_http_request_seconds', 'HTTP request latency per provider', ('provider',))
+HTTP_REQUESTS = Counter(f'{PREFIX}_http_requests_total', 'HTTP responses per provider and status', ('provider', 'status'))
+JOB_SECONDS = Histogram(f'{PREFIX}_job_seconds', 'Duration of each scheduler job run', ('job',))
+JOB_FAILURES = Counter(f'{PREFIX}_job_failures_total', 'Scheduler job runs that raised an exception', ('job',))
+
+CIRCUIT_STATE = Gauge(f'{PREFIX}_circuit_state', 'Circuit breaker state per provider (0 closed, 1 half-open, 2 open)',
+                      ('provider',))
+
+REGISTRY = [STAGE_SECONDS, STAGE_ERRORS, HTTP_SECONDS, HTTP_REQUESTS, JOB_SECONDS, JOB_FAILURES, CIRCUIT_STATE]
+
+
+class timed(ContextDecorator):
+    """
+    زمان‌سنجی یک مرحله به صورت context manager یا decorator
+    خطای داخل مرحله شمرده و دوباره پرتاب می‌شود
+    """
+
+    def __init__(self, stage: str, provider: str = LOCAL):
+        self.stage = stage
+        self.provider = provider
+        self._started = 0.0
+
+    def _recreate_cm(self):
+        # هر فراخوانی تابع تزئین‌شده (احتمالاً همزمان در چند thread) زمان‌سنج جدا می‌گیرد
+        return timed(self.stage, self.provider)
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.stage, time.perf_counter() - self._started, self.provider, ok=exc_type is None)
+        return False
+
+
+def observe(stage: str, seconds: float, provider: str = LOCAL, ok: bool = True) -> None:
+    """ثبت مستقیم مدت یک مرحله (برای جاهایی که context manager مناسب نیست)"""
+    if not METRICS_ENABLED:
+        return
+    STAGE_SECONDS.observe(seconds, stage, provider)
+    if not ok:
+        STAGE_ERRORS.inc(stage, provider)
+
+
+def record_request(provider: Optional[str], status, seconds: float) -> None:
+    """ثبت یک درخواست HTTP؛ status کد وضعیت یا 'error' برای خطای اتصال/timeout"""
+    if not METRICS_ENABLED:
+        return
+    provider = provider or 'other'
+    HTTP_SECONDS.observe(seconds, provider)
+    HTTP_REQUESTS.inc(provider, str(status))
+
+
+def record_job(job: str, seconds: float, ok: bool) -> None:
+    if not METRICS_ENABLED:
+        return
+    JOB_SECONDS.observe(seconds, job)
+    if not ok:
+        JOB_FAILURES.inc(job)
+
+
+def render() -> str:
+    """همه متریک‌ها در قالب متنی Prometheus (نسخه 0.0.4)"""
+    return '\n'.join(metric.render() for metric in REGISTRY) + '\n'
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def configured_port() -> Optional[int]:
+    """METRICS_PORT از config.py (None اگر تنظیم نشده باشد)"""
+    try:
+        import config
+    except ImportError:
+        return None
+    port = getattr(config, 'METRICS_PORT', None)
+    return int(port) if port else None
+
+
+def start_server(port: Optional[int] = None, host: str = METRICS_HOST) -> Optional[ThreadingHTTPServer]:
+    """
+    راه‌اندازی endpoint /metrics در یک thread پس‌زمینه (فقط یک‌بار در هر پروسه)
+    port=None: از METRICS_PORT در config.py؛ اگر آن هم تنظیم نشده باشد سرور راه‌اندازی نمی‌شود
+    """
+    global _server
+    port = configured_port() if port is None else port
+    if port is None:
+        return None
+    with _server_lock:
+        if _server is not None:
+            return _server
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            print(f"⚠️ راه‌اندازی endpoint متریک‌ها روی پورت {port} ناموفق بود: {e}")
+            return None
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+        _server = server
+        print(f"📈 متریک‌ها روی http://{host}:{server.server_address[1]}/metrics")
+        return server
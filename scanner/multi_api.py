@@ -2,49 +2,139 @@
 ماژول multi_api.py
 تجمیع داده و سیگنال از چندین API: CoinGecko, Ethereum, BSC, CoinMarketCap
 """
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
 import requests
+from scanner import circuit_breaker, coin_index, holder_store, http_client, market_data, metrics, transfer_index
 from typing import List, Dict, Optional
 
+# حداکثر درخواست همزمان به هر API در حالت موازی
+PROVIDER_CONCURRENCY = {
+    'coingecko': 4,
+    'coinmarketcap': 2,
+    'etherscan': 3,
+    'bscscan': 3,
+}
+
+# نگاشت شناسه CoinGecko به شناسه CoinMarketCap (برای جلوگیری از ابهام نمادهای تکراری)
+CMC_ID_MAP_FILE = 'cmc_id_map.json'
+CMC_ID_MAP_TTL = 7 * 24 * 3600   # هر نگاشت پس از یک هفته دوباره بررسی می‌شود
+CMC_ID_MISS_TTL = 6 * 3600       # نمادی که در CMC پیدا نشد زودتر دوباره بررسی می‌شود (ممکن است تازه لیست شود)
+CMC_BATCH_SIZE = 100             # تعداد شناسه در هر درخواست quotes/latest
+
+# پارامترهای coins/{id} وقتی فقط اطلاعات ثابت ارز (genesis_date، platforms) لازم است
+COIN_METADATA_PARAMS = {
+    'localization': 'false',
+    'tickers': 'false',
+    'market_data': 'false',
+    'community_data': 'false',
+    'developer_data': 'false',
+}
+
+# پنجره‌ای از transfer_index که تعداد انتقال آن در امتیاز (eth_tx/bsc_tx) استفاده می‌شود
+ONCHAIN_WINDOW = '24h'
+
 class MultiAPIScanner:
     def __init__(self, coingecko_key: Optional[str]=None, cmc_key: Optional[str]=None, eth_key: Optional[str]=None, bsc_key: Optional[str]=None):
         self.coingecko_key = coingecko_key
         self.cmc_key = cmc_key
         self.eth_key = eth_key
         self.bsc_key = bsc_key
+        self._cmc_id_map = None
+        self._cmc_id_lock = threading.Lock()
 
-    def fetch_coingecko(self, symbol: str) -> Dict:
-        import time
-        url = f"https://api.coingecko.com/api/v3/coins/{symbol}"
-        tries = 3
-        for attempt in range(tries):
-            try:
-                r = requests.get(url, timeout=10)
-                if r.status_code == 200:
-                    return r.json()
-                else:
-                    print(f"[CoinGecko] خطا: وضعیت {r.status_code} برای {symbol}")
-            except requests.exceptions.SSLError as e:
-                print(f"[CoinGecko] خطای SSL برای {symbol}: {e}")
-            except requests.exceptions.ConnectionError as e:
-                print(f"[CoinGecko] خطای اتصال برای {symbol}: {e}")
-            except Exception as e:
-                print(f"[CoinGecko] خطا در دریافت داده برای {symbol}: {e}")
-            if attempt < tries-1:
-                print("دوباره تلاش می‌شود...")
-                time.sleep(10)  # افزایش تاخیر برای اتصال بهتر به سرور
-        print(f"[CoinGecko] شکست در دریافت داده برای {symbol} بعد از {tries} تلاش.")
+    @metrics.timed('fetch', 'coingecko')
+    def fetch_coingecko(self, symbol: str, params: Optional[Dict] = None) -> Dict:
+        # تلاش مجدد (با backoff) و انتظار Retry-After را http_client و rate_limiter انجام می‌دهند
+        url = http_client.api_url('coingecko', f'/coins/{symbol}')
+        try:
+            r = http_client.get(url, params=params)
+        except circuit_breaker.CircuitOpenError as e:
+            print(f"[CoinGecko] {e}")
+            return {}
+        except requests.exceptions.SSLError as e:
+            print(f"[CoinGecko] خطای SSL برای {symbol}: {e}")
+            return {}
+        except requests.exceptions.ConnectionError as e:
+            print(f"[CoinGecko] خطای اتصال برای {symbol}: {e}")
+            return {}
+        except Exception as e:
+            print(f"[CoinGecko] خطا در دریافت داده برای {symbol}: {e}")
+            return {}
+        if r.status_code == 200:
+            return r.json()
+        print(f"[CoinGecko] خطا: وضعیت {r.status_code} برای {symbol}")
         return {}
 
+    @metrics.timed('fetch', 'coingecko')
     def fetch_top_coins(self, limit: int = 10) -> list:
-        url = f"https://api.coingecko.com/api/v3/coins/markets?vs_currency=usd&order=market_cap_desc&per_page={limit}&page=1&sparkline=false"
+        url, params = market_data.markets_query()
         headers = {"x-cg-pro-api-key": self.coingecko_key} if self.coingecko_key else {}
-        r = requests.get(url, headers=headers)
+        r = http_client.get(url, params=params, headers=headers)
         if r.status_code == 200:
-            return r.json()
+            return r.json()[:limit]
         return []
 
+    def fetch_coin_metadata(self, coin_id: str) -> Dict:
+        """نسخه سبک coins/{id} فقط برای اطلاعات ثابت (بدون market_data، tickers و ...)"""
+        return self.fetch_coingecko(coin_id, params=COIN_METADATA_PARAMS)
+
+    def coin_metadata(self, coins: list) -> Dict[str, Dict]:
+        """
+        اطلاعات ثابت (genesis_date، platforms) ارزها از ایندکس محلی
+        فقط ارزهایی که در ایندکس نیستند از شبکه گرفته می‌شوند و بقیه در پس‌زمینه به‌روز می‌شوند
+        """
+        index = coin_index.get_index()
+        index.start_refresher(self.fetch_coin_metadata)
+        return index.ensure((c['id'] for c in coins), self.fetch_coin_metadata)
+
+    @staticmethod
+    def _listed_days_ago(meta: Optional[Dict], now) -> Optional[int]:
+        import datetime
+        gen_date = (meta or {}).get('genesis_date')
+        if not gen_date:
+            return None
+        try:
+            listed_dt = datetime.datetime.strptime(gen_date, "%Y-%m-%d")
+        except Exception:
+            return None
+        return (now - listed_dt).days
+
     def detect_newly_listed(self, days: int = 7, min_volume: float = 1e5, min_change: float = 5) -> list:
-        ... # (existing code)
+        """
+        شناسایی کوین‌های تازه لیست‌شده با پتانسیل رشد بالا
+        days: تعداد روز از لیست شدن
+        min_volume: حداقل حجم معاملات
+        min_change: حداقل درصد رشد قیمت
+        """
+        import datetime
+        coins = self.fetch_top_coins(100)
+        if not coins:
+            return []
+        # تاریخ لیست شدن از ایندکس محلی (فقط ارزهای ناشناخته از کوین‌گکو گرفته می‌شوند)
+        metadata = self.coin_metadata(coins)
+        now = datetime.datetime.utcnow()
+        result = []
+        for coin in coins:
+            days_since = self._listed_days_ago(metadata.get(coin['id']), now)
+            if days_since is None or days_since > days:
+                continue
+            volume = coin.get('total_volume') or 0
+            price_change = coin.get('price_change_percentage_24h') or 0
+            if volume >= min_volume and price_change >= min_change:
+                result.append({
+                    'name': coin.get('name'),
+                    'symbol': coin.get('symbol'),
+                    'price': coin.get('current_price'),
+                    'volume': volume,
+                    'price_change_24h': price_change,
+                    'listed_days_ago': days_since
+                })
+        return result
 
     def detect_holder_growth(self, days: int = 7, min_growth: int = 50) -> list:
         """
@@ -53,41 +143,31 @@ class MultiAPIScanner:
         min_growth: حداقل رشد تعداد هولدر در ۲۴ ساعت اخیر
         """
         import datetime
-        url = f"https://api.coingecko.com/api/v3/coins/markets?vs_currency=usd&order=market_cap_desc&per_page=50&page=1&sparkline=false"
-        headers = {"x-cg-pro-api-key": self.coingecko_key} if self.coingecko_key else {}
-        r = requests.get(url, headers=headers)
-        if r.status_code != 200:
+        coins = self.fetch_top_coins(50)
+        if not coins:
             return []
-        coins = r.json()
+        metadata = self.coin_metadata(coins)
         now = datetime.datetime.utcnow()
         result = []
         for coin in coins:
-            coin_detail = self.fetch_coingecko(coin['id'])
-            gen_date = coin_detail.get('genesis_date')
-            if not gen_date:
-                continue
-            try:
-                listed_dt = datetime.datetime.strptime(gen_date, "%Y-%m-%d")
-            except Exception:
-                continue
-            days_since = (now - listed_dt).days
-            if days_since > days:
+            meta = metadata.get(coin['id'])
+            days_since = self._listed_days_ago(meta, now)
+            if days_since is None or days_since > days:
                 continue
             # فقط توکن‌های دارای قرارداد اتریوم یا BSC
-            eth_contract = None
-            bsc_contract = None
-            platforms = coin_detail.get('platforms', {})
-            if 'ethereum' in platforms and platforms['ethereum']:
-                eth_contract = platforms['ethereum']
-            if 'binance-smart-chain' in platforms and platforms['binance-smart-chain']:
-                bsc_contract = platforms['binance-smart-chain']
+            platforms = meta.get('platforms', {})
+            eth_contract = platforms.get('ethereum') or None
+            bsc_contract = platforms.get('binance-smart-chain') or None
             holders_now = None
             holders_24h_ago = None
-            # فقط یکی را چک کن (اولویت با اتریوم)
+            chain = contract = None
+            # فقط یکی را چک کن (اولویت با اتریوم)؛ مقدار ۲۴ ساعت قبل از تاریخچه محلی می‌آید
             if eth_contract:
+                chain, contract = 'ethereum', eth_contract
                 holders_now = self._get_eth_holder_count(eth_contract)
                 holders_24h_ago = self._get_eth_holder_count(eth_contract, days_ago=1)
             elif bsc_contract:
+                chain, contract = 'binance-smart-chain', bsc_contract
                 holders_now = self._get_bsc_holder_count(bsc_contract)
                 holders_24h_ago = self._get_bsc_holder_count(bsc_contract, days_ago=1)
             if holders_now is not None and holders_24h_ago is not None:
@@ -99,156 +179,317 @@ class MultiAPIScanner:
                         'price': coin.get('current_price'),
                         'holder_growth': growth,
                         'holders_now': holders_now,
+                        'holder_growth_windows': holder_store.get_store().growth_all(chain, contract),
                         'listed_days_ago': days_since
                     })
         return result
 
     def _get_eth_holder_count(self, contract, days_ago=0):
-        import time
         # Etherscan API: https://api.etherscan.io/api?module=token&action=tokenholderlist&contractaddress=... (pro API)
         # اما API رایگان فقط تعداد هولدر را نمی‌دهد، پس از token/tokeninfo استفاده می‌کنیم
-        url = f"https://api.etherscan.io/api?module=token&action=tokeninfo&contractaddress={contract}&apikey={self.eth_key}"
-        r = requests.get(url)
-        if r.status_code != 200:
-            return None
-        data = r.json()
-        try:
-            holders = int(data['result'][0]['tokenHolder'])
-        except Exception:
-            holders = None
-        # اگر days_ago>0 داده تاریخی نداریم، مقدار فعلی را برمی‌گردانیم (بهتر است تاریخچه را ذخیره کنیم)
-        return holders
+        url = http_client.api_url('etherscan', f'/api?module=token&action=tokeninfo&contractaddress={contract}&apikey={self.eth_key}')
+        return self._get_holder_count('ethereum', contract, url, days_ago)
 
     def _get_bsc_holder_count(self, contract, days_ago=0):
-        url = f"https://api.bscscan.com/api?module=token&action=tokeninfo&contractaddress={contract}&apikey={self.bsc_key}"
-        r = requests.get(url)
+        url = http_client.api_url('bscscan', f'/api?module=token&action=tokeninfo&contractaddress={contract}&apikey={self.bsc_key}')
+        return self._get_holder_count('binance-smart-chain', contract, url, days_ago)
+
+    def _get_holder_count(self, chain: str, contract: str, url: str, days_ago=0) -> Optional[int]:
+        """
+        days_ago=0: تعداد فعلی از explorer گرفته و در holder_store ثبت می‌شود
+        days_ago>0: مقدار گذشته فقط از تاریخچه محلی خوانده می‌شود (بدون درخواست شبکه)
+        """
+        store = holder_store.get_store()
+        if days_ago:
+            return store.value_at(chain, contract, days_ago * 24 * 3600)
+        r = http_client.get(url)
         if r.status_code != 200:
             return None
         data = r.json()
         try:
             holders = int(data['result'][0]['tokenHolder'])
         except Exception:
-            holders = None
+            return None
+        store.record(chain, contract, holders)
         return holders
 
+    def best_coin_signal(self, limit: int = 10, concurrent: bool = True) -> dict:
         """
-        شناسایی کوین‌های تازه لیست‌شده با پتانسیل رشد بالا
-        days: تعداد روز از لیست شدن
-        min_volume: حداقل حجم معاملات
-        min_change: حداقل درصد رشد قیمت
+        امتیازدهی ارزهای برتر با داده‌های چند API و انتخاب بهترین ارز
+        concurrent: اگر True باشد درخواست‌های هر ارز و هر API به صورت موازی
+        (با سقف همزمانی جدا برای هر API) ارسال می‌شوند
         """
-        import datetime
-        import time
-        url = f"https://api.coingecko.com/api/v3/coins/markets?vs_currency=usd&order=market_cap_desc&per_page=100&page=1&sparkline=false&price_change_percentage=24h"
-        headers = {"x-cg-pro-api-key": self.coingecko_key} if self.coingecko_key else {}
-        r = requests.get(url, headers=headers)
-        if r.status_code != 200:
-            return []
-        coins = r.json()
-        now = datetime.datetime.utcnow()
-        result = []
-        for coin in coins:
-            # گرفتن تاریخ لیست شدن از API اصلی کوین‌گکو (ممکن است کند باشد)
-            coin_detail = self.fetch_coingecko(coin['id'])
-            gen_date = coin_detail.get('genesis_date')
-            if not gen_date:
-                continue
-            try:
-                listed_dt = datetime.datetime.strptime(gen_date, "%Y-%m-%d")
-            except Exception:
-                continue
-            days_since = (now - listed_dt).days
-            if days_since > days:
-                continue
-            volume = coin.get('total_volume', 0)
-            price_change = coin.get('price_change_percentage_24h', 0)
-            if volume >= min_volume and price_change >= min_change:
-                result.append({
-                    'name': coin.get('name'),
-                    'symbol': coin.get('symbol'),
-                    'price': coin.get('current_price'),
-                    'volume': volume,
-                    'price_change_24h': price_change,
-                    'listed_days_ago': days_since
-                })
-        return result
-
-    def best_coin_signal(self, limit: int = 10) -> dict:
         coins = self.fetch_top_coins(limit)
-        best = None
-        best_score = float('-inf')
+        if concurrent:
+            return self._best_coin_signal_concurrent(coins)
+        try:
+            cmc_quotes = self.fetch_coinmarketcap_batch(coins)
+        except Exception as e:
+            # مثل _future_result در حالت موازی: خرابی CMC کل دور را متوقف نمی‌کند
+            print(f"[CoinMarketCap] خطا در دریافت داده: {e}")
+            cmc_quotes = {}
         results = []
         for coin in coins:
-            symbol = coin['id']
-            cg = self.fetch_coingecko(symbol)
-            cg_price = cg.get('market_data', {}).get('current_price', {}).get('usd')
-            cg_change = cg.get('market_data', {}).get('price_change_percentage_24h')
-            volume = cg.get('market_data', {}).get('total_volume', {}).get('usd')
-            cmc = self.fetch_coinmarketcap(coin.get('symbol', '').upper())
-            cmc_price = None
-            cmc_change = None
-            cmc_volume = None
-            try:
-                data = cmc.get('data', {})
-                for k in data:
-                    cmc_price = data[k]['quote']['USD']['price']
-                    cmc_change = data[k]['quote']['USD']['percent_change_24h']
-                    cmc_volume = data[k]['quote']['USD']['volume_24h']
-                    break
-            except Exception:
-                pass
+            cg = self.fetch_coingecko(coin['id'])
+            cmc = cmc_quotes.get(coin['id'], {})
             # آنچین: اگر contract address داشت، بگیر
-            eth_contract = cg.get('contract_address') if cg.get('asset_platform_id') == 'ethereum' else None
-            bsc_contract = cg.get('contract_address') if cg.get('asset_platform_id') == 'binance-smart-chain' else None
+            eth_contract, bsc_contract = self._onchain_contracts(cg)
             eth_data = self.fetch_ethereum(eth_contract) if eth_contract else None
             bsc_data = self.fetch_bsc(bsc_contract) if bsc_contract else None
-            # مثال ساده: تعداد تراکنش آنچین (در حالت واقعی باید پارس شود)
-            eth_tx = len(eth_data['result']) if eth_data and 'result' in eth_data else 0
-            bsc_tx = len(bsc_data['result']) if bsc_data and 'result' in bsc_data else 0
-            # امتیازدهی: رشد ۲۴ ساعت + حجم + log(تراکنش آنچین+1)
-            try:
-                score = ((cg_change or 0) + (cmc_change or 0))/2 + ((volume or 0)+(cmc_volume or 0))/2/1e7 + (eth_tx + bsc_tx)**0.3
-            except Exception:
-                score = 0
-            results.append({
-                'name': coin.get('name'),
-                'symbol': symbol,
-                'price': cg_price,
-                'cg_change_24h': cg_change,
-                'cg_volume': volume,
-                'cmc_price': cmc_price,
-                'cmc_change_24h': cmc_change,
-                'cmc_volume': cmc_volume,
-                'eth_tx': eth_tx,
-                'bsc_tx': bsc_tx,
-                'score': round(score,3)
-            })
-            if score > best_score:
-                best_score = score
-                best = results[-1]
+            results.append(self._score_coin(coin, cg, cmc, eth_data, bsc_data))
+        return self._pick_best(results)
+
+    def _best_coin_signal_concurrent(self, coins: list) -> dict:
+        """
+        نسخه موازی best_coin_signal: ابتدا CoinGecko و CoinMarketCap همه ارزها با هم
+        (CoinMarketCap به صورت دسته‌ای) درخواست می‌شوند و به محض رسیدن پاسخ CoinGecko هر ارز، درخواست‌های آنچین آن ارز ارسال می‌شود
+        """
+        with ExitStack() as stack:
+            # یک pool جدا برای هر API با اندازه سقف همزمانی آن: صف CoinGecko درخواست‌های آنچین را معطل نمی‌کند
+            pools = {p: stack.enter_context(ThreadPoolExecutor(max_workers=n, thread_name_prefix=f'multi-api-{p}'))
+                     for p, n in PROVIDER_CONCURRENCY.items()}
+            # سرویس‌هایی که مدارشان باز است کنار گذاشته می‌شوند (امتیاز فقط با داده بقیه محاسبه می‌شود)
+            cmc_future = None
+            if circuit_breaker.is_available('coinmarketcap'):
+                cmc_future = pools['coinmarketcap'].submit(self.fetch_coinmarketcap_batch, coins)
+            onchain = {p: circuit_breaker.is_available(p) for p in ('etherscan', 'bscscan')}
+            cg_futures = {}
+            for i, coin in enumerate(coins):
+                cg_futures[pools['coingecko'].submit(self.fetch_coingecko, coin['id'])] = i
+            cg_data = [{} for _ in coins]
+            eth_futures = {}
+            bsc_futures = {}
+            for future in as_completed(cg_futures):
+                i = cg_futures[future]
+                cg_data[i] = self._future_result(future, 'CoinGecko')
+                eth_contract, bsc_contract = self._onchain_contracts(cg_data[i])
+                if eth_contract and onchain['etherscan']:
+                    eth_futures[i] = pools['etherscan'].submit(self.fetch_ethereum, eth_contract)
+                if bsc_contract and onchain['bscscan']:
+                    bsc_futures[i] = pools['bscscan'].submit(self.fetch_bsc, bsc_contract)
+            cmc_quotes = self._future_result(cmc_future, 'CoinMarketCap') if cmc_future is not None else {}
+            results = []
+            for i, coin in enumerate(coins):
+                cmc = cmc_quotes.get(coin['id'], {})
+                eth_data = self._future_result(eth_futures[i], 'Etherscan') if i in eth_futures else None
+                bsc_data = self._future_result(bsc_futures[i], 'BscScan') if i in bsc_futures else None
+                results.append(self._score_coin(coin, cg_data[i], cmc, eth_data, bsc_data))
+        return self._pick_best(results)
+
+    @staticmethod
+    def _future_result(future, provider: str) -> Dict:
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"[{provider}] خطا در دریافت داده: {e}")
+            return {}
+
+    @staticmethod
+    def _onchain_contracts(cg: Dict) -> tuple:
+        eth_contract = cg.get('contract_address') if cg.get('asset_platform_id') == 'ethereum' else None
+        bsc_contract = cg.get('contract_address') if cg.get('asset_platform_id') == 'binance-smart-chain' else None
+        return eth_contract, bsc_contract
+
+    @staticmethod
+    def _transfer_count(activity: Optional[Dict]) -> int:
+        if not activity:
+            return 0
+        return activity.get('windows', {}).get(ONCHAIN_WINDOW, {}).get('transfers', 0)
+
+    @staticmethod
+    @metrics.timed('scoring')
+    def _score_coin(coin: Dict, cg: Dict, cmc: Dict, eth_data: Optional[Dict], bsc_data: Optional[Dict]) -> Dict:
+        symbol = coin['id']
+        cg_price = cg.get('market_data', {}).get('current_price', {}).get('usd')
+        cg_change = cg.get('market_data', {}).get('price_change_percentage_24h')
+        volume = cg.get('market_data', {}).get('total_volume', {}).get('usd')
+        quote = cmc.get('quote', {}).get('USD', {})
+        cmc_price = quote.get('price')
+        cmc_change = quote.get('percent_change_24h')
+        cmc_volume = quote.get('volume_24h')
+        # تعداد انتقال‌های آنچین در پنجره ONCHAIN_WINDOW (از transfer_index)
+        eth_tx = MultiAPIScanner._transfer_count(eth_data)
+        bsc_tx = MultiAPIScanner._transfer_count(bsc_data)
+        # امتیازدهی: رشد ۲۴ ساعت + حجم + log(تراکنش آنچین+1)
+        try:
+            score = ((cg_change or 0) + (cmc_change or 0))/2 + ((volume or 0)+(cmc_volume or 0))/2/1e7 + (eth_tx + bsc_tx)**0.3
+        except Exception:
+            score = 0
+        return {
+            'name': coin.get('name'),
+            'symbol': symbol,
+            'price': cg_price,
+            'cg_change_24h': cg_change,
+            'cg_volume': volume,
+            'cmc_price': cmc_price,
+            'cmc_change_24h': cmc_change,
+            'cmc_volume': cmc_volume,
+            'eth_tx': eth_tx,
+            'bsc_tx': bsc_tx,
+            'score': round(score,3)
+        }
+
+    @staticmethod
+    def _pick_best(results: list) -> dict:
+        best = None
+        best_score = float('-inf')
+        for item in results:
+            if item['score'] > best_score:
+                best_score = item['score']
+                best = item
         return {'best': best, 'all': results}
 
+    @metrics.timed('fetch', 'coinmarketcap')
+    def fetch_coinmarketcap_batch(self, coins: list) -> Dict[str, Dict]:
+        """
+        دریافت دسته‌ای قیمت CoinMarketCap برای یک لیست کامل از ارزها (خروجی fetch_top_coins)
+        خروجی: دیکشنری شناسه CoinGecko -> رکورد CMC (شامل quote.USD)
+        """
+        if not self.cmc_key or not coins:
+            return {}
+        cmc_ids = self.resolve_cmc_ids(coins)
+        ids = sorted(set(cmc_ids.values()))
+        headers = {"X-CMC_PRO_API_KEY": self.cmc_key}
+        by_cmc_id = {}
+        for start in range(0, len(ids), CMC_BATCH_SIZE):
+            chunk = ids[start:start + CMC_BATCH_SIZE]
+            url = http_client.api_url('coinmarketcap', '/v1/cryptocurrency/quotes/latest')
+            try:
+                r = http_client.get(url, params={'id': ','.join(str(i) for i in chunk)}, headers=headers)
+            except circuit_breaker.CircuitOpenError as e:
+                print(f"[CoinMarketCap] {e}")
+                break
+            except requests.RequestException as e:
+                print(f"[CoinMarketCap] خطا در دریافت قیمت {len(chunk)} ارز: {e}")
+                continue
+            if r.status_code != 200:
+                print(f"[CoinMarketCap] خطا: وضعیت {r.status_code} برای {len(chunk)} ارز")
+                continue
+            by_cmc_id.update(r.json().get('data', {}))
+        return {cg_id: by_cmc_id[str(cmc_id)] for cg_id, cmc_id in cmc_ids.items() if str(cmc_id) in by_cmc_id}
+
+    def resolve_cmc_ids(self, coins: list) -> Dict[str, int]:
+        """
+        تبدیل ارزهای CoinGecko به شناسه CMC با استفاده از نگاشت ذخیره‌شده روی دیسک
+        فقط ارزهایی که نگاشت ندارند (یا نگاشتشان قدیمی است) از cryptocurrency/map پرسیده می‌شوند
+        """
+        with self._cmc_id_lock:
+            id_map = self._load_cmc_id_map()
+            now = time.time()
+            missing = [c for c in coins if c.get('id') and self._cmc_id_stale(id_map.get(c['id']), now)]
+            if missing:
+                self._update_cmc_id_map(id_map, missing, now)
+            return {c['id']: id_map[c['id']]['cmc_id']
+                    for c in coins if id_map.get(c.get('id'), {}).get('cmc_id')}
+
+    @staticmethod
+    def _cmc_id_stale(entry: Optional[Dict], now: float) -> bool:
+        if not entry:
+            return True
+        ttl = CMC_ID_MAP_TTL if entry.get('cmc_id') else CMC_ID_MISS_TTL
+        return now - entry.get('updated', 0) > ttl
+
+    def _update_cmc_id_map(self, id_map: Dict, coins: list, now: float):
+        """
+        فقط نمادهایی که دسته‌شان با موفقیت پاسخ گرفت ثبت می‌شوند؛
+        خطای موقت (5xx، 429، مدار باز) نگاشت را خالی نمی‌کند و دور بعد دوباره پرسیده می‌شود
+        """
+        headers = {"X-CMC_PRO_API_KEY": self.cmc_key}
+        symbols = sorted({c.get('symbol', '').upper() for c in coins if c.get('symbol')})
+        candidates = {}
+        answered = set()
+        for start in range(0, len(symbols), CMC_BATCH_SIZE):
+            chunk = symbols[start:start + CMC_BATCH_SIZE]
+            url = http_client.api_url('coinmarketcap', '/v1/cryptocurrency/map')
+            try:
+                r = http_client.get(url, params={'symbol': ','.join(chunk)}, headers=headers)
+            except circuit_breaker.CircuitOpenError as e:
+                print(f"[CoinMarketCap] {e}")
+                break
+            except requests.RequestException as e:
+                print(f"[CoinMarketCap] خطا در دریافت نگاشت نمادها: {e}")
+                continue
+            if r.status_code != 200:
+                print(f"[CoinMarketCap] خطا در دریافت نگاشت نمادها: وضعیت {r.status_code}")
+                continue
+            answered.update(chunk)
+            for entry in r.json().get('data', []):
+                candidates.setdefault(entry.get('symbol', '').upper(), []).append(entry)
+        updated = False
+        for coin in coins:
+            symbol = coin.get('symbol', '').upper()
+            if symbol not in answered:
+                continue
+            match = self._match_cmc_entry(coin, candidates.get(symbol, []))
+            id_map[coin['id']] = {'cmc_id': match['id'] if match else None, 'updated': now}
+            updated = True
+        if updated:
+            self._save_cmc_id_map(id_map)
+
+    @staticmethod
+    def _match_cmc_entry(coin: Dict, entries: list) -> Optional[Dict]:
+        """
+        انتخاب رکورد درست CMC برای یک نماد مبهم:
+        اول slug برابر با شناسه CoinGecko، بعد نام یکسان، در غیر این صورت بهترین رتبه
+        """
+        active = [e for e in entries if e.get('is_active', 1)] or entries
+        if not active:
+            return None
+        for entry in active:
+            if entry.get('slug') == coin.get('id'):
+                return entry
+        name = (coin.get('name') or '').lower()
+        for entry in active:
+            if (entry.get('name') or '').lower() == name:
+                return entry
+        return min(active, key=lambda e: e.get('rank') or float('inf'))
+
+    def _load_cmc_id_map(self) -> Dict:
+        if self._cmc_id_map is None:
+            self._cmc_id_map = {}
+            if os.path.exists(CMC_ID_MAP_FILE):
+                try:
+                    with open(CMC_ID_MAP_FILE, 'r', encoding='utf-8') as f:
+                        self._cmc_id_map = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"[CoinMarketCap] خطا در خواندن {CMC_ID_MAP_FILE}: {e}")
+        return self._cmc_id_map
+
+    def _save_cmc_id_map(self, id_map: Dict):
+        tmp_path = CMC_ID_MAP_FILE + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(id_map, f)
+            os.replace(tmp_path, CMC_ID_MAP_FILE)
+        except OSError as e:
+            print(f"[CoinMarketCap] خطا در ذخیره {CMC_ID_MAP_FILE}: {e}")
+
+    @metrics.timed('fetch', 'coinmarketcap')
     def fetch_coinmarketcap(self, symbol: str) -> Dict:
-        url = f"https://pro-api.coinmarketcap.com/v1/cryptocurrency/quotes/latest?symbol={symbol}"
+        url = http_client.api_url('coinmarketcap', f'/v1/cryptocurrency/quotes/latest?symbol={symbol}')
         headers = {"X-CMC_PRO_API_KEY": self.cmc_key} if self.cmc_key else {}
-        r = requests.get(url, headers=headers)
+        r = http_client.get(url, headers=headers)
         if r.status_code == 200:
             return r.json()
         return {}
 
+    @metrics.timed('fetch', 'etherscan')
     def fetch_ethereum(self, contract: str) -> Dict:
-        url = f"https://api.etherscan.io/api?module=account&action=tokentx&contractaddress={contract}&apikey={self.eth_key}"
-        r = requests.get(url)
-        if r.status_code == 200:
-            return r.json()
-        return {}
+        return self._onchain_activity('ethereum', contract, self.eth_key)
 
+    @metrics.timed('fetch', 'bscscan')
     def fetch_bsc(self, contract: str) -> Dict:
-        url = f"https://api.bscscan.com/api?module=account&action=tokentx&contractaddress={contract}&apikey={self.bsc_key}"
-        r = requests.get(url)
-        if r.status_code == 200:
-            return r.json()
-        return {}
+        return self._onchain_activity('binance-smart-chain', contract, self.bsc_key)
+
+    @staticmethod
+    def _onchain_activity(chain: str, contract: str, api_key: Optional[str]) -> Dict:
+        """
+        به‌روزرسانی افزایشی انتقال‌های قرارداد (فقط بلوک‌های جدید) و فعالیت پنجره‌ای آن از ایندکس محلی
+        خروجی: {'new_transfers': تعداد انتقال جدید این دور یا None در صورت خطا، 'windows': {'1h'|'24h'|'7d': {...}}}
+        """
+        index = transfer_index.get_index()
+        new = index.sync(chain, contract, api_key or '')
+        return {'new_transfers': new, 'windows': index.activity(chain, contract)}
 
     def aggregate_signals(self, symbol: str, eth_contract: Optional[str]=None, bsc_contract: Optional[str]=None) -> Dict:
         """
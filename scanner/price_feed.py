@@ -0,0 +1,433 @@
+"""
+ماژول price_feed.py
+دریافت جریانی (streaming) قیمت‌ها به جای polling هر چند دقیقه
+- PriceFeed: رابط منابع تیک (WebSocket یا TCP با پیام‌های JSON خط به خط) با اتصال مجدد خودکار
+- LiveMarketState: وضعیت زنده هر ارز (آخرین قیمت، تغییر و حجم در پنجره‌های 1/5/15 دقیقه)
+  که اسکنرها هر لحظه می‌خوانند؛ شنونده‌ها با عبور تغییر از آستانه در همان لحظه خبر می‌گیرند
+- ReplayServer: سرور محلی که تیک‌های ضبط‌شده (یا داده ساختگی) را برای تست پخش می‌کند
+
+قالب هر پیام: {"s": "BTC", "p": 65000.5, "t": 1700000000.25, "v": 0.3}
+(کلیدهای symbol/price/ts/volume هم پذیرفته می‌شوند؛ t بر حسب ثانیه یا میلی‌ثانیه)
+
+اجرای سرور پخش:
+    python -m scanner.price_feed serve ticks.jsonl --port 8765 --speed 10
+    python -m scanner.price_feed demo --port 8765
+"""
+import argparse
+import json
+import math
+import random
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+try:
+    from websockets.sync.client import connect as ws_connect
+except ImportError:  # websockets اختیاری است؛ فقط برای فیدهای ws:// لازم است
+    ws_connect = None
+
+LIVE_WINDOWS = (60, 300, 900)         # پنجره‌های تغییر قیمت (ثانیه)
+ALERT_COOLDOWN = 900                  # حداقل فاصله دو هشدار یک ارز در یک پنجره
+RECONNECT_DELAY = 1.0
+RECONNECT_MAX_DELAY = 60.0
+REPLAY_PORT = 8765
+
+
+@dataclass
+class Tick:
+    symbol: str
+    price: float
+    ts: float
+    volume: float = 0.0
+
+
+def parse_tick(message) -> Optional[Tick]:
+    """تبدیل یک پیام (رشته JSON یا dict) به Tick؛ پیام نامعتبر None برمی‌گرداند"""
+    try:
+        data = json.loads(message) if isinstance(message, (str, bytes)) else message
+        symbol = data.get('s') or data.get('symbol')
+        price = data.get('p', data.get('price'))
+        ts = data.get('t', data.get('ts', time.time()))
+        if not symbol or price is None:
+            return None
+        ts = float(ts)
+        if ts > 1e11:                 # میلی‌ثانیه
+            ts /= 1000.0
+        return Tick(str(symbol).upper(), float(price), ts, float(data.get('v', data.get('volume')) or 0.0))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+class _Window:
+    """پنجره زمانی لغزان قیمت و حجم یک ارز"""
+
+    __slots__ = ('seconds', 'points', 'volume')
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.points = deque()
+        self.volume = 0.0
+
+    def add(self, tick: Tick):
+        self.points.append((tick.ts, tick.price, tick.volume))
+        self.volume += tick.volume
+        cutoff = tick.ts - self.seconds
+        # اولین نقطه قدیمی‌تر از پنجره به عنوان مبنا نگه داشته می‌شود
+        while len(self.points) > 1 and self.points[1][0] <= cutoff:
+            self.volume -= self.points.popleft()[2]
+
+    def change(self) -> Optional[float]:
+        if len(self.points) < 2:
+            return None
+        base = self.points[0][1]
+        return (self.points[-1][1] / base - 1) * 100 if base else None
+
+
+class CoinState:
+    """وضعیت زنده یک ارز"""
+
+    def __init__(self, symbol: str, windows: Iterable[float] = LIVE_WINDOWS):
+        self.symbol = symbol
+        self.price: Optional[float] = None
+        self.ts: Optional[float] = None
+        self.ticks = 0
+        self.windows = {w: _Window(w) for w in windows}
+
+    def update(self, tick: Tick):
+        self.price = tick.price
+        self.ts = tick.ts
+        self.ticks += 1
+        for window in self.windows.values():
+            window.add(tick)
+
+    def change(self, window: float) -> Optional[float]:
+        return self.windows[window].change()
+
+    def as_dict(self) -> Dict:
+        result = {'symbol': self.symbol, 'price': self.price, 'ts': self.ts, 'ticks': self.ticks}
+        for seconds, window in self.windows.items():
+            result[f'change_{int(seconds)}s'] = window.change()
+            result[f'volume_{int(seconds)}s'] = window.volume
+        return result
+
+
+class LiveMarketState:
+    """
+    وضعیت زنده همه ارزها (thread-safe)
+    add_listener(window, threshold, callback): با هر تیک اگر |تغییر| در پنجره از threshold درصد بیشتر شود
+    callback(symbol, change, coin_state_dict) صدا زده می‌شود (با فاصله حداقل cooldown ثانیه برای هر ارز)
+    """
+
+    def __init__(self, windows: Iterable[float] = LIVE_WINDOWS, cooldown: float = ALERT_COOLDOWN):
+        self.windows = tuple(windows)
+        self.cooldown = cooldown
+        self._coins: Dict[str, CoinState] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Tuple[float, float, Callable]] = []
+        self._last_alert: Dict[Tuple[str, float], float] = {}
+        self.ticks = 0
+
+    def add_listener(self, window: float, threshold: float, callback: Callable[[str, float, Dict], None]):
+        if window not in self.windows:
+            raise ValueError(f"پنجره {window} در {self.windows} نیست")
+        self._listeners.append((window, threshold, callback))
+
+    def update(self, tick: Tick):
+        fired = []
+        with self._lock:
+            coin = self._coins.get(tick.symbol)
+            if coin is None:
+                coin = self._coins[tick.symbol] = CoinState(tick.symbol, self.windows)
+            if coin.ts is not None and tick.ts < coin.ts:
+                return                                   # تیک قدیمی‌تر از آخرین تیک (ترتیب به هم خورده)
+            coin.update(tick)
+            self.ticks += 1
+            for window, threshold, callback in self._listeners:
+                change = coin.change(window)
+                if change is None or abs(change) < threshold:
+                    continue
+                key = (tick.symbol, window)
+                if tick.ts - self._last_alert.get(key, -math.inf) < self.cooldown:
+                    continue
+                self._last_alert[key] = tick.ts
+                fired.append((callback, change, coin.as_dict()))
+        for callback, change, state in fired:
+            try:
+                callback(tick.symbol, change, state)
+            except Exception as e:
+                print(f"[LiveMarketState] خطا در شنونده {tick.symbol}: {e}")
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        with self._lock:
+            coin = self._coins.get(symbol.upper())
+            return coin.as_dict() if coin else None
+
+    def price(self, symbol: str) -> Optional[float]:
+        with self._lock:
+            coin = self._coins.get(symbol.upper())
+            return coin.price if coin else None
+
+    def symbols(self) -> List[str]:
+        with self._lock:
+            return list(self._coins)
+
+    def movers(self, window: float = 300, threshold: float = 3.0) -> List[Dict]:
+        """ارزهایی که |تغییر| آن‌ها در پنجره از threshold درصد بیشتر است (بزرگ‌ترین اول)"""
+        with self._lock:
+            result = []
+            for coin in self._coins.values():
+                change = coin.change(window)
+                if change is not None and abs(change) >= threshold:
+                    result.append(coin.as_dict())
+        key = f'change_{int(window)}s'
+        return sorted(result, key=lambda c: abs(c[key]), reverse=True)
+
+
+class PriceFeed:
+    """
+    رابط یک منبع تیک؛ زیرکلاس‌ها فقط _messages را پیاده می‌کنند (تولید پیام‌های خام تا قطع اتصال)
+    start() یک thread پس‌زمینه با اتصال مجدد (backoff نمایی) اجرا می‌کند و هر تیک را به state می‌دهد
+    """
+
+    name = 'feed'
+
+    def __init__(self, state: LiveMarketState, symbols: Optional[Iterable[str]] = None):
+        self.state = state
+        self.symbols = {s.upper() for s in symbols} if symbols else None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.connected = threading.Event()
+        self.received = 0
+        self.last_tick_at: Optional[float] = None
+
+    def _messages(self) -> Iterator:
+        raise NotImplementedError
+
+    def handle(self, message):
+        tick = parse_tick(message)
+        if tick is None or (self.symbols is not None and tick.symbol not in self.symbols):
+            return
+        self.received += 1
+        self.last_tick_at = time.time()
+        self.state.update(tick)
+
+    def run(self):
+        delay = RECONNECT_DELAY
+        while not self._stop.is_set():
+            try:
+                for message in self._messages():
+                    if self._stop.is_set():
+                        break
+                    self.connected.set()
+                    delay = RECONNECT_DELAY
+                    self.handle(message)
+            except Exception as e:
+                if not self._stop.is_set():
+                    print(f"[{self.name}] قطع اتصال: {e}")
+            self.connected.clear()
+            if self._stop.wait(delay):
+                break
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    def start(self) -> 'PriceFeed':
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name=f'{self.name}-feed', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+class TCPLineFeed(PriceFeed):
+    """فید TCP با یک پیام JSON در هر خط (همان پروتکل ReplayServer)"""
+
+    name = 'tcp'
+
+    def __init__(self, state: LiveMarketState, host: str, port: int, symbols: Optional[Iterable[str]] = None):
+        super().__init__(state, symbols)
+        self.host = host
+        self.port = port
+
+    def _messages(self) -> Iterator:
+        with socket.create_connection((self.host, self.port), timeout=30) as sock:
+            sock.settimeout(1.0)
+            buffer = b''
+            while not self._stop.is_set():
+                try:
+                    chunk = sock.recv(65536)
+                except socket.timeout:
+                    continue
+                if not chunk:
+                    return
+                buffer += chunk
+                *lines, buffer = buffer.split(b'\n')
+                for line in lines:
+                    if line.strip():
+                        yield line
+
+
+class WebSocketFeed(PriceFeed):
+    """فید WebSocket (نیازمند بسته websockets)؛ subscribe در صورت وجود پس از اتصال ارسال می‌شود"""
+
+    name = 'websocket'
+
+    def __init__(self, state: LiveMarketState, url: str, symbols: Optional[Iterable[str]] = None,
+                 subscribe: Optional[Dict] = None):
+        if ws_connect is None:
+            raise ImportError("برای فید WebSocket بسته websockets را نصب کنید (pip install websockets)")
+        super().__init__(state, symbols)
+        self.url = url
+        self.subscribe = subscribe
+
+    def _messages(self) -> Iterator:
+        with ws_connect(self.url, open_timeout=30) as ws:
+            if self.subscribe:
+                ws.send(json.dumps(self.subscribe))
+            while not self._stop.is_set():
+                try:
+                    message = ws.recv(timeout=1.0)
+                except TimeoutError:
+                    continue
+                # برخی منابع چند تیک را در یک آرایه می‌فرستند
+                if isinstance(message, (str, bytes)) and message[:1] in ('[', b'['):
+                    yield from json.loads(message)
+                else:
+                    yield message
+
+
+def feed_from_url(url: str, state: LiveMarketState, symbols: Optional[Iterable[str]] = None) -> PriceFeed:
+    """ساخت فید از روی آدرس: tcp://host:port یا ws(s)://..."""
+    parsed = urlparse(url)
+    if parsed.scheme == 'tcp':
+        return TCPLineFeed(state, parsed.hostname or '127.0.0.1', parsed.port or REPLAY_PORT, symbols)
+    if parsed.scheme in ('ws', 'wss'):
+        return WebSocketFeed(state, url, symbols)
+    raise ValueError(f"نوع فید پشتیبانی نمی‌شود: {url}")
+
+
+# --- سرور پخش محلی ---
+
+def load_ticks(path: str) -> List[Dict]:
+    """خواندن فایل JSON-lines تیک‌ها (مرتب بر اساس زمان)"""
+    ticks = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            tick = parse_tick(line) if line.strip() else None
+            if tick is not None:
+                ticks.append({'s': tick.symbol, 'p': tick.price, 't': tick.ts, 'v': tick.volume})
+    ticks.sort(key=lambda t: t['t'])
+    return ticks
+
+
+def demo_ticks(symbols: Iterable[str] = ('BTC', 'ETH', 'SOL', 'DOGE', 'PEPE'), seconds: int = 1800,
+               step: float = 1.0, pump_symbol: str = 'PEPE', pump_at: float = 600, pump_pct: float = 12.0,
+               seed: int = 7) -> List[Dict]:
+    """داده ساختگی: گام تصادفی برای هر ارز به همراه یک پامپ سریع روی pump_symbol"""
+    rng = random.Random(seed)
+    prices = {s: rng.uniform(0.5, 100) for s in symbols}
+    start = time.time()
+    ticks = []
+    t = 0.0
+    while t < seconds:
+        for symbol in prices:
+            prices[symbol] *= 1 + rng.gauss(0, 0.0005)
+            if symbol == pump_symbol and pump_at <= t < pump_at + 60:
+                prices[symbol] *= (1 + pump_pct / 100) ** (step / 60)
+            ticks.append({'s': symbol, 'p': round(prices[symbol], 8), 't': start + t, 'v': round(rng.uniform(0, 5), 4)})
+        t += step
+    return ticks
+
+
+class ReplayServer:
+    """
+    سرور TCP محلی که تیک‌ها را با همان فاصله زمانی اصلی (تقسیم بر speed) برای هر کلاینت پخش می‌کند
+    زمان تیک‌ها به زمان شروع پخش منتقل می‌شود (فاصله‌های اصلی حفظ می‌شوند) تا برای کلاینت «زنده» به نظر برسند
+    """
+
+    def __init__(self, ticks: List[Dict], host: str = '127.0.0.1', port: int = REPLAY_PORT,
+                 speed: float = 1.0, loop: bool = False):
+        self.ticks = ticks
+        self.speed = speed
+        self.loop = loop
+        replay = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                replay._stream(self.request)
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self._server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    @property
+    def url(self) -> str:
+        host, port = self.address
+        return f"tcp://{host}:{port}"
+
+    def _stream(self, conn: socket.socket):
+        while True:
+            if not self.ticks:
+                return
+            origin = self.ticks[0]['t']
+            started = time.time()
+            for tick in self.ticks:
+                offset = (tick['t'] - origin) / self.speed
+                wait = started + offset - time.time()
+                if wait > 0:
+                    time.sleep(wait)
+                line = json.dumps(dict(tick, t=started + tick['t'] - origin)) + '\n'
+                try:
+                    conn.sendall(line.encode('utf-8'))
+                except OSError:
+                    return
+            if not self.loop:
+                return
+
+    def start(self) -> 'ReplayServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='replay-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="سرور محلی پخش تیک قیمت")
+    sub = parser.add_subparsers(dest='mode', required=True)
+    serve = sub.add_parser('serve', help="پخش فایل JSON-lines تیک‌ها")
+    serve.add_argument('path')
+    demo = sub.add_parser('demo', help="پخش داده ساختگی با یک پامپ")
+    for p in (serve, demo):
+        p.add_argument('--host', default='127.0.0.1')
+        p.add_argument('--port', type=int, default=REPLAY_PORT)
+        p.add_argument('--speed', type=float, default=1.0)
+        p.add_argument('--loop', action='store_true')
+    args = parser.parse_args()
+    ticks = load_ticks(args.path) if args.mode == 'serve' else demo_ticks()
+    server = ReplayServer(ticks, args.host, args.port, args.speed, args.loop)
+    print(f"📡 پخش {len(ticks)} تیک روی {server.url} (سرعت ×{args.speed})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️ سرور متوقف شد.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+ماژول rate_limiter.py
+محدودکننده نرخ درخواست با الگوریتم token bucket برای هر API
+وضعیت سطل‌ها در یک فایل SQLite نگه داشته می‌شود تا چند پروسه اسکنر یک سهمیه مشترک را تقسیم کنند
+"""
+import os
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+RATE_LIMIT_DB = 'rate_limits.db'
+
+# (تعداد توکن در ثانیه، ظرفیت سطل) برای هر API
+RATE_LIMITS = {
+    'coingecko': (0.5, 5),        # حدود ۳۰ درخواست در دقیقه (پلن رایگان/دمو)
+    'coinmarketcap': (0.5, 5),    # ۳۰ درخواست در دقیقه (پلن پایه)
+    'etherscan': (5.0, 5),        # ۵ درخواست در ثانیه
+    'bscscan': (5.0, 5),
+    'telegram': (30.0, 30),       # ۳۰ پیام در ثانیه برای کل ربات
+}
+
+DEFAULT_RETRY_AFTER = 30   # اگر سرور Retry-After نفرستاد، چند ثانیه صبر شود
+MAX_WAIT_SLICE = 5.0       # حداکثر خواب در هر دور تا تغییرات پروسه‌های دیگر دیده شود
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """تبدیل هدر Retry-After (ثانیه یا تاریخ HTTP) به تعداد ثانیه"""
+    if value is None or value == '':
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(str(value)).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    token bucket مشترک بین پروسه‌ها
+    هر API یک سطل دارد؛ acquire تا آزاد شدن توکن صبر می‌کند و penalize
+    پس از پاسخ 429 کل سطل را تا پایان Retry-After مسدود می‌کند
+    """
+
+    def __init__(self, db_path: str = RATE_LIMIT_DB, limits: Optional[dict] = None):
+        self.db_path = db_path
+        self.limits = dict(RATE_LIMITS if limits is None else limits)
+        self._local = threading.local()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS buckets ('
+            ' provider TEXT PRIMARY KEY,'
+            ' tokens REAL NOT NULL,'
+            ' updated REAL NOT NULL,'
+            ' blocked_until REAL NOT NULL DEFAULT 0)'
+        )
+
+    def _take(self, provider: str, tokens: float) -> float:
+        """یک تلاش برای برداشتن توکن؛ خروجی صفر یعنی موفق، در غیر این صورت زمان انتظار لازم"""
+        rate, capacity = self.limits[provider]
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated, blocked_until FROM buckets WHERE provider = ?',
+                               (provider,)).fetchone()
+            if row is None:
+                available, blocked_until = float(capacity), 0.0
+            else:
+                available = min(capacity, row[0] + max(0.0, now - row[1]) * rate)
+                blocked_until = row[2]
+            if blocked_until > now:
+                wait = blocked_until - now
+            elif available >= tokens:
+                available -= tokens
+                wait = 0.0
+            else:
+                wait = (tokens - available) / rate
+            conn.execute('INSERT OR REPLACE INTO buckets (provider, tokens, updated, blocked_until) VALUES (?, ?, ?, ?)',
+                         (provider, available, now, blocked_until))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+    def acquire(self, provider: str, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """
+        صبر تا آزاد شدن توکن برای provider
+        اگر timeout داده شود و تا آن زمان توکنی آزاد نشود False برمی‌گردد
+        """
+        if provider not in self.limits:
+            return True
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            wait = self._take(provider, tokens)
+            if wait <= 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(min(wait, MAX_WAIT_SLICE))
+
+    def penalize(self, provider: str, retry_after: Optional[float] = None):
+        """مسدود کردن سطل provider برای همه پروسه‌ها تا پایان Retry-After"""
+        if provider not in self.limits:
+            return
+        now = time.time()
+        until = now + (DEFAULT_RETRY_AFTER if retry_after is None else retry_after)
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT INTO buckets (provider, tokens, updated, blocked_until) VALUES (?, 0, ?, ?) '
+                'ON CONFLICT(provider) DO UPDATE SET tokens = 0, updated = excluded.updated, '
+                'blocked_until = MAX(blocked_until, excluded.blocked_until)',
+                (provider, now, until))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def blocked_for(self, provider: str) -> float:
+        """چند ثانیه دیگر provider مسدود است (صفر یعنی آزاد)"""
+        row = self._connect().execute('SELECT blocked_until FROM buckets WHERE provider = ?',
+                                      (provider,)).fetchone()
+        return max(0.0, row[0] - time.time()) if row else 0.0
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> RateLimiter:
+    """محدودکننده مشترک این پروسه (روی فایل RATE_LIMIT_DB)"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter(RATE_LIMIT_DB)
+    return _limiter
@@ -0,0 +1,182 @@
+"""
+ماژول response_cache.py
+کش پایدار پاسخ‌های HTTP روی دیسک (SQLite + فشرده‌سازی zlib) که بین همه پروسه‌های اسکنر مشترک است
+کلید کش آدرس نرمال‌شده + پارامترهای مرتب‌شده است و هر خانواده endpoint مدت اعتبار (TTL) خودش را دارد
+"""
+import atexit
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+RESPONSE_CACHE_DB = 'http_cache.db'
+
+# (سرویس، الگوی مسیر، نام خانواده، TTL بر حسب ثانیه) - اولین الگوی منطبق استفاده می‌شود
+CACHE_TTLS = [
+    ('coingecko', r'/coins/markets$', 'cg_markets', 60),
+    ('coingecko', r'/coins/[^/]+/market_chart$', 'cg_market_chart', 600),
+    ('coingecko', r'/coins/[^/]+/ohlc$', 'cg_ohlc', 600),
+    ('coingecko', r'/coins/[^/]+$', 'cg_coin_detail', 6 * 3600),   # genesis_date و platforms به ندرت تغییر می‌کنند
+    ('coinmarketcap', r'/listings/latest$', 'cmc_listings', 60),
+    ('coinmarketcap', r'/quotes/latest$', 'cmc_quotes', 60),
+    ('coinmarketcap', r'/cryptocurrency/map$', 'cmc_map', 24 * 3600),
+    ('etherscan', r'.*', 'etherscan', 60),
+    ('bscscan', r'.*', 'bscscan', 60),
+]
+
+# پارامترهایی که در کلید کش لحاظ نمی‌شوند (کلیدهای API)
+IGNORED_PARAMS = {'x_cg_pro_api_key', 'x_cg_demo_api_key', 'apikey', 'api_key'}
+
+PURGE_EVERY = 200   # پس از هر چند ذخیره، رکوردهای منقضی پاک شوند
+
+
+def normalize_key(url: str, params: Optional[Dict] = None) -> str:
+    """آدرس + پارامترها به یک کلید یکتا: هاست کوچک، پارامترها مرتب و بدون کلید API"""
+    parsed = urlparse(url)
+    items = parse_qsl(parsed.query, keep_blank_values=True)
+    for key, value in (params or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = str(value).lower()
+        items.append((str(key), str(value)))
+    items = sorted((k, v) for k, v in items if k.lower() not in IGNORED_PARAMS)
+    path = parsed.path.rstrip('/') or '/'
+    return f"{parsed.scheme}://{parsed.netloc.lower()}{path}?{urlencode(items)}"
+
+
+class ResponseCache:
+    """
+    کش مشترک بین پروسه‌ها؛ خواندن و نوشتن همزمان با حالت WAL در SQLite امن است
+    آمار hit/miss هر خانواده در حافظه نگه داشته می‌شود و در جدول stats هم جمع می‌شود
+    """
+
+    def __init__(self, db_path: str = RESPONSE_CACHE_DB, ttls=None):
+        self.db_path = db_path
+        self.ttls = [(p, re.compile(pattern), family, ttl)
+                     for p, pattern, family, ttl in (CACHE_TTLS if ttls is None else ttls)]
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._pending: Dict[str, Dict[str, int]] = {}
+        self._stores = 0
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' key TEXT PRIMARY KEY,'
+            ' family TEXT NOT NULL,'
+            ' created REAL NOT NULL,'
+            ' expires REAL NOT NULL,'
+            ' content_type TEXT,'
+            ' body BLOB NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS responses_expires ON responses (expires)')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS stats ('
+            ' family TEXT PRIMARY KEY,'
+            ' hits INTEGER NOT NULL DEFAULT 0,'
+            ' misses INTEGER NOT NULL DEFAULT 0,'
+            ' stores INTEGER NOT NULL DEFAULT 0)'
+        )
+
+    def family_for(self, provider: Optional[str], url: str) -> Tuple[Optional[str], int]:
+        """نام خانواده endpoint و TTL آن؛ (None, 0) یعنی این آدرس کش نمی‌شود"""
+        path = urlparse(url).path.rstrip('/')
+        for p, pattern, family, ttl in self.ttls:
+            if p == provider and pattern.search(path):
+                return family, ttl
+        return None, 0
+
+    def _count(self, family: str, field: str):
+        with self._stats_lock:
+            for bucket in (self._stats, self._pending):
+                counters = bucket.setdefault(family, {'hits': 0, 'misses': 0, 'stores': 0})
+                counters[field] += 1
+
+    def get(self, key: str, family: str) -> Optional[Tuple[bytes, Optional[str]]]:
+        """بدنه و content-type پاسخ معتبر، یا None اگر در کش نباشد یا منقضی شده باشد"""
+        row = self._connect().execute(
+            'SELECT body, content_type FROM responses WHERE key = ? AND expires > ?',
+            (key, time.time())).fetchone()
+        if row is None:
+            self._count(family, 'misses')
+            return None
+        self._count(family, 'hits')
+        return zlib.decompress(row[0]), row[1]
+
+    def set(self, key: str, family: str, ttl: float, body: bytes, content_type: Optional[str] = None):
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO responses (key, family, created, expires, content_type, body) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (key, family, now, now + ttl, content_type, zlib.compress(body, 6)))
+        self._count(family, 'stores')
+        self._stores += 1
+        if self._stores % PURGE_EVERY == 0:
+            self.purge_expired()
+        self.flush_stats()
+
+    def purge_expired(self) -> int:
+        cursor = self._connect().execute('DELETE FROM responses WHERE expires <= ?', (time.time(),))
+        return cursor.rowcount
+
+    def flush_stats(self):
+        """افزودن شمارنده‌های این پروسه به جدول stats مشترک"""
+        with self._stats_lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        conn = self._connect()
+        for family, c in pending.items():
+            conn.execute(
+                'INSERT INTO stats (family, hits, misses, stores) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(family) DO UPDATE SET hits = hits + excluded.hits, '
+                'misses = misses + excluded.misses, stores = stores + excluded.stores',
+                (family, c['hits'], c['misses'], c['stores']))
+
+    def stats(self, persisted: bool = False) -> Dict[str, Dict[str, int]]:
+        """
+        آمار hit/miss به تفکیک خانواده endpoint
+        persisted=True آمار تجمعی همه پروسه‌ها را از پایگاه داده برمی‌گرداند
+        """
+        if persisted:
+            self.flush_stats()
+            rows = self._connect().execute('SELECT family, hits, misses, stores FROM stats').fetchall()
+            return {f: {'hits': h, 'misses': m, 'stores': s} for f, h, m, s in rows}
+        with self._stats_lock:
+            return {f: dict(c) for f, c in self._stats.items()}
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    """کش مشترک این پروسه (روی فایل RESPONSE_CACHE_DB)"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(RESPONSE_CACHE_DB)
+                atexit.register(_cache.flush_stats)
+    return _cache
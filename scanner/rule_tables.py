@@ -0,0 +1,269 @@
+"""
+ماژول rule_tables.py
+جدول قوانین امتیازدهی چهار اسکنر در قالب scoring_rules:
+    advanced_score_rules  -> AdvancedCryptoScanner._calculate_final_scores
+    COIN_SCORE_RULES      -> calculate_coin_score در crypto_scanner.py
+    GROWTH_RULES          -> GrowthPotentialScanner.calculate_growth_potential
+    SIGNAL_RULES          -> AutoCryptoScanner.analyze_signals
+
+آستانه‌های بهینه‌شده (خروجی python -m scanner.sweep) از OVERRIDES_FILE با load_overrides خوانده می‌شوند
+"""
+import json
+import math
+import os
+from typing import Dict
+
+import numpy as np
+
+from scanner.scoring_rules import Condition, Factor, Group, RuleTable, Rung, SignalRule, SignalTable
+
+
+def _safe_ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """نسبت حجم به ارزش بازار؛ اگر ارزش بازار صفر باشد حجم مثبت بی‌نهایت حساب می‌شود"""
+    ratio = numerator / denominator
+    return np.where(denominator > 0, ratio, np.where(numerator > 0, np.inf, 0.0))
+
+
+def _safe_ratio_scalar(numerator: float, denominator: float) -> float:
+    """همان _safe_ratio برای یک رکورد (score_one)"""
+    if denominator > 0:
+        return numerator / denominator
+    return math.inf if numerator > 0 else 0.0
+
+
+def _momentum(weight: float):
+    """تغییر 1 ساعت منهای weight ساعت از میانگین ساعتی 24 ساعت (روی ستون و float یکسان کار می‌کند)"""
+    return lambda c: c['change_1h'] - c['change_24h'] / 24 * weight
+
+
+OVERRIDES_FILE = 'strategy_overrides.json'
+
+
+def load_overrides(strategy: str, path: str = OVERRIDES_FILE) -> Dict:
+    """
+    تنظیمات بهینه‌شده یک استراتژی ('advanced'، 'coin_score' یا 'growth')؛ دیکشنری خالی اگر فایل نباشد
+    کلیدها: settings (هم‌شکل SETTINGS)، thresholds (کلیدهای with_thresholds)، min_score، min_volume
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get(strategy, {})
+    except (OSError, ValueError) as e:
+        print(f"⚠️ خطا در خواندن {path}: {e}")
+        return {}
+
+
+def advanced_score_rules(max_drawdown: float = 15, rsi_oversold: float = 30,
+                         rsi_overbought: float = 70) -> RuleTable:
+    """قوانین _calculate_final_scores؛ آرگومان‌ها همان کلیدهای SETTINGS هستند"""
+    return RuleTable(
+        name='advanced',
+        floor=0,
+        ceiling=100,
+        derived={
+            'volume_to_mcap': (('volume', 'market_cap'),
+                               lambda c: np.where(c['market_cap'] > 0, c['volume'] / c['market_cap'], 0.0),
+                               lambda c: c['volume'] / c['market_cap'] if c['market_cap'] > 0 else 0.0),
+        },
+        groups=[
+            Group('price', cap=30, factors=[
+                Factor('change_1h', 'change_1h', [
+                    Rung('>', 5, 12, "📈 رشد قوی 1 ساعته"),
+                    Rung('>', 2, 8, "📈 رشد متوسط 1 ساعته"),
+                    Rung('>', 0, 3),
+                ]),
+                Factor('change_24h', 'change_24h', [
+                    Rung('>', 15, 12, "🚀 رشد انفجاری 24 ساعته"),
+                    Rung('>', 7, 8, "📈 رشد قوی 24 ساعته"),
+                    Rung('>', 3, 4, "📊 رشد متوسط 24 ساعته"),
+                ]),
+                Factor('change_7d', 'change_7d', [
+                    Rung('>', 30, 6, "🌟 روند صعودی قوی هفتگی"),
+                    Rung('>', 15, 4, "📈 روند صعودی هفتگی"),
+                    Rung('>', 0, 2),
+                ]),
+            ]),
+            Group('liquidity', cap=25, factors=[
+                Factor('volume_to_mcap', 'volume_to_mcap', [
+                    Rung('>', 0.5, 15, "💎 نقدینگی فوق‌العاده"),
+                    Rung('>', 0.2, 10, "💧 نقدینگی بالا"),
+                    Rung('>', 0.1, 5, "💦 نقدینگی مناسب"),
+                ]),
+                Factor('volume', 'volume', [
+                    Rung('>', 1000000000, 10, "💰 حجم معاملات بسیار بالا"),
+                    Rung('>', 100000000, 6, "💵 حجم معاملات بالا"),
+                    Rung('>', 10000000, 3),
+                ]),
+            ]),
+            Group('technical', cap=25, factors=[
+                Factor('rsi', 'rsi', [
+                    Rung('<', rsi_oversold, 8, "🟢 RSI در ناحیه اشباع فروش"),
+                    Rung('>', rsi_overbought, -5, "🔴 RSI اشباع خرید"),
+                ]),
+                Factor('macd', 'macd', [
+                    Rung('>', 0, 5, "📊 MACD مثبت"),
+                    Rung('notnull', None, -3),
+                ]),
+            ]),
+            Group('risk', factors=[
+                Factor('drawdown', 'change_24h', [
+                    Rung('<', -max_drawdown, -10, "⚠️ افت شدید قیمت"),
+                ]),
+            ]),
+        ],
+    )
+
+
+COIN_SCORE_RULES = RuleTable(
+    name='coin_score',
+    ceiling=100,
+    derived={
+        # momentum جدید (1ساعت بهتر از میانگین 24ساعت)
+        'breakout': (('change_1h', 'change_24h'), _momentum(3), _momentum(3)),
+        'volume_mcap_ratio': (('volume', 'market_cap'), lambda c: _safe_ratio(c['volume'], c['market_cap']),
+                              lambda c: _safe_ratio_scalar(c['volume'], c['market_cap'])),
+    },
+    groups=[
+        # عامل 1: روند قیمت (35 امتیاز)
+        Group('price', factors=[
+            Factor('change_1h', 'change_1h', [
+                Rung('>', 3, 15, "momentum قوی 1ساعت"),
+                Rung('>', 1, 8, "momentum متوسط 1ساعت"),
+                Rung('>', 0, 3),
+            ]),
+            Factor('change_24h', 'change_24h', [
+                Rung('>', 10, 15, "رشد فوق‌العاده 24ساعت"),
+                Rung('>', 5, 10, "رشد قوی 24ساعت"),
+                Rung('>', 2, 5, "رشد متوسط 24ساعت"),
+                Rung('>', 0, 2),
+            ]),
+            Factor('change_7d', 'change_7d', [
+                Rung('>', 20, 5, "روند هفتگی عالی"),
+                Rung('>', 0, 2),
+            ]),
+        ]),
+        # عامل 2: حجم و نقدینگی (25 امتیاز)
+        Group('liquidity', factors=[
+            Factor('volume_to_cap', 'volume_to_cap', [
+                Rung('>', 30, 15, "نقدینگی فوق‌العاده"),
+                Rung('>', 15, 10, "نقدینگی عالی"),
+                Rung('>', 5, 5, "نقدینگی خوب"),
+            ]),
+            Factor('volume', 'volume', [
+                Rung('>', 500000000, 10, "حجم معاملات بالا"),
+                Rung('>', 100000000, 5),
+            ]),
+        ]),
+        # عامل 3: رتبه و اعتبار (20 امتیاز)
+        Group('rank', factors=[
+            Factor('rank', 'rank', [
+                Rung('<=', 10, 20, "ارز برتر"),
+                Rung('<=', 30, 15, "ارز معتبر"),
+                Rung('<=', 50, 10, "ارز شناخته‌شده"),
+                Rung('<=', 100, 5),
+            ]),
+        ]),
+        # عامل 4: پتانسیل breakout (20 امتیاز)
+        Group('breakout', factors=[
+            Factor('breakout', 'breakout', [
+                Rung('>', 0, 10, "breakout جدید"),
+            ]),
+            # whale activity (حجم بیش از 50% یا 20% ارزش بازار)
+            Factor('whale', 'volume_mcap_ratio', [
+                Rung('>', 0.5, 10, "فعالیت نهنگ‌ها"),
+                Rung('>', 0.2, 5),
+            ]),
+        ]),
+    ],
+)
+
+
+GROWTH_RULES = RuleTable(
+    name='growth',
+    ceiling=100,
+    derived={
+        # اگر تغییر 1 ساعت خیلی بیشتر از 24 ساعت باشد (momentum جدید)
+        'momentum': (('change_1h', 'change_24h'), _momentum(2), _momentum(2)),
+    },
+    groups=[
+        # عامل 1: روند قیمت (40 امتیاز)
+        Group('price', factors=[
+            Factor('change_1h', 'change_1h', [
+                Rung('>', 2, 15, "روند 1ساعت مثبت"),
+                Rung('>', 0, 8),
+            ]),
+            Factor('change_24h', 'change_24h', [
+                Rung('>', 5, 15, "رشد 24ساعت قوی"),
+                Rung('>', 1, 10, "رشد 24ساعت متوسط"),
+                Rung('>', 0, 5),
+            ]),
+            Factor('change_7d', 'change_7d', [
+                Rung('>', 10, 10, "روند هفتگی مثبت"),
+                Rung('>', 0, 5),
+            ]),
+        ]),
+        # عامل 2: حجم معاملات (25 امتیاز)
+        Group('volume', factors=[
+            Factor('volume_to_cap', 'volume_to_cap', [
+                Rung('>', 20, 15, "حجم معاملات بالا"),
+                Rung('>', 10, 10, "حجم معاملات خوب"),
+                Rung('>', 5, 5),
+            ]),
+        ]),
+        # عامل 3: رتبه بازار (15 امتیاز)
+        Group('rank', factors=[
+            Factor('rank', 'rank', [
+                Rung('<=', 20, 15, "ارز برتر"),
+                Rung('<=', 50, 10, "ارز معتبر"),
+                Rung('<=', 100, 5),
+            ]),
+        ]),
+        # عامل 4: پتانسیل breakout (20 امتیاز)
+        Group('breakout', factors=[
+            Factor('momentum', 'momentum', [
+                Rung('>', 0, 10, "momentum جدید"),
+            ]),
+            Factor('whale', 'volume', [
+                Rung('>', 100000000, 10, "فعالیت نهنگ‌ها"),
+                Rung('>', 50000000, 5),
+            ]),
+        ]),
+    ],
+)
+
+
+SIGNAL_RULES = SignalTable(
+    name='auto_signals',
+    derived={
+        'abs_change_24h': (('change_24h',), lambda c: np.abs(c['change_24h'])),
+    },
+    # فیلتر اولیه: فقط ارزهای معتبر (حجم کمینه و top 100)
+    filters=[
+        Condition('volume', '>=', 100000),
+        Condition('rank', '<=', 100),
+    ],
+    rules=[
+        # سیگنال‌های خرید
+        SignalRule("خرید قوی", 3, "رشد {change_24h:.1f}% با حجم بالا", [
+            Condition('change_24h', '>', 5), Condition('volume', '>', 10000000)]),
+        SignalRule("خرید متوسط", 2, "رشد {change_24h:.1f}% با حجم خوب", [
+            Condition('change_24h', '>', 3), Condition('volume', '>', 5000000)]),
+        SignalRule("خرید ضعیف", 1, "رشد {change_24h:.1f}% در ارز معتبر", [
+            Condition('change_24h', '>', 1.5), Condition('volume', '>', 2000000), Condition('rank', '<=', 50)]),
+        # سیگنال‌های فروش
+        SignalRule("فروش قوی", 3, "سقوط {abs_change_24h:.1f}% با حجم بالا", [
+            Condition('change_24h', '<', -5), Condition('volume', '>', 5000000)]),
+        SignalRule("فروش متوسط", 2, "کاهش {abs_change_24h:.1f}%", [
+            Condition('change_24h', '<', -3), Condition('volume', '>', 2000000)]),
+        SignalRule("هشدار نزولی", 1, "کاهش {abs_change_24h:.1f}% در ارز برتر", [
+            Condition('change_24h', '<', -2), Condition('rank', '<=', 20)]),
+    ],
+    # بررسی تغییرات شدید (pump/dump)
+    overrides=[
+        SignalRule("پامپ احتمالی", 3, "رشد شدید {change_24h:.1f}% - احتیاط!", [
+            Condition('change_24h', '>', 15)]),
+        SignalRule("دامپ احتمالی", 3, "سقوط شدید {abs_change_24h:.1f}% - فرار!", [
+            Condition('change_24h', '<', -15)]),
+    ],
+)
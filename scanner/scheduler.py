@@ -0,0 +1,206 @@
+"""
+ماژول scheduler.py
+زمان‌بند asyncio برای اجرای همه اسکنرها در یک پروسه
+- هر اسکنر یک Job با بازه خودش است؛ زمان اجرای بعدی روی شبکه ثابت start + k*interval محاسبه می‌شود
+  (نه «پایان اجرا + sleep»)، پس اسکن کند باعث عقب افتادن دورهای بعدی نمی‌شود
+- jitter تصادفی فقط به زمان شروع هر دور اضافه می‌شود و روی شبکه زمان‌بندی جمع نمی‌شود
+- اگر اجرای قبلی یک Job هنوز تمام نشده باشد، دور جدید آن Job رد می‌شود (اجرای همپوشان نداریم)
+- DataSource: داده مشترک (مثلا snapshot بازار) که در هر تیک فقط یک‌بار دریافت و به همه Jobهای
+  نیازمند آن داده می‌شود؛ درخواست‌های همزمان منتظر همان دریافت در جریان می‌مانند
+- کارهای blocking (requests، pandas) در ThreadPoolExecutor اجرا می‌شوند
+- مدت هر اجرا در scanner.metrics ثبت می‌شود و با METRICS_PORT در config.py روی /metrics در دسترس است
+"""
+import asyncio
+import math
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from scanner import metrics
+
+DEFAULT_JITTER = 0.02                 # کسری از بازه هر Job
+SOURCE_MAX_AGE = 60                   # داده مشترکی که این مدت از دریافتش گذشته دوباره دریافت می‌شود
+IDLE_WAIT = 60
+
+
+@dataclass
+class DataSource:
+    name: str
+    loader: Callable[[], Any]         # None یعنی دریافت ناموفق (ذخیره نمی‌شود)
+    max_age: float = SOURCE_MAX_AGE
+    fetches: int = 0
+    shared: int = 0
+    errors: int = 0
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable                     # func() یا func(data) اگر source تعیین شده باشد
+    interval: float
+    source: Optional[str] = None
+    jitter: float = 0.0                # حداکثر تاخیر تصادفی شروع (ثانیه)
+    retry_interval: Optional[float] = None  # پس از خطا، اجرای دوباره زودتر از دور بعدی
+    runs: int = 0
+    failures: int = 0
+    skipped: int = 0
+    last_duration: Optional[float] = None
+    slot: float = field(default=0.0, repr=False)   # زمان دور جاری روی شبکه (monotonic، بدون jitter)
+    due: float = field(default=0.0, repr=False)    # زمان اجرای بعدی (با jitter)
+    running: bool = field(default=False, repr=False)
+
+
+class Scheduler:
+    """
+    زمان‌بند Jobها با زمان‌بندی بدون drift و داده مشترک در هر تیک
+    run() تا Ctrl+C یا stop() اجرا می‌شود
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, name: str = 'scheduler'):
+        self.name = name
+        self.max_workers = max_workers
+        self.jobs: Dict[str, Job] = {}
+        self.sources: Dict[str, DataSource] = {}
+        self._values: Dict[str, tuple] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._tasks = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def add_source(self, name: str, loader: Callable[[], Any], max_age: float = SOURCE_MAX_AGE) -> DataSource:
+        source = DataSource(name, loader, max_age)
+        self.sources[name] = source
+        return source
+
+    def add_job(self, name: str, func: Callable, interval: float, source: Optional[str] = None,
+                jitter: Optional[float] = None, retry_interval: Optional[float] = None) -> Job:
+        if source is not None and source not in self.sources:
+            raise ValueError(f"منبع داده ناشناخته: {source}")
+        jitter = interval * DEFAULT_JITTER if jitter is None else jitter
+        job = Job(name, func, interval, source, jitter, retry_interval)
+        self.jobs[name] = job
+        return job
+
+    # --- اجرا ---
+
+    def run(self):
+        """اجرای Jobها تا Ctrl+C"""
+        print(f"⏰ [{self.name}] {len(self.jobs)} کار زمان‌بندی شد: " +
+              ", ".join(f"{j.name} هر {j.interval:g}s" for j in self.jobs.values()))
+        print("💡 برای توقف: Ctrl+C")
+        metrics.start_server()      # فقط اگر METRICS_PORT در config.py تنظیم شده باشد
+        try:
+            asyncio.run(self._run())
+        except KeyboardInterrupt:
+            print(f"\n⏹️ [{self.name}] توسط کاربر متوقف شد.")
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stop(self):
+        """توقف زمان‌بند (از هر thread قابل فراخوانی است)"""
+        self._stopping = True
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        workers = self.max_workers or len(self.jobs) + len(self.sources) + 1
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=self.name)
+        start = time.monotonic()
+        for job in self.jobs.values():
+            job.slot = start
+            job.due = start + random.uniform(0, job.jitter)
+        while not self._stopping:
+            now = time.monotonic()
+            for job in self.jobs.values():
+                if not job.running and job.due <= now:
+                    job.running = True
+                    task = asyncio.create_task(self._execute(job))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+            pending = [j.due for j in self.jobs.values() if not j.running]
+            timeout = max(0.0, min(pending) - time.monotonic()) if pending else IDLE_WAIT
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        for task in list(self._tasks):
+            task.cancel()
+
+    async def _execute(self, job: Job):
+        ok = False
+        started = time.monotonic()
+        try:
+            args = ()
+            if job.source is not None:
+                args = (await self._fetch(job.source),)
+            await self._loop.run_in_executor(self._executor, job.func, *args)
+            job.runs += 1
+            ok = True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.failures += 1
+            print(f"\n❌ [{job.name}] خطا در اجرا: {e}")
+        finally:
+            job.last_duration = time.monotonic() - started
+            metrics.record_job(job.name, job.last_duration, ok)
+            self._reschedule(job, ok)
+            job.running = False
+            self._wakeup.set()
+
+    def _reschedule(self, job: Job, ok: bool):
+        now = time.monotonic()
+        if now >= job.slot:
+            # دورهایی که در طول اجرای طولانی گذشته‌اند رد می‌شوند؛ شبکه زمان‌بندی جابه‌جا نمی‌شود
+            passed = math.floor((now - job.slot) / job.interval) + 1
+            job.skipped += passed - 1
+            job.slot += passed * job.interval
+        job.due = job.slot + random.uniform(0, job.jitter)
+        if not ok and job.retry_interval is not None:
+            job.due = min(job.due, now + job.retry_interval)
+            print(f"🔄 [{job.name}] تلاش دوباره در {job.retry_interval:g} ثانیه...")
+
+    async def _fetch(self, name: str):
+        """داده مشترک منبع name؛ در هر تیک فقط یک‌بار دریافت می‌شود"""
+        source = self.sources[name]
+        cached = self._values.get(name)
+        if cached is not None and time.monotonic() - cached[1] <= source.max_age:
+            source.shared += 1
+            return cached[0]
+        inflight = self._inflight.get(name)
+        if inflight is not None:
+            source.shared += 1
+            return await asyncio.shield(inflight)
+        future = self._loop.create_future()
+        self._inflight[name] = future
+        value = None
+        try:
+            value = await self._loop.run_in_executor(self._executor, source.loader)
+            source.fetches += 1
+            if value is not None:
+                self._values[name] = (value, time.monotonic())
+        except Exception as e:
+            source.errors += 1
+            print(f"❌ [{self.name}] خطا در دریافت داده مشترک {name}: {e}")
+        finally:
+            del self._inflight[name]
+            future.set_result(value)
+        return value
+
+    def stats(self) -> Dict:
+        return {
+            'jobs': {j.name: {'runs': j.runs, 'failures': j.failures, 'skipped': j.skipped,
+                              'last_duration': j.last_duration} for j in self.jobs.values()},
+            'sources': {s.name: {'fetches': s.fetches, 'shared': s.shared, 'errors': s.errors}
+                        for s in self.sources.values()},
+        }
@@ -0,0 +1,292 @@
+"""
+ماژول scoring_rules.py
+قالب جدولی (declarative) برای قوانین امتیازدهی و سیگنال‌دهی اسکنرها
+هر جدول یک‌بار به ماسک‌ها و np.select کامپایل می‌شود و کل بازار را در یک گذر برداری امتیاز می‌دهد
+
+ساختار:
+    RuleTable -> Groupها (هر گروه سقف امتیاز خودش را دارد) -> Factorها -> Rungها
+    هر Factor یک نردبان if/elif است: اولین Rung برقرار امتیاز و برچسبش را می‌دهد
+    SignalTable برای قوانین نوع «اولین شرط برقرار» (مثل سیگنال خرید/فروش) با قالب متن دلیل
+"""
+import math
+import operator
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+Columns = Dict[str, np.ndarray]
+VectorFunc = Callable[[Columns], np.ndarray]
+ScalarFunc = Callable[[Dict[str, float]], float]
+# ستون مشتق‌شده: (ستون‌های ورودی لازم، تابع برداری روی ستون‌ها[، همان محاسبه روی float برای score_one])
+# بدون تابع اسکالر، score_one تابع برداری را روی np.float64 اجرا می‌کند (کندتر)
+Derived = Dict[str, Union[Tuple[Tuple[str, ...], VectorFunc], Tuple[Tuple[str, ...], VectorFunc, ScalarFunc]]]
+
+_OPS = {
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '<': np.less,
+    '<=': np.less_equal,
+}
+_SCALAR_OPS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    'notnull': lambda value, _: not math.isnan(value),
+}
+
+
+def _condition(values: np.ndarray, op: str, threshold: Optional[float]) -> np.ndarray:
+    if op == 'notnull':
+        return ~np.isnan(values)
+    with np.errstate(invalid='ignore'):
+        return _OPS[op](values, threshold)
+
+
+def _add_derived(columns: Columns, derived: Derived) -> Columns:
+    if not derived:
+        return columns
+    columns = dict(columns)
+    for name, spec in derived.items():
+        with np.errstate(divide='ignore', invalid='ignore'):
+            columns[name] = spec[1](columns)
+    return columns
+
+
+def _input_names(columns: Iterable[str], derived: Derived) -> List[str]:
+    names = []
+    for column in columns:
+        needed = derived[column][0] if column in derived else (column,)
+        for name in needed:
+            if name not in names:
+                names.append(name)
+    return names
+
+
+def columns_from_records(records: Sequence[Mapping], fields: Iterable[str]) -> Columns:
+    """تبدیل لیست دیکشنری‌ها به ستون‌های float64 (None یا فیلد ناموجود -> NaN)"""
+    columns = {}
+    for name in fields:
+        values = [r.get(name) for r in records]
+        columns[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    return columns
+
+
+@dataclass
+class Rung:
+    op: str                          # '>', '>=', '<', '<=' یا 'notnull'
+    threshold: Optional[float]
+    points: float
+    label: Optional[str] = None
+
+
+@dataclass
+class Factor:
+    name: str
+    column: str                      # نام ستون ورودی یا ستون مشتق‌شده جدول
+    rungs: List[Rung]
+
+
+@dataclass
+class Group:
+    name: str
+    factors: List[Factor]
+    cap: Optional[float] = None      # سقف جمع امتیاز گروه
+
+
+@dataclass
+class RuleTable:
+    name: str
+    groups: List[Group]
+    floor: Optional[float] = None    # حداقل امتیاز نهایی
+    ceiling: Optional[float] = None  # حداکثر امتیاز نهایی
+    derived: Derived = field(default_factory=dict)
+
+    def compile(self) -> 'CompiledRules':
+        return CompiledRules(self)
+
+    def inputs(self) -> List[str]:
+        """ستون‌های ورودی لازم (ستون‌های مشتق‌شده با ورودی‌هایشان جایگزین می‌شوند)"""
+        columns = [f.column for g in self.groups for f in g.factors]
+        return _input_names(columns, self.derived)
+
+    def with_thresholds(self, overrides: Mapping[str, float]) -> 'RuleTable':
+        """
+        نسخه‌ای از جدول با آستانه‌های جدید
+        کلید: 'factor' (برای همه پله‌ها با یک آستانه یکسان) یا 'factor.index' (برای یک پله)
+        """
+        groups = []
+        for group in self.groups:
+            factors = []
+            for factor in group.factors:
+                rungs = []
+                for i, rung in enumerate(factor.rungs):
+                    threshold = overrides.get(f'{factor.name}.{i}', overrides.get(factor.name, rung.threshold))
+                    rungs.append(Rung(rung.op, threshold, rung.points, rung.label))
+                factors.append(Factor(factor.name, factor.column, rungs))
+            groups.append(Group(group.name, factors, group.cap))
+        return RuleTable(self.name, groups, self.floor, self.ceiling, dict(self.derived))
+
+
+@dataclass
+class ScoreResult:
+    scores: np.ndarray
+    hits: List[Tuple[Factor, np.ndarray]]   # برای هر فاکتور: اندیس پله برقرار در هر ردیف (-1 یعنی هیچ)
+
+    def labels(self, row: int) -> List[str]:
+        """برچسب دلایل یک ردیف به همان ترتیب جدول"""
+        result = []
+        for factor, hit in self.hits:
+            index = hit[row]
+            if index >= 0 and factor.rungs[index].label:
+                result.append(factor.rungs[index].label)
+        return result
+
+
+class CompiledRules:
+    """جدول کامپایل‌شده که روی ستون‌های NumPy ارزیابی می‌شود"""
+
+    def __init__(self, table: RuleTable):
+        self.table = table
+        self.integer = all(float(r.points).is_integer()
+                           for g in table.groups for f in g.factors for r in f.rungs)
+        self._inputs = table.inputs()
+        self._plan = []
+        for group in table.groups:
+            factors = []
+            for factor in group.factors:
+                points = np.array([r.points for r in factor.rungs], dtype=np.float64)
+                factors.append((factor, points))
+            self._plan.append((group, factors))
+        # همان نقشه برای score_one روی float: (سقف گروه، [(ستون، [(مقایسه، آستانه، امتیاز، برچسب)])])
+        self._scalar_plan = [
+            (group.cap, [(factor.column, [(_SCALAR_OPS[r.op], r.threshold, r.points, r.label) for r in factor.rungs])
+                         for factor in group.factors])
+            for group in table.groups
+        ]
+
+    def evaluate(self, columns: Columns) -> ScoreResult:
+        columns = _add_derived(columns, self.table.derived)
+        size = len(next(iter(columns.values()))) if columns else 0
+        total = np.zeros(size, dtype=np.float64)
+        hits = []
+        for group, factors in self._plan:
+            group_total = np.zeros(size, dtype=np.float64)
+            for factor, points in factors:
+                values = columns[factor.column]
+                conditions = [_condition(values, r.op, r.threshold) for r in factor.rungs]
+                index = np.select(conditions, np.arange(len(conditions)), default=-1)
+                group_total += np.where(index >= 0, points[np.maximum(index, 0)], 0.0)
+                hits.append((factor, index))
+            if group.cap is not None:
+                group_total = np.minimum(group_total, group.cap)
+            total += group_total
+        if self.table.ceiling is not None:
+            total = np.minimum(total, self.table.ceiling)
+        if self.table.floor is not None:
+            total = np.maximum(total, self.table.floor)
+        return ScoreResult(total, hits)
+
+    def evaluate_records(self, records: Sequence[Mapping]) -> ScoreResult:
+        return self.evaluate(columns_from_records(records, self._inputs))
+
+    def score_one(self, record: Mapping) -> Tuple[float, List[str]]:
+        """
+        امتیاز و دلایل یک رکورد با همان قوانین evaluate ولی بدون ساخت ستون NumPy
+        (برای فراخوانی‌های تکی؛ برای چند رکورد evaluate یک‌جا سریع‌تر است)
+        """
+        values = {}
+        for name in self._inputs:
+            value = record.get(name)
+            values[name] = math.nan if value is None else float(value)
+        for name, spec in self.table.derived.items():
+            if len(spec) > 2:
+                values[name] = spec[2](values)
+            else:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    values[name] = float(spec[1]({k: np.float64(v) for k, v in values.items()}))
+        total, labels = 0.0, []
+        for cap, factors in self._scalar_plan:
+            group_total = 0.0
+            for column, rungs in factors:
+                value = values[column]
+                for compare, threshold, points, label in rungs:
+                    if compare(value, threshold):
+                        group_total += points
+                        if label:
+                            labels.append(label)
+                        break
+            total += group_total if cap is None else min(group_total, cap)
+        if self.table.ceiling is not None:
+            total = min(total, self.table.ceiling)
+        if self.table.floor is not None:
+            total = max(total, self.table.floor)
+        return (int(total) if self.integer else float(total)), labels
+
+
+@dataclass
+class Condition:
+    column: str
+    op: str
+    threshold: Optional[float]
+
+
+@dataclass
+class SignalRule:
+    label: str
+    strength: int
+    reason: str                      # قالب format با ستون‌های ردیف، مثلا "رشد {change_24h:.1f}%"
+    when: List[Condition]
+
+
+@dataclass
+class SignalTable:
+    name: str
+    rules: List[SignalRule]                                  # اولین قانون برقرار انتخاب می‌شود
+    overrides: List[SignalRule] = field(default_factory=list)  # در صورت برقرار بودن، جایگزین نتیجه قبلی
+    filters: List[Condition] = field(default_factory=list)   # ردیف‌هایی که این شرط‌ها را ندارند بررسی نمی‌شوند
+    derived: Derived = field(default_factory=dict)
+
+    def compile(self) -> 'CompiledSignals':
+        return CompiledSignals(self)
+
+    def inputs(self) -> List[str]:
+        conditions = list(self.filters)
+        for rule in self.rules + self.overrides:
+            conditions.extend(rule.when)
+        return _input_names([c.column for c in conditions], self.derived)
+
+
+class CompiledSignals:
+    """جدول سیگنال کامپایل‌شده؛ خروجی اندیس قانون انتخاب‌شده برای هر ردیف"""
+
+    def __init__(self, table: SignalTable):
+        self.table = table
+        self.all_rules = table.rules + table.overrides
+
+    def _mask(self, columns: Columns, conditions: List[Condition], size: int) -> np.ndarray:
+        mask = np.ones(size, dtype=bool)
+        for c in conditions:
+            mask &= _condition(columns[c.column], c.op, c.threshold)
+        return mask
+
+    def evaluate(self, columns: Columns) -> Tuple[np.ndarray, Columns]:
+        """
+        خروجی: (اندیس قانون در all_rules یا -1 برای هر ردیف، ستون‌ها همراه با ستون‌های مشتق‌شده)
+        """
+        columns = _add_derived(columns, self.table.derived)
+        size = len(next(iter(columns.values()))) if columns else 0
+        base = [self._mask(columns, r.when, size) for r in self.table.rules]
+        chosen = np.select(base, np.arange(len(base)), default=-1) if base else np.full(size, -1)
+        offset = len(self.table.rules)
+        for i, rule in enumerate(self.table.overrides):
+            chosen = np.where(self._mask(columns, rule.when, size), offset + i, chosen)
+        chosen = np.where(self._mask(columns, self.table.filters, size), chosen, -1)
+        return chosen, columns
+
+    def describe(self, rule_index: int, columns: Columns, row: int) -> Dict:
+        """نوع، قدرت و متن دلیل سیگنال یک ردیف"""
+        rule = self.all_rules[rule_index]
+        values = {name: float(col[row]) for name, col in columns.items()}
+        return {'type': rule.label, 'strength': rule.strength, 'reason': rule.reason.format(**values)}
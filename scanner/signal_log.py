@@ -0,0 +1,276 @@
+"""
+ماژول signal_log.py
+نوشتن بافرشده و چرخشی لاگ سیگنال‌ها (signals_log.csv) و آرشیو ستونی تاریخچه
+- ردیف‌ها در حافظه جمع و به‌صورت دسته‌ای (هر FLUSH_ROWS ردیف یا هر FLUSH_INTERVAL ثانیه) نوشته می‌شوند
+- با عوض شدن روز یا رسیدن حجم فایل به ROTATE_BYTES، فایل جاری به یک آرشیو ستونی در ARCHIVE_DIR
+  تبدیل می‌شود: Parquet (اگر pyarrow نصب باشد) یا npz فشرده با ستون‌های متنی dictionary-encoded
+- load_signals کل تاریخچه (آرشیوها + فایل جاری) را در یک DataFrame برمی‌گرداند
+
+ساخت آرشیو از فایل جاری و بارگذاری تاریخچه:
+    python -m scanner.signal_log archive
+    python -m scanner.signal_log load
+"""
+import argparse
+import atexit
+import csv
+import glob
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow اختیاری است؛ بدون آن آرشیو به قالب npz نوشته می‌شود
+    pa = None
+    pq = None
+
+SIGNAL_LOG_FILE = 'signals_log.csv'
+ARCHIVE_DIR = 'signal_archive'
+COLUMNS = ['time', 'symbol', 'name', 'score', 'reasons', 'timeframe', 'source']
+TEXT_COLUMNS = ['symbol', 'name', 'reasons', 'timeframe', 'source']
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+FLUSH_ROWS = 50
+FLUSH_INTERVAL = 30.0
+ROTATE_BYTES = 5 * 1024 * 1024
+ROTATE_DAILY = True
+
+
+def frame_from_rows(rows: List[List]) -> pd.DataFrame:
+    frame = pd.DataFrame(rows, columns=COLUMNS)
+    return _normalize(frame)
+
+
+def _normalize(frame: pd.DataFrame) -> pd.DataFrame:
+    frame = frame.reindex(columns=COLUMNS)
+    frame['time'] = pd.to_datetime(frame['time'], format=TIME_FORMAT, errors='coerce')
+    frame['score'] = pd.to_numeric(frame['score'], errors='coerce')
+    for name in TEXT_COLUMNS:
+        frame[name] = frame[name].fillna('').astype(str).astype('category')
+    return frame
+
+
+def write_archive(frame: pd.DataFrame, path_base: str) -> str:
+    """نوشتن DataFrame لاگ به Parquet (با pyarrow) یا npz فشرده؛ مسیر فایل نوشته‌شده را برمی‌گرداند"""
+    if pq is not None:
+        path = path_base + '.parquet'
+        pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), path, compression='zstd')
+        return path
+    path = path_base + '.npz'
+    arrays = {
+        'time': frame['time'].values.astype('datetime64[s]').astype(np.int64),
+        'score': frame['score'].to_numpy(dtype=np.float64),
+    }
+    for name in TEXT_COLUMNS:
+        values = frame[name].astype('category')
+        arrays[f'{name}.codes'] = values.cat.codes.to_numpy(dtype=np.int32)
+        arrays[f'{name}.categories'] = np.asarray(values.cat.categories.astype(str), dtype=np.str_)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_archive(path: str) -> pd.DataFrame:
+    if path.endswith('.parquet'):
+        return _normalize(pd.read_parquet(path))
+    with np.load(path, allow_pickle=False) as data:
+        frame = pd.DataFrame({'time': data['time'].astype('datetime64[s]'), 'score': data['score']})
+        for name in TEXT_COLUMNS:
+            frame[name] = pd.Categorical.from_codes(data[f'{name}.codes'], data[f'{name}.categories'])
+    return frame[COLUMNS]
+
+
+def read_csv(path: str) -> pd.DataFrame:
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return frame_from_rows([])
+    return _normalize(pd.read_csv(path, dtype={'symbol': str, 'name': str, 'reasons': str,
+                                               'timeframe': str, 'source': str}, keep_default_na=False))
+
+
+def load_signals(path: str = SIGNAL_LOG_FILE, archive_dir: str = ARCHIVE_DIR,
+                 since: Optional[datetime] = None) -> pd.DataFrame:
+    """کل تاریخچه سیگنال‌ها (آرشیوهای ستونی + فایل CSV جاری) مرتب بر اساس زمان"""
+    paths = sorted(glob.glob(os.path.join(archive_dir, 'signals_*.parquet')) +
+                   glob.glob(os.path.join(archive_dir, 'signals_*.npz')))
+    frames = [read_archive(p) for p in paths]
+    frames.append(read_csv(path))
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return frame_from_rows([])
+    # ستون‌های متنی با اجتماع دسته‌ها (بدون تبدیل به object) به هم چسبانده می‌شوند
+    frame = pd.DataFrame({
+        'time': np.concatenate([f['time'].to_numpy(dtype='datetime64[s]') for f in frames]),
+        'score': np.concatenate([f['score'].to_numpy(dtype=np.float64) for f in frames]),
+    })
+    for name in TEXT_COLUMNS:
+        frame[name] = union_categoricals([f[name].astype('category') for f in frames])
+    frame = frame[COLUMNS]
+    if since is not None:
+        frame = frame[frame['time'] >= pd.Timestamp(since)]
+    return frame.sort_values('time', kind='stable').reset_index(drop=True)
+
+
+class SignalLogWriter:
+    """
+    نویسنده بافرشده signals_log.csv
+    write فقط ردیف را در حافظه نگه می‌دارد؛ flush دسته‌ای با یک‌بار باز کردن فایل انجام می‌شود
+    """
+
+    def __init__(self, path: str = SIGNAL_LOG_FILE, archive_dir: str = ARCHIVE_DIR,
+                 flush_rows: int = FLUSH_ROWS, flush_interval: float = FLUSH_INTERVAL,
+                 rotate_bytes: Optional[int] = ROTATE_BYTES, rotate_daily: bool = ROTATE_DAILY):
+        self.path = path
+        self.archive_dir = archive_dir
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.rotate_daily = rotate_daily
+        self._buffer: List[List] = []
+        self._buffered_at = 0.0               # زمان monotonic قدیمی‌ترین ردیف بافر
+        self._lock = threading.RLock()
+        self._file_day = self._first_day()
+        self._timer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.counters = {'rows': 0, 'flushes': 0, 'rotations': 0}
+        atexit.register(self.close)
+
+    def _first_day(self) -> Optional[str]:
+        """روز اولین ردیف فایل جاری (فقط دو خط اول خوانده می‌شود)"""
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'r', encoding='utf-8') as f:
+            f.readline()
+            line = f.readline()
+        return line[:10] if len(line) >= 10 else None
+
+    def write(self, symbol, name, score, reasons, timeframe, source, when: Optional[str] = None):
+        when = when or datetime.now().strftime(TIME_FORMAT)
+        with self._lock:
+            if not self._buffer:
+                self._buffered_at = time.monotonic()
+            self._buffer.append([when, symbol, name, score, reasons, timeframe, source])
+            self.counters['rows'] += 1
+            if len(self._buffer) >= self.flush_rows:
+                self.flush()
+            else:
+                self.flush_if_due()
+            if self._buffer and self._timer is None:
+                self._timer = threading.Thread(target=self._run_timer, name='signal-log-flush', daemon=True)
+                self._timer.start()
+
+    def flush_if_due(self) -> bool:
+        """نوشتن بافر اگر قدیمی‌ترین ردیف آن FLUSH_INTERVAL ثانیه منتظر مانده باشد"""
+        with self._lock:
+            if not self._buffer or time.monotonic() - self._buffered_at < self.flush_interval:
+                return False
+            self.flush()
+            return True
+
+    def _next_flush_in(self) -> float:
+        with self._lock:
+            if not self._buffer:
+                return self.flush_interval
+            return max(0.0, self._buffered_at + self.flush_interval - time.monotonic())
+
+    def _run_timer(self):
+        while not self._stop.wait(self._next_flush_in()):
+            try:
+                self.flush_if_due()
+            except OSError as e:
+                print(f"❌ خطا در نوشتن {self.path}: {e}")
+
+    def flush(self):
+        with self._lock:
+            if not self._buffer:
+                return
+            rows, self._buffer = self._buffer, []
+            # ردیف‌های هر روز در فایل همان روز نوشته می‌شوند
+            start = 0
+            for i in range(1, len(rows) + 1):
+                if i == len(rows) or (self.rotate_daily and rows[i][0][:10] != rows[start][0][:10]):
+                    self._append(rows[start:i])
+                    start = i
+            self.counters['flushes'] += 1
+
+    def _append(self, rows: List[List]):
+        day = rows[0][0][:10]
+        if self.rotate_daily and self._file_day is not None and day != self._file_day:
+            self.rotate()
+        file_exists = os.path.isfile(self.path) and os.path.getsize(self.path) > 0
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if not file_exists:
+                writer.writerow(COLUMNS)
+            writer.writerows(rows)
+        if self._file_day is None:
+            self._file_day = day
+        if self.rotate_bytes is not None and os.path.getsize(self.path) >= self.rotate_bytes:
+            self.rotate()
+
+    def rotate(self) -> Optional[str]:
+        """تبدیل فایل جاری به آرشیو ستونی و شروع فایل خالی؛ مسیر آرشیو را برمی‌گرداند"""
+        with self._lock:
+            if not os.path.exists(self.path):
+                return None
+            frame = read_csv(self.path)
+            archive_path = None
+            if len(frame):
+                os.makedirs(self.archive_dir, exist_ok=True)
+                stamp = frame['time'].min()
+                stamp = stamp.strftime('%Y%m%d_%H%M%S') if not pd.isna(stamp) else time.strftime('%Y%m%d_%H%M%S')
+                base = os.path.join(self.archive_dir, f'signals_{stamp}')
+                suffix = 1
+                while glob.glob(base + '.*'):
+                    base = os.path.join(self.archive_dir, f'signals_{stamp}_{suffix}')
+                    suffix += 1
+                archive_path = write_archive(frame, base)
+                print(f"🗄️ لاگ سیگنال‌ها ({len(frame)} ردیف) در {archive_path} آرشیو شد.")
+            os.remove(self.path)
+            self._file_day = None
+            self.counters['rotations'] += 1
+            return archive_path
+
+    def close(self):
+        self._stop.set()
+        try:
+            self.flush()
+        except OSError as e:
+            print(f"❌ خطا در نوشتن {self.path}: {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.counters)
+            stats['buffered'] = len(self._buffer)
+            return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="آرشیو و بارگذاری لاگ سیگنال‌ها")
+    parser.add_argument('mode', choices=['archive', 'load'])
+    parser.add_argument('--path', default=SIGNAL_LOG_FILE)
+    parser.add_argument('--archive-dir', default=ARCHIVE_DIR)
+    args = parser.parse_args()
+    if args.mode == 'archive':
+        writer = SignalLogWriter(args.path, args.archive_dir)
+        if writer.rotate() is None:
+            print("⚪ ردیفی برای آرشیو وجود ندارد.")
+        return
+    started = time.perf_counter()
+    frame = load_signals(args.path, args.archive_dir)
+    elapsed = time.perf_counter() - started
+    print(f"📦 {len(frame)} سیگنال در {elapsed:.3f} ثانیه بارگذاری شد.")
+    if len(frame):
+        print(f"   بازه: {frame['time'].min()} تا {frame['time'].max()}")
+        print(frame.groupby('timeframe', observed=True).size().to_string())
+
+
+if __name__ == '__main__':
+    main()
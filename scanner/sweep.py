@@ -0,0 +1,390 @@
+"""
+ماژول sweep.py
+جستجوی موازی پارامترهای استراتژی‌ها (SETTINGS و آستانه‌های جدول امتیاز) با بک‌تست برداری روی داده تاریخی
+- فضای جستجو: برای هر پارامتر لیستی از مقادیر؛ grid همه ترکیب‌ها و random نمونه‌ای بدون تکرار از آن‌ها
+  نام پارامترها: settings.<کلید SETTINGS>، thresholds.<factor> یا thresholds.<factor>.<index>، min_score، min_volume
+- ماتریس‌های Panel یک‌بار در shared_memory قرار می‌گیرند و workerهای ProcessPool فقط‌خواندنی به آن‌ها وصل می‌شوند
+- ترکیب‌هایی که جدول امتیاز یکسانی دارند (فقط فیلتر یا حداقل امتیاز متفاوت) با یک‌بار امتیازدهی ارزیابی می‌شوند
+- پیکربندی‌ها بر اساس یک معیار بک‌تست رتبه‌بندی و بهترین در strategy_overrides.json نوشته می‌شود
+  (همان فایلی که اسکنرها هنگام import با load_overrides می‌خوانند)
+
+اجرا:
+    python -m scanner.sweep --strategy coin_score --synthetic 8760x500
+    python -m scanner.sweep --strategy advanced --input history.csv --search random --samples 500
+    python -m scanner.sweep --strategy growth --space space.json --metric calmar --no-write
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from scanner import backtest
+from scanner.backtest import Panel
+from scanner.rule_tables import OVERRIDES_FILE
+
+METRICS = ('excess', 'mean', 'hit_rate', 'total_return', 'calmar')
+DEFAULT_METRIC = 'excess'
+DEFAULT_HORIZON = '24h'
+MIN_ALERTS = 100                 # پیکربندی‌هایی با هشدار کمتر (در افق رتبه‌بندی) رتبه نمی‌گیرند
+TASK_SIZE = 32                   # حداکثر تعداد پیکربندی در هر کار ارسالی به worker
+ELIGIBLE_CACHE = 8               # تعداد ماسک فیلتر (و بازده مبنا) نگه‌داشته‌شده در هر worker
+TOP = 10
+
+# کلیدهایی از SETTINGS که روی انتخاب هشدار اثر دارند (max_volatility و min_liquidity فقط برچسب/اطلاع‌اند)
+ADVANCED_SETTINGS = ('min_volume', 'min_market_cap', 'max_market_cap', 'max_drawdown', 'rsi_oversold', 'rsi_overbought')
+RULE_SETTINGS = ('max_drawdown', 'rsi_oversold', 'rsi_overbought')
+
+DEFAULT_SPACES = {
+    'advanced': {
+        'settings.min_volume': [500000, 1000000, 5000000, 10000000],
+        'settings.min_market_cap': [1000000, 10000000, 100000000],
+        'settings.max_drawdown': [10, 15, 20, 25],
+        'settings.rsi_oversold': [25, 30, 35],
+        'settings.rsi_overbought': [65, 70, 75, 80],
+        'min_score': [30, 40, 50, 60],
+    },
+    'coin_score': {
+        'thresholds.change_24h.0': [5, 10, 15, 20],
+        'thresholds.change_1h.0': [2, 3, 5],
+        'thresholds.volume_to_cap.0': [20, 30, 50],
+        'min_volume': [500000, 1000000, 5000000, 10000000],
+        'min_score': [20, 30, 40, 50, 60],
+    },
+    'growth': {
+        'thresholds.change_24h.0': [10, 15, 20],
+        'thresholds.change_7d.0': [30, 50, 80],
+        'thresholds.volume_to_cap.0': [20, 30, 50],
+        'min_volume': [500000, 1000000, 5000000, 10000000],
+        'min_score': [50, 60, 70, 80],
+    },
+}
+
+
+# --- فضای جستجو ---
+
+def validate_space(strategy: str, space: Mapping[str, Sequence]):
+    for param, values in space.items():
+        if not len(values):
+            raise ValueError(f"پارامتر {param} مقداری ندارد")
+        if param in ('min_score', 'min_volume'):
+            if param == 'min_volume' and strategy == 'advanced':
+                raise ValueError("برای advanced از settings.min_volume استفاده کنید")
+            continue
+        section, _, key = param.partition('.')
+        if section == 'thresholds' and key:
+            continue
+        if section == 'settings' and strategy == 'advanced' and key in ADVANCED_SETTINGS:
+            continue
+        raise ValueError(f"پارامتر ناشناخته برای {strategy}: {param}")
+
+
+def grid_size(space: Mapping[str, Sequence]) -> int:
+    size = 1
+    for values in space.values():
+        size *= len(values)
+    return size
+
+
+def _decode(space: Mapping[str, Sequence], index: int) -> Dict:
+    """ترکیب شماره index از grid (ترتیب همان itertools.product)"""
+    params = {}
+    for name, values in reversed(list(space.items())):
+        index, position = divmod(index, len(values))
+        params[name] = values[position]
+    return dict(reversed(list(params.items())))
+
+
+def grid(space: Mapping[str, Sequence]) -> List[Dict]:
+    names = list(space)
+    return [dict(zip(names, combo)) for combo in itertools.product(*space.values())]
+
+
+def random_search(space: Mapping[str, Sequence], samples: int, seed: int = 0) -> List[Dict]:
+    """samples ترکیب متمایز از grid (بدون ساختن کل grid)"""
+    size = grid_size(space)
+    if samples >= size:
+        return grid(space)
+    rng = np.random.default_rng(seed)
+    chosen = rng.choice(size, samples, replace=False) if size < 2 ** 62 else rng.integers(0, size, samples)
+    return [_decode(space, int(i)) for i in sorted(set(chosen.tolist()))]
+
+
+def to_overrides(params: Mapping) -> Dict:
+    """تبدیل پارامترهای مسطح یک ترکیب به شکل strategy_overrides.json"""
+    overrides: Dict = {}
+    for param, value in params.items():
+        value = value.item() if isinstance(value, np.generic) else value
+        section, _, key = param.partition('.')
+        if section in ('settings', 'thresholds'):
+            overrides.setdefault(section, {})[key] = value
+        else:
+            overrides[param] = value
+    return overrides
+
+
+def _rules_key(params: Mapping) -> Tuple:
+    """پارامترهایی که جدول امتیاز را تغییر می‌دهند؛ ترکیب‌های با کلید یکسان امتیاز یکسان دارند"""
+    return tuple(sorted((k, v) for k, v in params.items()
+                        if k.startswith('thresholds.') or k[len('settings.'):] in RULE_SETTINGS))
+
+
+def plan_tasks(configs: Sequence[Mapping], task_size: int = TASK_SIZE) -> List[Tuple[Tuple, List[int]]]:
+    """گروه‌بندی اندیس ترکیب‌ها بر اساس جدول امتیاز و تقسیم هر گروه به کارهای حداکثر task_size تایی"""
+    groups: Dict[Tuple, List[int]] = {}
+    for i, params in enumerate(configs):
+        groups.setdefault(_rules_key(params), []).append(i)
+    tasks = []
+    for key, indices in groups.items():
+        for start in range(0, len(indices), task_size):
+            tasks.append((key, indices[start:start + task_size]))
+    return tasks
+
+
+# --- Panel در حافظه مشترک ---
+
+class SharedPanel:
+    """
+    کپی ماتریس‌های Panel در بلوک‌های shared_memory
+    spec (نام بلوک‌ها، شکل‌ها و محور زمان/ارز) برای workerها ارسال می‌شود؛ پروسه سازنده با close آزاد می‌کند
+    """
+
+    def __init__(self, panel: Panel, fields: Optional[Sequence[str]] = None):
+        self._blocks: List[shared_memory.SharedMemory] = []
+        layout = {}
+        try:
+            for name in fields or panel.fields:
+                values = np.ascontiguousarray(panel[name])
+                block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+                self._blocks.append(block)
+                np.ndarray(values.shape, values.dtype, buffer=block.buf)[...] = values
+                layout[name] = (block.name, values.shape, values.dtype.str)
+        except BaseException:
+            self.close()
+            raise
+        self.spec = {'times': panel.times, 'coins': panel.coins, 'step': panel.step, 'fields': layout}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(block.size for block in self._blocks)
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+
+def attach_panel(spec: Mapping) -> Tuple[Panel, List[shared_memory.SharedMemory]]:
+    """Panel فقط‌خواندنی روی بلوک‌های SharedPanel (بدون کپی)"""
+    blocks, fields = [], {}
+    for name, (block_name, shape, dtype) in spec['fields'].items():
+        # workerهای ProcessPool از resource_tracker پروسه اصلی استفاده می‌کنند؛ بلوک با خروج worker پاک نمی‌شود
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        values = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+        values.flags.writeable = False
+        fields[name] = values
+    return Panel(spec['times'], spec['coins'], fields, spec['step']), blocks
+
+
+# --- worker ---
+
+_worker: Dict = {}
+
+
+def _init_worker(spec: Mapping, strategy: str, settings: Optional[Mapping], horizon: str):
+    panel, blocks = attach_panel(spec)
+    _worker.clear()
+    steps = panel.steps(backtest.HORIZONS[horizon])
+    _worker.update(panel=panel, blocks=blocks, strategy=strategy, settings=settings, steps=steps,
+                   fwd=backtest.forward_returns(panel['price'], steps),
+                   fwd_1=backtest.forward_returns(panel['price'], 1),
+                   scores=(None, None), eligible={})
+
+
+def _scores(key: Tuple, strategy: backtest.Strategy) -> Tuple[np.ndarray, np.ndarray]:
+    """(امتیاز، ترتیب امتیاز) Panel برای جدول key؛ آخرین جدول در worker نگه داشته می‌شود"""
+    cached_key, scored = _worker['scores']
+    if cached_key != key:
+        scores = backtest.score_panel(_worker['panel'], strategy.compile())
+        scored = scores, backtest.rank_order(scores)
+        _worker['scores'] = (key, scored)
+    return scored
+
+
+def _eligible(strategy: backtest.Strategy) -> Tuple[np.ndarray, np.ndarray]:
+    """(ماسک فیلتر اولیه، بازده مبنا) برای فیلترهای strategy؛ چند فیلتر اخیر نگه داشته می‌شوند"""
+    key = (strategy.min_volume, strategy.min_market_cap, strategy.max_market_cap, strategy.require_price)
+    cache = _worker['eligible']
+    if key not in cache:
+        if len(cache) >= ELIGIBLE_CACHE:
+            cache.pop(next(iter(cache)))
+        eligible = backtest.eligible_mask(_worker['panel'], strategy)
+        cache[key] = eligible, backtest.benchmark_returns(_worker['fwd'], eligible)
+    return cache[key]
+
+
+def evaluate(panel: Panel, scores: np.ndarray, eligible: np.ndarray, strategy: backtest.Strategy,
+             steps: int, order: Optional[np.ndarray] = None, fwd: Optional[np.ndarray] = None,
+             benchmark: Optional[np.ndarray] = None, fwd_1: Optional[np.ndarray] = None) -> Dict[str, float]:
+    """معیارهای بک‌تست یک پیکربندی روی امتیازهای از پیش محاسبه‌شده"""
+    alerts = backtest.select_alerts(scores, eligible, strategy.threshold, strategy.top_n, order)
+    stats = backtest.horizon_stats(panel['price'], alerts, eligible, steps, fwd, benchmark)
+    equity = backtest.equity_curve(panel['price'], alerts, fwd_1)
+    total_return = float(equity[-1] - 1.0) if len(equity) else 0.0
+    drawdown = backtest.max_drawdown(equity)
+    return {
+        'alerts': int(stats['count']),
+        'mean': stats.get('mean', np.nan),
+        'median': stats.get('median', np.nan),
+        'hit_rate': stats.get('hit_rate', np.nan),
+        'excess': stats.get('excess', np.nan),
+        'mean_adverse': stats.get('mean_adverse', np.nan),
+        'total_return': total_return,
+        'max_drawdown': drawdown,
+        'calmar': total_return / -drawdown if drawdown < 0 else np.nan,
+    }
+
+
+def _run_task(key: Tuple, configs: Sequence[Tuple[int, Mapping]]) -> List[Tuple[int, Dict[str, float]]]:
+    results = []
+    for index, params in configs:
+        strategy = backtest.build_strategy(_worker['strategy'], to_overrides(params), _worker['settings'])
+        scores, order = _scores(key, strategy)
+        eligible, benchmark = _eligible(strategy)
+        metrics = evaluate(_worker['panel'], scores, eligible, strategy, _worker['steps'], order,
+                           _worker['fwd'], benchmark, _worker['fwd_1'])
+        results.append((index, metrics))
+    return results
+
+
+# --- اجرای sweep ---
+
+def run_sweep(panel: Panel, strategy: str, configs: Sequence[Mapping], settings: Optional[Mapping] = None,
+              horizon: str = DEFAULT_HORIZON, workers: Optional[int] = None,
+              task_size: int = TASK_SIZE, progress: bool = True) -> pd.DataFrame:
+    """
+    ارزیابی همه configs (پارامترهای مسطح) با ProcessPool؛ یک ردیف برای هر ترکیب
+    settings (SETTINGS پایه) فقط برای استراتژی 'advanced' لازم است
+    """
+    tasks = plan_tasks(configs, task_size)
+    workers = workers or os.cpu_count() or 1
+    shared = SharedPanel(panel, _panel_fields(panel, strategy, settings))
+    results: Dict[int, Dict[str, float]] = {}
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)) or 1, initializer=_init_worker,
+                                 initargs=(shared.spec, strategy, settings, horizon)) as pool:
+            futures = [pool.submit(_run_task, key, [(i, configs[i]) for i in indices]) for key, indices in tasks]
+            for done, future in enumerate(as_completed(futures), 1):
+                results.update(future.result())
+                if progress and (done % max(1, len(futures) // 10) == 0 or done == len(futures)):
+                    print(f"⏳ {len(results)}/{len(configs)} پیکربندی ({time.perf_counter() - started:.1f} ثانیه)")
+    finally:
+        shared.close()
+    frame = pd.DataFrame([configs[i] for i in range(len(configs))])
+    metrics = pd.DataFrame([results[i] for i in range(len(configs))])
+    return pd.concat([frame, metrics], axis=1)
+
+
+def _panel_fields(panel: Panel, strategy: str, settings: Optional[Mapping]) -> List[str]:
+    """فقط فیلدهایی که جدول امتیاز و فیلترها لازم دارند به حافظه مشترک می‌روند"""
+    needed = ['price', 'volume', 'market_cap'] + backtest.build_strategy(strategy, None, settings).rules.inputs()
+    return [name for name in panel.fields if name in needed]
+
+
+def rank(results: pd.DataFrame, metric: str = DEFAULT_METRIC, min_alerts: int = MIN_ALERTS) -> pd.DataFrame:
+    """مرتب‌سازی نزولی بر اساس metric؛ پیکربندی‌هایی با کمتر از min_alerts هشدار حذف می‌شوند"""
+    ranked = results[(results['alerts'] >= min_alerts) & results[metric].notna()]
+    return ranked.sort_values([metric, 'alerts'], ascending=False, kind='stable')
+
+
+def write_overrides(strategy: str, overrides: Mapping, metrics: Mapping, path: str = OVERRIDES_FILE):
+    """نوشتن اتمیک پیکربندی یک استراتژی در path (بخش‌های استراتژی‌های دیگر حفظ می‌شوند)"""
+    data = {}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    entry = dict(overrides)
+    entry['metrics'] = {k: (None if pd.isna(v) else int(v) if k == 'alerts' else float(v)) for k, v in metrics.items()}
+    entry['updated'] = datetime.now().isoformat(timespec='seconds')
+    data[strategy] = entry
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _settings_entry(settings: Mapping, overrides: Mapping) -> Dict:
+    """SETTINGS کامل (همان شکل crypto_scanner) با مقادیر بهینه‌شده"""
+    return {**settings, **overrides.get('settings', {})}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="جستجوی موازی پارامترهای استراتژی با بک‌تست")
+    parser.add_argument('--strategy', choices=['advanced'] + list(backtest.STRATEGIES), default='coin_score')
+    parser.add_argument('--space', help="فایل JSON فضای جستجو {پارامتر: [مقادیر]} (پیش‌فرض: DEFAULT_SPACES)")
+    parser.add_argument('--search', choices=['grid', 'random'], default='grid')
+    parser.add_argument('--samples', type=int, default=500, help="تعداد ترکیب در جستجوی random")
+    parser.add_argument('--metric', choices=METRICS, default=DEFAULT_METRIC)
+    parser.add_argument('--horizon', choices=list(backtest.HORIZONS), default=DEFAULT_HORIZON)
+    parser.add_argument('--min-alerts', type=int, default=MIN_ALERTS)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--results', help="ذخیره جدول کامل نتایج در CSV")
+    parser.add_argument('--output', default=OVERRIDES_FILE)
+    parser.add_argument('--no-write', action='store_true', help="فقط گزارش؛ بهترین پیکربندی نوشته نشود")
+    backtest.add_panel_arguments(parser)
+    args = parser.parse_args()
+
+    if args.space:
+        with open(args.space, 'r', encoding='utf-8') as f:
+            space = json.load(f)
+    else:
+        space = DEFAULT_SPACES[args.strategy]
+    validate_space(args.strategy, space)
+    settings = None
+    if args.strategy == 'advanced':
+        from crypto_scanner import SETTINGS as settings
+        settings = dict(settings)
+    configs = grid(space) if args.search == 'grid' else random_search(space, args.samples, args.seed)
+    panel = backtest.panel_from_args(args)
+
+    print(f"🔍 {len(configs)} پیکربندی ({args.search}، فضای {grid_size(space)} ترکیبی) برای {args.strategy}...")
+    started = time.perf_counter()
+    results = run_sweep(panel, args.strategy, configs, settings, args.horizon, args.workers)
+    elapsed = time.perf_counter() - started
+    print(f"✅ {len(results)} پیکربندی در {elapsed:.1f} ثانیه ({len(results) / elapsed:.1f} در ثانیه)")
+    if args.results:
+        results.to_csv(args.results, index=False)
+
+    ranked = rank(results, args.metric, args.min_alerts)
+    if ranked.empty:
+        print(f"⚪ هیچ پیکربندی با حداقل {args.min_alerts} هشدار پیدا نشد.")
+        return
+    columns = list(space) + ['alerts', 'mean', 'hit_rate', 'excess', 'total_return', 'max_drawdown', 'calmar']
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(ranked[columns].head(TOP).to_string(index=False, float_format=lambda v: f'{v:.4g}'))
+
+    best = ranked.iloc[0]
+    overrides = to_overrides(configs[ranked.index[0]])      # مقادیر با همان نوع فضای جستجو (نه float ستون)
+    if settings is not None:
+        overrides['settings'] = _settings_entry(settings, overrides)
+    strategy = backtest.build_strategy(args.strategy, overrides, settings)
+    print(backtest.run_backtest(panel, strategy).report())
+    if args.no_write:
+        return
+    metrics = {name: best[name] for name in columns if name not in space}
+    write_overrides(args.strategy, overrides, metrics, args.output)
+    print(f"💾 بهترین پیکربندی {args.strategy} در {args.output} نوشته شد.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,343 @@
+"""
+ماژول telegram_dispatcher.py
+ارسال پس‌زمینه پیام‌های تلگرام؛ اسکنر فقط پیام را در صف می‌گذارد و هیچ‌وقت منتظر API تلگرام نمی‌ماند
+- پیام‌های هم‌زمان یک چت (با parse_mode یکسان) در یک پیام زیر 4096 کاراکتر ادغام می‌شوند
+- محدودیت سراسری ربات از سطل 'telegram' در rate_limiter و محدودیت هر چت (۱ پیام در ثانیه،
+  ۲۰ پیام در دقیقه برای گروه‌ها) در همین ماژول رعایت می‌شود
+- پاسخ 429 فقط همان چت را تا پایان retry_after متوقف می‌کند؛ خطای شبکه/5xx با backoff تکرار می‌شود
+- هنگام خروج برنامه (atexit) صف تا FLUSH_TIMEOUT ثانیه خالی می‌شود
+"""
+import atexit
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+from scanner import circuit_breaker, http_client, metrics, rate_limiter
+
+MAX_MESSAGE_LENGTH = 4096
+SEPARATOR = '\n\n'
+COALESCE_DELAY = 0.5          # صبر کوتاه پس از اولین پیام تا پیام‌های همان دور اسکن هم برسند
+PER_CHAT_INTERVAL = 1.0       # حداقل فاصله دو پیام به یک چت
+GROUP_PER_MINUTE = 20         # سقف پیام به یک گروه در دقیقه
+MAX_QUEUE = 1000              # با پر شدن صف یک چت، قدیمی‌ترین پیام حذف می‌شود
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 60.0
+FLUSH_TIMEOUT = 10.0
+
+
+def message_length(text: str) -> int:
+    """طول از دید تلگرام (واحدهای UTF-16؛ هر emoji دو واحد است)"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def split_message(text: str, limit: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """تقسیم متن طولانی در مرز خطوط به قطعه‌های حداکثر limit کاراکتری"""
+    if message_length(text) <= limit:
+        return [text]
+    parts, current = [], ''
+    for line in text.split('\n'):
+        while message_length(line) > limit:
+            if current:
+                parts.append(current)
+                current = ''
+            cut = limit
+            while message_length(line[:cut]) > limit:
+                cut -= 1
+            parts.append(line[:cut])
+            line = line[cut:]
+        candidate = f"{current}\n{line}" if current else line
+        if current and message_length(candidate) > limit:
+            parts.append(current)
+            current = line
+        else:
+            current = candidate
+    if current:
+        parts.append(current)
+    return parts
+
+
+class _Message:
+    __slots__ = ('text', 'count', 'attempts')
+
+    def __init__(self, text: str, count: int = 1, attempts: int = 0):
+        self.text = text
+        self.count = count            # تعداد هشدارهای ادغام‌شده در این پیام
+        self.attempts = attempts
+
+
+class _ChatState:
+    def __init__(self, chat_id: str):
+        self.per_minute = GROUP_PER_MINUTE if str(chat_id).startswith('-') else None
+        self.next_allowed = 0.0
+        self.sent_times = deque()
+
+    def ready_at(self, now: float) -> float:
+        ready = self.next_allowed
+        if self.per_minute is not None:
+            while self.sent_times and now - self.sent_times[0] >= 60:
+                self.sent_times.popleft()
+            if len(self.sent_times) >= self.per_minute:
+                ready = max(ready, self.sent_times[0] + 60)
+        return ready
+
+    def mark_sent(self, now: float):
+        self.next_allowed = max(self.next_allowed, now + PER_CHAT_INTERVAL)
+        if self.per_minute is not None:
+            self.sent_times.append(now)
+
+    def block(self, seconds: float):
+        self.next_allowed = max(self.next_allowed, time.monotonic() + seconds)
+
+
+class TelegramDispatcher:
+    """
+    صف ارسال پس‌زمینه برای یک ربات
+    submit فوراً برمی‌گردد؛ یک thread پس‌زمینه پیام‌ها را ادغام و با رعایت محدودیت‌ها ارسال می‌کند
+    """
+
+    def __init__(self, token: str, name: str = 'telegram'):
+        self.token = token
+        self.name = name
+        self.url = http_client.api_url('telegram', f'/bot{token}/sendMessage')
+        self._pending: 'OrderedDict[Tuple[str, Optional[str]], deque]' = OrderedDict()
+        self._first_queued: Dict[Tuple[str, Optional[str]], float] = {}
+        self._chats: Dict[str, _ChatState] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._inflight = 0
+        self._closed = False
+        self.counters = {
+            'queued': 0,
+            'sent': 0,
+            'alerts_sent': 0,
+            'coalesced': 0,
+            'dropped': 0,
+            'retries': 0,
+            'rate_limited': 0,
+            'failed': 0,
+        }
+
+    # --- رابط عمومی ---
+
+    def submit(self, chat_id, text: str, parse_mode: Optional[str] = 'HTML') -> bool:
+        """قرار دادن پیام در صف (بدون انتظار)؛ False یعنی dispatcher بسته شده است"""
+        if not text:
+            return False
+        key = (str(chat_id), parse_mode)
+        with self._cond:
+            if self._closed:
+                return False
+            queue = self._pending.setdefault(key, deque())
+            if not queue:
+                self._first_queued[key] = time.monotonic()
+            for part in split_message(text):
+                if len(queue) >= MAX_QUEUE:
+                    queue.popleft()
+                    self.counters['dropped'] += 1
+                queue.append(_Message(part))
+                self.counters['queued'] += 1
+            self._ensure_thread()
+            self._cond.notify_all()
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """صبر تا خالی شدن صف؛ True یعنی همه پیام‌ها تعیین تکلیف شدند"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._inflight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(timeout=remaining)
+            return True
+
+    def close(self, timeout: float = FLUSH_TIMEOUT) -> bool:
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if not flushed:
+            pending = sum(len(q) for q in self._pending.values())
+            print(f"⚠️ [{self.name}] {pending} پیام تلگرام پیش از خروج ارسال نشد.")
+        return flushed
+
+    def stats(self) -> Dict:
+        with self._cond:
+            stats = dict(self.counters)
+            stats['pending'] = sum(len(q) for q in self._pending.values())
+            return stats
+
+    # --- thread پس‌زمینه ---
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=f'{self.name}-dispatcher', daemon=True)
+            self._thread.start()
+
+    def _chat(self, chat_id: str) -> _ChatState:
+        state = self._chats.get(chat_id)
+        if state is None:
+            state = self._chats[chat_id] = _ChatState(chat_id)
+        return state
+
+    def _next_ready(self, now: float):
+        """(کلید آماده ارسال یا None، زمان انتظار تا اولین کلید آماده)"""
+        best_key, best_at = None, None
+        for key, queue in self._pending.items():
+            if not queue:
+                continue
+            ready = max(self._chat(key[0]).ready_at(now), self._first_queued.get(key, 0) + COALESCE_DELAY)
+            if best_at is None or ready < best_at:
+                best_key, best_at = key, ready
+        if best_key is None:
+            return None, None
+        if best_at <= now:
+            return best_key, 0.0
+        return None, best_at - now
+
+    def _take_batch(self, key) -> _Message:
+        queue = self._pending[key]
+        batch = queue.popleft()
+        while queue and queue[0].attempts == 0 and batch.attempts == 0:
+            text = batch.text + SEPARATOR + queue[0].text
+            if message_length(text) > MAX_MESSAGE_LENGTH:
+                break
+            message = queue.popleft()
+            batch = _Message(text, batch.count + message.count)
+            self.counters['coalesced'] += 1
+        if not queue:
+            del self._pending[key]
+            self._first_queued.pop(key, None)
+        return batch
+
+    def _requeue(self, key, message: _Message):
+        queue = self._pending.setdefault(key, deque())
+        queue.appendleft(message)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    key, wait = self._next_ready(time.monotonic())
+                    if key is not None:
+                        break
+                    if self._closed and not self._pending:
+                        return
+                    self._cond.wait(timeout=wait)
+                batch = self._take_batch(key)
+                self._inflight += 1
+            try:
+                self._deliver(key, batch)
+            except Exception as e:
+                print(f"❌ [{self.name}] خطای غیرمنتظره در ارسال: {e}")
+            finally:
+                with self._cond:
+                    self._inflight -= 1
+                    self._cond.notify_all()
+
+    def _deliver(self, key, batch: _Message):
+        chat_id, parse_mode = key
+        data = {'chat_id': chat_id, 'text': batch.text}
+        if parse_mode:
+            data['parse_mode'] = parse_mode
+        breaker = circuit_breaker.get_breaker('telegram') if http_client.CIRCUIT_BREAKER_ENABLED else None
+        if breaker is not None and not breaker.allow():
+            # مدار تلگرام باز است: پیام بدون مصرف تلاش در صف می‌ماند تا درخواست آزمایشی بعدی
+            with self._cond:
+                self._chat(chat_id).block(max(breaker.retry_in(), 1.0))
+                self._requeue(key, batch)
+                self._cond.notify_all()
+            return
+        recorded = False
+        try:
+            try:
+                rate_limiter.get_limiter().acquire('telegram')
+            except sqlite3.Error as e:
+                print(f"⚠️ خطا در پایگاه داده rate_limiter: {e}")
+            started = time.perf_counter()
+            try:
+                response = http_client.get_session().post(self.url, data=data, timeout=http_client.timeout_for(self.url))
+            except Exception as e:
+                elapsed = time.perf_counter() - started
+                metrics.record_request('telegram', 'error', elapsed)
+                metrics.observe('dispatch', elapsed, 'telegram', ok=False)
+                if breaker is not None:
+                    recorded = True
+                    breaker.record(False, elapsed)
+                self._retry(key, batch, f"خطای اتصال: {e}")
+                return
+            elapsed = time.perf_counter() - started
+            metrics.record_request('telegram', response.status_code, elapsed)
+            metrics.observe('dispatch', elapsed, 'telegram', ok=response.status_code == 200)
+            if breaker is not None:
+                recorded = True
+                breaker.record(None if response.status_code == 429 else response.status_code < 500, elapsed)
+        finally:
+            if breaker is not None and not recorded:
+                breaker.release()
+        with self._cond:
+            state = self._chat(chat_id)
+            if response.status_code == 200:
+                state.mark_sent(time.monotonic())
+                self.counters['sent'] += 1
+                self.counters['alerts_sent'] += batch.count
+                suffix = f" ({batch.count} هشدار)" if batch.count > 1 else ""
+                print(f"📱 پیام به تلگرام ارسال شد{suffix}.")
+                return
+            if response.status_code == 429:
+                wait = http_client.retry_after_of(response) or BACKOFF_MAX
+                state.block(wait)
+                self.counters['rate_limited'] += 1
+                self._requeue(key, batch)
+                print(f"⏳ محدودیت نرخ تلگرام برای چت {chat_id}. صبر {wait:.0f} ثانیه...")
+                self._cond.notify_all()
+                return
+            if response.status_code == 400 and parse_mode and "parse" in response.text:
+                # HTML نامعتبر (مثلا تگ شکسته پس از تقسیم پیام): همان متن بدون قالب‌بندی ارسال می‌شود
+                self._requeue((chat_id, None), _Message(batch.text, batch.count, batch.attempts))
+                self._cond.notify_all()
+                return
+        if response.status_code >= 500:
+            self._retry(key, batch, f"کد {response.status_code}")
+            return
+        with self._cond:
+            self.counters['failed'] += batch.count
+        print(f"❌ خطا در ارسال تلگرام: {response.status_code} {response.text[:200]}")
+
+    def _retry(self, key, batch: _Message, reason: str):
+        with self._cond:
+            batch.attempts += 1
+            if batch.attempts >= MAX_ATTEMPTS:
+                self.counters['failed'] += batch.count
+                print(f"❌ ارسال تلگرام پس از {batch.attempts} تلاش ناموفق ماند ({reason}).")
+                return
+            delay = min(BACKOFF_MAX, BACKOFF_BASE ** batch.attempts)
+            self._chat(key[0]).block(delay)
+            self.counters['retries'] += 1
+            self._requeue(key, batch)
+            self._cond.notify_all()
+        print(f"🔄 تلاش دوباره ارسال تلگرام در {delay:.0f} ثانیه ({reason})")
+
+
+_dispatchers: Dict[str, TelegramDispatcher] = {}
+_dispatchers_lock = threading.Lock()
+
+
+def get_dispatcher(token: str) -> TelegramDispatcher:
+    """dispatcher مشترک هر ربات در این پروسه (با ثبت flush هنگام خروج)"""
+    with _dispatchers_lock:
+        dispatcher = _dispatchers.get(token)
+        if dispatcher is None:
+            dispatcher = _dispatchers[token] = TelegramDispatcher(token)
+            atexit.register(dispatcher.close)
+        return dispatcher
+
+
+def send(token: str, chat_id, text: str, parse_mode: Optional[str] = 'HTML') -> bool:
+    """قرار دادن پیام در صف ارسال پس‌زمینه؛ بدون انتظار برای تلگرام"""
+    if not token or not chat_id:
+        return False
+    return get_dispatcher(token).submit(chat_id, text, parse_mode)
@@ -0,0 +1,249 @@
+"""
+ماژول transfer_index.py
+ایندکس افزایشی انتقال‌های توکن (tokentx) از Etherscan/BscScan
+- برای هر قرارداد آخرین بلوک دیده‌شده ذخیره می‌شود و هر دور فقط از همان بلوک به بعد (صفحه‌بندی‌شده) دریافت می‌شود
+- بار اول فقط انتقال‌های اخیر (به ترتیب نزولی تا RETENTION) دریافت می‌شوند، نه کل تاریخچه قرارداد
+- انتقال‌ها تا RETENTION نگه داشته می‌شوند و تعداد انتقال، فرستنده/گیرنده یکتا و حجم هر پنجره از همین داده محلی محاسبه می‌شود
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import requests
+
+from scanner import http_client
+
+TRANSFER_INDEX_DB = 'transfers.db'
+
+TRANSFER_WINDOWS = {
+    '1h': 3600,
+    '24h': 24 * 3600,
+    '7d': 7 * 24 * 3600,
+}
+RETENTION = max(TRANSFER_WINDOWS.values())
+PAGE_SIZE = 1000                      # offset هر درخواست tokentx
+MAX_RESULT_WINDOW = 10000             # سقف page × offset در Etherscan/BscScan
+MAX_PAGES = 20                        # سقف درخواست هر قرارداد در یک دور
+PRUNE_EVERY = 200
+
+# شبکه (مثل asset_platform_id کوین‌گکو) -> سرویس explorer
+EXPLORERS = {
+    'ethereum': 'etherscan',
+    'binance-smart-chain': 'bscscan',
+}
+
+
+def fetch_transfers(provider: str, contract: str, api_key: str = '', start_block: int = 0,
+                    page: int = 1, sort: str = 'asc') -> Optional[List[Dict]]:
+    """یک صفحه tokentx؛ None یعنی خطا (لیست خالی یعنی انتقالی نیست)"""
+    params = {
+        'module': 'account',
+        'action': 'tokentx',
+        'contractaddress': contract,
+        'startblock': start_block,
+        'endblock': 99999999,
+        'page': page,
+        'offset': PAGE_SIZE,
+        'sort': sort,
+    }
+    if api_key:
+        params['apikey'] = api_key
+    response = http_client.get(http_client.api_url(provider, '/api'), params=params)
+    if response.status_code != 200:
+        print(f"❌ [{provider}] خطا در دریافت انتقال‌های {contract}: کد {response.status_code}")
+        return None
+    data = response.json()
+    result = data.get('result')
+    if isinstance(result, list):
+        return result
+    if str(data.get('message', '')).startswith('No transactions'):
+        return []
+    print(f"❌ [{provider}] خطا در دریافت انتقال‌های {contract}: {result or data.get('message')}")
+    return None
+
+
+class TransferIndex:
+    """ذخیره انتقال‌های اخیر هر قرارداد و محاسبه فعالیت پنجره‌ای"""
+
+    def __init__(self, db_path: str = TRANSFER_INDEX_DB):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._writes = 0
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS cursors ('
+            ' chain TEXT NOT NULL,'
+            ' contract TEXT NOT NULL,'
+            ' last_block INTEGER NOT NULL,'
+            ' since REAL NOT NULL,'               # از این زمان به بعد همه انتقال‌ها ایندکس شده‌اند
+            ' synced REAL NOT NULL,'
+            ' PRIMARY KEY (chain, contract))'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS transfers ('
+            ' chain TEXT NOT NULL,'
+            ' contract TEXT NOT NULL,'
+            ' block INTEGER NOT NULL,'
+            ' ts INTEGER NOT NULL,'
+            ' hash TEXT NOT NULL,'
+            ' sender TEXT NOT NULL,'
+            ' receiver TEXT NOT NULL,'
+            ' value TEXT NOT NULL,'
+            ' amount REAL NOT NULL,'
+            ' PRIMARY KEY (chain, contract, hash, sender, receiver, value)) WITHOUT ROWID'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS transfers_ts ON transfers (chain, contract, ts)')
+
+    @staticmethod
+    def _key(chain: str, contract: str):
+        return chain.lower(), contract.lower()
+
+    def cursor(self, chain: str, contract: str) -> Optional[Dict]:
+        chain, contract = self._key(chain, contract)
+        with self._lock:
+            row = self._conn.execute('SELECT last_block, since, synced FROM cursors WHERE chain = ? AND contract = ?',
+                                     (chain, contract)).fetchone()
+        return {'last_block': row[0], 'since': row[1], 'synced': row[2]} if row else None
+
+    def ingest(self, chain: str, contract: str, rows: List[Dict], since: Optional[float] = None,
+               now: Optional[float] = None) -> int:
+        """
+        ثبت انتقال‌های یک صفحه tokentx و جلو بردن cursor تا بزرگ‌ترین بلوک آن؛ تعداد انتقال‌های جدید را برمی‌گرداند
+        انتقال‌های قدیمی‌تر از RETENTION و تکراری (همپوشانی صفحه‌ها روی بلوک مرزی) نادیده گرفته می‌شوند
+        """
+        chain, contract = self._key(chain, contract)
+        now = time.time() if now is None else now
+        horizon = now - RETENTION
+        records = []
+        last_block = None
+        for tx in rows:
+            try:
+                block, ts = int(tx['blockNumber']), int(tx['timeStamp'])
+                last_block = block if last_block is None else max(last_block, block)
+                if ts < horizon:
+                    continue
+                value = str(tx.get('value', '0'))
+                amount = int(value) / 10 ** int(tx.get('tokenDecimal') or 0)
+                records.append((chain, contract, block, ts, tx['hash'], tx['from'].lower(), tx['to'].lower(),
+                                value, amount))
+            except (KeyError, TypeError, ValueError):
+                continue
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO transfers (chain, contract, block, ts, hash, sender, receiver, value, amount) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', records)
+                inserted = self._conn.total_changes - before
+                self._conn.execute(
+                    'INSERT INTO cursors (chain, contract, last_block, since, synced) VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT(chain, contract) DO UPDATE SET '
+                    ' last_block = MAX(last_block, excluded.last_block), synced = excluded.synced,'
+                    ' since = COALESCE(?, since)',
+                    (chain, contract, last_block or 0, now if since is None else since, now, since))
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                self._conn.execute('DELETE FROM transfers WHERE ts < ?', (horizon,))
+        return inserted
+
+    def sync(self, chain: str, contract: str, api_key: str = '', max_pages: int = MAX_PAGES) -> Optional[int]:
+        """
+        دریافت انتقال‌های جدید قرارداد از آخرین بلوک ایندکس‌شده؛ تعداد انتقال‌های جدید یا None در صورت خطا
+        بار اول انتقال‌های اخیر به ترتیب نزولی تا RETENTION دریافت می‌شوند
+        """
+        provider = EXPLORERS[chain.lower()]
+        cursor = self.cursor(chain, contract)
+        try:
+            if cursor is None:
+                return self._bootstrap(provider, chain, contract, api_key, max_pages)
+            start, page, added = cursor['last_block'], 1, 0
+            for _ in range(max_pages):
+                rows = fetch_transfers(provider, contract, api_key, start, page, 'asc')
+                if rows is None:
+                    return added or None
+                added += self.ingest(chain, contract, rows)
+                if len(rows) < PAGE_SIZE:
+                    break
+                if (page + 1) * PAGE_SIZE > MAX_RESULT_WINDOW:
+                    # سقف نتایج: از بلوک آخرین انتقال دوباره از صفحه اول (همپوشانی با کلید یکتا حذف می‌شود)
+                    start, page = int(rows[-1]['blockNumber']), 1
+                else:
+                    page += 1
+            return added
+        except requests.RequestException as e:
+            print(f"❌ [{provider}] خطا در به‌روزرسانی انتقال‌های {contract}: {e}")
+            return None
+
+    def _bootstrap(self, provider: str, chain: str, contract: str, api_key: str, max_pages: int) -> Optional[int]:
+        now = time.time()
+        horizon = now - RETENTION
+        pages = min(max_pages, MAX_RESULT_WINDOW // PAGE_SIZE)
+        rows, oldest, complete = [], now, False
+        for page in range(1, pages + 1):
+            batch = fetch_transfers(provider, contract, api_key, 0, page, 'desc')
+            if batch is None:
+                return None
+            rows.extend(batch)
+            if batch:
+                oldest = min(oldest, int(batch[-1]['timeStamp']))
+            if len(batch) < PAGE_SIZE or oldest < horizon:
+                complete = True
+                break
+        # اگر به سقف صفحه‌ها رسیدیم، پنجره‌های قدیمی‌تر از قدیمی‌ترین انتقال دریافت‌شده ناقص‌اند
+        return self.ingest(chain, contract, rows, since=horizon if complete else oldest, now=now)
+
+    def activity(self, chain: str, contract: str, now: Optional[float] = None) -> Dict[str, Dict]:
+        """
+        فعالیت هر پنجره TRANSFER_WINDOWS: تعداد انتقال، فرستنده و گیرنده یکتا، حجم (با اعشار توکن)
+        complete=False یعنی ایندکس هنوز کل آن پنجره را پوشش نمی‌دهد
+        """
+        chain, contract = self._key(chain, contract)
+        now = time.time() if now is None else now
+        cursor = self.cursor(chain, contract)
+        columns, params = [], []
+        for seconds in TRANSFER_WINDOWS.values():
+            start = now - seconds
+            columns.append('SUM(ts >= ?), COUNT(DISTINCT CASE WHEN ts >= ? THEN sender END), '
+                           'COUNT(DISTINCT CASE WHEN ts >= ? THEN receiver END), '
+                           'SUM(CASE WHEN ts >= ? THEN amount ELSE 0 END)')
+            params.extend([start] * 4)
+        with self._lock:
+            row = self._conn.execute(
+                f'SELECT {", ".join(columns)} FROM transfers WHERE chain = ? AND contract = ? AND ts >= ?',
+                params + [chain, contract, now - RETENTION]).fetchone()
+        activity = {}
+        for i, (window, seconds) in enumerate(TRANSFER_WINDOWS.items()):
+            transfers, senders, receivers, volume = row[4 * i:4 * i + 4]
+            activity[window] = {
+                'transfers': int(transfers or 0),
+                'senders': int(senders or 0),
+                'receivers': int(receivers or 0),
+                'volume': float(volume or 0.0),
+                'complete': cursor is not None and cursor['since'] <= now - seconds,
+            }
+        return activity
+
+
+_index: Optional[TransferIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> TransferIndex:
+    """ایندکس مشترک این پروسه (روی فایل TRANSFER_INDEX_DB)"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = TransferIndex(TRANSFER_INDEX_DB)
+    return _index
@@ -0,0 +1,216 @@
+"""
+ماژول ttl_cache.py
+کش محدود در حافظه با انقضای زمانی (TTL) و حذف LRU
+- سقف تعداد و/یا حجم (بایت) ورودی‌ها؛ با پر شدن، کم‌استفاده‌ترین ورودی حذف می‌شود
+- هر ورودی زمان انقضای خودش را دارد (مثلا تا بسته شدن کندل جاری)
+- stale-while-revalidate: ورودی منقضی تا stale_ttl ثانیه بعد هنوز برگردانده می‌شود و
+  همزمان در پس‌زمینه دوباره بارگذاری می‌شود
+- شمارنده‌های hit/miss/eviction برای مانیتورینگ
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+REFRESH_WORKERS = 2
+
+_MISSING = object()
+
+
+def default_sizeof(value: Any) -> int:
+    """تخمین حجم یک مقدار (DataFrame، آرایه NumPy یا شیء معمولی)"""
+    memory_usage = getattr(value, 'memory_usage', None)
+    if callable(memory_usage):
+        try:
+            usage = memory_usage(index=True)
+            return int(getattr(usage, 'sum', lambda: usage)())
+        except TypeError:
+            pass
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+    return sys.getsizeof(value)
+
+
+def candle_expiry(interval: float, now: Optional[float] = None) -> float:
+    """زمان بسته شدن کندل جاری با طول interval ثانیه (هم‌تراز با UTC)"""
+    now = time.time() if now is None else now
+    return (now // interval + 1) * interval
+
+
+class _Entry:
+    __slots__ = ('value', 'expires_at', 'size')
+
+    def __init__(self, value, expires_at: float, size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+class TTLCache:
+    """
+    کش LRU با TTL؛ رابط دیکشنری‌مانند (cache[key]، key in cache، get، len) به علاوه get_or_load
+    max_entries یا max_bytes برابر None یعنی بدون سقف در آن بعد
+    """
+
+    def __init__(self, max_entries: Optional[int] = 1000, max_bytes: Optional[int] = None,
+                 ttl: float = 300, stale_ttl: float = 0,
+                 sizeof: Callable[[Any], int] = default_sizeof, name: str = 'cache'):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.sizeof = sizeof
+        self.name = name
+        self._data: 'OrderedDict[Hashable, _Entry]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._refreshing = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.counters = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'refreshes': 0,
+            'refresh_errors': 0,
+        }
+
+    # --- رابط دیکشنری‌مانند ---
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry.expires_at > time.time()
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def get(self, key, default=None):
+        """مقدار تازه (منقضی نشده)؛ ورودی منقضی حذف و miss شمرده می‌شود"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.counters['misses'] += 1
+                return default
+            if entry.expires_at <= time.time():
+                self._remove(key)
+                self.counters['expirations'] += 1
+                self.counters['misses'] += 1
+                return default
+            self._data.move_to_end(key)
+            self.counters['hits'] += 1
+            return entry.value
+
+    def set(self, key, value, ttl: Optional[float] = None, expires_at: Optional[float] = None):
+        """ذخیره با TTL پیش‌فرض، TTL دلخواه یا زمان انقضای مطلق"""
+        if expires_at is None:
+            expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            self._remove(key)
+            self._data[key] = _Entry(value, expires_at, size)
+            self._bytes += size
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    # --- stale-while-revalidate ---
+
+    def get_or_load(self, key, loader: Callable[[], Any], ttl: Optional[float] = None,
+                    expires_at: Optional[Callable[[], float]] = None):
+        """
+        مقدار key؛ در صورت نبودن، loader همزمان اجرا و نتیجه ذخیره می‌شود (None ذخیره نمی‌شود)
+        اگر ورودی منقضی ولی هنوز در بازه stale_ttl باشد، همان مقدار برگردانده و loader در پس‌زمینه اجرا می‌شود
+        expires_at (اختیاری) تابعی است که زمان انقضای مقدار تازه را می‌دهد
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._data.move_to_end(key)
+                    self.counters['hits'] += 1
+                    return entry.value
+                if now < entry.expires_at + self.stale_ttl:
+                    self._data.move_to_end(key)
+                    self.counters['stale_hits'] += 1
+                    self._schedule_refresh(key, loader, ttl, expires_at)
+                    return entry.value
+                self._remove(key)
+                self.counters['expirations'] += 1
+            self.counters['misses'] += 1
+        return self._load(key, loader, ttl, expires_at)
+
+    def _load(self, key, loader, ttl, expires_at):
+        value = loader()
+        if value is not None:
+            self.set(key, value, ttl=ttl, expires_at=expires_at() if expires_at else None)
+        return value
+
+    def _schedule_refresh(self, key, loader, ttl, expires_at):
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS,
+                                                thread_name_prefix=f'{self.name}-refresh')
+
+        def refresh():
+            try:
+                self._load(key, loader, ttl, expires_at)
+                with self._lock:
+                    self.counters['refreshes'] += 1
+            except Exception as e:
+                with self._lock:
+                    self.counters['refresh_errors'] += 1
+                print(f"[{self.name}] خطا در به‌روزرسانی پس‌زمینه {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(refresh)
+
+    # --- داخلی ---
+
+    def _remove(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _evict(self):
+        while self._data and (
+                (self.max_entries is not None and len(self._data) > self.max_entries) or
+                (self.max_bytes is not None and self._bytes > self.max_bytes)):
+            _, entry = self._data.popitem(last=False)
+            self._bytes -= entry.size
+            self.counters['evictions'] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.counters)
+            stats['entries'] = len(self._data)
+            stats['bytes'] = self._bytes
+            lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+            stats['hit_ratio'] = round((stats['hits'] + stats['stale_hits']) / lookups, 4) if lookups else 0.0
+            return stats
+
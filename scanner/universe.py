@@ -0,0 +1,205 @@
+"""
+ماژول universe.py
+اسکن کل بازار (full-universe) با دریافت موازی صفحه‌های coins/markets و listings/latest
+- صفحه‌ها با چند thread و در محدوده سهمیه rate_limiter (که در http_client اعمال می‌شود) دریافت می‌شوند
+- صفحه‌های ابتدایی (ارزهای بزرگ) هر دور دریافت می‌شوند و صفحه‌های عمیق با یک cursor پایدار
+  دور به دور جلو می‌روند؛ snapshot نهایی اجتماع آخرین نسخه همه صفحه‌هاست (برای 5000+ ارز)
+"""
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from scanner import circuit_breaker, http_client, market_data, metrics
+from scanner.market_snapshot import MarketSnapshot
+
+UNIVERSE_CONCURRENCY = {
+    'coingecko': 4,
+    'coinmarketcap': 2,
+}
+HEAD_PAGES = 4                        # 1000 ارز اول در هر دور
+DEEP_PAGES_PER_CYCLE = 4              # تعداد صفحه‌های عمیق در هر دور
+DEEP_PAGE_TTL = 6 * 3600              # صفحه عمیقی که این مدت به‌روز نشده از snapshot کنار گذاشته می‌شود
+MAX_PAGES = 80                        # سقف عمق اسکن (20000 ارز)
+UNIVERSE_CURSOR_FILE = 'universe_cursor.json'
+
+
+def _fetch_parallel(provider: str, func, args: List) -> Dict:
+    """اجرای func روی هر آرگومان با حداکثر UNIVERSE_CONCURRENCY[provider] درخواست همزمان"""
+    if not args:
+        return {}
+    if not circuit_breaker.is_available(provider):
+        print(f"🔌 [{provider}] مدار باز است؛ {len(args)} صفحه در این دور دریافت نمی‌شود.")
+        return {arg: None for arg in args}
+    workers = min(len(args), UNIVERSE_CONCURRENCY.get(provider, 1))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'universe-{provider}') as pool:
+        futures = {arg: pool.submit(func, arg) for arg in args}
+        results = {}
+        for arg, future in futures.items():
+            try:
+                results[arg] = future.result()
+            except Exception as e:
+                print(f"[{provider}] خطا در دریافت صفحه {arg}: {e}")
+                results[arg] = None
+        return results
+
+
+def fetch_coingecko_page(page: int, api_key: str = '') -> Optional[MarketSnapshot]:
+    """یک صفحه coins/markets؛ None یعنی خطا و snapshot خالی یعنی پایان لیست"""
+    url, params = market_data.markets_query(page)
+    if api_key:
+        params['x_cg_pro_api_key'] = api_key
+    with metrics.timed('fetch', 'coingecko'):
+        response = http_client.get(url, params=params)
+    if response.status_code != 200:
+        print(f"❌ خطا در دریافت صفحه {page} از CoinGecko: کد {response.status_code}")
+        return None
+    with metrics.timed('parse', 'coingecko'):
+        return MarketSnapshot.from_coingecko(response.json())
+
+
+def fetch_coingecko_pages(pages: Iterable[int], api_key: str = '') -> Dict[int, Optional[MarketSnapshot]]:
+    return _fetch_parallel('coingecko', lambda page: fetch_coingecko_page(page, api_key), list(pages))
+
+
+def fetch_coingecko_top(limit: int, api_key: str = '') -> MarketSnapshot:
+    """limit ارز اول بر اساس ارزش بازار (صفحه‌ها موازی دریافت می‌شوند)"""
+    pages = range(1, math.ceil(limit / market_data.MARKETS_PER_PAGE) + 1)
+    results = fetch_coingecko_pages(pages, api_key)
+    snapshots = [results[p] for p in pages if results.get(p) is not None]
+    return MarketSnapshot.concat(*snapshots).unique('id').head(limit)
+
+
+def fetch_coinmarketcap_page(start: int, api_key: str,
+                             limit: int = market_data.CMC_LISTINGS_PER_PAGE) -> Optional[MarketSnapshot]:
+    url, params = market_data.cmc_listings_query(start, limit)
+    headers = {'X-CMC_PRO_API_KEY': api_key, 'Accept': 'application/json'}
+    with metrics.timed('fetch', 'coinmarketcap'):
+        response = http_client.get(url, headers=headers, params=params)
+    if response.status_code != 200:
+        try:
+            error_msg = response.json().get('status', {}).get('error_message', 'خطای ناشناخته')
+        except ValueError:
+            error_msg = 'خطای ناشناخته'
+        print(f"❌ خطا در دریافت داده از CoinMarketCap (start={start}): کد {response.status_code} - {error_msg}")
+        return None
+    with metrics.timed('parse', 'coinmarketcap'):
+        return MarketSnapshot.from_coinmarketcap(response.json().get('data', []))
+
+
+def fetch_coinmarketcap_top(limit: int, api_key: str) -> MarketSnapshot:
+    """limit ارز اول کوین‌مارکت‌کپ با صفحه‌بندی start (صفحه‌ها موازی دریافت می‌شوند)"""
+    size = market_data.CMC_LISTINGS_PER_PAGE
+    starts = list(range(1, limit + 1, size))
+    results = _fetch_parallel('coinmarketcap',
+                              lambda start: fetch_coinmarketcap_page(start, api_key, min(size, limit - start + 1)),
+                              starts)
+    snapshots = [results[s] for s in starts if results.get(s) is not None]
+    return MarketSnapshot.concat(*snapshots).head(limit)
+
+
+class UniverseScanner:
+    """
+    اسکن تدریجی کل بازار کوین‌گکو
+    هر scan صفحه‌های 1..head_pages و deep_pages صفحه بعدی از cursor را موازی دریافت می‌کند؛
+    cursor در فایل ذخیره می‌شود تا پس از راه‌اندازی مجدد هم از همان‌جا ادامه دهد
+    """
+
+    def __init__(self, head_pages: int = HEAD_PAGES, deep_pages: int = DEEP_PAGES_PER_CYCLE,
+                 cursor_file: str = UNIVERSE_CURSOR_FILE, api_key: str = '', max_pages: int = MAX_PAGES):
+        self.head_pages = head_pages
+        self.deep_pages = deep_pages
+        self.cursor_file = cursor_file
+        self.api_key = api_key
+        self.max_pages = max_pages
+        self._pages: Dict[int, MarketSnapshot] = {}
+        self._fetched_at: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self.cursor = self._load_cursor()
+
+    def _load_cursor(self) -> Dict:
+        cursor = {'next_page': self.head_pages + 1, 'last_page': None}
+        if os.path.exists(self.cursor_file):
+            try:
+                with open(self.cursor_file, 'r', encoding='utf-8') as f:
+                    cursor.update(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"[Universe] خطا در خواندن {self.cursor_file}: {e}")
+        if cursor['next_page'] <= self.head_pages:
+            cursor['next_page'] = self.head_pages + 1
+        return cursor
+
+    def _save_cursor(self):
+        tmp_path = self.cursor_file + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.cursor, f)
+            os.replace(tmp_path, self.cursor_file)
+        except OSError as e:
+            print(f"[Universe] خطا در ذخیره {self.cursor_file}: {e}")
+
+    def _deep_window(self) -> List[int]:
+        last = self.cursor['last_page'] or self.max_pages
+        last = min(last, self.max_pages)
+        first_deep = self.head_pages + 1
+        if last < first_deep:
+            return []
+        pages = []
+        page = self.cursor['next_page']
+        for _ in range(min(self.deep_pages, last - first_deep + 1)):
+            if page > last:
+                page = first_deep
+            pages.append(page)
+            page += 1
+        return pages
+
+    def scan(self) -> MarketSnapshot:
+        with self._lock:
+            head = list(range(1, self.head_pages + 1))
+            deep = self._deep_window()
+            results = fetch_coingecko_pages(head + deep, self.api_key)
+            now = time.time()
+            end = None
+            # به ترتیب شماره صفحه: صفحه‌های خالی بعد از انتهای لیست نباید last_page را جلو ببرند
+            for page in sorted(results):
+                snapshot = results[page]
+                if snapshot is None:
+                    continue                        # خطا: نسخه قبلی این صفحه (اگر باشد) نگه داشته می‌شود
+                if end is not None and page > end:
+                    continue
+                self._pages[page] = snapshot
+                self._fetched_at[page] = now
+                if len(snapshot) < market_data.MARKETS_PER_PAGE:
+                    # صفحه ناقص یا خالی: انتهای لیست کوین‌گکو
+                    end = page if len(snapshot) else page - 1
+                    self.cursor['last_page'] = end
+                    for stale in [p for p in self._pages if p > page]:
+                        self._pages.pop(stale, None)
+                        self._fetched_at.pop(stale, None)
+                elif page == self.cursor['last_page']:
+                    self.cursor['last_page'] = None     # صفحه آخر پر شده؛ لیست بزرگ‌تر شده است
+            if deep:
+                next_page = deep[-1] + 1
+                last = min(self.cursor['last_page'] or self.max_pages, self.max_pages)
+                self.cursor['next_page'] = next_page if next_page <= last else self.head_pages + 1
+                self._save_cursor()
+            return self._merged(now)
+
+    def _merged(self, now: float) -> MarketSnapshot:
+        pages = sorted(p for p in self._pages
+                       if p <= self.head_pages or now - self._fetched_at[p] <= DEEP_PAGE_TTL)
+        merged = MarketSnapshot.concat(*(self._pages[p] for p in pages))
+        # یک ارز ممکن است بین دو دور از یک صفحه به صفحه دیگر رفته باشد؛ نسخه صفحه با شماره کمتر می‌ماند
+        return merged.unique('id', keep='first').sort('rank', descending=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'pages': len(self._pages),
+                'coins': sum(len(s) for s in self._pages.values()),
+                'next_page': self.cursor['next_page'],
+                'last_page': self.cursor['last_page'],
+            }
@@ -1,4 +1,4 @@
-import requests
+from scanner import http_client, market_data
 from datetime import datetime
 
 def fetch_top_coins():
@@ -6,19 +6,11 @@ def fetch_top_coins():
     print("📡 در حال دریافت داده‌های ارزهای دیجیتال...")
     
     try:
-        url = "https://api.coingecko.com/api/v3/coins/markets"
-        params = {
-            'vs_currency': 'usd',
-            'order': 'market_cap_desc',
-            'per_page': 10,
-            'page': 1,
-            'sparkline': False,
-            'price_change_percentage': '24h'
-        }
+        url, params = market_data.markets_query()
         
-        response = requests.get(url, params=params, timeout=10)
+        response = http_client.get(url, params=params)
         if response.status_code == 200:
-            return response.json()
+            return response.json()[:10]
         else:
             print(f"❌ خطا: کد {response.status_code}")
             return None
@@ -0,0 +1,27 @@
+"""
+ابزارهای مشترک تست‌ها
+"""
+import pytest
+
+
+class FakeClock:
+    """ساعت دستی به جای ماژول time (time/monotonic/perf_counter هر سه همین مقدار را برمی‌گردانند)"""
+
+    def __init__(self, start: float = 1_000_000.0):
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+    monotonic = perf_counter = time
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
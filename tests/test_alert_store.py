@@ -0,0 +1,92 @@
+"""
+رفتار AlertStore: جلوگیری از هشدار تکراری با کلید (symbol, timeframe, source, day)، حذف روزهای قدیمی
+و وارد کردن یک‌باره signals_log.csv
+"""
+import csv
+from datetime import datetime, timedelta
+
+import pytest
+
+from scanner import alert_store
+from scanner.alert_store import AlertStore
+
+
+def _when(days_ago: int = 0, time: str = '10:00:00') -> str:
+    return f"{(datetime.now() - timedelta(days=days_ago)).strftime(alert_store.DAY_FORMAT)} {time}"
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AlertStore(str(tmp_path / 'alerts.db'), retention_days=30)
+
+
+def test_mark_dedupes_on_symbol_timeframe_source_day(store):
+    today = _when()[:10]
+    assert not store.seen('BTC', '1h', 'CoinGecko')
+    assert store.mark('BTC', '1h', 'CoinGecko', _when(time='09:00:00'))
+    assert store.mark('BTC', '1h', 'CoinGecko', _when(time='18:00:00')) is False    # همان روز
+    assert store.seen('BTC', '1h', 'CoinGecko')
+    assert store.seen('BTC', '1h', 'CoinGecko', day=today)
+    # هر جزء کلید متفاوت، هشدار جدید است
+    assert store.mark('BTC', '4h', 'CoinGecko', _when())
+    assert store.mark('BTC', '1h', 'CoinMarketCap', _when())
+    assert store.mark('ETH', '1h', 'CoinGecko', _when())
+    assert store.mark('BTC', '1h', 'CoinGecko', _when(days_ago=1))
+    assert not store.seen('BTC', '1d', 'CoinGecko')
+    assert store.count() == 5
+    first_seen = store._conn.execute(
+        "SELECT first_seen FROM alerts WHERE symbol = 'BTC' AND timeframe = '1h' AND source = 'CoinGecko' AND day = ?",
+        (today,)).fetchone()[0]
+    assert first_seen.endswith('09:00:00')
+
+
+def test_prune_removes_days_past_retention(store):
+    store.mark('OLD', '1h', 'CoinGecko', _when(days_ago=40))
+    store.mark('EDGE', '1h', 'CoinGecko', _when(days_ago=30))
+    store.mark('NEW', '1h', 'CoinGecko', _when(days_ago=1))
+    assert store.prune() == 1
+    assert store.count() == 2
+    assert store.prune(retention_days=7) == 1
+    assert store.seen('NEW', '1h', 'CoinGecko', day=_when(days_ago=1)[:10])
+
+
+def test_periodic_prune_on_writes(store, monkeypatch):
+    monkeypatch.setattr(alert_store, 'PRUNE_EVERY', 3)
+    store.mark('OLD', '1h', 'CoinGecko', _when(days_ago=60))
+    store.mark('A', '1h', 'CoinGecko', _when())
+    assert store.count() == 2
+    store.mark('B', '1h', 'CoinGecko', _when())
+    assert store.count() == 2
+
+
+def _write_log(path, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['time', 'symbol', 'name', 'score', 'reasons', 'timeframe', 'source'])
+        writer.writerows(rows)
+
+
+def test_import_csv_runs_once_per_file(store, tmp_path):
+    log = tmp_path / 'signals_log.csv'
+    _write_log(log, [
+        [_when(), 'BTC', 'Bitcoin', 80, '', '1h', 'CoinGecko'],
+        [_when(time='11:00:00'), 'BTC', 'Bitcoin', 82, '', '1h', 'CoinGecko'],  # تکراری همان روز
+        [_when(days_ago=2), 'ETH', 'Ethereum', 70, '', '4h', 'CoinGecko'],
+        [_when(days_ago=45), 'SOL', 'Solana', 65, '', '1d', 'CoinGecko'],       # خارج از بازه نگهداری
+        ['', 'BAD', 'Bad', 0, '', '1h', 'CoinGecko'],
+    ])
+    assert store.import_csv(str(log)) == 3
+    assert store.count() == 2
+    assert store.seen('ETH', '4h', 'CoinGecko', day=_when(days_ago=2)[:10])
+    assert not store.seen('SOL', '1d', 'CoinGecko', day=_when(days_ago=45)[:10])
+
+    # اجرای بعدی اسکنر: فایل دوباره خوانده نمی‌شود حتی اگر رشد کرده باشد
+    with open(log, 'a', encoding='utf-8', newline='') as f:
+        csv.writer(f).writerow([_when(), 'DOGE', 'Dogecoin', 60, '', '1h', 'CoinGecko'])
+    assert store.import_csv(str(log)) == 0
+    reopened = AlertStore(store.db_path)
+    assert reopened.import_csv(str(log)) == 0
+    assert not reopened.seen('DOGE', '1h', 'CoinGecko')
+    assert reopened.import_csv(str(log), force=True) == 4
+    assert reopened.seen('DOGE', '1h', 'CoinGecko')
+    assert store.import_csv(str(tmp_path / 'missing.csv')) == 0
@@ -0,0 +1,169 @@
+"""
+گذارهای CircuitBreaker (closed -> open -> half_open -> closed/open) با ساعت دستی
+و آزاد شدن سهم آزمایشی half_open در http_client.request برای هر نوع خطا
+"""
+import pytest
+import requests
+
+from scanner import circuit_breaker, http_client
+from scanner.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def breaker_clock(clock, monkeypatch):
+    monkeypatch.setattr(circuit_breaker, 'time', clock)
+    return clock
+
+
+def _breaker(**kwargs):
+    options = dict(window=60, min_calls=4, error_rate=0.5, slow_rate=0.5, slow_call=5,
+                   open_seconds=30, max_open_seconds=100, probes=1)
+    options.update(kwargs)
+    return CircuitBreaker('test', **options)
+
+
+def _trip(breaker):
+    for _ in range(breaker.min_calls):
+        assert breaker.allow()
+        breaker.record(False)
+    assert breaker.state == OPEN
+
+
+def test_stays_closed_below_min_calls(breaker_clock):
+    b = _breaker()
+    for _ in range(3):
+        assert b.allow()
+        b.record(False)
+    assert b.state == CLOSED
+
+
+def test_error_rate_opens_and_rejects_fast(breaker_clock):
+    b = _breaker()
+    for ok in (True, False, True, False):
+        b.allow()
+        b.record(ok)
+    assert b.state == OPEN
+    assert not b.allow()
+    with pytest.raises(CircuitOpenError) as error:
+        b.check()
+    assert error.value.retry_in == pytest.approx(30)
+    assert b.health()['rejected'] == 2 and b.health()['opened'] == 1
+
+
+def test_rate_limited_responses_are_neutral(breaker_clock):
+    b = _breaker()
+    for _ in range(10):
+        b.allow()
+        b.record(None)
+    b.allow()
+    b.record(True)
+    assert b.state == CLOSED
+    assert b.health()['calls'] == 1
+
+
+def test_slow_calls_open_the_circuit(breaker_clock):
+    b = _breaker()
+    for seconds in (6, 6, 1, 1):
+        b.allow()
+        b.record(True, seconds)
+    assert b.state == OPEN
+
+
+def test_old_failures_leave_the_window(breaker_clock):
+    b = _breaker()
+    for _ in range(3):
+        b.allow()
+        b.record(False)
+    breaker_clock.advance(61)
+    for _ in range(3):
+        b.allow()
+        b.record(True)
+    b.allow()
+    b.record(False)
+    assert b.state == CLOSED                   # 1 شکست از 4 درخواست داخل پنجره
+
+
+def test_half_open_success_closes(breaker_clock):
+    b = _breaker()
+    _trip(b)
+    breaker_clock.advance(30)
+    assert b.state == HALF_OPEN
+    assert b.allow()
+    assert not b.allow()                       # فقط یک درخواست آزمایشی
+    b.record(True, 0.1)
+    assert b.state == CLOSED
+    assert b.allow()
+
+
+def test_half_open_failure_reopens_with_longer_cooldown(breaker_clock):
+    b = _breaker()
+    _trip(b)
+    for expected in (60, 100, 100):            # دو برابر تا سقف max_open_seconds
+        breaker_clock.advance(b.retry_in())
+        assert b.allow()
+        b.record(False)
+        assert b.state == OPEN
+        assert b.retry_in() == pytest.approx(expected)
+    breaker_clock.advance(100)
+    assert b.allow()
+    b.record(True)
+    _trip(b)
+    assert b.retry_in() == pytest.approx(30)   # پس از بسته شدن، مدت باز بودن به مقدار اولیه برمی‌گردد
+
+
+def test_slow_probe_counts_as_failure(breaker_clock):
+    b = _breaker()
+    _trip(b)
+    breaker_clock.advance(30)
+    assert b.allow()
+    b.record(True, 6)
+    assert b.state == OPEN
+
+
+def test_release_frees_the_probe(breaker_clock):
+    b = _breaker()
+    _trip(b)
+    breaker_clock.advance(30)
+    assert b.allow()
+    b.release()
+    assert b.state == HALF_OPEN
+    assert b.allow()
+
+
+class _Session:
+    def __init__(self, error):
+        self.error = error
+
+    def request(self, method, url, timeout=None, **kwargs):
+        raise self.error
+
+
+@pytest.fixture
+def half_open(breaker_clock, monkeypatch):
+    b = _breaker()
+    monkeypatch.setattr(circuit_breaker, 'get_breaker', lambda provider: b)
+    monkeypatch.setattr(http_client, 'CIRCUIT_BREAKER_ENABLED', True)
+    monkeypatch.setattr(http_client, 'RATE_LIMIT_ENABLED', False)
+    _trip(b)
+    breaker_clock.advance(30)
+    return b
+
+
+@pytest.mark.parametrize('error', [KeyboardInterrupt(), RuntimeError('urllib3 internals'), ValueError('bad')])
+def test_request_releases_probe_on_unexpected_errors(half_open, monkeypatch, error):
+    monkeypatch.setattr(http_client, 'get_session', lambda: _Session(error))
+    url = http_client.api_url('coingecko', '/ping')
+    with pytest.raises(type(error)):
+        http_client.request('GET', url)
+    assert half_open.state == HALF_OPEN
+    assert half_open.allow()                   # سهم آزمایشی نشت نکرده است
+
+
+def test_request_failure_reopens_half_open_circuit(half_open, monkeypatch):
+    monkeypatch.setattr(http_client, 'get_session', lambda: _Session(requests.ConnectionError('down')))
+    url = http_client.api_url('coingecko', '/ping')
+    with pytest.raises(requests.ConnectionError):
+        http_client.request('GET', url)
+    assert half_open.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        http_client.request('GET', url)
@@ -0,0 +1,107 @@
+"""
+برابری اندیکاتورهای افزایشی scanner/indicators.py با کتابخانه ta (تنظیمات پیش‌فرض)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from scanner import ttl_cache
+from scanner.indicators import IndicatorEngine, IndicatorState
+
+ta = pytest.importorskip('ta')
+
+TOLERANCE = 1e-9
+
+
+def _prices(seed: int, size: int = 400) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, size)))
+    prices[50:60] = prices[49]          # بازه بدون تغییر قیمت (تقسیم صفر بر صفر در RSI)
+    return pd.Series(prices)
+
+
+def _expected(prices: pd.Series) -> pd.DataFrame:
+    macd = ta.trend.MACD(prices)
+    bands = ta.volatility.BollingerBands(prices)
+    return pd.DataFrame({
+        'rsi': ta.momentum.RSIIndicator(prices).rsi(),
+        'macd': macd.macd(),
+        'macd_signal': macd.macd_signal(),
+        'bb_high': bands.bollinger_hband(),
+        'bb_mid': bands.bollinger_mavg(),
+        'bb_low': bands.bollinger_lband(),
+    })
+
+
+def _streamed(prices: pd.Series) -> pd.DataFrame:
+    state = IndicatorState()
+    rows = [state.update(float(i), float(p)) for i, p in enumerate(prices)]
+    return pd.DataFrame(rows).drop(columns=['timestamp', 'price']).astype(float)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_streaming_matches_ta(seed):
+    prices = _prices(seed)
+    expected = _expected(prices)
+    actual = _streamed(prices)
+    for column in expected.columns:
+        exp, act = expected[column].to_numpy(), actual[column].to_numpy()
+        # همان نقاط گرم‌شدن (NaN) و همان مقادیر
+        assert np.array_equal(np.isnan(exp), np.isnan(act)), column
+        valid = ~np.isnan(exp)
+        assert np.allclose(act[valid], exp[valid], rtol=0, atol=TOLERANCE), column
+
+
+def test_engine_ingests_only_new_points():
+    prices = _prices(3, 120)
+    points = list(enumerate(prices))
+    engine = IndicatorEngine(history=200)
+    engine.ingest('bitcoin:1h', points[:80])
+    # دریافت بعدی با همپوشانی: نقاط قبلی دوباره اعمال نمی‌شوند
+    rows = engine.ingest('bitcoin:1h', points[40:])
+    expected = _streamed(prices)
+    assert [r['timestamp'] for r in rows] == list(range(120))
+    assert np.allclose([r['rsi'] for r in rows[20:]], expected['rsi'][20:], atol=TOLERANCE)
+    assert np.allclose([r['macd'] for r in rows[40:]], expected['macd'][40:], atol=TOLERANCE)
+
+
+def test_engine_does_not_commit_provisional_last_point():
+    prices = _prices(4, 60)
+    engine = IndicatorEngine(history=200)
+    first = engine.ingest('ethereum:1h', list(enumerate(prices[:50])) + [(50, 999.0)])
+    assert first[-1]['price'] == 999.0
+    assert engine.latest('ethereum:1h')['timestamp'] == 49
+    # قیمت نهایی نقطه 50 جایگزین قیمت موقت می‌شود
+    rows = engine.ingest('ethereum:1h', list(enumerate(prices)), provisional_last=False)
+    expected = _streamed(prices)
+    assert rows[50]['price'] == prices[50]
+    assert rows[-1]['rsi'] == pytest.approx(expected['rsi'].iloc[-1], abs=TOLERANCE)
+
+
+def test_engine_keeps_only_trailing_rows():
+    prices = _prices(5, 100)
+    engine = IndicatorEngine()
+    rows = engine.ingest('bitcoin:1d', list(enumerate(prices)))
+    expected = _streamed(prices)
+    # دو ردیف ثبت‌شده آخر (برای تقاطع MACD) به علاوه نقطه موقت
+    assert [r['timestamp'] for r in rows] == [97, 98, 99]
+    assert rows[-1]['macd'] == pytest.approx(expected['macd'].iloc[-1], abs=TOLERANCE)
+    assert rows[-2]['macd_signal'] == pytest.approx(expected['macd_signal'].iloc[-2], abs=TOLERANCE)
+
+
+def test_engine_keys_do_not_collide_and_are_evicted(clock, monkeypatch):
+    monkeypatch.setattr(ttl_cache, 'time', clock)
+    engine = IndicatorEngine(max_keys=2, ttl=100)
+    # دو ارز متفاوت با نماد مشترک، وضعیت جدا دارند
+    engine.ingest('uniswap:1d', [(0, 5.0), (1, 6.0)], provisional_last=False)
+    engine.ingest('unicorn-token:1d', [(0, 0.01), (1, 0.02)], provisional_last=False)
+    assert engine.latest('uniswap:1d')['price'] == 6.0
+    assert engine.latest('unicorn-token:1d')['price'] == 0.02
+    # سقف تعداد: کم‌استفاده‌ترین کلید حذف می‌شود
+    engine.ingest('bitcoin:1d', [(0, 100.0)], provisional_last=False)
+    assert engine.latest('uniswap:1d') is None
+    # کلیدی که تا ttl دریافت نشده منقضی می‌شود و از ابتدا ساخته می‌شود
+    clock.advance(101)
+    assert engine.latest('bitcoin:1d') is None
+    rows = engine.ingest('bitcoin:1d', [(0, 100.0), (1, 101.0)], provisional_last=False)
+    assert [r['timestamp'] for r in rows] == [0, 1]
@@ -0,0 +1,87 @@
+"""
+رفتار MarketSnapshot: ساخت از پاسخ کوین‌گکو با فیلدهای ناموجود/null، coerce، head، index_of و نمای سطری
+"""
+import numpy as np
+import pytest
+
+from scanner.market_snapshot import FIELD_ORDER, MarketSnapshot, SnapshotRow
+
+
+def _coin(coin_id, symbol, price=1.0, volume=1e6, market_cap=1e7, rank=1, **extra):
+    coin = {'id': coin_id, 'symbol': symbol, 'name': coin_id.title(), 'current_price': price,
+            'total_volume': volume, 'market_cap': market_cap, 'market_cap_rank': rank,
+            'price_change_percentage_24h': 2.5}
+    coin.update(extra)
+    return coin
+
+
+def test_from_coingecko_handles_missing_and_null_fields(capsys):
+    markets = [
+        _coin('bitcoin', 'btc', price=60000, volume=3e10, market_cap=1.2e12, rank=1,
+              price_change_percentage_1h=0.4, price_change_percentage_7d=None, ath=69000),
+        _coin('newcoin', 'new', market_cap=None, rank=None, price_change_percentage_24h=None),
+        _coin('zerocap', 'zero', market_cap=0),
+        {'id': 'broken', 'name': 'Broken'},                       # بدون symbol: رد می‌شود
+    ]
+    snapshot = MarketSnapshot.from_coingecko(markets)
+    assert len(snapshot) == 3
+    assert "'symbol'" in capsys.readouterr().out
+    assert list(snapshot.fields)[:len(FIELD_ORDER)] == list(FIELD_ORDER)
+
+    btc, new, zero = snapshot
+    assert btc['symbol'] == 'BTC' and btc['source'] == 'CoinGecko'
+    assert btc['rank'] == 1 and isinstance(btc['rank'], int)
+    assert btc['change_1h'] == 0.4 and btc['change_7d'] == 0.0     # null -> 0 برای درصدهای تغییر
+    assert btc['ath'] == 69000.0 and btc['ath_date'] is None
+    assert btc['volume_to_cap'] == pytest.approx(2.5)
+    assert new['market_cap'] is None and new['rank'] is None      # null -> NaN در ستون، None در ردیف
+    assert new['change_24h'] == 0.0
+    assert new['volume_to_cap'] == 0.0 and zero['volume_to_cap'] == 0.0
+    assert np.isnan(snapshot['market_cap'][1])
+    assert snapshot['id'].dtype == object and snapshot['price'].dtype == np.float64
+
+
+def test_coerce_accepts_snapshots_lists_and_none():
+    snapshot = MarketSnapshot.from_coingecko([_coin('bitcoin', 'btc')])
+    assert MarketSnapshot.coerce(snapshot) is snapshot
+    empty = MarketSnapshot.coerce(None)
+    assert len(empty) == 0 and set(FIELD_ORDER) <= set(empty.fields)
+    assert len(MarketSnapshot.coerce([])) == 0
+
+    records = [{'symbol': 'BTC', 'price': 1.5, 'rank': 3}, {'symbol': 'ETH', 'volume': None, 'extra': 'x'}]
+    coerced = MarketSnapshot.coerce(records)
+    assert coerced[0]['volume'] is None and coerced[1]['price'] is None
+    assert coerced[1]['extra'] == 'x' and coerced[0]['extra'] is None
+    assert coerced[0]['rank'] == 3
+    assert coerced.to_records()[0] == {'symbol': 'BTC', 'price': 1.5, 'rank': 3, 'volume': None, 'extra': None}
+
+
+def test_head_take_and_row_access():
+    snapshot = MarketSnapshot.from_coingecko([_coin(f'coin{i}', f'c{i}', rank=i) for i in range(5)])
+    head = snapshot.head(2)
+    assert len(head) == 2 and head['symbol'].tolist() == ['C0', 'C1']
+    assert len(snapshot.head(10)) == 5 and len(snapshot.head(0)) == 0
+    assert snapshot[-1]['symbol'] == 'C4'
+    with pytest.raises(IndexError):
+        snapshot[5]
+    assert snapshot[np.array([4, 0])]['symbol'].tolist() == ['C4', 'C0']
+    assert len(snapshot.mask(snapshot['rank'] >= 3)) == 2
+    row = snapshot[0]
+    assert isinstance(row, SnapshotRow) and row.get('missing') is None
+    assert dict(row)['id'] == 'coin0'
+
+
+def test_index_of_keeps_first_row_and_handles_missing_values():
+    snapshot = MarketSnapshot.coerce([
+        {'id': 'a', 'symbol': 'DUP'}, {'id': 'b', 'symbol': 'DUP'}, {'id': None, 'symbol': 'X'}])
+    assert snapshot.index_of('symbol') == {'DUP': 0, 'X': 2}
+    assert snapshot.index_of('id') == {'a': 0, 'b': 1, None: 2}
+    assert MarketSnapshot.empty().index_of() == {}
+    assert snapshot.unique('symbol', keep='last')['id'].tolist() == ['b', None]
+
+
+def test_sort_puts_missing_values_last():
+    snapshot = MarketSnapshot.coerce([{'symbol': 'A', 'volume': 5}, {'symbol': 'B', 'volume': None},
+                                      {'symbol': 'C', 'volume': 9}])
+    assert snapshot.sort('volume')['symbol'].tolist() == ['C', 'A', 'B']
+    assert snapshot.sort('volume', descending=False)['symbol'].tolist() == ['A', 'C', 'B']
@@ -0,0 +1,96 @@
+"""
+رفتار LiveMarketState: شنونده‌ها با رسیدن تغییر قیمت پنجره به آستانه صدا زده می‌شوند (با cooldown هر ارز)،
+پنجره‌های لغزان و تبدیل پیام‌های تیک
+"""
+import pytest
+
+from scanner.price_feed import LiveMarketState, PriceFeed, Tick, parse_tick
+
+T0 = 1_700_000_000.0
+
+
+def _state(threshold=2.0, window=60, cooldown=900):
+    state = LiveMarketState(windows=(60, 300), cooldown=cooldown)
+    alerts = []
+    state.add_listener(window, threshold, lambda symbol, change, coin: alerts.append((symbol, round(change, 6), coin)))
+    return state, alerts
+
+
+def test_listener_fires_at_window_threshold():
+    state, alerts = _state()
+    state.update(Tick('BTC', 100.0, T0))
+    state.update(Tick('BTC', 101.99, T0 + 10))
+    assert alerts == []                                   # 1.99% کمتر از آستانه
+    state.update(Tick('BTC', 102.0, T0 + 20))
+    assert [(s, c) for s, c, _ in alerts] == [('BTC', 2.0)]
+    coin = alerts[0][2]
+    assert coin['price'] == 102.0 and coin['ticks'] == 3 and coin['change_60s'] == pytest.approx(2.0)
+
+
+def test_drops_fire_too_and_other_symbols_are_independent():
+    state, alerts = _state()
+    state.update(Tick('ETH', 100.0, T0))
+    state.update(Tick('SOL', 50.0, T0))
+    state.update(Tick('ETH', 97.5, T0 + 5))
+    state.update(Tick('SOL', 50.5, T0 + 5))
+    assert [(s, c) for s, c, _ in alerts] == [('ETH', -2.5)]
+
+
+def test_change_is_measured_inside_the_window():
+    state, alerts = _state()
+    state.update(Tick('BTC', 100.0, T0))
+    state.update(Tick('BTC', 101.0, T0 + 50))
+    state.update(Tick('BTC', 102.5, T0 + 120))           # مبنا: آخرین نقطه پیش از شروع پنجره (101)
+    assert alerts == []
+    assert state.get('btc')['change_60s'] == pytest.approx(102.5 / 101 * 100 - 100)
+    assert state.get('btc')['change_300s'] == pytest.approx(2.5)
+    state.update(Tick('BTC', 103.1, T0 + 130))
+    assert [s for s, _, _ in alerts] == ['BTC']
+
+
+def test_cooldown_per_symbol_and_window():
+    state, alerts = _state(cooldown=300)
+    state.update(Tick('BTC', 100.0, T0))
+    state.update(Tick('BTC', 103.0, T0 + 1))
+    state.update(Tick('BTC', 106.0, T0 + 30))
+    assert len(alerts) == 1                               # هنوز در cooldown
+    state.update(Tick('BTC', 100.0, T0 + 301))
+    state.update(Tick('BTC', 104.0, T0 + 302))
+    assert len(alerts) == 2
+
+
+def test_out_of_order_ticks_and_failing_listeners_are_ignored(capsys):
+    state = LiveMarketState(windows=(60, 300))
+    alerts = []
+    state.add_listener(300, 1.0, lambda *args: 1 / 0)    # اول ثبت شده و خطا می‌دهد
+    state.add_listener(60, 2.0, lambda *args: alerts.append(args))
+    state.update(Tick('BTC', 100.0, T0 + 10))
+    state.update(Tick('BTC', 150.0, T0))                  # قدیمی‌تر از آخرین تیک
+    assert state.price('BTC') == 100.0 and state.ticks == 1
+    state.update(Tick('BTC', 103.0, T0 + 20))
+    assert len(alerts) == 1                               # خطای یک شنونده بقیه را متوقف نمی‌کند
+    assert 'BTC' in capsys.readouterr().out
+    with pytest.raises(ValueError):
+        state.add_listener(900, 1.0, print)
+
+
+def test_movers_sorted_by_absolute_change():
+    state = LiveMarketState(windows=(60, 300))
+    for symbol, end in (('A', 104.0), ('B', 95.0), ('C', 101.0)):
+        state.update(Tick(symbol, 100.0, T0))
+        state.update(Tick(symbol, end, T0 + 30))
+    assert [c['symbol'] for c in state.movers(window=60, threshold=3.0)] == ['B', 'A']
+
+
+def test_parse_tick_and_feed_symbol_filter():
+    assert parse_tick('{"s": "btc", "p": 65000.5, "t": 1700000000250, "v": 0.3}') == \
+        Tick('BTC', 65000.5, 1700000000.25, 0.3)
+    assert parse_tick({'symbol': 'eth', 'price': '3000', 'ts': T0}) == Tick('ETH', 3000.0, T0, 0.0)
+    assert parse_tick('{"s": "BTC"}') is None
+    assert parse_tick('not json') is None
+
+    state = LiveMarketState()
+    feed = PriceFeed(state, symbols=['btc'])
+    feed.handle('{"s": "BTC", "p": 1, "t": 1700000000}')
+    feed.handle('{"s": "ETH", "p": 1, "t": 1700000000}')
+    assert feed.received == 1 and state.symbols() == ['BTC']
@@ -0,0 +1,93 @@
+"""
+رفتار RateLimiter (token bucket مشترک روی SQLite) با ساعت دستی: انتظار پس از خالی شدن سطل،
+مسدود شدن با Retry-After و تبدیل هدر Retry-After
+"""
+from email.utils import formatdate
+
+import pytest
+
+from scanner import rate_limiter
+from scanner.rate_limiter import RateLimiter, parse_retry_after
+
+START = 1_700_000_000.0
+
+
+@pytest.fixture
+def limiter_clock(clock, monkeypatch):
+    monkeypatch.setattr(rate_limiter, 'time', clock)
+    clock.now = START
+    return clock
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'rate_limits.db')
+
+
+def test_acquire_blocks_once_bucket_is_empty(limiter_clock, db_path):
+    limiter = RateLimiter(db_path, limits={'api': (2.0, 3)})
+    for _ in range(3):
+        assert limiter.acquire('api')
+    assert limiter_clock.now == START            # ظرفیت سطل بدون انتظار
+    assert limiter.acquire('api')
+    assert limiter_clock.now == pytest.approx(START + 0.5)   # یک توکن با نرخ 2 در ثانیه
+    limiter_clock.advance(10)                    # پر شدن دوباره تا سقف ظرفیت، نه بیشتر
+    for _ in range(3):
+        limiter.acquire('api')
+    before = limiter_clock.now
+    limiter.acquire('api')
+    assert limiter_clock.now == pytest.approx(before + 0.5)
+
+
+def test_acquire_timeout_and_unknown_provider(limiter_clock, db_path):
+    limiter = RateLimiter(db_path, limits={'api': (0.1, 1)})
+    assert limiter.acquire('api')
+    assert limiter.acquire('api', timeout=2) is False
+    assert limiter_clock.now == pytest.approx(START + 2)
+    assert limiter.acquire('other')              # API بدون محدودیت
+
+
+def test_bucket_is_shared_between_instances(limiter_clock, db_path):
+    first = RateLimiter(db_path, limits={'api': (1.0, 2)})
+    second = RateLimiter(db_path, limits={'api': (1.0, 2)})
+    first.acquire('api')
+    second.acquire('api')
+    second.acquire('api')
+    assert limiter_clock.now == pytest.approx(START + 1)
+
+
+def test_penalize_honours_retry_after(limiter_clock, db_path):
+    limiter = RateLimiter(db_path, limits={'api': (10.0, 10)})
+    limiter.penalize('api', 12)
+    assert limiter.blocked_for('api') == pytest.approx(12)
+    assert limiter.acquire('api', timeout=5) is False
+    limiter.penalize('api', 1)                   # مسدودیت کوتاه‌تر، قبلی را کم نمی‌کند
+    assert limiter.blocked_for('api') == pytest.approx(7)
+    assert limiter.acquire('api')
+    assert limiter_clock.now == pytest.approx(START + 12)
+    assert limiter.blocked_for('api') == 0.0
+    limiter.acquire('api')                       # سطل پس از 429 خالی شده بود
+    assert limiter_clock.now == pytest.approx(START + 12.1)
+
+
+def test_penalize_without_header_uses_default(limiter_clock, db_path):
+    limiter = RateLimiter(db_path, limits={'api': (1.0, 1)})
+    limiter.penalize('api')
+    assert limiter.blocked_for('api') == pytest.approx(rate_limiter.DEFAULT_RETRY_AFTER)
+    limiter.penalize('other', 5)
+    assert limiter.blocked_for('other') == 0.0
+
+
+def test_parse_retry_after_seconds():
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after('1.5') == 1.5
+    assert parse_retry_after(3) == 3.0
+    assert parse_retry_after('-4') == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('') is None
+    assert parse_retry_after('soon') is None
+
+
+def test_parse_retry_after_http_date(limiter_clock):
+    assert parse_retry_after(formatdate(START + 90, usegmt=True)) == pytest.approx(90)
+    assert parse_retry_after(formatdate(START - 90, usegmt=True)) == 0.0
@@ -0,0 +1,82 @@
+"""
+رفتار ResponseCache: کلید نرمال‌شده بدون کلید API، TTL هر خانواده endpoint، فشرده‌سازی و شمارنده‌های hit/miss
+"""
+import json
+
+import pytest
+
+from scanner import response_cache
+from scanner.response_cache import ResponseCache, normalize_key
+
+CG = 'https://api.coingecko.com/api/v3'
+
+
+@pytest.fixture
+def cache_clock(clock, monkeypatch):
+    monkeypatch.setattr(response_cache, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, cache_clock):
+    return ResponseCache(str(tmp_path / 'http_cache.db'))
+
+
+def test_normalize_key_ignores_param_order_and_api_keys():
+    a = normalize_key(f'{CG}/coins/markets', {'vs_currency': 'usd', 'page': 1, 'x_cg_pro_api_key': 'secret'})
+    b = normalize_key('https://API.coingecko.com/api/v3/coins/markets/?page=1',
+                      {'x_cg_demo_api_key': 'other', 'vs_currency': 'usd', 'sparkline': None})
+    assert a == b == f'{CG}/coins/markets?page=1&vs_currency=usd'
+    assert 'secret' not in normalize_key('https://api.etherscan.io/api', {'module': 'account', 'apikey': 'secret'})
+    assert normalize_key(f'{CG}/coins/markets', {'sparkline': False}).endswith('sparkline=false')
+    assert normalize_key(f'{CG}/coins/markets', {'page': 1}) != normalize_key(f'{CG}/coins/markets', {'page': 2})
+
+
+def test_family_for_picks_first_matching_pattern(cache):
+    assert cache.family_for('coingecko', f'{CG}/coins/markets') == ('cg_markets', 60)
+    assert cache.family_for('coingecko', f'{CG}/coins/bitcoin/market_chart') == ('cg_market_chart', 600)
+    assert cache.family_for('coingecko', f'{CG}/coins/bitcoin') == ('cg_coin_detail', 6 * 3600)
+    assert cache.family_for('etherscan', 'https://api.etherscan.io/api') == ('etherscan', 60)
+    assert cache.family_for('telegram', 'https://api.telegram.org/botX/sendMessage') == (None, 0)
+
+
+def test_entries_expire_per_family_ttl(cache, cache_clock):
+    markets = normalize_key(f'{CG}/coins/markets', {'page': 1})
+    chart = normalize_key(f'{CG}/coins/bitcoin/market_chart', {'days': 90})
+    cache.set(markets, 'cg_markets', cache.family_for('coingecko', f'{CG}/coins/markets')[1], b'[]')
+    cache.set(chart, 'cg_market_chart', cache.family_for('coingecko', f'{CG}/coins/bitcoin/market_chart')[1], b'{}')
+    cache_clock.advance(59)
+    assert cache.get(markets, 'cg_markets') is not None
+    cache_clock.advance(1)
+    assert cache.get(markets, 'cg_markets') is None
+    assert cache.get(chart, 'cg_market_chart') is not None
+    cache_clock.advance(540)
+    assert cache.get(chart, 'cg_market_chart') is None
+    assert cache.purge_expired() == 2
+
+
+def test_compressed_body_reads_back_unchanged(cache):
+    body = json.dumps([{'id': f'coin-{i}', 'current_price': i * 1.5, 'name': 'بیت‌کوین'} for i in range(500)],
+                      ensure_ascii=False).encode()
+    cache.set('k', 'cg_markets', 60, body, 'application/json; charset=utf-8')
+    stored = cache._connect().execute('SELECT body FROM responses WHERE key = ?', ('k',)).fetchone()[0]
+    assert len(stored) < len(body)
+    assert cache.get('k', 'cg_markets') == (body, 'application/json; charset=utf-8')
+    cache.set('empty', 'cg_markets', 60, b'')
+    assert cache.get('empty', 'cg_markets') == (b'', None)
+
+
+def test_hit_miss_counters_and_persisted_stats(cache, tmp_path):
+    assert cache.get('k', 'cg_markets') is None
+    cache.set('k', 'cg_markets', 60, b'x')
+    cache.get('k', 'cg_markets')
+    cache.get('k', 'cg_markets')
+    cache.get('other', 'cmc_quotes')
+    assert cache.stats() == {'cg_markets': {'hits': 2, 'misses': 1, 'stores': 1},
+                             'cmc_quotes': {'hits': 0, 'misses': 1, 'stores': 0}}
+    # پروسه دیگر روی همان فایل: آمار تجمعی در جدول stats جمع می‌شود
+    other = ResponseCache(str(tmp_path / 'http_cache.db'))
+    assert other.get('k', 'cg_markets') == (b'x', None)
+    assert other.stats() == {'cg_markets': {'hits': 1, 'misses': 0, 'stores': 0}}
+    cache.flush_stats()
+    assert other.stats(persisted=True)['cg_markets'] == {'hits': 3, 'misses': 1, 'stores': 1}
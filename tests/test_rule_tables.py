@@ -0,0 +1,279 @@
+"""
+برابری جدول‌های scanner/rule_tables.py با نردبان‌های if/elif قبلی اسکنرها
+نردبان‌های زیر نسخه مرجع هستند؛ هر تغییر آستانه یا امتیاز در جدول‌ها باید این‌جا هم اعمال شود
+"""
+import numpy as np
+import pytest
+
+from scanner.rule_tables import COIN_SCORE_RULES, GROWTH_RULES, SIGNAL_RULES, advanced_score_rules
+from scanner.scoring_rules import columns_from_records
+
+ROWS = 5000
+
+# مقادیر مرزی هر ستون (آستانه‌ها دقیقاً، و کمی بالا و پایین آن‌ها) در کنار مقادیر تصادفی
+BOUNDARIES = {
+    'change_1h': [-1, 0, 1, 2, 3, 5],
+    'change_24h': [-20, -15, -5, -3, -2, 0, 1, 1.5, 2, 3, 5, 7, 10, 15, 20],
+    'change_7d': [0, 10, 15, 20, 30],
+    'volume': [0, 1e5, 2e6, 5e6, 1e7, 5e7, 1e8, 5e8, 1e9],
+    'market_cap': [0, 1e6, 1e8, 1e9],
+    'volume_to_cap': [5, 10, 15, 20, 30],
+    'rank': [10, 20, 30, 50, 100],
+    'rsi': [30, 70],
+    'macd': [0],
+}
+RANGES = {
+    'change_1h': (-10, 10),
+    'change_24h': (-30, 30),
+    'change_7d': (-50, 50),
+    'volume': (0, 2e9),
+    'market_cap': (0, 5e9),
+    'volume_to_cap': (0, 50),
+    'rank': (1, 200),
+    'rsi': (0, 100),
+    'macd': (-5, 5),
+}
+
+
+def _records(seed: int, nullable=()):
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, (low, high) in RANGES.items():
+        values = rng.uniform(low, high, ROWS)
+        if name == 'rank':
+            values = np.floor(values)
+        edges = np.array(BOUNDARIES[name], dtype=np.float64)
+        pick = rng.random(ROWS) < 0.5
+        jitter = rng.choice([-1e-9, 0.0, 1e-9], ROWS)
+        values = np.where(pick, rng.choice(edges, ROWS) + jitter, values)
+        columns[name] = np.maximum(values, 0) if low >= 0 else values   # حجم و ارزش بازار منفی نمی‌شوند
+    records = [{name: float(columns[name][i]) for name in columns} for i in range(ROWS)]
+    rng_null = np.random.default_rng(seed + 1)
+    for record in records:
+        for name in nullable:
+            if rng_null.random() < 0.2:
+                record[name] = None
+    return records
+
+
+# --- نردبان‌های مرجع (کد قبلی اسکنرها) ---
+
+def _old_final_score(t, max_drawdown=15, rsi_oversold=30, rsi_overbought=70):
+    score, factors, price = 0, [], 0
+    if t['change_1h'] > 5:
+        price += 12; factors.append("📈 رشد قوی 1 ساعته")
+    elif t['change_1h'] > 2:
+        price += 8; factors.append("📈 رشد متوسط 1 ساعته")
+    elif t['change_1h'] > 0:
+        price += 3
+    if t['change_24h'] > 15:
+        price += 12; factors.append("🚀 رشد انفجاری 24 ساعته")
+    elif t['change_24h'] > 7:
+        price += 8; factors.append("📈 رشد قوی 24 ساعته")
+    elif t['change_24h'] > 3:
+        price += 4; factors.append("📊 رشد متوسط 24 ساعته")
+    if t['change_7d'] > 30:
+        price += 6; factors.append("🌟 روند صعودی قوی هفتگی")
+    elif t['change_7d'] > 15:
+        price += 4; factors.append("📈 روند صعودی هفتگی")
+    elif t['change_7d'] > 0:
+        price += 2
+    score += min(price, 30)
+    liquidity = 0
+    ratio = (t['volume'] / t['market_cap']) if t['market_cap'] > 0 else 0
+    if ratio > 0.5:
+        liquidity += 15; factors.append("💎 نقدینگی فوق‌العاده")
+    elif ratio > 0.2:
+        liquidity += 10; factors.append("💧 نقدینگی بالا")
+    elif ratio > 0.1:
+        liquidity += 5; factors.append("💦 نقدینگی مناسب")
+    if t['volume'] > 1000000000:
+        liquidity += 10; factors.append("💰 حجم معاملات بسیار بالا")
+    elif t['volume'] > 100000000:
+        liquidity += 6; factors.append("💵 حجم معاملات بالا")
+    elif t['volume'] > 10000000:
+        liquidity += 3
+    score += min(liquidity, 25)
+    ta = 0
+    if t['rsi'] is not None:
+        if t['rsi'] < rsi_oversold:
+            ta += 8; factors.append("🟢 RSI در ناحیه اشباع فروش")
+        elif t['rsi'] > rsi_overbought:
+            ta -= 5; factors.append("🔴 RSI اشباع خرید")
+    if t['macd'] is not None:
+        if t['macd'] > 0:
+            ta += 5; factors.append("📊 MACD مثبت")
+        else:
+            ta -= 3
+    score += min(ta, 25)
+    risk = 0
+    if t['change_24h'] < -max_drawdown:
+        risk -= 10; factors.append("⚠️ افت شدید قیمت")
+    return max(0, min(score + risk, 100)), factors
+
+
+def _old_coin_score(t):
+    score, factors = 0, []
+    if t['change_1h'] > 3:
+        score += 15; factors.append("momentum قوی 1ساعت")
+    elif t['change_1h'] > 1:
+        score += 8; factors.append("momentum متوسط 1ساعت")
+    elif t['change_1h'] > 0:
+        score += 3
+    if t['change_24h'] > 10:
+        score += 15; factors.append("رشد فوق‌العاده 24ساعت")
+    elif t['change_24h'] > 5:
+        score += 10; factors.append("رشد قوی 24ساعت")
+    elif t['change_24h'] > 2:
+        score += 5; factors.append("رشد متوسط 24ساعت")
+    elif t['change_24h'] > 0:
+        score += 2
+    if t['change_7d'] > 20:
+        score += 5; factors.append("روند هفتگی عالی")
+    elif t['change_7d'] > 0:
+        score += 2
+    if t['volume_to_cap'] > 30:
+        score += 15; factors.append("نقدینگی فوق‌العاده")
+    elif t['volume_to_cap'] > 15:
+        score += 10; factors.append("نقدینگی عالی")
+    elif t['volume_to_cap'] > 5:
+        score += 5; factors.append("نقدینگی خوب")
+    if t['volume'] > 500000000:
+        score += 10; factors.append("حجم معاملات بالا")
+    elif t['volume'] > 100000000:
+        score += 5
+    if t['rank'] <= 10:
+        score += 20; factors.append("ارز برتر")
+    elif t['rank'] <= 30:
+        score += 15; factors.append("ارز معتبر")
+    elif t['rank'] <= 50:
+        score += 10; factors.append("ارز شناخته‌شده")
+    elif t['rank'] <= 100:
+        score += 5
+    if t['change_1h'] > t['change_24h'] / 24 * 3:
+        score += 10; factors.append("breakout جدید")
+    if t['volume'] > t['market_cap'] * 0.5:
+        score += 10; factors.append("فعالیت نهنگ‌ها")
+    elif t['volume'] > t['market_cap'] * 0.2:
+        score += 5
+    return min(score, 100), factors
+
+
+def _old_growth(t):
+    score, factors = 0, []
+    if t['change_1h'] > 2:
+        score += 15; factors.append("روند 1ساعت مثبت")
+    elif t['change_1h'] > 0:
+        score += 8
+    if t['change_24h'] > 5:
+        score += 15; factors.append("رشد 24ساعت قوی")
+    elif t['change_24h'] > 1:
+        score += 10; factors.append("رشد 24ساعت متوسط")
+    elif t['change_24h'] > 0:
+        score += 5
+    if t['change_7d'] > 10:
+        score += 10; factors.append("روند هفتگی مثبت")
+    elif t['change_7d'] > 0:
+        score += 5
+    if t['volume_to_cap'] > 20:
+        score += 15; factors.append("حجم معاملات بالا")
+    elif t['volume_to_cap'] > 10:
+        score += 10; factors.append("حجم معاملات خوب")
+    elif t['volume_to_cap'] > 5:
+        score += 5
+    if t['rank'] <= 20:
+        score += 15; factors.append("ارز برتر")
+    elif t['rank'] <= 50:
+        score += 10; factors.append("ارز معتبر")
+    elif t['rank'] <= 100:
+        score += 5
+    if t['change_1h'] > t['change_24h'] / 24 * 2:
+        score += 10; factors.append("momentum جدید")
+    if t['volume'] > 100000000:
+        score += 10; factors.append("فعالیت نهنگ‌ها")
+    elif t['volume'] > 50000000:
+        score += 5
+    return min(score, 100), factors
+
+
+def _old_signal(t):
+    change, volume, rank = t['change_24h'], t['volume'], t['rank']
+    if not volume or volume < 100000 or rank > 100:
+        return None
+    signal = None
+    if change > 5 and volume > 10000000:
+        signal = ("خرید قوی", 3, f"رشد {change:.1f}% با حجم بالا")
+    elif change > 3 and volume > 5000000:
+        signal = ("خرید متوسط", 2, f"رشد {change:.1f}% با حجم خوب")
+    elif change > 1.5 and volume > 2000000 and rank <= 50:
+        signal = ("خرید ضعیف", 1, f"رشد {change:.1f}% در ارز معتبر")
+    elif change < -5 and volume > 5000000:
+        signal = ("فروش قوی", 3, f"سقوط {abs(change):.1f}% با حجم بالا")
+    elif change < -3 and volume > 2000000:
+        signal = ("فروش متوسط", 2, f"کاهش {abs(change):.1f}%")
+    elif change < -2 and rank <= 20:
+        signal = ("هشدار نزولی", 1, f"کاهش {abs(change):.1f}% در ارز برتر")
+    if abs(change) > 15:
+        if change > 0:
+            signal = ("پامپ احتمالی", 3, f"رشد شدید {change:.1f}% - احتیاط!")
+        else:
+            signal = ("دامپ احتمالی", 3, f"سقوط شدید {abs(change):.1f}% - فرار!")
+    return signal
+
+
+# --- تست‌ها ---
+
+def _assert_scores(table, records, reference):
+    compiled = table.compile()
+    result = compiled.evaluate_records(records)
+    for i, record in enumerate(records):
+        expected_score, expected_factors = reference(record)
+        assert result.scores[i] == expected_score, (i, record)
+        assert result.labels(i) == expected_factors, (i, record)
+        # مسیر تکی (بدون ستون NumPy) باید با مسیر برداری یکی باشد
+        assert compiled.score_one(record) == (expected_score, expected_factors), (i, record)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_advanced_rules_match_old_ladder(seed):
+    records = _records(seed, nullable=('rsi', 'macd'))
+    _assert_scores(advanced_score_rules(), records, _old_final_score)
+
+
+def test_advanced_rules_follow_settings():
+    records = _records(2, nullable=('rsi', 'macd'))
+    table = advanced_score_rules(max_drawdown=8, rsi_oversold=25, rsi_overbought=80)
+    _assert_scores(table, records,
+                   lambda t: _old_final_score(t, max_drawdown=8, rsi_oversold=25, rsi_overbought=80))
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_coin_score_rules_match_old_ladder(seed):
+    _assert_scores(COIN_SCORE_RULES, _records(seed), _old_coin_score)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_growth_rules_match_old_ladder(seed):
+    _assert_scores(GROWTH_RULES, _records(seed), _old_growth)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_signal_rules_match_old_ladder(seed):
+    records = _records(seed)
+    compiled = SIGNAL_RULES.compile()
+    chosen, columns = compiled.evaluate(columns_from_records(records, SIGNAL_RULES.inputs()))
+    for i, record in enumerate(records):
+        expected = _old_signal(record)
+        if expected is None:
+            assert chosen[i] == -1, (i, record)
+            continue
+        signal = compiled.describe(chosen[i], columns, i)
+        assert (signal['type'], signal['strength'], signal['reason']) == expected, (i, record)
+
+
+def test_single_record_scoring_returns_int():
+    record = {'change_1h': 6, 'change_24h': 16, 'change_7d': 31, 'volume': 2e9, 'market_cap': 1e9,
+              'rsi': 25, 'macd': 1}
+    score, factors = advanced_score_rules().compile().score_one(record)
+    assert (score, factors) == _old_final_score(record)
+    assert isinstance(score, int)
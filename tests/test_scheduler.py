@@ -0,0 +1,140 @@
+"""
+رفتار Scheduler: زمان‌بندی بدون drift روی شبکه start + k*interval، رد کردن دورهای همپوشان
+و دریافت یک‌باره داده مشترک برای همه Jobهای یک تیک
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from scanner import scheduler as scheduler_module
+from scanner.scheduler import Scheduler
+
+START = 1_000_000.0
+
+
+@pytest.fixture
+def sched_clock(clock, monkeypatch):
+    monkeypatch.setattr(scheduler_module, 'time', clock)
+    clock.now = START
+    return clock
+
+
+def _job(interval=10.0, jitter=0.0, retry_interval=None):
+    s = Scheduler()
+    job = s.add_job('scan', lambda: None, interval, jitter=jitter, retry_interval=retry_interval)
+    job.slot = job.due = START
+    return s, job
+
+
+def test_next_run_stays_on_grid_after_slow_run(sched_clock):
+    s, job = _job()
+    sched_clock.advance(3)                     # اجرا ۳ ثانیه طول کشید
+    s._reschedule(job, ok=True)
+    assert job.due == START + 10               # نه 3 + 10
+    sched_clock.advance(9.5)
+    s._reschedule(job, ok=True)
+    assert job.due == START + 20
+
+
+def test_long_run_skips_missed_slots(sched_clock):
+    s, job = _job()
+    sched_clock.advance(25)
+    s._reschedule(job, ok=True)
+    assert job.slot == START + 30
+    assert job.skipped == 2
+
+
+def test_jitter_does_not_accumulate(sched_clock):
+    s, job = _job(jitter=2.0)
+    for k in range(1, 200):
+        sched_clock.now = job.due + 0.5        # هر اجرا نیم ثانیه پس از زمان jitter‌دار
+        s._reschedule(job, ok=True)
+        assert job.slot == START + 10 * k
+        assert job.slot <= job.due <= job.slot + 2.0
+
+
+def test_failure_retries_before_next_slot(sched_clock):
+    s, job = _job(retry_interval=2)
+    sched_clock.advance(1)
+    s._reschedule(job, ok=False)
+    assert job.due == START + 3
+    assert job.slot == START + 10              # شبکه اصلی دست نمی‌خورد
+
+
+def test_unknown_source_is_rejected():
+    with pytest.raises(ValueError):
+        Scheduler().add_job('scan', lambda data: None, 10, source='missing')
+
+
+def _run_until(s: Scheduler, done, timeout: float = 5.0):
+    async def main():
+        runner = asyncio.create_task(s._run())
+        deadline = time.monotonic() + timeout
+        while not done():
+            assert time.monotonic() < deadline, s.stats()
+            await asyncio.sleep(0.005)
+        s.stop()
+        await runner
+
+    try:
+        asyncio.run(main())
+    finally:
+        s._executor.shutdown(wait=True)
+
+
+def test_source_is_fetched_once_per_tick_for_all_jobs():
+    s = Scheduler()
+    loads = []
+
+    def load_snapshot():
+        loads.append(threading.get_ident())
+        time.sleep(0.05)                       # دریافت کند: Job دوم منتظر همان دریافت می‌ماند
+        return {'market': len(loads)}
+
+    seen = []
+    s.add_source('snapshot', load_snapshot, max_age=0)
+    for name in ('growth', 'signals', 'best'):
+        s.add_job(name, seen.append, interval=3600, source='snapshot', jitter=0)
+    _run_until(s, lambda: len(seen) == 3)
+
+    assert len(loads) == 1
+    assert seen == [{'market': 1}] * 3
+    assert s.stats()['sources']['snapshot'] == {'fetches': 1, 'shared': 2, 'errors': 0}
+
+
+def test_failed_source_is_not_cached_and_job_gets_none():
+    s = Scheduler()
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise RuntimeError('api down')
+
+    seen = []
+    s.add_source('snapshot', broken)
+    s.add_job('scan', seen.append, interval=0.02, source='snapshot', jitter=0)
+    _run_until(s, lambda: len(seen) >= 2)
+    assert seen[:2] == [None, None]
+    assert len(attempts) >= 2
+    assert s.stats()['sources']['snapshot']['errors'] >= 2
+
+
+def test_runs_of_one_job_never_overlap():
+    s = Scheduler()
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def slow_scan():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)                       # طولانی‌تر از بازه
+        with lock:
+            active[0] -= 1
+
+    job = s.add_job('scan', slow_scan, interval=0.01, jitter=0)
+    _run_until(s, lambda: job.runs >= 3)
+    assert peak[0] == 1
+    assert job.skipped > 0
@@ -0,0 +1,127 @@
+"""
+رفتار SignalLogWriter: نوشتن دسته‌ای پس از FLUSH_ROWS ردیف یا FLUSH_INTERVAL ثانیه (با ساعت دستی)،
+چرخش فایل با عوض شدن روز و رسیدن به سقف حجم، و خواندن کل تاریخچه با load_signals
+"""
+import csv
+import glob
+import os
+from datetime import datetime
+
+import pytest
+
+from scanner import signal_log
+from scanner.signal_log import SignalLogWriter, load_signals
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / 'signals_log.csv'), str(tmp_path / 'signal_archive')
+
+
+@pytest.fixture
+def make_writer(paths):
+    writers = []
+
+    def make(**kwargs):
+        writer = SignalLogWriter(*paths, **kwargs)
+        writers.append(writer)
+        return writer
+    yield make
+    for writer in writers:
+        writer.close()
+
+
+def _rows(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def _write(writer, symbol, when, score=50):
+    writer.write(symbol, symbol.title(), score, 'رشد قوی', '1h', 'CoinGecko', when)
+
+
+def test_flushes_after_flush_rows(paths, make_writer):
+    writer = make_writer()
+    for i in range(signal_log.FLUSH_ROWS - 1):
+        _write(writer, f'C{i}', '2026-10-18 10:00:00')
+    assert _rows(paths[0]) == []
+    assert writer.stats()['buffered'] == signal_log.FLUSH_ROWS - 1
+    _write(writer, 'LAST', '2026-10-18 10:00:01')
+    rows = _rows(paths[0])
+    assert len(rows) == signal_log.FLUSH_ROWS and rows[-1]['symbol'] == 'LAST'
+    assert writer.stats() == {'rows': 50, 'flushes': 1, 'rotations': 0, 'buffered': 0}
+
+
+def test_flushes_after_interval(paths, make_writer, clock, monkeypatch):
+    monkeypatch.setattr(signal_log, 'time', clock)
+    writer = make_writer()
+    _write(writer, 'BTC', '2026-10-18 10:00:00')
+    clock.advance(20)
+    _write(writer, 'ETH', '2026-10-18 10:00:20')
+    clock.advance(9.9)
+    assert writer.flush_if_due() is False                   # زمان از قدیمی‌ترین ردیف بافر شمرده می‌شود
+    assert _rows(paths[0]) == []
+    clock.advance(0.1)
+    assert writer.flush_if_due() is True
+    assert [r['symbol'] for r in _rows(paths[0])] == ['BTC', 'ETH']
+    # ردیف بعدی دوباره 30 ثانیه منتظر می‌ماند؛ write خودش بافر سررسیده را می‌نویسد
+    _write(writer, 'SOL', '2026-10-18 10:01:00')
+    clock.advance(signal_log.FLUSH_INTERVAL)
+    _write(writer, 'ADA', '2026-10-18 10:01:30')
+    assert [r['symbol'] for r in _rows(paths[0])] == ['BTC', 'ETH', 'SOL', 'ADA']
+    assert writer.flush_if_due() is False
+
+
+def test_rotates_on_day_change(paths, make_writer):
+    path, archive_dir = paths
+    writer = make_writer()
+    _write(writer, 'BTC', '2026-10-17 23:59:00')
+    _write(writer, 'ETH', '2026-10-18 00:01:00')              # یک flush با دو روز
+    writer.flush()
+    archives = glob.glob(os.path.join(archive_dir, 'signals_20261017_235900.*'))
+    assert len(archives) == 1
+    assert [r['symbol'] for r in _rows(path)] == ['ETH']
+    assert writer.stats()['rotations'] == 1
+
+    # پروسه بعدی روز فایل جاری را از خود فایل می‌خواند
+    reopened = make_writer()
+    _write(reopened, 'SOL', '2026-10-19 09:00:00')
+    reopened.flush()
+    assert [r['symbol'] for r in _rows(path)] == ['SOL']
+    assert len(glob.glob(os.path.join(archive_dir, 'signals_*'))) == 2
+
+
+def test_rotates_at_size_limit(paths, make_writer):
+    path, archive_dir = paths
+    assert signal_log.ROTATE_BYTES == 5 * 1024 * 1024
+    writer = make_writer(rotate_bytes=2048, flush_rows=10)
+    for i in range(40):
+        _write(writer, f'COIN{i}', f'2026-10-18 10:{i:02d}:00')
+    writer.flush()
+    assert writer.stats()['rotations'] >= 1
+    assert not os.path.exists(path) or os.path.getsize(path) < 2048
+    archived = sum(len(signal_log.read_archive(p)) for p in glob.glob(os.path.join(archive_dir, 'signals_*')))
+    assert archived + len(_rows(path)) == 40
+
+
+def test_load_signals_reads_across_rotations(paths, make_writer):
+    path, archive_dir = paths
+    writer = make_writer(flush_rows=3)
+    days = ['2026-10-16', '2026-10-17', '2026-10-18']
+    for day in days:
+        for hour in (9, 10, 11):
+            _write(writer, f'C{day[-2:]}{hour}', f'{day} {hour:02d}:00:00', score=hour)
+    writer.flush()
+    assert len(glob.glob(os.path.join(archive_dir, 'signals_*'))) == 2
+    assert len(_rows(path)) == 3
+
+    frame = load_signals(path, archive_dir)
+    assert len(frame) == 9
+    assert list(frame.columns) == signal_log.COLUMNS
+    assert frame['time'].is_monotonic_increasing
+    assert frame['symbol'].tolist()[0] == 'C169' and frame['symbol'].tolist()[-1] == 'C1811'
+    assert frame['score'].tolist() == [9.0, 10.0, 11.0] * 3
+    assert str(frame['timeframe'].dtype) == 'category'
+    assert len(load_signals(path, archive_dir, since=datetime(2026, 10, 17, 10))) == 5
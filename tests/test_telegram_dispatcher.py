@@ -0,0 +1,152 @@
+"""
+رفتار TelegramDispatcher با session ساختگی: ادغام پیام‌ها، محدودیت هر چت، 429 و تلاش مجدد
+"""
+import threading
+import time
+
+import pytest
+
+from scanner import http_client, telegram_dispatcher
+from scanner.telegram_dispatcher import TelegramDispatcher, _ChatState, message_length, split_message
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None, text='{"ok":true}'):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = text
+
+    def json(self):
+        return {}
+
+
+class FakeSession:
+    """پاسخ هر درخواست از لیست responses[chat_id] (پس از اتمام لیست: 200)"""
+
+    def __init__(self, responses=None):
+        self.responses = {chat: list(items) for chat, items in (responses or {}).items()}
+        self.posts = []
+        self._lock = threading.Lock()
+
+    def post(self, url, data=None, timeout=None):
+        with self._lock:
+            self.posts.append((time.monotonic(), dict(data)))
+            queue = self.responses.get(data['chat_id'])
+            return queue.pop(0) if queue else FakeResponse()
+
+    def texts(self, chat_id=None):
+        return [d['text'] for _, d in self.posts if chat_id is None or d['chat_id'] == chat_id]
+
+    def times(self, chat_id):
+        return [t for t, d in self.posts if d['chat_id'] == chat_id]
+
+
+class _NoLimiter:
+    def acquire(self, provider):
+        return 0.0
+
+
+@pytest.fixture
+def session(monkeypatch):
+    fake = FakeSession()
+    monkeypatch.setattr(http_client, 'get_session', lambda: fake)
+    monkeypatch.setattr(http_client, 'CIRCUIT_BREAKER_ENABLED', False)
+    monkeypatch.setattr(telegram_dispatcher.rate_limiter, 'get_limiter', lambda: _NoLimiter())
+    # زمان‌های کوتاه برای تست (منطق همان است)
+    monkeypatch.setattr(telegram_dispatcher, 'COALESCE_DELAY', 0.05)
+    monkeypatch.setattr(telegram_dispatcher, 'PER_CHAT_INTERVAL', 0.2)
+    monkeypatch.setattr(telegram_dispatcher, 'BACKOFF_BASE', 0.05)
+    return fake
+
+
+@pytest.fixture
+def dispatcher(session):
+    d = TelegramDispatcher('TOKEN')
+    yield d
+    d.close(timeout=5)
+
+
+def test_split_message_respects_utf16_limit():
+    line = '🚀 پامپ احتمالی BTC'
+    text = '\n'.join([line] * 400)
+    parts = split_message(text, limit=500)
+    assert all(message_length(p) <= 500 for p in parts)
+    assert '\n'.join(parts) == text
+    assert split_message('x' * 1200, limit=500) == ['x' * 500, 'x' * 500, 'x' * 200]
+
+
+def test_messages_of_one_scan_are_coalesced(session, dispatcher):
+    for symbol in ('BTC', 'ETH', 'SOL'):
+        dispatcher.submit('42', f'signal {symbol}')
+    dispatcher.submit('42', 'plain', parse_mode=None)    # parse_mode دیگر جدا ارسال می‌شود
+    assert dispatcher.flush(timeout=5)
+    assert sorted(session.texts('42')) == ['plain', 'signal BTC\n\nsignal ETH\n\nsignal SOL']
+    stats = dispatcher.stats()
+    assert stats['sent'] == 2 and stats['alerts_sent'] == 4 and stats['coalesced'] == 2
+    assert stats['pending'] == 0
+
+
+def test_coalescing_stops_at_message_limit(session, dispatcher):
+    big = 'x' * 3000
+    dispatcher.submit('42', big)
+    dispatcher.submit('42', big)
+    assert dispatcher.flush(timeout=5)
+    assert session.texts('42') == [big, big]
+
+
+def test_per_chat_interval_does_not_block_other_chats(session, dispatcher):
+    dispatcher.submit('1', 'a')
+    assert dispatcher.flush(timeout=5)
+    dispatcher.submit('1', 'b')
+    dispatcher.submit('2', 'c')
+    assert dispatcher.flush(timeout=5)
+    first, second = session.times('1')
+    assert second - first >= telegram_dispatcher.PER_CHAT_INTERVAL - 0.01
+    # چت 2 منتظر فاصله چت 1 نمی‌ماند
+    assert session.times('2')[0] < second
+
+
+def test_group_chat_per_minute_cap(monkeypatch):
+    monkeypatch.setattr(telegram_dispatcher, 'PER_CHAT_INTERVAL', 1.0)
+    group, private = _ChatState('-1001'), _ChatState('42')
+    for t in range(telegram_dispatcher.GROUP_PER_MINUTE):
+        group.mark_sent(100.0 + t)
+        private.mark_sent(100.0 + t)
+    now = 100.0 + telegram_dispatcher.GROUP_PER_MINUTE
+    assert group.ready_at(now) == 160.0          # اولین ارسال + 60 ثانیه
+    assert private.ready_at(now) == now          # چت خصوصی فقط فاصله ۱ ثانیه دارد
+    assert group.ready_at(161.0) <= 161.0        # ارسال‌های قدیمی‌تر از یک دقیقه شمرده نمی‌شوند
+
+
+def test_429_blocks_only_that_chat(session, dispatcher):
+    session.responses['1'] = [FakeResponse(429, headers={'Retry-After': '0.3'})]
+    dispatcher.submit('1', 'limited')
+    dispatcher.submit('2', 'free')
+    assert dispatcher.flush(timeout=5)
+    assert session.texts('1') == ['limited', 'limited']
+    first, second = session.times('1')
+    assert second - first >= 0.29
+    assert session.times('2')[0] < second
+    stats = dispatcher.stats()
+    assert stats['rate_limited'] == 1 and stats['sent'] == 2 and stats['failed'] == 0
+
+
+def test_server_errors_retry_then_give_up(session, dispatcher, monkeypatch):
+    monkeypatch.setattr(telegram_dispatcher, 'MAX_ATTEMPTS', 3)
+    session.responses['1'] = [FakeResponse(502), FakeResponse(503)]
+    session.responses['2'] = [FakeResponse(500)] * 3
+    dispatcher.submit('1', 'eventually')
+    dispatcher.submit('2', 'never')
+    assert dispatcher.flush(timeout=5)
+    assert session.texts('1') == ['eventually'] * 3
+    assert session.texts('2') == ['never'] * 3
+    stats = dispatcher.stats()
+    assert stats['retries'] == 4 and stats['failed'] == 1 and stats['sent'] == 1
+
+
+def test_close_flushes_and_rejects_new_messages(session):
+    d = TelegramDispatcher('TOKEN')
+    d.submit('1', 'last words')
+    assert d.close(timeout=5)
+    assert session.texts('1') == ['last words']
+    assert d.submit('1', 'too late') is False
@@ -0,0 +1,161 @@
+"""
+رفتار TransferIndex: جلو رفتن cursor، حذف تکراری‌ها روی بلوک مرزی، بازه نگهداری، پنجره‌های فعالیت
+و همگام‌سازی (bootstrap نزولی، افزایشی از آخرین بلوک، عبور از سقف MAX_RESULT_WINDOW، خطا) با explorer ساختگی
+"""
+import pytest
+import requests
+
+from scanner import transfer_index
+from scanner.transfer_index import RETENTION, TransferIndex
+
+NOW = 1_700_000_000.0
+HOUR = 3600
+CHAIN, CONTRACT = 'ethereum', '0xToken'
+
+
+def _tx(block, ts, i=0, sender='0xa', receiver='0xb', value='1000000', decimals='6'):
+    return {'blockNumber': str(block), 'timeStamp': str(int(ts)), 'hash': f'0x{block:x}-{i}',
+            'from': sender, 'to': receiver, 'value': value, 'tokenDecimal': decimals}
+
+
+class FakeExplorer:
+    """tokentx روی یک لیست در حافظه: startblock، page/offset، sort و سقف page × offset مثل Etherscan"""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.calls = []
+        self.fail = None
+
+    def __call__(self, provider, contract, api_key='', start_block=0, page=1, sort='asc'):
+        self.calls.append((start_block, page, sort))
+        if self.fail is not None:
+            if isinstance(self.fail, Exception):
+                raise self.fail
+            return None
+        if page * transfer_index.PAGE_SIZE > transfer_index.MAX_RESULT_WINDOW:
+            return None                        # Result window is too large
+        rows = sorted((r for r in self.rows if int(r['blockNumber']) >= start_block),
+                      key=lambda r: (int(r['blockNumber']), r['hash']), reverse=sort == 'desc')
+        return rows[(page - 1) * transfer_index.PAGE_SIZE:page * transfer_index.PAGE_SIZE]
+
+
+@pytest.fixture
+def index(tmp_path):
+    return TransferIndex(str(tmp_path / 'transfers.db'))
+
+
+@pytest.fixture
+def explorer(clock, monkeypatch):
+    clock.now = NOW
+    monkeypatch.setattr(transfer_index, 'time', clock)
+    monkeypatch.setattr(transfer_index, 'PAGE_SIZE', 10)
+    monkeypatch.setattr(transfer_index, 'MAX_RESULT_WINDOW', 30)
+    fake = FakeExplorer()
+    monkeypatch.setattr(transfer_index, 'fetch_transfers', fake)
+    return fake
+
+
+def test_ingest_advances_cursor_and_ignores_boundary_duplicates(index):
+    assert index.cursor(CHAIN, CONTRACT) is None
+    assert index.ingest(CHAIN, CONTRACT, [_tx(100, NOW), _tx(101, NOW), _tx(102, NOW)], now=NOW) == 3
+    assert index.cursor(CHAIN, CONTRACT)['last_block'] == 102
+    # صفحه بعد از همان بلوک مرزی شروع می‌شود
+    assert index.ingest(CHAIN, CONTRACT.upper(), [_tx(102, NOW), _tx(103, NOW)], now=NOW + 1) == 1
+    cursor = index.cursor(CHAIN, CONTRACT)
+    assert cursor['last_block'] == 103 and cursor['synced'] == NOW + 1
+    assert index.ingest(CHAIN, CONTRACT, [_tx(90, NOW, i=1)], now=NOW) == 1
+    assert index.cursor(CHAIN, CONTRACT)['last_block'] == 103     # cursor عقب نمی‌رود
+
+
+def test_ingest_skips_expired_and_malformed_rows(index):
+    rows = [_tx(10, NOW - RETENTION - 1), {'blockNumber': '11', 'hash': '0x'}, _tx(12, NOW - HOUR)]
+    assert index.ingest(CHAIN, CONTRACT, rows, now=NOW) == 1
+    assert index.cursor(CHAIN, CONTRACT)['last_block'] == 12
+
+
+def test_activity_windows(index):
+    rows = [
+        _tx(1, NOW - 10 * 60, 0, '0xa', '0xb', '2500000'),
+        _tx(2, NOW - 30 * 60, 0, '0xa', '0xc', '500000'),
+        _tx(3, NOW - 5 * HOUR, 0, '0xd', '0xb', '1000000'),
+        _tx(4, NOW - 3 * 24 * HOUR, 0, '0xe', '0xf', '4000000'),
+    ]
+    index.ingest(CHAIN, CONTRACT, rows, since=NOW - 2 * 24 * HOUR, now=NOW)
+    activity = index.activity(CHAIN, CONTRACT, now=NOW)
+    assert activity['1h'] == {'transfers': 2, 'senders': 1, 'receivers': 2, 'volume': 3.0, 'complete': True}
+    assert activity['24h'] == {'transfers': 3, 'senders': 2, 'receivers': 2, 'volume': 4.0, 'complete': True}
+    assert activity['7d']['transfers'] == 4 and activity['7d']['volume'] == 8.0
+    assert activity['7d']['complete'] is False                     # ایندکس فقط دو روز اخیر را پوشش می‌دهد
+    assert index.activity(CHAIN, '0xother', now=NOW)['1h'] == {
+        'transfers': 0, 'senders': 0, 'receivers': 0, 'volume': 0.0, 'complete': False}
+
+
+def _history(count=30, step=8 * HOUR, last_block=1000):
+    """یک انتقال در هر step ساعت به عقب از NOW، بلوک‌ها نزولی"""
+    return [_tx(last_block - k, NOW - k * step) for k in range(count)]
+
+
+def test_bootstrap_fetches_recent_transfers_newest_first(index, explorer):
+    explorer.rows = _history()
+    assert index.sync(CHAIN, CONTRACT) == 22                        # k * 8h <= 7d
+    assert explorer.calls == [(0, 1, 'desc'), (0, 2, 'desc'), (0, 3, 'desc')]
+    cursor = index.cursor(CHAIN, CONTRACT)
+    assert cursor['last_block'] == 1000 and cursor['since'] == NOW - RETENTION
+    assert all(window['complete'] for window in index.activity(CHAIN, CONTRACT).values())
+
+
+def test_bootstrap_page_cap_marks_older_windows_incomplete(index, explorer):
+    explorer.rows = _history(count=40, step=HOUR)
+    assert index.sync(CHAIN, CONTRACT, max_pages=2) == 20
+    assert index.cursor(CHAIN, CONTRACT)['since'] == NOW - 19 * HOUR
+    activity = index.activity(CHAIN, CONTRACT)
+    assert activity['1h']['complete'] and not activity['24h']['complete']
+
+
+def test_incremental_sync_resumes_from_last_block(index, explorer, clock):
+    explorer.rows = _history()
+    index.sync(CHAIN, CONTRACT)
+    explorer.calls.clear()
+    clock.advance(60)
+    explorer.rows += [_tx(1001, NOW + 30), _tx(1002, NOW + 60)]
+    assert index.sync(CHAIN, CONTRACT) == 2
+    assert explorer.calls == [(1000, 1, 'asc')]
+    cursor = index.cursor(CHAIN, CONTRACT)
+    assert cursor['last_block'] == 1002 and cursor['synced'] == NOW + 60
+    assert cursor['since'] == NOW - RETENTION                       # پوشش از bootstrap حفظ می‌شود
+    explorer.calls.clear()
+    assert index.sync(CHAIN, CONTRACT) == 0                         # فقط بلوک مرزی تکراری
+    assert explorer.calls == [(1002, 1, 'asc')]
+
+
+def test_incremental_sync_slides_past_result_window(index, explorer, clock):
+    explorer.rows = _history()
+    index.sync(CHAIN, CONTRACT)
+    explorer.calls.clear()
+    # سه انتقال در هر بلوک: صفحه‌ها وسط یک بلوک تمام می‌شوند
+    explorer.rows += [_tx(1000 + b, NOW + b, i) for b in range(1, 26) for i in range(3)]
+    clock.advance(30)
+    assert index.sync(CHAIN, CONTRACT) == 75
+    assert index.cursor(CHAIN, CONTRACT)['last_block'] == 1025
+    assert all(page * 10 <= 30 for _, page, _ in explorer.calls)
+    starts = [start for start, page, _ in explorer.calls if page == 1]
+    assert starts[0] == 1000 and starts == sorted(starts) and len(starts) > 1
+    assert index.activity(CHAIN, CONTRACT)['1h']['transfers'] == 76
+
+
+def test_fetch_errors_leave_cursor_unchanged(index, explorer, capsys):
+    explorer.fail = True
+    assert index.sync(CHAIN, CONTRACT) is None
+    assert index.cursor(CHAIN, CONTRACT) is None                    # bootstrap ناقص ثبت نمی‌شود
+    explorer.fail = None
+    explorer.rows = _history()
+    index.sync(CHAIN, CONTRACT)
+    before = index.cursor(CHAIN, CONTRACT)
+    explorer.rows.append(_tx(1001, NOW))
+    explorer.fail = True
+    assert index.sync(CHAIN, CONTRACT) is None
+    explorer.fail = requests.ConnectionError('down')
+    assert index.sync(CHAIN, CONTRACT) is None
+    assert index.cursor(CHAIN, CONTRACT) == before
+    explorer.fail = None
+    assert index.sync(CHAIN, CONTRACT) == 1
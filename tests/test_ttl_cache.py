@@ -0,0 +1,127 @@
+"""
+رفتار TTLCache: انقضا، حذف LRU با سقف تعداد/حجم و stale-while-revalidate
+"""
+import threading
+import time
+
+import pytest
+
+from scanner import ttl_cache
+from scanner.ttl_cache import TTLCache, candle_expiry
+
+
+@pytest.fixture
+def cache_clock(clock, monkeypatch):
+    monkeypatch.setattr(ttl_cache, 'time', clock)
+    return clock
+
+
+def _wait_for(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, 'background refresh did not finish'
+        time.sleep(0.005)
+
+
+def test_entries_expire_after_ttl(cache_clock):
+    cache = TTLCache(ttl=10)
+    cache['btc'] = 1
+    cache_clock.advance(9.9)
+    assert cache['btc'] == 1 and 'btc' in cache
+    cache_clock.advance(0.2)
+    assert 'btc' not in cache
+    assert cache.get('btc') is None
+    with pytest.raises(KeyError):
+        cache['btc']
+    assert cache.stats()['expirations'] == 1
+    assert len(cache) == 0
+
+
+def test_absolute_expiry_and_per_entry_ttl(cache_clock):
+    cache = TTLCache(ttl=300)
+    cache.set('candle', 'open', expires_at=candle_expiry(3600, cache_clock.time()))
+    cache.set('short', 'x', ttl=5)
+    cache_clock.advance(6)
+    assert cache.get('short') is None
+    cache_clock.now = candle_expiry(3600, cache_clock.time()) - 0.001
+    assert cache.get('candle') == 'open'
+    cache_clock.advance(0.002)
+    assert cache.get('candle') is None
+
+
+def test_lru_eviction_by_entry_count(cache_clock):
+    cache = TTLCache(max_entries=2)
+    cache['a'], cache['b'] = 1, 2
+    assert cache['a'] == 1                     # a تازه‌ترین استفاده است
+    cache['c'] = 3
+    assert 'b' not in cache
+    assert cache['a'] == 1 and cache['c'] == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_lru_eviction_by_bytes(cache_clock):
+    cache = TTLCache(max_entries=None, max_bytes=10, sizeof=len)
+    cache['a'] = 'xxxx'
+    cache['b'] = 'yyyy'
+    cache['a'] = 'xxxxx'                       # جایگزینی، حجم قبلی را آزاد می‌کند
+    assert cache.stats()['bytes'] == 9
+    cache['c'] = 'zz'
+    assert 'b' not in cache and 'a' in cache and 'c' in cache
+    assert cache.stats()['bytes'] == 7
+    cache['big'] = 'w' * 11                    # بزرگ‌تر از سقف: خودش هم نمی‌ماند
+    assert len(cache) == 0 and cache.stats()['bytes'] == 0
+
+
+def test_get_or_load_caches_and_skips_none(cache_clock):
+    cache = TTLCache(ttl=10)
+    calls = []
+    loader = lambda: calls.append(1) or 'v'
+    assert cache.get_or_load('k', loader) == 'v'
+    assert cache.get_or_load('k', loader) == 'v'
+    assert len(calls) == 1
+    assert cache.get_or_load('none', lambda: None) is None
+    assert 'none' not in cache
+
+
+def test_stale_value_is_served_while_refreshing(cache_clock):
+    cache = TTLCache(ttl=10, stale_ttl=30)
+    cache.get_or_load('k', lambda: 'old')
+    cache_clock.advance(15)
+    release = threading.Event()
+    calls = []
+
+    def slow_loader():
+        calls.append(1)
+        release.wait(5)
+        return 'new'
+
+    # در بازه stale مقدار قبلی بلافاصله برمی‌گردد و فقط یک به‌روزرسانی پس‌زمینه اجرا می‌شود
+    assert cache.get_or_load('k', slow_loader) == 'old'
+    assert cache.get_or_load('k', slow_loader) == 'old'
+    release.set()
+    _wait_for(lambda: cache.counters['refreshes'] == 1)
+    assert len(calls) == 1
+    assert cache.get_or_load('k', slow_loader) == 'new'
+    stats = cache.stats()
+    assert stats['stale_hits'] == 2 and stats['hits'] == 1
+
+
+def test_expired_past_stale_window_loads_synchronously(cache_clock):
+    cache = TTLCache(ttl=10, stale_ttl=30)
+    cache.get_or_load('k', lambda: 'old')
+    cache_clock.advance(41)
+    assert cache.get_or_load('k', lambda: 'new') == 'new'
+    assert cache.counters['stale_hits'] == 0
+
+
+def test_failed_refresh_keeps_stale_value(cache_clock, capsys):
+    cache = TTLCache(ttl=10, stale_ttl=30)
+    cache.get_or_load('k', lambda: 'old')
+    cache_clock.advance(15)
+
+    def broken():
+        raise RuntimeError('api down')
+
+    assert cache.get_or_load('k', broken) == 'old'
+    _wait_for(lambda: cache.counters['refresh_errors'] == 1)
+    assert cache.get_or_load('k', lambda: 'new') == 'old'     # هنوز در بازه stale
@@ -0,0 +1,106 @@
+"""
+رفتار UniverseScanner با بازار ساختگی: جلو رفتن cursor صفحه‌های عمیق، برگشت به ابتدا پس از صفحه آخر،
+ذخیره و ادامه cursor از universe_cursor.json و نگه داشتن نسخه قبلی صفحه‌ای که دریافتش خطا داشت
+"""
+import json
+
+import pytest
+
+from scanner import market_data, universe
+from scanner.market_snapshot import MarketSnapshot
+from scanner.universe import UniverseScanner
+
+PAGE_SIZE = 2
+
+
+class FakeMarket:
+    """coins/markets روی یک لیست در حافظه؛ صفحه‌های failing خطا (None) برمی‌گردانند"""
+
+    def __init__(self, count):
+        self.coins = [{'id': f'coin{i}', 'symbol': f'c{i}', 'name': f'Coin {i}', 'current_price': 1.0,
+                       'total_volume': 1e6, 'market_cap': 1e9 - i, 'market_cap_rank': i + 1} for i in range(count)]
+        self.requests = []
+        self.failing = set()
+
+    def __call__(self, pages, api_key=''):
+        pages = list(pages)
+        self.requests.append(pages)
+        return {p: None if p in self.failing else
+                MarketSnapshot.from_coingecko(self.coins[(p - 1) * PAGE_SIZE:p * PAGE_SIZE]) for p in pages}
+
+
+@pytest.fixture
+def market(clock, monkeypatch):
+    fake = FakeMarket(15)                      # صفحه‌های 1 تا 8؛ صفحه 8 ناقص
+    monkeypatch.setattr(market_data, 'MARKETS_PER_PAGE', PAGE_SIZE)
+    monkeypatch.setattr(universe, 'fetch_coingecko_pages', fake)
+    monkeypatch.setattr(universe, 'time', clock)
+    return fake
+
+
+@pytest.fixture
+def cursor_file(tmp_path):
+    return str(tmp_path / 'universe_cursor.json')
+
+
+def _saved(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_deep_cursor_advances_and_wraps(market, cursor_file):
+    scanner = UniverseScanner(head_pages=2, deep_pages=2, cursor_file=cursor_file)
+    scanner.scan()
+    assert market.requests[-1] == [1, 2, 3, 4]
+    assert _saved(cursor_file) == {'next_page': 5, 'last_page': None}
+    scanner.scan()
+    assert market.requests[-1] == [1, 2, 5, 6]
+    tokens = scanner.scan()
+    assert market.requests[-1] == [1, 2, 7, 8]
+    # صفحه 8 ناقص است: انتهای لیست پیدا شد و cursor به اولین صفحه عمیق برمی‌گردد
+    assert _saved(cursor_file) == {'next_page': 3, 'last_page': 8}
+    assert len(tokens) == 15
+    assert tokens['rank'].tolist() == list(range(1, 16))
+    scanner.scan()
+    assert market.requests[-1] == [1, 2, 3, 4]
+    assert scanner.stats() == {'pages': 8, 'coins': 15, 'next_page': 5, 'last_page': 8}
+
+
+def test_window_wraps_inside_one_scan(market, cursor_file):
+    with open(cursor_file, 'w', encoding='utf-8') as f:
+        json.dump({'next_page': 7, 'last_page': 8}, f)
+    scanner = UniverseScanner(head_pages=2, deep_pages=3, cursor_file=cursor_file)
+    scanner.scan()
+    assert market.requests[-1] == [1, 2, 7, 8, 3]
+    assert _saved(cursor_file)['next_page'] == 4
+
+
+def test_cursor_resumes_after_restart(market, cursor_file):
+    UniverseScanner(head_pages=2, deep_pages=2, cursor_file=cursor_file).scan()
+    restarted = UniverseScanner(head_pages=2, deep_pages=2, cursor_file=cursor_file)
+    restarted.scan()
+    assert market.requests[-1] == [1, 2, 5, 6]
+    # cursor داخل صفحه‌های ابتدایی (مثلاً پس از افزایش head_pages) به اولین صفحه عمیق منتقل می‌شود
+    assert UniverseScanner(head_pages=6, deep_pages=2, cursor_file=cursor_file).cursor['next_page'] == 7
+
+
+def test_list_growth_and_shrink_move_last_page(market, cursor_file):
+    scanner = UniverseScanner(head_pages=2, deep_pages=6, cursor_file=cursor_file)
+    scanner.scan()
+    assert scanner.cursor['last_page'] == 8
+    market.coins = market.coins[:9]            # لیست کوتاه‌تر شد: صفحه 5 ناقص و صفحه‌های بعدی حذف می‌شوند
+    tokens = scanner.scan()
+    assert scanner.cursor['last_page'] == 5
+    assert len(tokens) == 9 and scanner.stats()['pages'] == 5
+
+
+def test_failed_page_keeps_previous_copy_and_stale_deep_pages_expire(market, cursor_file, clock):
+    scanner = UniverseScanner(head_pages=2, deep_pages=6, cursor_file=cursor_file)
+    assert len(scanner.scan()) == 15
+    market.failing = {1, 5}
+    tokens = scanner.scan()
+    assert len(tokens) == 15 and 'coin8' in tokens['id'].tolist()
+    market.failing = set(range(3, 9))
+    clock.advance(universe.DEEP_PAGE_TTL + 1)
+    tokens = scanner.scan()
+    assert tokens['id'].tolist() == ['coin0', 'coin1', 'coin2', 'coin3']   # فقط صفحه‌های ابتدایی